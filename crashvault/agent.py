@@ -0,0 +1,230 @@
+"""Key agent: keeps an encrypted vault's derived key between CLI runs.
+
+Deriving the vault key from its password is deliberately slow (PBKDF2,
+see :mod:`crashvault.encrypter`).  ``crashvault agent start`` hands the
+derived key to a small background process listening on a unix socket;
+later commands against the same vault fetch the key from it instead of
+asking for the password and deriving the key again.
+
+The socket lives in a per-user directory only its owner can enter, and on
+Linux the agent also checks the uid of each peer.  The agent forgets the
+key and exits when its time-to-live runs out or ``agent stop`` is run.
+The password itself is never handed to the agent.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from . import core
+
+DEFAULT_TTL = 15 * 60
+CONNECT_TIMEOUT = 1.0
+_MAX_REQUEST = 4096
+
+
+class AgentError(RuntimeError):
+    """The key agent could not be started or reached."""
+
+
+def supported() -> bool:
+    return hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def socket_path(root: Optional[Path] = None) -> Path:
+    """The agent socket of a vault (one agent per vault and user)."""
+    root = Path(root or core.ROOT).resolve()
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / f"crashvault-{os.getuid()}" / f"{digest}.sock"
+
+
+def _request(op: str, path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Send one request to the agent; None if no agent is listening."""
+    if not supported():
+        return None
+    path = path or socket_path()
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(str(path))
+            sock.sendall(json.dumps({"op": op}).encode() + b"\n")
+            data = b""
+            while not data.endswith(b"\n"):
+                chunk = sock.recv(_MAX_REQUEST)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data)
+    except ConnectionRefusedError:
+        # Left behind by an agent that did not shut down cleanly
+        _unlink(path)
+        return None
+    except (OSError, ValueError):
+        return None
+
+
+def fetch_key() -> Optional[bytes]:
+    """The key held by this vault's agent, or None if there is no agent."""
+    reply = _request("get")
+    if not reply or not reply.get("key"):
+        return None
+    return reply["key"].encode("ascii")
+
+
+def status() -> Optional[Dict[str, Any]]:
+    """``{"pid": ..., "expires_in": seconds}`` of the running agent, or None."""
+    reply = _request("status")
+    return reply if reply and "pid" in reply else None
+
+
+def stop() -> bool:
+    """Stop this vault's agent; False if none was running."""
+    return _request("stop") is not None
+
+
+def start(key: bytes, ttl: int = DEFAULT_TTL) -> int:
+    """Start an agent holding ``key`` for ``ttl`` seconds, replacing any running one.
+
+    Returns the agent's pid.
+    """
+    if not supported():
+        raise AgentError("The key agent needs unix domain sockets, which this platform lacks")
+    path = socket_path()
+    stop()
+    _prepare_dir(path.parent)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "crashvault.agent", str(path), str(int(ttl))],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    proc.stdin.write(key + b"\n")
+    proc.stdin.close()
+    # The agent reports once it is listening (or exits, closing stdout)
+    line = proc.stdout.readline()
+    proc.stdout.close()
+    if line.strip() != b"ready":
+        proc.kill()
+        raise AgentError("The key agent failed to start")
+    return proc.pid
+
+
+def _prepare_dir(directory: Path):
+    directory.mkdir(mode=0o700, exist_ok=True)
+    st = directory.stat()
+    if st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise AgentError(f"Refusing to use {directory}: it must belong to you and be private (mode 700)")
+
+
+def _unlink(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _peer_uid(conn: socket.socket) -> Optional[int]:
+    option = getattr(socket, "SO_PEERCRED", None)
+    if option is None:
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, option, struct.calcsize("3i"))
+    return struct.unpack("3i", creds)[1]
+
+
+def serve(path: Path, key: bytes, ttl: int, ready=None):
+    """Answer requests on ``path`` until ``ttl`` seconds have passed or a stop request."""
+    deadline = time.monotonic() + ttl
+    _unlink(path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(str(path))
+    finally:
+        os.umask(old_umask)
+    inode = path.stat().st_ino
+
+    def remove_socket():
+        # A replacement agent may already be listening on the same path
+        try:
+            if path.stat().st_ino == inode:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+    server.listen(8)
+    if ready:
+        ready()
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            server.settimeout(remaining)
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                return
+            with conn:
+                if _handle(conn, key, deadline, remove_socket) == "stop":
+                    return
+    finally:
+        server.close()
+        remove_socket()
+
+
+def _handle(conn: socket.socket, key: bytes, deadline: float, on_stop) -> Optional[str]:
+    uid = _peer_uid(conn)
+    if uid is not None and uid != os.getuid():
+        return None
+    conn.settimeout(CONNECT_TIMEOUT)
+    try:
+        data = b""
+        while not data.endswith(b"\n") and len(data) < _MAX_REQUEST:
+            chunk = conn.recv(_MAX_REQUEST)
+            if not chunk:
+                break
+            data += chunk
+        op = json.loads(data).get("op")
+    except (OSError, ValueError, AttributeError):
+        return None
+    if op == "get":
+        reply = {"key": key.decode("ascii")}
+    elif op == "status":
+        reply = {"pid": os.getpid(), "expires_in": max(0, int(deadline - time.monotonic()))}
+    elif op == "stop":
+        # Gone before the reply, so nobody connects to a stopping agent
+        on_stop()
+        reply = {"stopped": True}
+    else:
+        reply = {"error": f"unknown request {op!r}"}
+    try:
+        conn.sendall(json.dumps(reply).encode() + b"\n")
+    except OSError:
+        pass
+    return op
+
+
+def main(argv=None):
+    path, ttl = (argv or sys.argv[1:])[:2]
+    key = sys.stdin.buffer.readline().strip()
+    sys.stdin.close()
+
+    def ready():
+        sys.stdout.buffer.write(b"ready\n")
+        sys.stdout.flush()
+        sys.stdout.close()
+
+    serve(Path(path), key, int(ttl), ready)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,135 +1,147 @@
+import importlib
+
 import click
 
 from .core import ensure_dirs, configure_logging
-from .commands.add_cmd import add
-from .commands.list_cmd import list_cmd as list
-from .commands.show_cmd import show
-from .commands.kill_cmd import kill
-from .commands.resolve_cmd import resolve
-from .commands.set_status_cmd import set_status
-from .commands.set_severity_cmd import set_severity
-from .commands.reopen_cmd import reopen
-from .commands.set_title_cmd import set_title
-from .commands.purge_cmd import purge
-from .commands.gc_cmd import gc
-from .commands.search_cmd import search
-from .commands.stats_cmd import stats
-from .commands.export_cmd import export
-from .commands.import_cmd import import_ as import_cmd
-from .commands.tail_cmd import tail
-from .commands.prune_cmd import prune
-from .commands.events_cmd import events_cmd
-from .commands.aliases import ls, rm, new, st, title_cmd, sh
-from .commands.config_cmd import config_group
-from .commands.misc_cmds import init, path
-from .commands.docs import docs
-from .commands.note_cmd import note
-from .commands.report_cmd import report
-from .commands.attach_cmd import attach
-from .commands.wrap_cmd import wrap
-from .commands.autolog_cmd import autolog
-from .commands.diagnose_cmd import diagnose
-from .commands.notify_cmd import notify
-from .commands.test_cmd import test_cmd
-from .commands.setup_cmd import setup_cmd
-from .commands.generate_report_cmd import generate_report
-from .commands.completion_cmd import completion
-from .commands.encrypt_cmd import encrypt_cmd
-from .commands.decrypt_cmd import decrypt_cmd
-from .commands.batch_cmd import batch_cmd
-from .commands.webhook_cmd import webhook
-# from .commands.server_cmd import server
 
 
-@click.group()
+# Subcommand -> "module:attribute" in crashvault.commands.  A command's
+# module (and whatever it imports) is only loaded when that command runs,
+# or when --help lists every command.
+COMMANDS = {
+    "config": "config_cmd:config_group",
+    "add": "add_cmd:add",
+    "list": "list_cmd:list_cmd",
+    "show": "show_cmd:show",
+    "kill": "kill_cmd:kill",
+    "resolve": "resolve_cmd:resolve",
+    "set-status": "set_status_cmd:set_status",
+    "set-severity": "set_severity_cmd:set_severity",
+    "reopen": "reopen_cmd:reopen",
+    "set-title": "set_title_cmd:set_title",
+    "purge": "purge_cmd:purge",
+    "gc": "gc_cmd:gc",
+    "search": "search_cmd:search",
+    "stats": "stats_cmd:stats",
+    "export": "export_cmd:export",
+    "import": "import_cmd:import_",
+    "tail": "tail_cmd:tail",
+    "prune": "prune_cmd:prune",
+    "events": "events_cmd:events_cmd",
+    "init": "misc_cmds:init",
+    "path": "misc_cmds:path",
+    "note": "note_cmd:note",
+    "report": "report_cmd:report",
+    "attach": "attach_cmd:attach",
+    "wrap": "wrap_cmd:wrap",
+    "autolog": "autolog_cmd:autolog",
+    "diagnose": "diagnose_cmd:diagnose",
+    "notify": "notify_cmd:notify",
+    "test": "test_cmd:test_cmd",
+    "setup": "setup_cmd:setup_cmd",
+    "generate-report": "generate_report_cmd:generate_report",
+    "completion": "completion_cmd:completion",
+    "encrypt": "encrypt_cmd:encrypt_cmd",
+    "decrypt": "decrypt_cmd:decrypt_cmd",
+    "agent": "agent_cmd:agent",
+    # webhook and server commands
+    "webhook": "webhook_cmd:webhook",
+    # "server": "server_cmd:server",
+    "storage": "storage_cmd:storage",
+    "index": "index_cmd:index",
+    "regroup": "regroup_cmd:regroup",
+    "cluster": "cluster_cmd:cluster",
+    "docs": "docs:docs",
+    "batch": "batch_cmd:batch_cmd",
+    # aliases
+    "ls": "aliases:ls",
+    "rm": "aliases:rm",
+    "new": "aliases:new",
+    "st": "aliases:st",
+    "title": "aliases:title_cmd",
+    "sh": "aliases:sh",
+}
+
+
+class LazyGroup(click.Group):
+    """A click group that imports each subcommand's module on first use."""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, name):
+        if name not in self.commands and name in self.lazy_commands:
+            module_name, attr = self.lazy_commands[name].split(":")
+            module = importlib.import_module(f".commands.{module_name}", __package__)
+            self.add_command(getattr(module, attr), name=name)
+        return super().get_command(ctx, name)
+
+    def parse_args(self, ctx, args):
+        ctx.meta["crashvault.help"] = _help_requested(ctx, self, args)
+        return super().parse_args(ctx, args)
+
+
+def _help_requested(ctx, command, args):
+    """Whether click will show help for ``command`` or a subcommand in ``args``.
+
+    Each level is parsed the way click parses it, so a ``--help`` that is an
+    argument of the command (``wrap -- pytest --help``) does not count.
+    """
+    try:
+        opts, rest, _ = command.make_parser(ctx).parse_args(args=list(args))
+    except click.UsageError:
+        return False
+    help_option = command.get_help_option(ctx)
+    if help_option is not None and opts.get(help_option.name):
+        return True
+    if not isinstance(command, click.Group) or not rest:
+        return False
+    sub = command.get_command(ctx, rest[0])
+    if sub is None:
+        return False
+    sub_ctx = click.Context(sub, info_name=rest[0], parent=ctx, resilient_parsing=True)
+    return _help_requested(sub_ctx, sub, rest[1:])
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
 @click.pass_context
 def cli(ctx):
+    # Help and shell completion only need the command definitions
+    if ctx.resilient_parsing or ctx.meta.get("crashvault.help"):
+        return
     ensure_dirs()
     configure_logging()
     
     # Check if vault is encrypted and prompt for password if needed
-    from .core import is_vault_encrypted, set_vault_password, get_vault_password
-    from cryptography.fernet import InvalidToken
+    from .core import (is_vault_encrypted, set_vault_password, set_vault_key, get_vault_key, verify_vault_key,
+                       derive_vault_key)
     import getpass
     
-    # Skip password prompt for setup, encrypt, decrypt commands
+    # Skip password prompt for setup, encrypt, decrypt and agent commands
     # These will be handled separately
-    if ctx.invoked_subcommand in ('setup', 'encrypt', 'decrypt', None):
+    if ctx.invoked_subcommand in ('setup', 'encrypt', 'decrypt', 'agent', None):
         return
     
-    if is_vault_encrypted() and not get_vault_password():
+    if is_vault_encrypted() and get_vault_key() is None:
+        # A running key agent saves the prompt and the key derivation
+        from . import agent
+        key = agent.fetch_key()
+        if key is not None and verify_vault_key(key):
+            set_vault_key(key)
+            return
         # Prompt for password
         password = getpass.getpass("Enter vault password: ")
         if password:
-            # Try to verify the password works by attempting to decrypt
-            try:
-                from . import encrypter
-                from .core import ISSUES_FILE
-                if ISSUES_FILE.exists():
-                    decrypted = encrypter.decrypt_file(ISSUES_FILE, password)
-                    # Verify it's valid JSON
-                    import json
-                    json.loads(decrypted)
-                set_vault_password(password)
-            except (InvalidToken, ValueError, Exception):
+            # Verify the password works by decrypting with the derived key
+            # (derivation is cached, so the store reuses it)
+            if not verify_vault_key(derive_vault_key(password)):
                 import sys
                 from .rich_utils import get_console
                 console = get_console()
                 console.print("[error]Invalid password![/error]")
                 sys.exit(1)
-
-
-# register config subgroup
-cli.add_command(config_group, name="config")
-
-# root commands
-cli.add_command(add)
-cli.add_command(list, name="list")
-cli.add_command(show)
-cli.add_command(kill)
-cli.add_command(resolve)
-cli.add_command(set_status, name="set-status")
-cli.add_command(set_severity, name="set-severity")
-cli.add_command(reopen)
-cli.add_command(set_title, name="set-title")
-cli.add_command(purge)
-cli.add_command(gc)
-cli.add_command(search)
-cli.add_command(stats)
-cli.add_command(export)
-cli.add_command(import_cmd, name="import")
-cli.add_command(tail)
-cli.add_command(prune)
-cli.add_command(events_cmd, name="events")
-cli.add_command(init)
-cli.add_command(path)
-cli.add_command(note)
-cli.add_command(report)
-cli.add_command(attach)
-cli.add_command(wrap)
-cli.add_command(autolog)
-cli.add_command(diagnose)
-cli.add_command(notify)
-cli.add_command(test_cmd, name="test")
-cli.add_command(setup_cmd)
-cli.add_command(generate_report)
-cli.add_command(completion)
-cli.add_command(encrypt_cmd, name="encrypt")
-cli.add_command(decrypt_cmd, name="decrypt")
-
-# webhook and server commands
-cli.add_command(webhook)
-# cli.add_command(server)
-
-cli.add_command(docs)
-cli.add_command(batch_cmd)
-
-# aliases
-cli.add_command(ls, name="ls")
-cli.add_command(rm, name="rm")
-cli.add_command(new, name="new")
-cli.add_command(st, name="st")
-cli.add_command(title_cmd, name="title")
-cli.add_command(sh, name="sh")
-
-
+            set_vault_password(password)
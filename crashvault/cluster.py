@@ -0,0 +1,356 @@
+"""Near-duplicate detection of issues - behind ``crashvault cluster``.
+
+Fingerprints only group events that hash the same.  Issues whose
+stacktraces are merely *similar* (one frame more, a renamed helper) are
+found here without comparing every pair of issues:
+
+1. Each issue is reduced to a set of shingles: the in-app frames of its
+   representative stacktrace (that of its earliest event that has one) and
+   pairs of neighbouring frames, or words and word pairs of the normalised
+   message when there is no stacktrace.
+2. A MinHash signature of ``NUM_PERM`` values estimates the Jaccard
+   similarity of two shingle sets as the fraction of equal values.
+3. Signatures are cut into bands; issues sharing any band are candidates
+   (LSH), and only candidates are compared.  The band size is the largest
+   that still finds pairs at the threshold with ``MIN_RECALL`` probability:
+   at 0.8, 16 bands of 8 rows, which rarely pair issues below 0.5.
+
+Signatures are cached in ``index/signatures.db`` with, per issue, the
+event count (from the rollups) they were computed at, the rank of the
+representative event and the ordering key of the issue's newest event.
+A re-run reads no events for issues whose count did not change.  For an
+issue that only gained events, just the events newer than its newest
+cached one are read (one time-bounded pass for all such issues).  Issues
+whose new events are not all newer (imports, merges) or that lost events
+are re-read in full.  MinHash is only recomputed when the representative's
+shingles changed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import core
+from .fingerprint import exception_type, is_in_app, normalize_message, parse_frames
+from .storage.base import event_sort_key
+from .timerange import event_time
+
+
+logger = logging.getLogger("crashvault")
+
+INDEX_DIR_NAME = "index"
+DB_NAME = "signatures.db"
+
+NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.8
+MIN_RECALL = 0.9
+SEED = 1
+_MAX_HASH = (1 << 64) - 1
+
+# One random 64-bit mask per "permutation": h_i(x) = hash(x) XOR mask_i
+_MASKS = [random.Random(SEED + i).getrandbits(64) for i in range(NUM_PERM)]
+_SIGNATURE_VERSION = f"{NUM_PERM}:{SEED}:1"
+
+_WORD_RE = re.compile(r"[\w<>]+")
+
+SCHEMA = """
+DROP TABLE IF EXISTS signatures;
+
+CREATE TABLE IF NOT EXISTS issue_signatures (
+    issue_id  INTEGER PRIMARY KEY,
+    digest    TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    events    INTEGER NOT NULL,
+    rank      TEXT,
+    latest    TEXT
+);
+"""
+
+
+@dataclass(frozen=True)
+class CachedSignature:
+    """A cached signature and what is needed to tell whether it is still current."""
+    digest: str
+    signature: Tuple[int, ...]
+    events: int  # event count of the issue when computed
+    rank: Optional[Tuple[Any, ...]]  # rank of the representative event (None: the title)
+    latest: Optional[Tuple[str, str]]  # event_sort_key of the newest event seen
+
+
+def shingles(message: str, stacktrace: str = "") -> Set[str]:
+    """The shingle set of an event: frames and frame pairs, else words and word pairs."""
+    frames = parse_frames(stacktrace)
+    if frames:
+        in_app = [f for f in frames if is_in_app(f)] or frames
+        tokens = [f"{os.path.basename(path.replace(os.sep, '/'))}:{func}" for path, func in in_app]
+        kind = exception_type(message)
+        if kind:
+            tokens.insert(0, kind)
+    else:
+        tokens = _WORD_RE.findall(normalize_message(f"{message}\n{stacktrace}"))
+    result = set(tokens)
+    result.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return result
+
+
+def _hash64(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash(items: Iterable[str]) -> Tuple[int, ...]:
+    """MinHash signature of a shingle set (``NUM_PERM`` values)."""
+    hashes = [_hash64(s) for s in items]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _MASKS)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the sets behind two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def shingle_digest(items: Set[str]) -> str:
+    data = "\n".join(sorted(items))
+    return hashlib.sha1(f"{_SIGNATURE_VERSION}\n{data}".encode("utf-8")).hexdigest()
+
+
+def band_rows(threshold: float) -> int:
+    """Rows per LSH band: the most that still pair ``threshold``-similar issues with ``MIN_RECALL``."""
+    rows = NUM_PERM
+    while rows > 1:
+        if 1 - (1 - threshold ** rows) ** (NUM_PERM // rows) >= MIN_RECALL:
+            break
+        rows //= 2
+    return rows
+
+
+def candidate_pairs(signatures: Dict[int, Tuple[int, ...]], rows: int) -> Set[Tuple[int, int]]:
+    """Pairs of issue ids that share at least one LSH band of ``rows`` values."""
+    pairs: Set[Tuple[int, int]] = set()
+    for lo in range(0, NUM_PERM, rows):
+        buckets: Dict[Tuple[int, ...], List[int]] = {}
+        for issue_id, sig in signatures.items():
+            buckets.setdefault(sig[lo:lo + rows], []).append(issue_id)
+        for members in buckets.values():
+            if len(members) > 1:
+                members.sort()
+                pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+    return pairs
+
+
+def find_clusters(signatures: Dict[int, Tuple[int, ...]],
+                  threshold: float = DEFAULT_THRESHOLD) -> List[List[int]]:
+    """Groups of issue ids linked by candidate pairs at least ``threshold`` similar.
+
+    Each group is sorted; groups come ordered by their smallest id.
+    """
+    parent = {issue_id: issue_id for issue_id in signatures}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in candidate_pairs(signatures, band_rows(threshold)):
+        if similarity(signatures[a], signatures[b]) >= threshold:
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+    groups: Dict[int, List[int]] = {}
+    for issue_id in sorted(signatures):
+        groups.setdefault(find(issue_id), []).append(issue_id)
+    return sorted((g for g in groups.values() if len(g) > 1), key=lambda g: g[0])
+
+
+def _rank(ev: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Events with a stacktrace come first, then the earliest."""
+    return (not ev.get("stacktrace"),) + event_sort_key(ev)
+
+
+def _title_rep(issue: Dict[str, Any]) -> Dict[str, str]:
+    """Issues without events are represented by their title."""
+    return {"message": issue.get("title", ""), "stacktrace": ""}
+
+
+class SignatureCache:
+    """The ``index/signatures.db`` sidecar of one vault."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def load(self) -> Dict[int, CachedSignature]:
+        rows = self._conn().execute("SELECT issue_id, digest, signature, events, rank, latest FROM issue_signatures")
+        return {
+            issue_id: CachedSignature(digest, tuple(array("Q", blob)), events,
+                                      tuple(json.loads(rank)) if rank else None,
+                                      tuple(json.loads(latest)) if latest else None)
+            for issue_id, digest, blob, events, rank, latest in rows
+        }
+
+    def store(self, entries: Dict[int, CachedSignature]):
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO issue_signatures (issue_id, digest, signature, events, rank, latest) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (i, e.digest, array("Q", e.signature).tobytes(), e.events,
+                     json.dumps(e.rank) if e.rank else None, json.dumps(e.latest) if e.latest else None)
+                    for i, e in entries.items()
+                ],
+            )
+
+    def prune(self, keep: Iterable[int]) -> int:
+        """Drop the signatures of issues not in ``keep`` (deleted or merged away)."""
+        conn = self._conn()
+        keep = set(keep)
+        with conn:
+            stale = [(i,) for (i,) in conn.execute("SELECT issue_id FROM issue_signatures").fetchall()
+                     if i not in keep]
+            conn.executemany("DELETE FROM issue_signatures WHERE issue_id = ?", stale)
+        return len(stale)
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM issue_signatures")
+
+
+_instances: Dict[str, SignatureCache] = {}
+_instances_lock = threading.Lock()
+
+
+def open_signature_cache() -> SignatureCache:
+    """The (cached) signature cache of the current vault."""
+    path = core.ROOT / INDEX_DIR_NAME / DB_NAME
+    with _instances_lock:
+        cache = _instances.get(str(path))
+        if cache is None:
+            cache = _instances[str(path)] = SignatureCache(path)
+    return cache
+
+
+def issue_signatures(issues: List[Dict[str, Any]],
+                     cache: Optional[SignatureCache] = None) -> Tuple[Dict[int, Tuple[int, ...]], int]:
+    """MinHash signatures of ``issues``, reading events only for issues that changed.
+
+    Returns ``(signatures, computed)``, ``computed`` being the number of
+    signatures hashed this time; issues with nothing to shingle are left out.
+    """
+    cached: Dict[int, CachedSignature] = {}
+    if cache is not None:
+        try:
+            cached = cache.load()
+        except sqlite3.Error as e:
+            logger.warning(f"signature cache unreadable, recomputing: {e}")
+            cache = None
+    counts = core.count_events_by_issue()
+
+    signatures: Dict[int, Tuple[int, ...]] = {}
+    # issue id -> [rank, representative (None: the cached one), newest key]
+    best: Dict[int, List[Any]] = {}
+    grown: Dict[int, CachedSignature] = {}
+    full: Set[int] = set()
+    for issue in issues:
+        issue_id, hit = issue["id"], cached.get(issue["id"])
+        events = counts.get(issue_id, 0)
+        if events and hit is not None and hit.events == events:
+            signatures[issue_id] = hit.signature
+            continue
+        if not events:
+            best[issue_id] = [None, _title_rep(issue), None]
+        elif hit is not None and hit.rank is not None and hit.latest is not None and hit.events < events:
+            grown[issue_id] = hit
+            best[issue_id] = [hit.rank, None, hit.latest]
+        else:
+            full.add(issue_id)
+
+    def offer(ev, issue_id):
+        rank, key = _rank(ev), event_sort_key(ev)
+        current = best.get(issue_id)
+        if current is None:
+            best[issue_id] = current = [None, None, None]
+        if current[0] is None or rank < current[0]:
+            current[0], current[1] = rank, {"message": ev.get("message", ""), "stacktrace": ev.get("stacktrace", "")}
+        if current[2] is None or key > current[2]:
+            current[2] = key
+
+    if grown:
+        # Only events newer than the newest one each issue had last time
+        since = event_time(min(hit.latest[0] for hit in grown.values()))
+        new = Counter()
+        for ev in core.iter_events(since=since):
+            issue_id = ev.get("issue_id")
+            hit = grown.get(issue_id)
+            if hit is not None and event_sort_key(ev) > hit.latest:
+                new[issue_id] += 1
+                offer(ev, issue_id)
+        for issue_id, hit in grown.items():
+            if new[issue_id] != counts[issue_id] - hit.events:
+                # Some arrived with older timestamps (an import, a merge): read it all
+                full.add(issue_id)
+                del best[issue_id]
+    if full:
+        for ev in core.iter_events():
+            if ev.get("issue_id") in full:
+                offer(ev, ev["issue_id"])
+        for issue in issues:
+            if issue["id"] in full and issue["id"] not in best:
+                best[issue["id"]] = [None, _title_rep(issue), None]  # its events are gone
+
+    fresh: Dict[int, CachedSignature] = {}
+    computed = 0
+    for issue_id, (rank, rep, latest) in best.items():
+        hit = cached.get(issue_id)
+        if rep is None:
+            # The cached representative still ranks first
+            digest, signature = hit.digest, hit.signature
+        else:
+            items = shingles(rep["message"], rep["stacktrace"])
+            if not items:
+                continue
+            digest = shingle_digest(items)
+            if hit is not None and hit.digest == digest:
+                signature = hit.signature
+            else:
+                signature = minhash(items)
+                computed += 1
+        signatures[issue_id] = signature
+        fresh[issue_id] = CachedSignature(digest, signature, counts.get(issue_id, 0) if rank else 0, rank, latest)
+    if cache is not None:
+        try:
+            cache.store(fresh)
+        except sqlite3.Error as e:
+            logger.warning(f"signature cache update failed: {e}")
+    return signatures, computed
@@ -1,7 +1,9 @@
-import click, hashlib, logging
+import click, logging
 from datetime import datetime, timezone
 
-from ..core import load_issues, save_issues, event_path_for
+from ..core import next_issue_id, save_issue, save_event, issue_store_lock, load_config
+from ..fingerprint import find_issue, get_strategy
+from ..storage import get_storage
 import json, os, uuid, platform
 
 
@@ -13,31 +15,31 @@ import json, os, uuid, platform
 @click.option("--context", "contexts", multiple=True, help="Context key=value; can repeat")
 def add(message, stack, level, tags, contexts):
     logger = logging.getLogger("crashvault")
-    issues = load_issues()
-    fp = hashlib.sha1(message.encode("utf-8")).hexdigest()[:8]
-    issue = next((i for i in issues if i["fingerprint"] == fp), None)
-    if not issue:
-        issue = {
-            "id": len(issues)+1,
-            "fingerprint": fp,
-            "title": message[:80],
-            "status": "open",
-            "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
-        }
-        # Set severity based on level if not already set
-        level_to_severity = {
-            "debug": "low",
-            "info": "low", 
-            "warning": "medium",
-            "error": "high",
-            "critical": "critical"
-        }
-        issue["severity"] = level_to_severity.get(level.lower(), "medium")
-        issues.append(issue)
-        save_issues(issues)
-        from ..rich_utils import get_console
-        console = get_console()
-        console.print(f"[success]Created new issue[/success] [highlight]#{issue['id']}[/highlight]")
+    grouping = get_strategy()
+    fp = grouping.fingerprint(message, stack)
+    with issue_store_lock():
+        issue = find_issue(get_storage(), fp, message, grouping)
+        if not issue:
+            issue = {
+                "id": next_issue_id(),
+                "fingerprint": fp,
+                "title": message[:80],
+                "status": "open",
+                "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+            }
+            # Set severity based on level if not already set
+            level_to_severity = {
+                "debug": "low",
+                "info": "low", 
+                "warning": "medium",
+                "error": "high",
+                "critical": "critical"
+            }
+            issue["severity"] = level_to_severity.get(level.lower(), "medium")
+            save_issue(issue)
+            from ..rich_utils import get_console
+            console = get_console()
+            console.print(f"[success]Created new issue[/success] [highlight]#{issue['id']}[/highlight]")
     context_dict = {}
     for kv in contexts:
         if "=" in kv:
@@ -57,17 +59,16 @@ def add(message, stack, level, tags, contexts):
         "host": platform.node(),
         "pid": os.getpid(),
     }
-    path = event_path_for(event_id, ts)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with open(tmp, "w") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp, path)
+    save_event(data)
     logger.info(f"event recorded | issue_id={issue['id']} | event_id={event_id} | level={level}")
     from ..rich_utils import get_console
     console = get_console()
     console.print(f"[success]Event {event_id} logged to issue[/success] [highlight]#{issue['id']}[/highlight]")
 
-    # Dispatch webhooks
+    # Dispatch webhooks (the webhook package pulls in the http stack, so
+    # skip importing it when none are configured)
+    if not load_config().get("webhooks"):
+        return
     try:
         from ..webhooks.dispatcher import dispatch_webhooks
         dispatch_webhooks(data)
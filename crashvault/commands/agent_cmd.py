@@ -0,0 +1,70 @@
+"""Key agent commands for encrypted vaults."""
+
+import getpass
+import sys
+
+import click
+
+from .. import agent as key_agent
+from ..core import derive_vault_key, get_vault_key, is_vault_encrypted, set_vault_password, verify_vault_key
+from ..rich_utils import get_console
+
+console = get_console()
+
+
+@click.group(name="agent")
+def agent():
+    """Keep an encrypted vault unlocked across commands.
+
+    The agent holds the vault's derived key (never the password) in a
+    background process reachable only by you, so later commands neither
+    prompt for the password nor repeat the key derivation.
+    """
+    pass
+
+
+@agent.command(name="start")
+@click.option("--ttl", type=click.IntRange(min=1), default=key_agent.DEFAULT_TTL, show_default=True,
+              help="Seconds until the agent forgets the key")
+def start(ttl):
+    """Unlock the vault and start (or restart) its key agent."""
+    if not is_vault_encrypted():
+        console.print("[error]Vault is not encrypted![/error]")
+        return
+    if not key_agent.supported():
+        console.print("[error]The key agent is not supported on this platform.[/error]")
+        sys.exit(1)
+    key = get_vault_key() or key_agent.fetch_key()
+    if key is None:
+        password = getpass.getpass("Enter vault password: ")
+        key = derive_vault_key(password)
+        if not password or not verify_vault_key(key):
+            console.print("[error]Invalid password![/error]")
+            sys.exit(1)
+        set_vault_password(password)
+    try:
+        pid = key_agent.start(key, ttl)
+    except key_agent.AgentError as e:
+        console.print(f"[error]{e}[/error]")
+        sys.exit(1)
+    console.print(f"[success]Key agent started[/success] [muted](pid {pid}, expires in {ttl}s)[/muted]")
+
+
+@agent.command(name="stop")
+def stop():
+    """Stop the vault's key agent, forgetting the key."""
+    if key_agent.stop():
+        console.print("[success]Key agent stopped[/success]")
+    else:
+        console.print("[muted]No key agent is running for this vault.[/muted]")
+
+
+@agent.command(name="status")
+def status():
+    """Show whether a key agent is running for the vault."""
+    info = key_agent.status()
+    if info is None:
+        console.print("[muted]No key agent is running for this vault.[/muted]")
+        return
+    console.print(f"[highlight]pid:[/highlight] {info['pid']}")
+    console.print(f"[highlight]expires in:[/highlight] {info['expires_in']}s")
@@ -1,6 +1,6 @@
 import click, json, os, sys, uuid, platform, atexit, traceback
 from datetime import datetime, timezone
-from ..core import event_path_for
+from ..core import save_event
 from ..rich_utils import get_console
 
 console = get_console()
@@ -31,11 +31,7 @@ def autolog(enable):
             "host": platform.node(),
             "pid": os.getpid(),
         }
-        path = event_path_for(event_id, ts)
-        tmp = path.with_suffix(path.suffix + ".tmp")
-        with open(tmp, "w") as f:
-            json.dump(data, f, indent=2)
-        os.replace(tmp, path)
+        save_event(data)
 
     sys.excepthook = excepthook
     # Best effort: write a tiny marker so users know it's active in this process
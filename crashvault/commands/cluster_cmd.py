@@ -0,0 +1,62 @@
+import click
+
+from ..cluster import DEFAULT_THRESHOLD, find_clusters, issue_signatures, open_signature_cache, similarity
+from ..core import count_events_by_issue, load_issues, merge_issues
+from ..rich_utils import get_console
+
+console = get_console()
+
+
+@click.command()
+@click.option("--threshold", type=click.FloatRange(0.0, 1.0), default=DEFAULT_THRESHOLD, show_default=True,
+              help="Minimum estimated stacktrace similarity to cluster two issues")
+@click.option("--status", type=click.Choice(["open", "resolved", "ignored"], case_sensitive=False),
+              help="Only consider issues with this status")
+@click.option("--apply", "apply_", is_flag=True, help="Merge each cluster into its largest issue")
+@click.option("--yes", is_flag=True, help="Do not ask before merging (with --apply)")
+@click.option("--rebuild", is_flag=True, help="Recompute all signatures instead of using the cache")
+def cluster(threshold, status, apply_, yes, rebuild):
+    """Find issues with near-duplicate stacktraces and propose merges.
+
+    Issues are compared by MinHash signatures of their stacktrace frames,
+    and only pairs that collide in an LSH band are looked at, so large
+    vaults do not need a comparison of every pair.  Signatures are cached
+    with each issue's event count, so re-runs read no events for issues
+    that did not change, only the newer events of issues that grew, and
+    only hash issues whose representative stacktrace changed.
+    """
+    issues = load_issues()
+    cache = open_signature_cache()
+    if rebuild:
+        cache.clear()
+    else:
+        cache.prune(i["id"] for i in issues)
+    if status:
+        issues = [i for i in issues if i.get("status") == status]
+    signatures, computed = issue_signatures(issues, cache)
+    clusters = find_clusters(signatures, threshold)
+
+    by_id = {i["id"]: i for i in issues}
+    sizes = count_events_by_issue()
+    plan = []
+    for members in clusters:
+        target = max(members, key=lambda iid: (sizes.get(iid, 0), -iid))
+        plan.append((target, [iid for iid in members if iid != target]))
+
+    for n, (target, others) in enumerate(plan, 1):
+        console.print(f"[highlight]Cluster {n}:[/highlight] [highlight]#{target}[/highlight] "
+                      f"{by_id[target].get('title', '')} [muted]({sizes.get(target, 0)} event(s))[/muted]")
+        for iid in others:
+            score = similarity(signatures[iid], signatures[target])
+            console.print(f"  [secondary]{score:.2f}[/secondary] [highlight]#{iid}[/highlight] "
+                          f"{by_id[iid].get('title', '')} [muted]({sizes.get(iid, 0)} event(s))[/muted]")
+    merges = sum(len(others) for _, others in plan)
+    console.print(f"[muted]{len(plan)} cluster(s), {merges} issue(s) to merge; "
+                  f"{computed} of {len(signatures)} signature(s) computed[/muted]")
+
+    if not apply_ or not plan:
+        return
+    if not yes:
+        click.confirm(f"Merge {merges} issue(s) into {len(plan)}?", abort=True)
+    moved = sum(merge_issues(target, others) for target, others in plan)
+    console.print(f"[success]Merged {merges} issue(s), moved {moved} event(s)[/success]")
@@ -20,6 +20,9 @@ def decrypt_cmd(password):
     
     try:
         decrypt_vault(password)
+        # Nothing left for a key agent to unlock
+        from .. import agent
+        agent.stop()
         console.print("[success]Vault has been decrypted successfully![/success]")
     except ValueError as e:
         console.print(f"[error]Decryption failed: {e}[/error]")
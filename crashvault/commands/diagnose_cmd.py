@@ -1,6 +1,6 @@
 import click, json, re
 from pathlib import Path
-from ..core import EVENTS_DIR
+from ..core import get_event
 from ..rich_utils import get_console
 
 console = get_console()
@@ -35,14 +35,9 @@ def _read_context(path: Path, line: int, radius: int = 5):
 @click.argument("event_id")
 def diagnose(event_id):
     """Show source code context for an event's stack trace."""
-    event_file = None
-    for p in EVENTS_DIR.glob("**/*.json"):
-        if p.stem == event_id:
-            event_file = p
-            break
-    if not event_file:
+    ev = get_event(event_id)
+    if not ev:
         raise click.ClickException("Event not found")
-    ev = json.loads(event_file.read_text())
     stack = ev.get("stacktrace", "")
     if not stack:
         console.print("[warning]No stacktrace available for this event[/warning]")
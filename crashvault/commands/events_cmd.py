@@ -1,25 +1,37 @@
 import click
-from ..core import load_events
+from ..core import page_events
 from ..rich_utils import get_console
+from ..storage.base import decode_cursor
+from ..timerange import time_range_options
 
 console = get_console()
 
 
 @click.command(name="events")
 @click.option("--issue", type=int, help="Only events for issue id")
+@click.option("--level", help="Only events with this level")
 @click.option("--limit", type=int, default=50, show_default=True)
 @click.option("--offset", type=int, default=0, show_default=True)
-def events_cmd(issue, limit, offset):
-    """List events with optional pagination."""
-    all_events = load_events()
-    if issue is not None:
-        all_events = [e for e in all_events if e.get("issue_id") == issue]
-    all_events.sort(key=lambda e: e.get("timestamp", ""), reverse=True)
-    page = all_events[offset: offset + limit]
+@click.option("--cursor", help="Continue after the page that printed this cursor")
+@click.option("--oldest-first", is_flag=True, help="List oldest events first")
+@time_range_options
+def events_cmd(issue, level, limit, offset, cursor, oldest_first, since, until):
+    """List events with optional pagination.
+
+    Events are read lazily in timestamp order, so only about ``--limit``
+    events are loaded.  Each page ends with the cursor of the next one.
+    """
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--cursor")
+    page, next_cursor = page_events(limit, cursor, newest_first=not oldest_first, offset=offset,
+                                    issue_id=issue, level=level, since=since, until=until)
     for ev in page:
         ev_level = ev.get('level', '').upper()
         level_style = "danger" if ev_level in ["ERROR", "CRITICAL"] else "warning" if ev_level == "WARNING" else "info"
         console.print(f"[secondary]{ev['timestamp']}[/secondary] [{level_style}][{ev_level}][/{level_style}] [highlight]#{ev['issue_id']}[/highlight] {ev['message']}")
-    console.print(f"[muted]-- showing {len(page)} of {len(all_events)} --[/muted]")
-
-
+    console.print(f"[muted]-- showing {len(page)} event(s) --[/muted]")
+    if next_cursor:
+        console.print(f"[muted]-- more: --cursor {next_cursor} --[/muted]")
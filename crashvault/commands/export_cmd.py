@@ -1,9 +1,13 @@
 import csv
+import sys
+import textwrap
 import click, json
 from datetime import datetime, timezone
-from pathlib import Path
-from ..core import load_issues, load_events
+from ..compression import COMPRESSIONS, compression_for_path, open_write
+from ..core import get_issue, load_issues, iter_events
+from ..encrypter import ChunkedWriter, derive_key, new_kdf_salt
 from ..rich_utils import get_console
+from ..timerange import time_range_options
 
 console = get_console()
 
@@ -60,33 +64,101 @@ def export_as_csv(issues, events, output_path):
         events_to_csv(events, events_writer)
 
 
+def write_json_export(issues, events, write):
+    """Write the JSON export document, serialising ``events`` one at a time.
+
+    The output matches ``json.dumps(payload, indent=2)`` without holding
+    every event (or the whole document) in memory.
+    """
+    head = json.dumps({
+        "version": 1,
+        "exported_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "issues": issues,
+    }, indent=2)
+    write(head[:-2] + ',\n  "events": [')
+    empty = True
+    for event in events:
+        write(("\n" if empty else ",\n") + textwrap.indent(json.dumps(event, indent=2), "    "))
+        empty = False
+    write("]\n}" if empty else "\n  ]\n}")
+
+
+def write_ndjson_export(issues, events, write):
+    """Write the export as NDJSON: a header line, then one line per issue and per event."""
+    write(json.dumps({
+        "type": "header",
+        "version": 1,
+        "exported_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+    }, separators=(",", ":")) + "\n")
+    for issue in issues:
+        write(json.dumps({"type": "issue", "data": issue}, separators=(",", ":")) + "\n")
+    for event in events:
+        write(json.dumps({"type": "event", "data": event}, separators=(",", ":")) + "\n")
+
+
 @click.command()
 @click.option("--output", type=click.Path(dir_okay=False, writable=True, resolve_path=True), help="Output file. Defaults to stdout")
-@click.option("--format", type=click.Choice(["json", "csv"], case_sensitive=False), default="json", help="Export format (json or csv)")
-def export(output, format):
-    """Export all issues and events to JSON or CSV format."""
-    issues = load_issues()
-    events = load_events()
-    
+@click.option("--format", type=click.Choice(["json", "ndjson", "csv"], case_sensitive=False), default="json", help="Export format (json, ndjson or csv)")
+@click.option("--compress", type=click.Choice(COMPRESSIONS, case_sensitive=False),
+              help="Compress the output (default: from the --output suffix, .gz or .zst)")
+@click.option("--encrypt", is_flag=True,
+              help="Encrypt the output with a password you are asked for")
+@click.option("--issue", type=int, help="Only export this issue and its events")
+@time_range_options
+def export(output, format, compress, encrypt, issue, since, until):
+    """Export issues and events to JSON, NDJSON or CSV format.
+
+    Events are written as they are read from the vault, so memory use does
+    not grow with the export.  NDJSON writes one record per line; JSON and
+    NDJSON can be gzip or zstd compressed, and encrypted.
+    """
+    format = format.lower()
+    compress = (compress or (compression_for_path(output) if output else "none")).lower()
+    if issue is not None:
+        found = get_issue(issue)
+        if found is None:
+            raise click.ClickException(f"Issue #{issue} not found")
+        issues = [found]
+    else:
+        issues = load_issues()
+    events = iter_events(issue_id=issue, since=since, until=until)
+
     if format == "csv":
         if not output:
             # Cannot output CSV to stdout with proper formatting, require output file
             console.print("[error]CSV format requires an output file. Use --output <filename>[/error]")
             raise click.Abort()
-        
+        if compress != "none" or encrypt:
+            raise click.UsageError("CSV exports cannot be compressed or encrypted; use --format json or ndjson")
+
         export_as_csv(issues, events, output)
         console.print(f"[success]Exported to[/success] [highlight]{output}[/highlight]")
-    
-    else:  # JSON format (default)
-        payload = {
-            "version": 1,
-            "exported_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            "issues": issues,
-            "events": events,
-        }
-        data = json.dumps(payload, indent=2)
+        return
+
+    key = salt = None
+    if encrypt:
+        # Keyed by a password rather than the vault key, so the export can be
+        # imported into any vault, including this one after `decrypt`
+        salt = new_kdf_salt()
+        key = derive_key(click.prompt("Export password", hide_input=True, confirmation_prompt=True, err=True),
+                         salt)
+
+    write_export = write_ndjson_export if format == "ndjson" else write_json_export
+    raw = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        sink = ChunkedWriter(raw, key, salt=salt) if encrypt else raw
+        try:
+            stream = open_write(sink, compress)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        write_export(issues, events, lambda chunk: stream.write(chunk.encode("utf-8")))
+        if not output and format == "json" and compress == "none" and not encrypt:
+            stream.write(b"\n")
+        stream.close()
+        if encrypt:
+            sink.close()
+    finally:
         if output:
-            Path(output).write_text(data)
-            console.print(f"[success]Exported to[/success] [highlight]{output}[/highlight]")
-        else:
-            click.echo(data)
+            raw.close()
+    if output:
+        console.print(f"[success]Exported to[/success] [highlight]{output}[/highlight]")
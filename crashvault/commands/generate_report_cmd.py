@@ -2,8 +2,9 @@
 import click, json
 from datetime import datetime
 from pathlib import Path
-from ..core import load_issues, load_events, get_user_config
+from ..core import load_issues, iter_events, get_user_config
 from ..rich_utils import get_console
+from ..timerange import time_range_options
 
 console = get_console()
 
@@ -359,7 +360,8 @@ def _generate_json_report(issues, events, filters):
 @click.option("--status", type=click.Choice(["open", "resolved", "ignored"], case_sensitive=False), help="Filter by issue status")
 @click.option("--level", type=click.Choice(["debug", "info", "warning", "error", "critical"], case_sensitive=False), help="Filter by event level")
 @click.option("--tag", multiple=True, help="Filter by tags (can be specified multiple times)")
-def generate_report(output_format, output_file, status, level, tag):
+@time_range_options
+def generate_report(output_format, output_file, status, level, tag, since, until):
     """Generate formatted reports of errors and issues.
 
     This command creates comprehensive reports in various formats:
@@ -374,7 +376,7 @@ def generate_report(output_format, output_file, status, level, tag):
     """
     # Load issues and events
     issues = load_issues()
-    events = load_events()
+    events = list(iter_events(level=level, tags=tag, since=since, until=until))
 
     # Build filter description
     filters_applied = []
@@ -384,6 +386,10 @@ def generate_report(output_format, output_file, status, level, tag):
         filters_applied.append(f"level={level}")
     if tag:
         filters_applied.append(f"tags={list(tag)}")
+    if since:
+        filters_applied.append(f"since={since.isoformat()}")
+    if until:
+        filters_applied.append(f"until={until.isoformat()}")
     filter_desc = ", ".join(filters_applied) if filters_applied else "none"
 
     # Filter issues
@@ -395,13 +401,6 @@ def generate_report(output_format, output_file, status, level, tag):
         issue_ids = {issue["id"] for issue in issues}
         events = [e for e in events if e.get("issue_id") in issue_ids]
 
-    if level:
-        events = [e for e in events if e.get("level") == level]
-
-    if tag:
-        tag_set = set(tag)
-        events = [e for e in events if tag_set.issubset(set(e.get("tags", [])))]
-
     if not issues and not events:
         console.print("[yellow]Warning: No data matches the specified filters[/yellow]")
 
@@ -0,0 +1,130 @@
+"""Lookup index maintenance commands."""
+
+import click
+
+from ..rich_utils import get_console
+
+console = get_console()
+
+
+@click.group(name="index")
+def index():
+    """Inspect or rebuild the vault's lookup indexes."""
+    pass
+
+
+def _print_status(status):
+    if not status:
+        console.print("[muted]This storage engine keeps no separate indexes.[/muted]")
+        return
+    for name, value in status.items():
+        if isinstance(value, dict):
+            console.print(f"[highlight]{name}:[/highlight]")
+            for k, v in value.items():
+                console.print(f"  [muted]{k}:[/muted] {v}")
+        else:
+            console.print(f"[highlight]{name}:[/highlight] {value}")
+
+
+def _engine_and_search_status(engine_status):
+    from ..storage import get_search_index, open_rollups
+
+    search_index = get_search_index()
+    if search_index is not None:
+        engine_status = dict(engine_status, search_index=search_index.status())
+    return dict(engine_status, rollups=open_rollups().status())
+
+
+@index.command(name="status")
+def status():
+    """Show whether the indexes are present and up to date."""
+    from ..storage import get_storage
+
+    _print_status(_engine_and_search_status(get_storage().index_status()))
+
+
+@index.command(name="rebuild")
+def rebuild():
+    """Rebuild the indexes from the stored data.
+
+    Use this when an index is missing or stale, e.g. after editing
+    issues.json by hand.
+    """
+    from ..core import issue_store_lock
+    from ..storage import get_search_index, get_storage, open_rollups
+
+    storage = get_storage()
+    result = storage.rebuild_index()
+    search_index = get_search_index()
+    if search_index is not None:
+        search_index.rebuild(storage.iter_events())
+    with issue_store_lock():
+        open_rollups().rebuild(storage.iter_events())
+    console.print("[success]Indexes rebuilt[/success]")
+    _print_status(_engine_and_search_status(result))
+
+
+@index.command(name="check")
+@click.option("--fix", is_flag=True, help="Rebuild the counters if they are off")
+def check(fix):
+    """Compare the stats counters with a full recount of the events."""
+    from ..core import issue_store_lock
+    from ..storage import get_storage, open_rollups
+
+    storage = get_storage()
+    rollups = open_rollups()
+    rollups.ensure_built(storage)
+    with issue_store_lock():
+        problems = rollups.check(storage.iter_events())
+        if problems and fix:
+            rollups.rebuild(storage.iter_events())
+    if not problems:
+        console.print("[success]Stats counters are consistent[/success]")
+        return
+    for problem in problems:
+        console.print(f"  [warning]{problem}[/warning]")
+    if fix:
+        console.print("[success]Stats counters rebuilt[/success]")
+    else:
+        console.print("[error]Stats counters are out of date; run `crashvault index check --fix`[/error]")
+        raise SystemExit(1)
+
+
+OPTIONAL_INDEXES = ["search"]
+
+
+@index.command(name="enable")
+@click.argument("name", type=click.Choice(OPTIONAL_INDEXES))
+def enable(name):
+    """Turn on an optional index and build it from the stored events.
+
+    search: inverted index used by `crashvault search`.
+    """
+    from ..core import load_config, save_config
+    from ..storage import get_storage
+    from ..storage.search_index import open_search_index
+
+    # Enable first so events written during the build are indexed too
+    cfg = load_config()
+    indexes = cfg.get("indexes")
+    cfg["indexes"] = dict(indexes if isinstance(indexes, dict) else {}, **{name: True})
+    save_config(cfg)
+    status = open_search_index().rebuild(get_storage().iter_events())
+    console.print(f"[success]{name} index enabled[/success]")
+    _print_status({f"{name}_index": status})
+
+
+@index.command(name="disable")
+@click.argument("name", type=click.Choice(OPTIONAL_INDEXES))
+def disable(name):
+    """Turn off an optional index and delete its files."""
+    from ..core import load_config, save_config
+    from ..storage.search_index import drop_search_index
+
+    cfg = load_config()
+    indexes = cfg.get("indexes")
+    if isinstance(indexes, dict):
+        indexes.pop(name, None)
+        save_config(cfg)
+    drop_search_index()
+    console.print(f"[success]{name} index disabled[/success]")
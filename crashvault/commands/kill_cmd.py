@@ -1,5 +1,5 @@
 import click
-from ..core import ISSUES_FILE, EVENTS_DIR
+from ..core import clear_vault
 from ..rich_utils import get_console
 
 console = get_console()
@@ -8,10 +8,7 @@ console = get_console()
 @click.confirmation_option(prompt="Are you sure you want to delete all logs?")
 def kill():
     """Delete all issues and events (wipe logs)."""
-    if ISSUES_FILE.exists():
-        ISSUES_FILE.unlink()
-    for f in EVENTS_DIR.glob("**/*.json"):
-        f.unlink()
+    clear_vault()
     console.print("[danger]All logs deleted![/danger]")
 
 
@@ -1,6 +1,6 @@
 import click, json, os, uuid
 from datetime import datetime, timezone
-from ..core import event_path_for
+from ..core import save_event
 
 
 @click.command(name="note")
@@ -22,11 +22,7 @@ def note(message, tags):
         "host": os.uname().nodename if hasattr(os, "uname") else os.getenv("COMPUTERNAME", "unknown"),
         "pid": os.getpid(),
     }
-    path = event_path_for(event_id, ts)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with open(tmp, "w") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp, path)
+    save_event(data)
     from ..rich_utils import get_console
     console = get_console()
     console.print(f"[success]Note[/success] [highlight]{event_id}[/highlight] [success]saved[/success]")
@@ -1,5 +1,5 @@
 import click, json, subprocess, shutil, sys
-from ..core import get_config_value, EVENTS_DIR
+from ..core import get_config_value, get_event
 
 
 def _notify_win(title, message):
@@ -40,17 +40,15 @@ def notify(event_id):
     from ..rich_utils import get_console
     console = get_console()
 
-    for p in EVENTS_DIR.glob("**/*.json"):
-        if p.stem == event_id:
-            ev = json.loads(p.read_text())
-            title = f"Crashvault: #{ev.get('issue_id')} {ev.get('level','').upper()}"
-            msg = ev.get("message", "")[:200]
-            ok = send_notification(title, msg)
-            if not ok:
-                console.print("[warning]Notification not supported on this system.[/warning]")
-            else:
-                console.print("[success]Notification sent.[/success]")
-            return
-    raise click.ClickException("Event not found")
+    ev = get_event(event_id)
+    if not ev:
+        raise click.ClickException("Event not found")
+    title = f"Crashvault: #{ev.get('issue_id')} {ev.get('level','').upper()}"
+    msg = ev.get("message", "")[:200]
+    ok = send_notification(title, msg)
+    if not ok:
+        console.print("[warning]Notification not supported on this system.[/warning]")
+    else:
+        console.print("[success]Notification sent.[/success]")
 
 
@@ -1,6 +1,6 @@
 import click
 from datetime import datetime, timezone
-from ..core import EVENTS_DIR
+from ..core import delete_events_before
 from ..rich_utils import get_console
 
 console = get_console()
@@ -11,14 +11,7 @@ console = get_console()
 def prune(days):
     """Remove old events to save disk space."""
     cutoff = datetime.now(timezone.utc).timestamp() - (days * 86400)
-    removed = 0
-    for p in EVENTS_DIR.glob("**/*.json"):
-        try:
-            if p.stat().st_mtime < cutoff:
-                p.unlink()
-                removed += 1
-        except Exception:
-            continue
+    removed = delete_events_before(cutoff)
     console.print(f"[success]Pruned {removed} old event file(s)[/success]")
 
 
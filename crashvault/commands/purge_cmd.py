@@ -1,5 +1,5 @@
-import click, json
-from ..core import load_issues, save_issues, EVENTS_DIR
+import click
+from ..core import load_issues, save_issues, delete_issue_events
 from ..rich_utils import get_console
 
 console = get_console()
@@ -17,18 +17,7 @@ def purge(issue_id):
         console.print("[error]Issue not found[/error]")
         return
     save_issues(issues)
-    removed_events = 0
-    for f in EVENTS_DIR.glob("**/*.json"):
-        try:
-            ev = json.loads(f.read_text())
-        except Exception:
-            continue
-        if ev.get("issue_id") == issue_id:
-            try:
-                f.unlink()
-                removed_events += 1
-            except Exception:
-                pass
+    removed_events = delete_issue_events(issue_id)
     console.print(f"[danger]Purged issue[/danger] [highlight]#{issue_id}[/highlight] [danger]and {removed_events} event(s)[/danger]")
 
 
@@ -0,0 +1,129 @@
+import click
+from datetime import datetime, timezone
+
+from ..core import (
+    delete_issue_events,
+    issue_store_lock,
+    iter_events,
+    load_config,
+    load_issues,
+    save_config,
+    save_events,
+    save_issues,
+)
+from ..fingerprint import available_strategies, get_strategy
+from ..rich_utils import get_console
+
+console = get_console()
+
+
+def plan_regroup(issues, events, strategy):
+    """Work out which issue each fingerprint of ``strategy`` maps to.
+
+    Every new fingerprint keeps the existing issue that holds most of its
+    events, unless a bigger group already claimed that issue; the rest get
+    new issues.  Events of unknown issues are left alone.  Returns
+    ``(targets, new_groups, sources, merged, moves)``: ``targets`` maps
+    fingerprints to kept issue ids, ``new_groups`` maps the other
+    fingerprints to ``(title, source issue id)``, ``sources`` are the issues
+    losing events, ``merged`` those left without any and ``moves`` counts
+    moved events.
+    """
+    known = {i["id"] for i in issues}
+    counts = {}
+    titles = {}
+    for ev in events:
+        issue_id = ev.get("issue_id")
+        if issue_id not in known:
+            continue
+        fp = strategy.fingerprint(ev.get("message", ""), ev.get("stacktrace", ""))
+        per_issue = counts.setdefault(fp, {})
+        per_issue[issue_id] = per_issue.get(issue_id, 0) + 1
+        titles.setdefault(fp, ev.get("message", "")[:80])
+
+    targets, new_groups, claimed = {}, {}, set()
+    for fp, per_issue in sorted(counts.items(), key=lambda item: (-sum(item[1].values()), item[0])):
+        ranked = sorted(per_issue, key=lambda iid: (-per_issue[iid], iid))
+        free = [iid for iid in ranked if iid not in claimed]
+        if free:
+            targets[fp] = free[0]
+            claimed.add(free[0])
+        else:
+            new_groups[fp] = (titles[fp], ranked[0])
+
+    sources, moves = set(), 0
+    for fp, per_issue in counts.items():
+        for issue_id, n in per_issue.items():
+            if targets.get(fp) != issue_id:
+                sources.add(issue_id)
+                moves += n
+    had_events = {iid for per_issue in counts.values() for iid in per_issue}
+    merged = sorted(had_events - claimed)
+    return targets, new_groups, sources, merged, moves
+
+
+@click.command()
+@click.option("--strategy", type=click.Choice(available_strategies()),
+              help="Grouping strategy to switch to (default: the configured one)")
+@click.option("--dry-run", is_flag=True, help="Only show what would change")
+@click.confirmation_option(prompt="Re-fingerprint all events and merge/split issues?")
+def regroup(strategy, dry_run):
+    """Re-fingerprint stored events and regroup them into issues.
+
+    Issues whose events now share a fingerprint are merged into the one
+    holding most of them; events that no longer match their issue move to
+    the issue of their new fingerprint.  With --strategy the vault also
+    switches to that strategy for new events.  Without it, this re-keys
+    issues of older vaults to full-width fingerprints and splits those
+    whose 8-character fingerprints collided.
+    """
+    grouping = get_strategy(strategy)
+    with issue_store_lock():
+        issues = load_issues()
+        targets, new_groups, sources, merged, moves = plan_regroup(issues, iter_events(), grouping)
+        by_id = {i["id"]: i for i in issues}
+        rekeyed = sum(1 for fp, issue_id in targets.items() if by_id[issue_id].get("fingerprint") != fp)
+        console.print(
+            f"[highlight]{grouping.name}:[/highlight] {rekeyed} issue(s) re-keyed, {moves} event(s) to move, "
+            f"{len(merged)} issue(s) merged away, {len(new_groups)} new issue(s)"
+        )
+        if dry_run:
+            return
+
+        if strategy:
+            cfg = load_config()
+            grouping_cfg = cfg.get("grouping")
+            cfg["grouping"] = dict(grouping_cfg if isinstance(grouping_cfg, dict) else {}, strategy=strategy)
+            save_config(cfg)
+
+        for fp, issue_id in targets.items():
+            by_id[issue_id]["fingerprint"] = fp
+        next_id = max(by_id, default=0) + 1
+        now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        for fp, (title, source_id) in sorted(new_groups.items()):
+            source = by_id[source_id]
+            issue = {"id": next_id, "fingerprint": fp, "title": title,
+                     "status": source.get("status", "open"), "created_at": now}
+            if "severity" in source:
+                issue["severity"] = source["severity"]
+            by_id[next_id] = issue
+            targets[fp] = next_id
+            next_id += 1
+        # New and re-fingerprinted issues first, so moved events always have a home
+        save_issues(list(by_id.values()))
+
+        # The events of every source issue are deleted and stored again
+        # under their (possibly new) issue.  All deletes come before the
+        # save: events may move between two source issues in both directions
+        sources = set(sources)
+        rewritten = []
+        for ev in iter_events():
+            if ev.get("issue_id") in sources:
+                fp = grouping.fingerprint(ev.get("message", ""), ev.get("stacktrace", ""))
+                rewritten.append(dict(ev, issue_id=targets[fp]))
+        for issue_id in sorted(sources):
+            delete_issue_events(issue_id)
+        save_events(rewritten)
+
+        save_issues([i for iid, i in by_id.items() if iid not in merged])
+    console.print(f"[success]Regrouped into {len(by_id) - len(merged)} issue(s)[/success]")
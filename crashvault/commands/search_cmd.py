@@ -1,6 +1,7 @@
-import click, json
-from ..core import EVENTS_DIR
+import click
+from ..core import search_events
 from ..rich_utils import get_console
+from ..timerange import time_range_options
 
 console = get_console()
 
@@ -9,24 +10,27 @@ console = get_console()
 @click.option("--level", type=click.Choice(["debug","info","warning","error","critical"], case_sensitive=False), help="Filter by level")
 @click.option("--tag", "tags", multiple=True, help="Filter by tag(s)")
 @click.option("--text", default="", help="Search text in message")
-def search(level, tags, text):
-    """Search events with optional filters."""
+@click.option("--query", "-q", default=None,
+              help='Query: words (AND), OR, "exact phrase", prefix*, tag:/level:/host:/issue: fields')
+@time_range_options
+def search(level, tags, text, query, since, until):
+    """Search events with optional filters.
+
+    Examples:
+        crashvault search --text timeout --tag db
+        crashvault search -q 'timeout OR "connection reset" level:error'
+        crashvault search --level error --since 24h
+    """
     level = level.lower() if level else None
     count = 0
-    for f in EVENTS_DIR.glob("**/*.json"):
-        ev = json.loads(f.read_text())
-        if level and ev.get("level") != level:
-            continue
-        if tags:
-            etags = set(ev.get("tags", []))
-            if not set(tags).issubset(etags):
-                continue
-        if text and text.lower() not in ev.get("message", "").lower():
-            continue
+    try:
+        # Only parses the query; reading events happens below
+        events = search_events(query=query, level=level, tags=tags, text=text, since=since, until=until)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--query")
+    for ev in events:
         ev_level = ev.get('level', '').upper()
         level_style = "danger" if ev_level in ["ERROR", "CRITICAL"] else "warning" if ev_level == "WARNING" else "info"
         console.print(f"[secondary]{ev['timestamp']}[/secondary] [{level_style}][{ev_level}][/{level_style}] [highlight]#{ev['issue_id']}[/highlight] {ev['message']}")
         count += 1
     console.print(f"[muted]-- {count} event(s) matched --[/muted]")
-
-
@@ -16,7 +16,10 @@ def server():
 @click.option("--port", "-p", default=5678, help="Port to listen on", show_default=True)
 @click.option("--host", "-h", default="0.0.0.0", help="Host to bind to", show_default=True)
 @click.option("--background", "-b", is_flag=True, help="Run in background")
-def start(port, host, background):
+@click.option("--mode", type=click.Choice(["threaded", "asyncio", "single"]), default=None,
+              help="Concurrency model (default: server.mode from config, else threaded)")
+@click.option("--workers", type=int, default=None, help="Worker pool size (threaded and asyncio modes)")
+def start(port, host, background, mode, workers):
     """Start the HTTP server to receive runtime errors.
 
     The server listens for POST requests with error data:
@@ -30,6 +33,10 @@ def start(port, host, background):
             "context": {"user_id": "123"}
         }
 
+    Concurrency modes: "threaded" serves connections from a bounded worker
+    pool, "asyncio" uses an event loop with keep-alive connections, and
+    "single" handles one connection at a time.
+
     Example client integration (JavaScript):
 
         window.onerror = (msg, url, line, col, error) => {
@@ -61,7 +68,7 @@ def start(port, host, background):
 
         with open(log_file, "a") as log:
             proc = subprocess.Popen(
-                [sys.executable, "-m", "crashvault.server", str(port), host],
+                [sys.executable, "-m", "crashvault.server", str(port), host, mode or "", str(workers or "")],
                 stdout=log,
                 stderr=log,
                 start_new_session=True,
@@ -71,7 +78,7 @@ def start(port, host, background):
         click.echo(f"Log file: {log_file}")
     else:
         # Run in foreground
-        run_server(port=port, host=host)
+        run_server(port=port, host=host, mode=mode, workers=workers)
 
 
 @server.command(name="stop")
@@ -1,5 +1,5 @@
 import click
-from ..core import load_issues, save_issues
+from ..core import get_issue, save_issue
 from ..rich_utils import get_console
 
 console = get_console()
@@ -35,14 +35,13 @@ def set_severity(issue_id, severity):
     Example:
         crashvault set-severity 1 critical
     """
-    issues = load_issues()
-    issue = next((i for i in issues if i["id"] == issue_id), None)
+    issue = get_issue(issue_id)
     if not issue:
         console.print("[error]Issue not found[/error]")
         return
     
     issue["severity"] = severity.lower()
-    save_issues(issues)
+    save_issue(issue)
     
     # Style based on severity
     severity_styles = {
@@ -1,5 +1,5 @@
 import click
-from ..core import load_issues, save_issues
+from ..core import get_issue, save_issue
 from ..rich_utils import get_console
 
 console = get_console()
@@ -10,13 +10,12 @@ console = get_console()
 @click.argument("title")
 def set_title(issue_id, title):
     """Rename an issue's title."""
-    issues = load_issues()
-    issue = next((i for i in issues if i["id"] == issue_id), None)
+    issue = get_issue(issue_id)
     if not issue:
         console.print("[error]Issue not found[/error]")
         return
     issue["title"] = title[:200]
-    save_issues(issues)
+    save_issue(issue)
     console.print(f"[success]Issue[/success] [highlight]#{issue_id}[/highlight] [success]title updated[/success]")
 
 
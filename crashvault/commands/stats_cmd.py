@@ -1,22 +1,60 @@
-import click, json
-from ..core import load_issues, EVENTS_DIR
+import click
+from ..core import count_issues_by_status, count_events_by_level, event_series
 from ..rich_utils import get_console
+from ..timerange import time_range_options
 
 console = get_console()
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARK_WIDTH = 60
+
+
+def sparkline(values, width=SPARK_WIDTH):
+    """Render counts as a one-line bar chart, summing neighbours to fit ``width``."""
+    if len(values) > width:
+        size = -(-len(values) // width)
+        values = [sum(values[i:i + size]) for i in range(0, len(values), size)]
+    peak = max(values, default=0)
+    if not peak:
+        return " " * len(values)
+    return "".join(" " if v == 0 else SPARK_CHARS[min((v * len(SPARK_CHARS) - 1) // peak, len(SPARK_CHARS) - 1)]
+                   for v in values)
+
+
+def _print_trend(issue, level_counts, since, until, resolution):
+    try:
+        overall = event_series(issue_id=issue, since=since, until=until, resolution=resolution)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    subject = f" for issue #{issue}" if issue is not None else ""
+    console.print(f"\n[highlight]Trend{subject} (per {overall['resolution']}, "
+                  f"{overall['since']} to {overall['until']}):[/highlight]")
+    rows = [("all", overall)]
+    for level in sorted(level_counts):
+        rows.append((level, event_series(issue_id=issue, level=level, since=since, until=until,
+                                         resolution=overall["resolution"])))
+    for name, series in rows:
+        if name != "all" and not series["total"]:
+            continue
+        line = sparkline([b["count"] for b in series["buckets"]])
+        console.print(f"  [muted]{name:<9}[/muted] {line} {series['total']}", highlight=False)
+
 
 @click.command()
-def stats():
-    """Show simple statistics about issues and events."""
-    issues = load_issues()
+@click.option("--trend", is_flag=True, help="Also show event rate sparklines (default range: last 24h)")
+@click.option("--issue", type=int, help="Trend of a single issue (with --trend)")
+@click.option("--resolution", type=click.Choice(["minute", "hour", "day"]),
+              help="Trend bucket size (default: finest that fits the range)")
+@time_range_options
+def stats(trend, issue, resolution, since, until):
+    """Show simple statistics about issues and events.
+
+    --since/--until restrict the event counts to a time range.  Counts come
+    from counters kept up to date on write, not from reading every event.
+    """
     status_counts = {"open": 0, "resolved": 0}
-    for i in issues:
-        status_counts[i.get("status", "open")] = status_counts.get(i.get("status", "open"), 0) + 1
-    level_counts = {}
-    for f in EVENTS_DIR.glob("**/*.json"):
-        ev = json.loads(f.read_text())
-        lvl = ev.get("level", "unknown")
-        level_counts[lvl] = level_counts.get(lvl, 0) + 1
+    status_counts.update(count_issues_by_status())
+    level_counts = count_events_by_level(since=since, until=until)
 
     console.print("[highlight]Issues by status:[/highlight]")
     for k, v in status_counts.items():
@@ -28,4 +66,5 @@ def stats():
         level_style = "danger" if k in ["error", "critical"] else "warning" if k == "warning" else "info"
         console.print(f"  [{level_style}]{k}:[/{level_style}] {v}")
 
-
+    if trend:
+        _print_trend(issue, level_counts, since, until, resolution)
@@ -0,0 +1,97 @@
+"""Storage engine commands."""
+
+import click
+
+from ..core import load_config, save_config
+from ..rich_utils import get_console
+
+console = get_console()
+
+MIGRATE_BATCH_SIZE = 1000
+
+
+@click.group(name="storage")
+def storage():
+    """Inspect or switch the vault storage engine."""
+    pass
+
+
+@storage.command(name="info")
+def info():
+    """Show the storage engine in use."""
+    from ..storage import get_storage
+
+    for key, value in get_storage().info().items():
+        console.print(f"[highlight]{key}:[/highlight] {value}")
+
+
+@storage.command(name="migrate")
+@click.argument("engine")
+def migrate(engine):
+    """Copy all issues and events into ENGINE and make it the active engine.
+
+    The source data is left in place, so switching back is always possible.
+
+    Example:
+        crashvault storage migrate sqlite
+    """
+    from ..storage import available_engines, configured_engine_name, get_engine, JSONStorage, SegmentStorage
+
+    if engine not in available_engines():
+        raise click.BadParameter(f"choose from {', '.join(available_engines())}", param_hint="ENGINE")
+
+    cfg = load_config()
+    current = configured_engine_name(cfg)
+    if engine == current:
+        console.print(f"[warning]Vault already uses the {engine} engine[/warning]")
+        return
+
+    source = get_engine(current)
+    target = get_engine(engine)
+
+    issues = source.load_issues()
+    target.save_issues(issues)
+
+    # json and segments share the events directory, so events are moved
+    # between per-event files and segments rather than copied.
+    if isinstance(target, SegmentStorage) and not isinstance(source, SegmentStorage):
+        shared = isinstance(source, JSONStorage)
+    else:
+        shared = isinstance(source, SegmentStorage) and isinstance(target, JSONStorage)
+
+    if shared and isinstance(target, SegmentStorage):
+        copied = target.absorb_event_files(MIGRATE_BATCH_SIZE)
+    else:
+        events = source.iter_segment_events() if shared else source.iter_events()
+        copied = 0
+        batch = []
+        for ev in events:
+            batch.append(ev)
+            if len(batch) >= MIGRATE_BATCH_SIZE:
+                target.append_events(batch)
+                copied += len(batch)
+                batch = []
+        if batch:
+            target.append_events(batch)
+            copied += len(batch)
+        if shared:
+            source.clear_segments()
+
+    _switch_engine(cfg, engine)
+    _report(issues, copied, current, engine)
+
+
+def _switch_engine(cfg, engine):
+    storage_cfg = cfg.get("storage")
+    if not isinstance(storage_cfg, dict):
+        storage_cfg = {}
+    storage_cfg["engine"] = engine
+    cfg["storage"] = storage_cfg
+    save_config(cfg)
+
+
+def _report(issues, copied, current, engine):
+    console.print(
+        f"[success]Migrated {len(issues)} issue(s) and {copied} event(s) from[/success] "
+        f"[highlight]{current}[/highlight] [success]to[/success] [highlight]{engine}[/highlight]"
+    )
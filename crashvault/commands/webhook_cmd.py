@@ -17,7 +17,10 @@ def webhook():
 @click.option("--name", default=None, help="Friendly name for this webhook")
 @click.option("--secret", default=None, help="Secret for signing payloads (HTTP) or GitHub Personal Access Token")
 @click.option("--events", default=None, help="Comma-separated event levels to filter (e.g., 'error,critical')")
-def add(type, url, name, secret, events):
+@click.option("--rate-limit", type=click.FloatRange(min=0, min_open=True), default=None, help="Max notifications per minute")
+@click.option("--burst", type=click.IntRange(min=1), default=None, help="Notifications allowed at once before the rate limit applies (default: rate limit)")
+@click.option("--coalesce-window", type=click.FloatRange(min=0, min_open=True), default=None, help="Seconds to fold repeat events of an issue into one notification")
+def add(type, url, name, secret, events, rate_limit, burst, coalesce_window):
     """Add a new webhook.
 
     TYPE is one of: slack, discord, http, github
@@ -28,6 +31,7 @@ def add(type, url, name, secret, events):
         crashvault webhook add http --url=https://myapp.com/webhook --secret=mysecret
         crashvault webhook add github --url=owner/repo --secret=ghp_xxx
         crashvault webhook add github --url=https://api.github.com/repos/owner/repo --secret=ghp_xxx --events=error,critical
+        crashvault webhook add slack --url=https://hooks.slack.com/services/xxx --rate-limit=10 --coalesce-window=60
     """
     # Import providers to register them
     from .. import webhooks  # noqa
@@ -43,6 +47,9 @@ def add(type, url, name, secret, events):
         name=name,
         secret=secret,
         events=event_list,
+        rate_limit=rate_limit,
+        burst=burst,
+        coalesce_window=coalesce_window,
     )
 
     click.echo(f"Webhook added: {webhook.id}")
@@ -52,6 +59,10 @@ def add(type, url, name, secret, events):
         click.echo(f"  Events: {', '.join(event_list)}")
     else:
         click.echo("  Events: all")
+    if rate_limit:
+        click.echo(f"  Rate limit: {rate_limit:g}/min (burst {burst or rate_limit:g})")
+    if coalesce_window:
+        click.echo(f"  Coalesce window: {coalesce_window:g}s")
 
 
 @webhook.command(name="list")
@@ -151,3 +162,96 @@ def show(webhook_id):
     click.echo(f"Events:  {', '.join(w.events) if w.events else 'all'}")
     if w.secret:
         click.echo(f"Secret:  {'*' * 8} (configured)")
+    if w.rate_limit:
+        click.echo(f"Rate:    {w.rate_limit:g}/min (burst {w.burst or w.rate_limit:g})")
+    if w.coalesce_window:
+        click.echo(f"Coalesce: {w.coalesce_window:g}s")
+
+
+@webhook.command(name="outbox")
+def outbox():
+    """Show the webhook delivery queue and delivery metrics.
+
+    Queue depth is read from disk; delivery counts and latency are the last
+    snapshot written by the server's webhook workers.
+    """
+    from ..webhooks.outbox import WebhookOutbox, read_saved_metrics
+
+    depth = WebhookOutbox().depth()
+    click.echo(f"Pending:   {depth['pending']}")
+    click.echo(f"In flight: {depth['inflight']}")
+    click.echo(f"Dead:      {depth['dead']}")
+
+    metrics = read_saved_metrics()
+    if not metrics:
+        click.echo("No delivery metrics recorded yet.")
+        return
+    click.echo(f"Delivered: {metrics.get('delivered', 0)}")
+    click.echo(f"Failed attempts: {metrics.get('failed_attempts', 0)}")
+    latency = metrics.get("latency_seconds")
+    if latency:
+        click.echo(
+            f"Latency:   avg {latency['avg']}s | p50 {latency['p50']}s | "
+            f"p95 {latency['p95']}s | max {latency['max']}s"
+        )
+
+
+@webhook.command(name="deliver")
+def deliver():
+    """Send queued webhook deliveries that are due now.
+
+    The server's webhook workers do this continuously; use it when no
+    server is running. Deliveries that fail again are rescheduled or
+    dead-lettered as usual.
+    """
+    # Import providers to register them
+    from .. import webhooks  # noqa
+    from ..webhooks.outbox import WebhookOutbox
+
+    outbox = WebhookOutbox()
+    handled = outbox.deliver_due()
+    depth = outbox.depth()
+    click.echo(f"Handled {handled} delivery(ies); {depth['pending']} pending, {depth['dead']} dead.")
+
+
+@webhook.command(name="replay")
+@click.option("--webhook", "webhook_id", default=None, help="Only replay deliveries for this webhook ID")
+@click.option("--limit", type=int, default=None, help="Replay at most this many deliveries")
+@click.option("--requeue", is_flag=True, help="Hand them back to the server's delivery queue instead of sending now")
+def replay(webhook_id, limit, requeue):
+    """Redeliver dead-lettered webhook deliveries.
+
+    Deliveries that still fail stay in the dead-letter store.
+
+    Examples:
+        crashvault webhook replay
+        crashvault webhook replay --webhook abc123 --limit 50
+        crashvault webhook replay --requeue
+    """
+    # Import providers to register them
+    from .. import webhooks  # noqa
+    from ..webhooks.outbox import WebhookOutbox
+
+    outbox = WebhookOutbox()
+    jobs = list(outbox.iter_dead(webhook_id))
+    if limit is not None:
+        jobs = jobs[:limit]
+    if not jobs:
+        click.echo("No dead-lettered deliveries.")
+        return
+
+    if requeue:
+        for path, job in jobs:
+            outbox.requeue_dead(path, job)
+        click.echo(f"Requeued {len(jobs)} delivery(ies).")
+        return
+
+    delivered = failed = 0
+    for path, job in jobs:
+        error = outbox.replay_dead(path, job)
+        if error is None:
+            delivered += 1
+        else:
+            failed += 1
+            click.echo(f"✗ {job['webhook_id']} event {job['payload'].get('event_id')}: {error}", err=True)
+    click.echo(f"Replayed {delivered} delivery(ies), {failed} still failing.")
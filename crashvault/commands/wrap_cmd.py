@@ -1,6 +1,6 @@
 import click, subprocess, json, os, uuid, platform
 from datetime import datetime, timezone
-from ..core import event_path_for
+from ..core import save_event
 from ..rich_utils import get_console
 
 console = get_console()
@@ -59,11 +59,7 @@ def wrap(cmd, level, tags, exit_codes, ignore_tags):
         "host": platform.node(),
         "pid": os.getpid(),
     }
-    path = event_path_for(event_id, ts)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with open(tmp, "w") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp, path)
+    save_event(data)
     console.print(f"[error]{message}[/error]")
     if proc.stdout:
         click.echo(proc.stdout, nl=False)
@@ -0,0 +1,125 @@
+"""Compressed export files: gzip always, zstd when ``zstandard`` is installed.
+
+Exports pick the compression from ``--compress`` or the output file name
+(``.gz``, ``.zst``); imports recognise compressed files by their magic
+bytes, whatever they are called.  Exports may also be encrypted (see
+``encrypter``); compression is applied before encryption.
+"""
+
+import gzip
+import io
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from . import encrypter
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install crashvault[zstd]
+    zstandard = None
+
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+_SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+_MAGIC = {b"\x1f\x8b": "gzip", b"\x28\xb5\x2f\xfd": "zstd"}
+
+
+def compression_for_path(path) -> str:
+    """The compression implied by a file name's suffix."""
+    return _SUFFIXES.get(Path(path).suffix.lower(), "none")
+
+
+def _compression_of(head: bytes) -> str:
+    return next((name for magic, name in _MAGIC.items() if head.startswith(magic)), "none")
+
+
+def detect_compression(path) -> str:
+    """The compression of an existing file, from its magic bytes."""
+    with open(path, "rb") as f:
+        return _compression_of(f.read(4))
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+
+
+def open_read(path, key: Optional[bytes] = None) -> Tuple[BinaryIO, BinaryIO]:
+    """Open a possibly encrypted and compressed file for binary reading of its contents.
+
+    Returns ``(stream, raw)``: ``stream`` yields the plain bytes and
+    ``raw.tell()`` is how far into the file on disk reading has got.
+    Closing ``stream`` closes both.  Encrypted files need the vault
+    ``key`` they were written with.
+    """
+    raw = open(path, "rb")
+    source = raw
+    if raw.peek(len(encrypter.CHUNK_MAGIC)).startswith(encrypter.CHUNK_MAGIC):
+        if key is None:
+            raw.close()
+            raise ValueError("the file is encrypted; a vault key or password is needed")
+        source = io.BufferedReader(encrypter.ChunkedReader(raw, key))
+    compression = _compression_of(source.peek(4))
+    if compression == "gzip":
+        return _ClosingGzip(fileobj=source, mode="rb"), raw
+    if compression == "zstd":
+        _require_zstd()
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(source, closefd=True)), raw
+    return source, raw
+
+
+def skip_to(stream: BinaryIO, offset: int, chunk_size: int = 1024 * 1024):
+    """Position ``stream`` at ``offset``, reading forward if it cannot seek.
+
+    Decompressed zstd streams are not seekable; resuming one at a
+    checkpoint means decompressing and discarding everything before it.
+    """
+    if offset <= 0:
+        return
+    if stream.seekable():
+        stream.seek(offset)
+        return
+    remaining = offset
+    while remaining:
+        chunk = stream.read(min(remaining, chunk_size))
+        if not chunk:
+            raise ValueError(f"File ends before offset {offset}")
+        remaining -= len(chunk)
+
+
+class _ClosingGzip(gzip.GzipFile):
+    """A GzipFile that also closes the file object it reads from."""
+
+    def close(self):
+        fileobj = self.fileobj
+        super().close()
+        if fileobj is not None:
+            fileobj.close()
+
+
+def open_write(raw: BinaryIO, compression: str, level: Optional[int] = None) -> BinaryIO:
+    """Wrap a binary stream so that what is written to it gets compressed.
+
+    Closing the returned stream finishes the compressed data; ``raw`` stays
+    open for the caller to close.
+    """
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=level or 6, mtime=0)
+    if compression == "zstd":
+        _require_zstd()
+        return zstandard.ZstdCompressor(level=level or 3).stream_writer(raw, closefd=False)
+    return _Unclosed(raw)
+
+
+class _Unclosed:
+    """Pass-through writer whose ``close`` leaves the stream open."""
+
+    def __init__(self, raw: BinaryIO):
+        self._raw = raw
+
+    def write(self, data: bytes) -> int:
+        return self._raw.write(data)
+
+    def close(self):
+        self._raw.flush()
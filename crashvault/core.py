@@ -1,10 +1,9 @@
 from pathlib import Path
 import os, json, logging, platform, base64
 from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
-from cryptography.fernet import InvalidToken
 
-from . import encrypter
+# cryptography (via .encrypter) and logging.handlers are imported where
+# used, so commands that do not need them start faster.
 
 ENV_ROOT = os.environ.get("CRASHVAULT_HOME")
 ROOT = Path(ENV_ROOT) if ENV_ROOT else Path(os.path.expanduser("~/.crashvault"))
@@ -16,18 +15,29 @@ ATTACH_DIR = ROOT / "attachments"
 
 # Global encryption password (set when vault is opened)
 _vault_password = None
+# Derived key, when it came from the key agent rather than a password
+_vault_key = None
 
 
 def set_vault_password(password: str):
     """Set the vault password for encrypted vault operations."""
-    global _vault_password
+    global _vault_password, _vault_key
     _vault_password = password
+    _vault_key = None
+
+
+def set_vault_key(key: bytes):
+    """Unlock the vault with an already derived key (from the key agent)."""
+    global _vault_password, _vault_key
+    _vault_password = None
+    _vault_key = key
 
 
 def clear_vault_password():
-    """Clear the vault password from memory."""
-    global _vault_password
+    """Clear the vault password and key from memory."""
+    global _vault_password, _vault_key
     _vault_password = None
+    _vault_key = None
 
 
 def get_vault_password():
@@ -35,16 +45,66 @@ def get_vault_password():
     return _vault_password
 
 
+def get_vault_key():
+    """The key the vault is unlocked with, or None if it is locked."""
+    if _vault_key is not None:
+        return _vault_key
+    if not _vault_password:
+        return None
+    return derive_vault_key(_vault_password)
+
+
+def derive_vault_key(password: str) -> bytes:
+    """The key ``password`` gives for this vault, derived with the vault's own salt."""
+    from . import encrypter
+    salt = _encryption_settings()[1]
+    return encrypter.derive_key(password, base64.b64decode(salt) if salt else encrypter.LEGACY_SALT)
+
+
+def verify_vault_key(key: bytes) -> bool:
+    """Whether ``key`` opens the encrypted vault."""
+    if not ISSUES_FILE.exists():
+        return True
+    from . import encrypter
+    if encrypter.is_chunked_file(ISSUES_FILE):
+        return encrypter.verify_key(ISSUES_FILE, key)
+    try:
+        json.loads(encrypter.decrypt_file(ISSUES_FILE, key=key))
+    except Exception:
+        return False
+    return True
+
+
+# (config path, size, mtime) -> (encrypted, kdf salt); storage engines ask
+# on every lookup, so config.json is only parsed again when it changes
+_encryption_cache = (None, (False, None))
+
+
+def _encryption_settings():
+    global _encryption_cache
+    try:
+        st = CONFIG_FILE.stat()
+        sig = (str(CONFIG_FILE), st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        sig = None
+    if sig is None or sig != _encryption_cache[0]:
+        cfg = load_config()
+        _encryption_cache = (sig, (cfg.get("encrypted", False), cfg.get("kdf_salt")))
+    return _encryption_cache[1]
+
+
 def is_vault_encrypted() -> bool:
     """Check if the vault is configured as encrypted."""
-    cfg = load_config()
-    return cfg.get("encrypted", False)
+    return _encryption_settings()[0]
 
 
 def _is_encrypted_json_file(file_path: Path) -> bool:
-    """Check if a JSON file is actually encrypted (Fernet format)."""
+    """Check if a JSON file is actually encrypted (chunked or Fernet format)."""
     if not file_path.exists():
         return False
+    from . import encrypter
+    if encrypter.is_chunked_file(file_path):
+        return True
     try:
         data = file_path.read_bytes()
         # Check minimum size for Fernet token
@@ -87,6 +147,7 @@ def configure_logging():
         return logger
     logger.setLevel(logging.INFO)
     log_path = LOGS_DIR / "app.log"
+    from logging.handlers import RotatingFileHandler
     handler = RotatingFileHandler(log_path, maxBytes=1024 * 1024, backupCount=3)
     formatter = logging.Formatter(
         "%(asctime)s | %(levelname)s | %(message)s",
@@ -114,46 +175,231 @@ def event_path_for(event_id: str, ts: datetime) -> Path:
     return _event_day_dir(ts) / f"{event_id}.json"
 
 
+def parse_timestamp(value: str) -> datetime:
+    """Parse an event/issue ISO-8601 timestamp (``...Z`` or offset form)."""
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return datetime.now(timezone.utc)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def event_day_dir(timestamp):
+    """Day directory an event with this timestamp is stored under, or None if unparseable."""
+    try:
+        ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return EVENTS_DIR / ts.strftime("%Y/%m/%d")
+
+
+def _storage():
+    from .storage import get_storage
+    return get_storage()
+
+
+def issue_store_lock():
+    """Exclusive lock over the issue store, across threads and processes.
+
+    Hold it around read-modify-write sequences such as allocating a new
+    issue id, so concurrent writers cannot hand out the same id.  It is
+    re-entrant within a thread.
+    """
+    from .storage.locking import file_lock
+    return file_lock(ROOT / ".issues.lock")
+
+
 def load_issues():
-    ensure_dirs()
-    if is_vault_encrypted() and _vault_password:
-        # Encrypted vault
-        if _is_encrypted_json_file(ISSUES_FILE):
-            try:
-                decrypted = encrypter.decrypt_file(ISSUES_FILE, _vault_password)
-                return json.loads(decrypted)
-            except InvalidToken:
-                raise ValueError("Invalid password for encrypted vault")
-        else:
-            # Vault was just encrypted, file is not yet encrypted
-            pass
-    
-    with open(ISSUES_FILE, "r") as f:
-        return json.load(f)
+    return _storage().load_issues()
 
 
 def save_issues(issues):
-    if is_vault_encrypted() and _vault_password:
-        # Encrypt and save
-        data = json.dumps(issues, indent=2).encode()
-        encrypted = encrypter.encrypt_data(data, _vault_password)
-        tmp_path = ISSUES_FILE.with_suffix(ISSUES_FILE.suffix + ".tmp")
-        tmp_path.write_bytes(encrypted)
-        os.replace(tmp_path, ISSUES_FILE)
-    else:
-        _write_json_atomic(ISSUES_FILE, issues)
+    with issue_store_lock():
+        _storage().save_issues(issues)
+
+
+def get_issue(issue_id):
+    """Look up a single issue by id, or None."""
+    return _storage().get_issue(issue_id)
+
+
+def find_issue_by_fingerprint(fingerprint):
+    """Look up the issue grouping a fingerprint, or None."""
+    return _storage().find_issue_by_fingerprint(fingerprint)
+
+
+def next_issue_id():
+    """Return the id to use for a newly created issue."""
+    return _storage().next_issue_id()
+
+
+def save_issue(issue):
+    """Insert or update a single issue."""
+    with issue_store_lock():
+        _storage().save_issue(issue)
+
+
+def _search_index():
+    from .storage import search_index
+    return search_index
+
+
+def _rollups():
+    from .storage import rollups
+    return rollups
+
+
+def save_event(event):
+    """Persist a single event through the configured storage engine."""
+    save_events([event])
+
+
+def save_events(events):
+    """Persist several events in one write."""
+    events = list(events)
+    # Rollups are rebuilt from the stored events under this lock, so an
+    # append must be counted before anyone else can take it
+    with issue_store_lock():
+        _storage().append_events(events)
+        _rollups().count_events(events)
+    _search_index().index_events(events)
+
+
+def iter_events(**filters):
+    """Yield events matching ``issue_id``/``level``/``tags``/``text``/``since``/``until`` filters."""
+    return _storage().iter_events(**filters)
+
+
+def iter_events_sorted(newest_first=True, cursor=None, **filters):
+    """Lazily yield matching events by timestamp, newest first unless ``newest_first=False``.
+
+    ``cursor`` (from ``page_events``) resumes after the event it was taken at.
+    """
+    return _storage().iter_events_sorted(newest_first=newest_first, cursor=cursor, **filters)
+
+
+def page_events(limit, cursor=None, newest_first=True, offset=0, **filters):
+    """Return ``(events, next_cursor)`` for one page of matching events; next_cursor is None at the end."""
+    return _storage().page_events(limit, cursor=cursor, newest_first=newest_first, offset=offset, **filters)
+
+
+def search_events(query=None, **filters):
+    """Events matching a search ``query`` plus the ``iter_events`` filters.
+
+    Answered from the search index when it is enabled.  Raises ValueError
+    for a malformed query before any event is read.
+    """
+    return _search_index().search_events(_storage(), query=query, **filters)
+
+
+def get_event(event_id):
+    """Look up a single event by id, or None."""
+    return _storage().get_event(event_id)
+
+
+def count_events_by_level(since=None, until=None):
+    """Return a mapping of level -> number of events, optionally within a time range.
+
+    Answered from the rollup counters rather than by reading events.
+    """
+    return _rollups().count_events_by_level(_storage(), since=since, until=until)
+
+
+def count_events_by_issue():
+    """Return a mapping of issue id -> number of events, from the rollup counters."""
+    return _rollups().count_events_by_issue(_storage())
+
+
+def event_series(issue_id=None, level=None, since=None, until=None, resolution=None):
+    """Event counts per minute/hour/day bucket, from the rollup counters (see ``rollups.event_series``)."""
+    return _rollups().event_series(_storage(), issue_id=issue_id, level=level, since=since, until=until,
+                                   resolution=resolution)
+
+
+def count_issues_by_status():
+    """Return a mapping of issue status -> number of issues."""
+    return _storage().count_issues_by_status()
+
+
+def delete_issue_events(issue_id):
+    """Delete every event of one issue; returns how many were removed."""
+    removed = _storage().delete_issue_events(issue_id)
+    _search_index().unindex_issue(issue_id)
+    if removed:
+        _rollups().invalidate_rollups()
+    return removed
+
+
+def merge_issues(target_id, source_ids):
+    """Move the events of ``source_ids`` into issue ``target_id`` and delete those issues.
+
+    The target remembers their fingerprints in ``merged_fingerprints``, so
+    new events of the merged issues keep landing in it.  Returns the number
+    of events moved.
+    """
+    source_ids = set(source_ids) - {target_id}
+    moved = 0
+    with issue_store_lock():
+        issues = load_issues()
+        by_id = {i["id"]: i for i in issues}
+        target = by_id[target_id]
+        aliases = list(target.get("merged_fingerprints", []))
+        for issue_id in sorted(source_ids):
+            source = by_id[issue_id]
+            for fp in [source.get("fingerprint")] + list(source.get("merged_fingerprints", [])):
+                if fp and fp != target.get("fingerprint") and fp not in aliases:
+                    aliases.append(fp)
+        target["merged_fingerprints"] = aliases
+        save_issues(issues)
+        for issue_id in sorted(source_ids):
+            events = [dict(ev, issue_id=target_id) for ev in iter_events(issue_id=issue_id)]
+            delete_issue_events(issue_id)
+            save_events(events)
+            moved += len(events)
+        save_issues([i for i in issues if i["id"] not in source_ids])
+    return moved
+
+
+def delete_orphaned_events(valid_ids):
+    """Delete events that do not belong to any of ``valid_ids``."""
+    valid_ids = set(valid_ids)
+    removed = _storage().delete_orphaned_events(valid_ids)
+    _search_index().unindex_orphans(valid_ids)
+    if removed:
+        _rollups().invalidate_rollups()
+    return removed
+
+
+def delete_events_before(cutoff):
+    """Delete events recorded before the ``cutoff`` unix timestamp."""
+    # The search index forgets pruned events lazily, when a search hits them
+    removed = _storage().delete_events_before(cutoff)
+    if removed:
+        _rollups().invalidate_rollups()
+    return removed
+
+
+def clear_events():
+    """Delete every event in the vault (issues are kept)."""
+    _storage().clear_events()
+    _search_index().clear_search_index()
+    _rollups().clear_rollups()
+
+
+def clear_vault():
+    """Delete all issues and events."""
+    _storage().clear()
+    _search_index().clear_search_index()
+    _rollups().clear_rollups()
 
 
 def load_events():
     ensure_dirs()
-    events = []
-    for f in EVENTS_DIR.glob("**/*.json"):
-        try:
-            ev = json.loads(f.read_text())
-            events.append(ev)
-        except Exception:
-            continue
-    return events
+    return list(_storage().iter_events())
 
 
 def load_config():
@@ -185,55 +431,66 @@ def get_user_config():
 
 def encrypt_vault(password: str):
     """Encrypt the current vault with a password."""
-    global _vault_password
-    _vault_password = password
-    
-    # Update config to mark as encrypted
+    from . import encrypter
+    # Update config to mark as encrypted, with a salt of its own for the key
+    # (a vault that is already encrypted keeps the salt it was encrypted with)
     cfg = load_config()
+    if not cfg.get("encrypted"):
+        cfg["kdf_salt"] = base64.b64encode(encrypter.new_kdf_salt()).decode()
     cfg["encrypted"] = True
     save_config(cfg)
+    set_vault_password(password)
     
     # Encrypt issues file if it exists and is not already encrypted
     if ISSUES_FILE.exists() and not _is_encrypted_json_file(ISSUES_FILE):
         data = ISSUES_FILE.read_bytes()
         if data.strip():  # Only encrypt if not empty
-            encrypted = encrypter.encrypt_data(data, password)
-            ISSUES_FILE.write_bytes(encrypted)
+            encrypter.write_encrypted(ISSUES_FILE, data, get_vault_key())
+
+    # Events move to the sealed store; the search index would leak their text
+    _storage().seal_events()
+    _search_index().drop_search_index()
 
 
 def decrypt_vault(password: str):
     """Decrypt the vault with a password."""
-    global _vault_password
-    
+    from cryptography.fernet import InvalidToken
+    from . import encrypter
+    key = derive_vault_key(password)
     # Try to decrypt issues file
     if ISSUES_FILE.exists() and _is_encrypted_json_file(ISSUES_FILE):
         try:
-            decrypted = encrypter.decrypt_file(ISSUES_FILE, password)
+            decrypted = encrypter.decrypt_file(ISSUES_FILE, key=key)
             # Write decrypted content back
             ISSUES_FILE.write_bytes(decrypted)
         except InvalidToken:
             raise ValueError("Invalid password for encrypted vault")
+
+    # Sealed events are written back as plain files
+    _storage().unseal_events(key)
     
-    # Update config to mark as not encrypted
+    # Update config to mark as not encrypted; encrypting again picks a new salt
     cfg = load_config()
     cfg["encrypted"] = False
+    cfg.pop("kdf_salt", None)
     save_config(cfg)
     
     # Set the password temporarily so operations can complete
-    _vault_password = password
+    set_vault_password(password)
 
 
 def create_encrypted_vault(password: str):
     """Create a new vault that is encrypted from the start."""
-    global _vault_password
-    _vault_password = password
-    
+    from . import encrypter
     ensure_dirs()
+    cfg = load_config()
+    cfg["kdf_salt"] = base64.b64encode(encrypter.new_kdf_salt()).decode()
+    save_config(cfg)
+    set_vault_password(password)
     
     # Create empty encrypted issues file
     data = json.dumps([], indent=2).encode()
-    encrypted = encrypter.encrypt_data(data, password)
-    ISSUES_FILE.write_bytes(encrypted)
+    encrypter.write_encrypted(ISSUES_FILE, data, get_vault_key())
     
     # Update config
     cfg = load_config()
@@ -1,66 +1,360 @@
 """Encryption module for CrashVault encrypted vaults.
 
-Uses Fernet symmetric encryption from the cryptography library.
+The vault key is derived from the vault password with PBKDF2; derivation
+is deliberately slow, so each derived key is cached for the life of the
+process, and every function accepts an already derived ``key`` (as handed
+out by the key agent) instead of the password.
+
+Files are written in a chunked format that can be streamed, searched and
+appended to without decrypting the whole file::
+
+    header:  b"CVX1" | salt (16 bytes) | chunk size (u32)
+    chunk:   length (u32, top bit set on the last chunk) | nonce (12) | ciphertext + tag
+
+Each file gets a random salt, from which its own AES-256-GCM key is
+derived (HKDF) from the vault key.  Every chunk but the last holds exactly
+``chunk size`` bytes of plaintext, so the chunk holding any offset can be
+found without reading the ones before it.  The header, the chunk's index
+and whether it is the last are authenticated with each chunk, so reordered,
+modified or truncated files fail to decrypt.  Small blobs and files from
+older versions use single Fernet tokens, which are still read.
 """
+import io
 import os
 import json
+import struct
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO, Optional
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
 
+KDF_ITERATIONS = 100000
+
+CHUNK_MAGIC = b"CVX1"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+_HEADER = struct.Struct(">4s16sI")
+_LENGTH = struct.Struct(">I")
+_FINAL = 0x80000000
+_NONCE_SIZE = 12
+_TAG_SIZE = 16
+
+
+class DecryptionError(InvalidToken, ValueError):
+    """Wrong key, or the encrypted file was modified or truncated."""
+
+
+# Vaults and password-protected exports written by older versions use this
+# fixed salt; newer vaults store a random one in their config, and exports
+# use the salt of their chunked file header
+LEGACY_SALT = b"crashvault_salt_v1"
 
-def _derive_key(password: str) -> bytes:
-    """Derive a Fernet key from a password using PBKDF2."""
-    salt = b"crashvault_salt_v1"  # Fixed salt for consistency
+
+def new_kdf_salt() -> bytes:
+    """A random salt for deriving a new vault's key."""
+    return os.urandom(16)
+
+
+@lru_cache(maxsize=8)
+def derive_key(password: str, salt: bytes = LEGACY_SALT) -> bytes:
+    """Derive a Fernet key from a password and salt using PBKDF2 (cached per process)."""
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
         salt=salt,
-        iterations=100000,
+        iterations=KDF_ITERATIONS,
     )
     key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
     return key
 
 
-def encrypt_data(data: bytes, password: str) -> bytes:
-    """Encrypt data with a password."""
-    key = _derive_key(password)
-    f = Fernet(key)
-    return f.encrypt(data)
+def _fernet(password: Optional[str], key: Optional[bytes]) -> Fernet:
+    if key is None:
+        if password is None:
+            raise ValueError("A password or key is required")
+        key = derive_key(password)
+    return Fernet(key)
+
+
+def encrypt_data(data: bytes, password: Optional[str] = None, key: Optional[bytes] = None) -> bytes:
+    """Encrypt data with a password or derived key."""
+    return _fernet(password, key).encrypt(data)
+
+
+def decrypt_data(data: bytes, password: Optional[str] = None, key: Optional[bytes] = None) -> bytes:
+    """Decrypt data with a password or derived key. Raises InvalidToken if it is wrong."""
+    return _fernet(password, key).decrypt(data)
+
+
+def derive_subkey(key: bytes, purpose: bytes, salt: Optional[bytes] = None) -> bytes:
+    """A 32-byte key for one ``purpose``, derived from the vault key (HKDF)."""
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=purpose)
+    return hkdf.derive(base64.urlsafe_b64decode(key))
+
+
+def _file_key(key: bytes, salt: bytes) -> AESGCM:
+    return AESGCM(derive_subkey(key, b"crashvault chunked v1", salt))
+
+
+def _chunk_aad(header: bytes, index: int, final: bool) -> bytes:
+    return header + struct.pack(">QB", index, final)
+
+
+class ChunkedWriter:
+    """Encrypt what is written to it into ``raw`` in the chunked format.
+
+    Closing the writer writes the last chunk; ``raw`` is closed too only
+    with ``closefd``.
+    """
+
+    def __init__(self, raw: BinaryIO, key: bytes, chunk_size: int = DEFAULT_CHUNK_SIZE, closefd: bool = False,
+                 salt: Optional[bytes] = None, _resume=None):
+        self._raw = raw
+        self._closefd = closefd
+        if _resume is None:
+            salt = salt or os.urandom(16)
+            self._header = _HEADER.pack(CHUNK_MAGIC, salt, chunk_size)
+            raw.write(self._header)
+            self._index, self._buf = 0, bytearray()
+        else:
+            self._header, salt, chunk_size, self._index, self._buf = _resume
+        self._chunk_size = chunk_size
+        self._aead = _file_key(key, salt)
+        self.closed = False
+
+    @classmethod
+    def append(cls, raw: BinaryIO, key: bytes, closefd: bool = False) -> "ChunkedWriter":
+        """Continue a chunked file; ``raw`` must be open for reading and writing.
+
+        The last chunk is decrypted and written again (with a fresh nonce)
+        once the appended data follows it.
+        """
+        raw.seek(0)
+        header = raw.read(_HEADER.size)
+        magic, salt, chunk_size = _parse_header(header)
+        size = raw.seek(0, io.SEEK_END)
+        full = _LENGTH.size + _NONCE_SIZE + chunk_size + _TAG_SIZE
+        index = (size - _HEADER.size - 1) // full
+        raw.seek(_HEADER.size + index * full)
+        aead = _file_key(key, salt)
+        last = _read_chunk(raw, aead, header, index)
+        if last is None or not last[1]:
+            raise DecryptionError("The encrypted file is truncated")
+        raw.seek(_HEADER.size + index * full)
+        raw.truncate()
+        return cls(raw, key, closefd=closefd, _resume=(header, salt, chunk_size, index, bytearray(last[0])))
+
+    def _emit(self, data: bytes, final: bool):
+        nonce = os.urandom(_NONCE_SIZE)
+        sealed = self._aead.encrypt(nonce, data, _chunk_aad(self._header, self._index, final))
+        self._raw.write(_LENGTH.pack(len(sealed) | (_FINAL if final else 0)) + nonce + sealed)
+        self._index += 1
+
+    def write(self, data: bytes) -> int:
+        self._buf += data
+        # Keep at least one byte back: the last chunk is only known at close
+        while len(self._buf) > self._chunk_size:
+            self._emit(bytes(self._buf[:self._chunk_size]), False)
+            del self._buf[:self._chunk_size]
+        return len(data)
+
+    def flush(self):
+        self._raw.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self._emit(bytes(self._buf), True)
+        self._buf = bytearray()
+        self.closed = True
+        if self._closefd:
+            self._raw.close()
+        else:
+            self._raw.flush()
+
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc):
+        self.close()
 
-def decrypt_data(data: bytes, password: str) -> bytes:
-    """Decrypt data with a password. Raises InvalidToken if password is wrong."""
-    key = _derive_key(password)
-    f = Fernet(key)
-    return f.decrypt(data)
+
+def _parse_header(header: bytes):
+    if len(header) != _HEADER.size or not header.startswith(CHUNK_MAGIC):
+        raise DecryptionError("Not a chunked encrypted file")
+    return _HEADER.unpack(header)
+
+
+def _read_chunk(raw: BinaryIO, aead: AESGCM, header: bytes, index: int):
+    """``(plaintext, final)`` of the chunk at the position of ``raw``; None at the end of the file."""
+    head = raw.read(_LENGTH.size)
+    if not head:
+        return None
+    if len(head) < _LENGTH.size:
+        raise DecryptionError("The encrypted file is truncated")
+    (length,) = _LENGTH.unpack(head)
+    final = bool(length & _FINAL)
+    length &= ~_FINAL
+    body = raw.read(_NONCE_SIZE + length)
+    if len(body) < _NONCE_SIZE + length:
+        raise DecryptionError("The encrypted file is truncated")
+    try:
+        data = aead.decrypt(body[:_NONCE_SIZE], body[_NONCE_SIZE:], _chunk_aad(header, index, final))
+    except InvalidTag:
+        raise DecryptionError("Wrong key, or the encrypted file was modified")
+    return data, final
+
+
+class ChunkedReader(io.RawIOBase):
+    """Decrypt a chunked file while reading it; wrap in ``io.BufferedReader`` for lines.
+
+    Seeking is supported (when ``raw`` is seekable) and decrypts only the
+    chunk holding the new position.
+    """
+
+    def __init__(self, raw: BinaryIO, key: bytes, closefd: bool = True):
+        super().__init__()
+        self._raw = raw
+        self._closefd = closefd
+        self._header = raw.read(_HEADER.size)
+        _, salt, self._chunk_size = _parse_header(self._header)
+        self._aead = _file_key(key, salt)
+        self._index = 0
+        self._buf = b""
+        self._pos = 0
+        self._buf_start = 0
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._raw.seekable()
+
+    def _next_chunk(self) -> bool:
+        if self._done:
+            return False
+        chunk = _read_chunk(self._raw, self._aead, self._header, self._index)
+        if chunk is None:
+            raise DecryptionError("The encrypted file is truncated")
+        self._buf_start = self._index * self._chunk_size
+        self._buf, self._done = chunk
+        self._pos = 0
+        self._index += 1
+        return True
+
+    def readinto(self, b) -> int:
+        while self._pos >= len(self._buf):
+            if not self._next_chunk():
+                return 0
+        n = min(len(b), len(self._buf) - self._pos)
+        b[:n] = self._buf[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def tell(self) -> int:
+        return self._buf_start + self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only seek from the start or the current position")
+        # At a chunk boundary, stay at the end of the previous chunk: it may be the last
+        index = max(offset - 1, 0) // self._chunk_size
+        full = _LENGTH.size + _NONCE_SIZE + self._chunk_size + _TAG_SIZE
+        self._raw.seek(_HEADER.size + index * full)
+        self._index, self._done = index, False
+        self._buf, self._pos, self._buf_start = b"", 0, index * self._chunk_size
+        if offset > self._buf_start and self._next_chunk():
+            self._pos = min(offset - self._buf_start, len(self._buf))
+        return offset
+
+    def close(self):
+        if not self.closed and self._closefd:
+            self._raw.close()
+        super().close()
+
+
+def is_chunked_file(file_path: Path) -> bool:
+    """Whether a file is in the chunked encrypted format."""
+    try:
+        with open(file_path, "rb") as f:
+            return f.read(len(CHUNK_MAGIC)) == CHUNK_MAGIC
+    except OSError:
+        return False
+
+
+def file_salt(file_path: Path) -> bytes:
+    """The random salt in the header of a chunked file.
+
+    Password-encrypted exports derive their key from the password and this
+    salt (see :func:`derive_key`), so they open in any vault.
+    """
+    with open(file_path, "rb") as f:
+        return _parse_header(f.read(_HEADER.size))[1]
+
+
+def open_decrypted(file_path: Path, key: bytes) -> io.BufferedReader:
+    """Open a chunked encrypted file for reading its plaintext."""
+    return io.BufferedReader(ChunkedReader(open(file_path, "rb"), key))
+
+
+def write_encrypted(file_path: Path, data: bytes, key: bytes) -> None:
+    """Atomically replace ``file_path`` with ``data`` in the chunked format."""
+    tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as raw, ChunkedWriter(raw, key) as writer:
+        writer.write(data)
+    os.replace(tmp_path, file_path)
+
+
+def verify_key(file_path: Path, key: bytes) -> bool:
+    """Whether ``key`` decrypts a chunked file, checking only its first chunk."""
+    try:
+        with open_decrypted(file_path, key) as f:
+            f.read(1)
+    except DecryptionError:
+        return False
+    return True
 
 
-def encrypt_file(file_path: Path, password: str) -> None:
-    """Encrypt a JSON file in place."""
+def encrypt_file(file_path: Path, password: Optional[str] = None, key: Optional[bytes] = None) -> None:
+    """Encrypt a file in place (in the chunked format)."""
     if not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
     
-    data = file_path.read_bytes()
-    encrypted = encrypt_data(data, password)
-    file_path.write_bytes(encrypted)
+    if key is None:
+        key = derive_key(password)
+    tmp_path = file_path.with_suffix(file_path.suffix + ".tmp")
+    with open(file_path, "rb") as src, open(tmp_path, "wb") as raw, ChunkedWriter(raw, key) as writer:
+        for block in iter(lambda: src.read(DEFAULT_CHUNK_SIZE), b""):
+            writer.write(block)
+    os.replace(tmp_path, file_path)
 
 
-def decrypt_file(file_path: Path, password: str) -> bytes:
-    """Decrypt an encrypted file and return the decrypted content."""
+def decrypt_file(file_path: Path, password: Optional[str] = None, key: Optional[bytes] = None) -> bytes:
+    """Decrypt an encrypted file (chunked or a Fernet token) and return its content."""
     if not file_path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
     
+    if is_chunked_file(file_path):
+        with open_decrypted(file_path, key if key is not None else derive_key(password)) as f:
+            return f.read()
     encrypted_data = file_path.read_bytes()
-    return decrypt_data(encrypted_data, password)
+    return decrypt_data(encrypted_data, password, key)
 
 
 def is_encrypted_file(file_path: Path) -> bool:
-    """Check if a file appears to be encrypted (starts with Fernet token)."""
+    """Check if a file appears to be encrypted (chunked, or starts with Fernet token)."""
     if not file_path.exists():
         return False
+    if is_chunked_file(file_path):
+        return True
     
     try:
         data = file_path.read_bytes()
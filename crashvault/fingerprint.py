@@ -0,0 +1,223 @@
+"""Fingerprinting - decides which issue an event is grouped into.
+
+The strategy is picked per vault in config.json::
+
+    {"grouping": {"strategy": "stack", "frames": 5}}
+
+``message``
+    SHA-1 of the raw message.  The historical behaviour and the default, so
+    existing vaults keep grouping new events into their existing issues.
+``normalized``
+    The message with variable tokens (numbers, UUIDs, hex ids, timestamps,
+    IP and e-mail addresses) replaced by placeholders, so "User 42 not
+    found" and "User 7 not found" are one issue.
+``stack``
+    The exception type plus the innermost ``frames`` in-app stack frames
+    (file name and function, without line numbers, which move with every
+    deploy).  Frames from ``site-packages``, ``node_modules``, the standard
+    library and the JVM are skipped; ``in_app_exclude`` adds more path
+    fragments.  Events without a parseable stacktrace fall back to
+    ``normalized``.
+
+Changing the strategy only affects new events; ``crashvault regroup``
+re-fingerprints the stored ones and merges or splits issues to match.
+
+Fingerprints are full 40-character SHA-1 digests.  Vaults written before
+keyed issues by the first 8 characters, which collide by the birthday
+bound at around 65k distinct errors and silently merged them.  Such issues
+are re-keyed by ``regroup``, or one by one by :func:`find_issue` when their
+next event arrives.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from .core import load_config
+
+
+logger = logging.getLogger("crashvault")
+
+DEFAULT_STRATEGY = "message"
+DEFAULT_FRAMES = 5
+FINGERPRINT_LENGTH = 40
+LEGACY_FINGERPRINT_LENGTH = 8
+
+_NORMALIZERS = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?\b"), "<ts>"),
+    (re.compile(r"\b\d{2}:\d{2}:\d{2}(?:\.\d+)?\b"), "<ts>"),
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+"), "<email>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b", re.I), "<hex>"),
+    (re.compile(r"\b(?=[0-9a-f]*\d)[0-9a-f]{12,}\b", re.I), "<hex>"),
+    (re.compile(r"(?<![\w.])\d+(?:\.\d+)?"), "<num>"),
+]
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_PYTHON_FRAME_RE = re.compile(r'File "(?P<file>[^"]+)", line \d+, in (?P<func>\S+)')
+_JAVA_FRAME_RE = re.compile(r"^\s*at (?P<func>[\w$.<>/]+)\((?P<file>[^():]*)(?::\d+)?\)\s*$")
+_JS_FRAME_RE = re.compile(r"^\s*at (?:(?P<func>.+?) \()?(?P<file>[^\s()]+?)(?::\d+){1,2}\)?\s*$")
+_EXCEPTION_TYPE_RE = re.compile(r"^\s*([A-Za-z_][\w.]*(?:Error|Exception|Exit|Interrupt|Warning|Fault))\b")
+
+_NOT_IN_APP = (
+    "site-packages", "dist-packages", "node_modules", "/lib/python", "\\lib\\python",
+    "<frozen", "<string>", "node:", "internal/",
+)
+_JVM_PACKAGES = ("java.", "javax.", "jdk.", "sun.", "kotlin.", "scala.")
+
+
+def normalize_message(message: str) -> str:
+    """Replace the variable tokens of a message with placeholders."""
+    for pattern, placeholder in _NORMALIZERS:
+        message = pattern.sub(placeholder, message)
+    return _WHITESPACE_RE.sub(" ", message).strip()
+
+
+def exception_type(message: str) -> Optional[str]:
+    """The exception class a message starts with (``KeyError: 'x'`` -> ``KeyError``), if any."""
+    match = _EXCEPTION_TYPE_RE.match(message or "")
+    return match.group(1) if match else None
+
+
+def parse_frames(stacktrace: str) -> List[Tuple[str, str]]:
+    """``(file, function)`` of each frame, innermost first.
+
+    Understands Python tracebacks and JavaScript / JVM ``at ...`` lines.
+    """
+    if not stacktrace:
+        return []
+    frames = [(m.group("file"), m.group("func")) for m in _PYTHON_FRAME_RE.finditer(stacktrace)]
+    if frames:
+        # Python prints the most recent call last
+        return frames[::-1]
+    for line in stacktrace.splitlines():
+        match = _JAVA_FRAME_RE.match(line) or _JS_FRAME_RE.match(line)
+        if match:
+            frames.append((match.group("file") or "", match.group("func") or "<anonymous>"))
+    return frames
+
+
+def is_in_app(frame: Tuple[str, str], exclude: Tuple[str, ...] = ()) -> bool:
+    path, func = frame
+    if any(part in path for part in _NOT_IN_APP + exclude):
+        return False
+    # JVM frames may carry a module prefix: java.base/java.lang.Thread.run
+    return not func.rsplit("/", 1)[-1].startswith(_JVM_PACKAGES)
+
+
+class GroupingStrategy:
+    """Base class of fingerprinting strategies."""
+
+    name = ""
+
+    def __init__(self, options: Optional[Dict[str, Any]] = None):
+        self.options = options or {}
+
+    def components(self, message: str, stacktrace: str) -> List[str]:
+        """The values the fingerprint is derived from."""
+        raise NotImplementedError
+
+    def fingerprint(self, message: str, stacktrace: str = "") -> str:
+        data = "\n".join(self.components(message or "", stacktrace or ""))
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()[:FINGERPRINT_LENGTH]
+
+
+class MessageStrategy(GroupingStrategy):
+    name = "message"
+
+    def components(self, message, stacktrace):
+        return [message]
+
+
+class NormalizedStrategy(GroupingStrategy):
+    name = "normalized"
+
+    def components(self, message, stacktrace):
+        return [normalize_message(message)]
+
+
+class StackStrategy(GroupingStrategy):
+    name = "stack"
+
+    def components(self, message, stacktrace):
+        frames = parse_frames(stacktrace)
+        if not frames:
+            return NormalizedStrategy().components(message, stacktrace)
+        exclude = tuple(self.options.get("in_app_exclude") or ())
+        in_app = [f for f in frames if is_in_app(f, exclude)] or frames
+        limit = int(self.options.get("frames", DEFAULT_FRAMES))
+        head = exception_type(message) or normalize_message(message)
+        return [head] + [f"{os.path.basename(path.replace(os.sep, '/'))}:{func}" for path, func in in_app[:limit]]
+
+
+_STRATEGIES: Dict[str, Type[GroupingStrategy]] = {}
+
+
+def register_strategy(name: str, strategy_class: Type[GroupingStrategy]):
+    """Register a fingerprinting strategy."""
+    _STRATEGIES[name] = strategy_class
+
+
+def available_strategies() -> List[str]:
+    return sorted(_STRATEGIES)
+
+
+register_strategy("message", MessageStrategy)
+register_strategy("normalized", NormalizedStrategy)
+register_strategy("stack", StackStrategy)
+
+
+def grouping_config(cfg: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    cfg = cfg if cfg is not None else load_config()
+    grouping = cfg.get("grouping", {})
+    return grouping if isinstance(grouping, dict) else {}
+
+
+def get_strategy(name: Optional[str] = None, cfg: Optional[Dict[str, Any]] = None) -> GroupingStrategy:
+    """The named strategy, or the one configured for the vault, with its options."""
+    options = grouping_config(cfg)
+    name = name or options.get("strategy", DEFAULT_STRATEGY)
+    strategy_class = _STRATEGIES.get(name)
+    if strategy_class is None:
+        raise ValueError(f"Unknown grouping strategy: {name} (available: {', '.join(available_strategies())})")
+    return strategy_class(options)
+
+
+def fingerprint_event(message: str, stacktrace: str = "", cfg: Optional[Dict[str, Any]] = None) -> str:
+    """Fingerprint of an event under the vault's grouping strategy."""
+    return get_strategy(cfg=cfg).fingerprint(message, stacktrace)
+
+
+def find_issue(storage, fingerprint: str, title: str, strategy: Optional[GroupingStrategy] = None):
+    """The issue grouping ``fingerprint``, adopting a legacy 8-character issue.
+
+    On a miss, an issue keyed by the legacy prefix of ``fingerprint`` is
+    re-keyed to the full fingerprint, but only if its title fingerprints
+    the same as ``title`` (the new event's title).  Otherwise the prefixes
+    merely collide: the collision is logged and None is returned, so the
+    event gets an issue of its own.  Callers hold ``issue_store_lock``.
+    """
+    issue = storage.find_issue_by_fingerprint(fingerprint)
+    if issue is not None or len(fingerprint) <= LEGACY_FINGERPRINT_LENGTH:
+        return issue
+    legacy = storage.find_issue_by_fingerprint(fingerprint[:LEGACY_FINGERPRINT_LENGTH])
+    if legacy is None:
+        return None
+    strategy = strategy or get_strategy()
+    if strategy.fingerprint(legacy.get("title", "")[:80]) != strategy.fingerprint(title[:80]):
+        logger.warning(
+            f"fingerprint collision: {fingerprint} shares its legacy prefix with issue #{legacy['id']} "
+            f"({legacy.get('title', '')!r}); grouping separately"
+        )
+        return None
+    if legacy.get("fingerprint") == fingerprint[:LEGACY_FINGERPRINT_LENGTH]:
+        legacy["fingerprint"] = fingerprint
+    else:
+        # Matched through a merged fingerprint
+        legacy["merged_fingerprints"] = [fingerprint if fp == fingerprint[:LEGACY_FINGERPRINT_LENGTH] else fp
+                                         for fp in legacy.get("merged_fingerprints", [])]
+    storage.save_issue(legacy)
+    return legacy
@@ -0,0 +1,378 @@
+"""Streaming import of export documents - behind ``crashvault import``.
+
+The export (JSON, or NDJSON records as written by ``export --format
+ndjson``; either may be gzip or zstd compressed, and encrypted) is parsed
+incrementally, so memory use does not grow with the file.  Its issues are
+merged into the vault with one save of the issue list; events are then
+resolved through hash maps and stored in batches through the ingest
+writer's commit path, so each batch is one append (and one issue save if
+it created issues).
+
+After every batch a checkpoint (``imports/<digest>.json`` in the vault)
+records the byte offset of the next event, so an interrupted import of a
+large file continues with ``--resume`` instead of starting over.  A crash
+between storing a batch and recording it repeats at most that batch.
+"""
+
+import codecs
+import hashlib
+import json
+import os
+import platform
+import re
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import core
+from .compression import open_read, skip_to
+from .fingerprint import get_strategy
+from .ingest import commit_events
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_BATCH_SIZE = 1000
+CHECKPOINT_DIR_NAME = "imports"
+NDJSON_TYPES = ("header", "issue", "event")
+NDJSON_PROBE_BYTES = 1 << 16
+
+_NON_WHITESPACE_RE = re.compile(r"[^ \t\r\n]")
+
+
+class JSONStream:
+    """Incremental reader of a JSON document of the shape ``{"key": value, ...}``.
+
+    Values are read whole, except arrays, whose elements can be read one at
+    a time with :meth:`items`.  ``offset`` is the byte offset of the next
+    unread character, so reading can later continue from it.
+    """
+
+    def __init__(self, f, offset: int = 0, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        skip_to(f, offset)
+        self.offset = offset
+        self.chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self._eof = not chunk
+        if self._pos:
+            self._buf, self._pos = self._buf[self._pos:], 0
+        self._buf += self._decoder.decode(chunk, final=self._eof)
+        return not self._eof
+
+    def _advance(self, n: int):
+        self.offset += len(self._buf[self._pos:self._pos + n].encode("utf-8"))
+        self._pos += n
+
+    def peek(self) -> str:
+        """The next non-whitespace character ("" at the end of the file)."""
+        while True:
+            match = _NON_WHITESPACE_RE.search(self._buf, self._pos)
+            # Whitespace is ASCII: one byte per character
+            end = match.start() if match else len(self._buf)
+            self.offset += end - self._pos
+            self._pos = end
+            if match or not self._fill():
+                return self._buf[self._pos:self._pos + 1]
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} at byte {self.offset}, found {found or 'end of file'!r}")
+        self._advance(1)
+
+    def value(self) -> Any:
+        """Read the JSON value at the cursor."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON at byte {self.offset}")
+            # A number may continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._advance(end - self._pos)
+            return value
+
+    def keys(self) -> Iterator[str]:
+        """Yield the keys of the object at the cursor; the caller reads each value."""
+        self.expect("{")
+        while True:
+            char = self.peek()
+            if char == "}":
+                self._advance(1)
+                return
+            if char == ",":
+                self._advance(1)
+                continue
+            key = self.value()
+            self.expect(":")
+            yield key
+
+    def skip(self):
+        """Skip the value at the cursor, element by element if it is an array."""
+        if self.peek() == "[":
+            for _ in self.items():
+                pass
+        else:
+            self.value()
+
+    def items(self, opened: bool = False) -> Iterator[Tuple[int, Any]]:
+        """Yield ``(offset, element)`` for the array at the cursor.
+
+        With ``opened`` the cursor is already inside the array, as when
+        continuing from the offset of one of its elements.
+        """
+        if not opened:
+            self.expect("[")
+        while True:
+            char = self.peek()
+            if char == "]":
+                self._advance(1)
+                return
+            if char == ",":
+                self._advance(1)
+                continue
+            if not char:
+                raise ValueError("Unexpected end of file inside an array")
+            start = self.offset
+            yield start, self.value()
+
+
+def find_array(path: Path, key: str, vault_key: Optional[bytes] = None) -> Iterator[Tuple[int, Any]]:
+    """Stream the elements of the top-level ``key`` array of a document (nothing if absent)."""
+    f, _ = open_read(path, vault_key)
+    with f:
+        stream = JSONStream(f)
+        for name in stream.keys():
+            if name == key and stream.peek() == "[":
+                yield from stream.items()
+                return
+            stream.skip()
+
+
+def detect_format(path: Path, vault_key: Optional[bytes] = None) -> str:
+    """``ndjson`` if the (uncompressed) file starts with an NDJSON record, else ``json``."""
+    f, _ = open_read(path, vault_key)
+    with f:
+        line = f.readline(NDJSON_PROBE_BYTES)
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return "json"
+    return "ndjson" if isinstance(record, dict) and record.get("type") in NDJSON_TYPES else "json"
+
+
+def _json_events(path: Path, offset: Optional[int], vault_key: Optional[bytes]) -> Iterator[Tuple[int, int, Any]]:
+    """``(offset after, file position, event)`` for the events of a JSON export."""
+    f, raw = open_read(path, vault_key)
+    with f:
+        if offset is None:
+            stream = JSONStream(f)
+            for name in stream.keys():
+                if name == "events" and stream.peek() == "[":
+                    break
+                stream.skip()
+            else:
+                return
+            items = stream.items()
+        else:
+            stream = JSONStream(f, offset)
+            items = stream.items(opened=True)
+        for _, ev in items:
+            yield stream.offset, raw.tell(), ev
+
+
+def _ndjson_records(path: Path, offset: int = 0,
+                    vault_key: Optional[bytes] = None) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """``(offset after, file position, record)`` for the lines of an NDJSON export."""
+    f, raw = open_read(path, vault_key)
+    with f:
+        skip_to(f, offset)
+        for line in f:
+            offset += len(line)
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    raise ValueError(f"Invalid JSON line ending at byte {offset}")
+                yield offset, raw.tell(), record
+
+
+def _ndjson_issues(path: Path, vault_key: Optional[bytes]) -> Iterator[Tuple[int, Any]]:
+    for offset, _, record in _ndjson_records(path, 0, vault_key):
+        if record.get("type") == "event":
+            return
+        if record.get("type") == "issue":
+            yield offset, record.get("data", {})
+
+
+def _ndjson_events(path: Path, offset: Optional[int], vault_key: Optional[bytes]) -> Iterator[Tuple[int, int, Any]]:
+    for end, position, record in _ndjson_records(path, offset or 0, vault_key):
+        if record.get("type") == "event":
+            yield end, position, record.get("data", {})
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Checkpoint:
+    """Progress of one import, kept in the vault until it completes."""
+
+    def __init__(self, source: Path):
+        self.source = source
+        digest = hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:16]
+        self.path = core.ROOT / CHECKPOINT_DIR_NAME / f"{digest}.json"
+
+    def _signature(self) -> Dict[str, Any]:
+        st = self.source.stat()
+        return {"source": str(self.source), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """The saved state, if there is one for the current version of the source file."""
+        try:
+            state = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return None
+        sig = self._signature()
+        return state if all(state.get(k) == v for k, v in sig.items()) else None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def save(self, state: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        core._write_json_atomic(self.path, dict(state, **self._signature()))
+
+    def remove(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def merge_incoming_issues(incoming: Iterator[Tuple[int, Dict[str, Any]]], grouping) -> Tuple[Dict[str, int], int]:
+    """Merge incoming issues into the vault with a single save.
+
+    Issues matching a local fingerprint update its title and status; the
+    others are added with new ids.  Returns ``(id_map, count)``, mapping
+    incoming issue ids (as strings) to local ones.
+    """
+    with core.issue_store_lock():
+        existing = core.load_issues()
+        by_fp = {i.get("fingerprint"): i for i in existing}
+        next_id = max((i["id"] for i in existing), default=0) + 1
+        id_map: Dict[str, int] = {}
+        count = 0
+        for _, issue in incoming:
+            count += 1
+            fp = issue.get("fingerprint")
+            local = by_fp.get(fp) if fp else None
+            if local is not None:
+                local["title"] = issue.get("title", local["title"])[:200]
+                local["status"] = issue.get("status", local.get("status", "open"))
+            else:
+                local = {
+                    "id": next_id,
+                    "fingerprint": fp or grouping.fingerprint(issue.get("title", "")),
+                    "title": issue.get("title", "")[:200],
+                    "status": issue.get("status", "open"),
+                    "created_at": issue.get("created_at", _now()),
+                }
+                existing.append(local)
+                by_fp[local["fingerprint"]] = local
+                next_id += 1
+            if issue.get("id") is not None:
+                id_map[str(issue["id"])] = local["id"]
+        core.save_issues(existing)
+    return id_map, count
+
+
+def _draft(ev: Dict[str, Any], id_map: Dict[str, int], local_ids, grouping) -> Dict[str, Any]:
+    event = {
+        "event_id": str(uuid.uuid4()),
+        "message": ev.get("message", ""),
+        "stacktrace": ev.get("stacktrace", ""),
+        "timestamp": _now(),
+        "level": ev.get("level", "error"),
+        "tags": ev.get("tags", []),
+        "context": ev.get("context", {}),
+        "host": platform.node(),
+        "pid": os.getpid(),
+    }
+    issue_id = ev.get("issue_id")
+    if str(issue_id) in id_map:
+        return {"issue_id": id_map[str(issue_id)], "event": event}
+    if issue_id in local_ids:
+        return {"issue_id": issue_id, "event": event}
+    return {
+        "fingerprint": grouping.fingerprint(event["message"], event["stacktrace"]),
+        "title": event["message"][:200],
+        "event": event,
+    }
+
+
+def import_file(path: Path, mode: str = "merge", resume: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+                progress: Optional[Callable[[int], None]] = None, vault_key: Optional[bytes] = None) -> Dict[str, int]:
+    """Import an export document; returns ``{"issues": n, "events": n}``.
+
+    The file may be a JSON or NDJSON export, gzip or zstd compressed, and
+    encrypted with ``vault_key`` (default: the open vault's key).
+    ``progress`` is called after each batch with how many bytes of the file
+    have been read.  With ``resume`` the import continues from the
+    checkpoint of an earlier, interrupted run of the same file.
+    """
+    path = Path(path)
+    checkpoint = Checkpoint(path)
+    state = checkpoint.load() if resume else None
+    grouping = get_strategy()
+    if vault_key is None:
+        vault_key = core.get_vault_key()
+    ndjson = detect_format(path, vault_key) == "ndjson"
+
+    if state is None:
+        if mode == "replace":
+            core.save_issues([])
+            core.clear_events()
+        incoming = _ndjson_issues(path, vault_key) if ndjson else find_array(path, "issues", vault_key)
+        id_map, issue_count = merge_incoming_issues(incoming, grouping)
+        state = {"id_map": id_map, "issues": issue_count, "events": 0, "offset": None}
+        checkpoint.save(state)
+
+    local_ids = {i["id"] for i in core.load_issues()}
+    id_map = state["id_map"]
+    batch: List[Dict[str, Any]] = []
+
+    def flush(offset, position):
+        commit_events(batch)
+        state["events"] += len(batch)
+        state["offset"] = offset
+        checkpoint.save(state)
+        batch.clear()
+        if progress:
+            progress(position)
+
+    events = (_ndjson_events if ndjson else _json_events)(path, state["offset"], vault_key)
+    end = position = None
+    for end, position, ev in events:
+        if isinstance(ev, dict):
+            batch.append(_draft(ev, id_map, local_ids, grouping))
+        if len(batch) >= batch_size:
+            flush(end, position)
+    if batch:
+        flush(end, position)
+
+    checkpoint.remove()
+    return {"issues": state["issues"], "events": state["events"]}
@@ -0,0 +1,207 @@
+"""Group-commit ingestion for the HTTP server.
+
+Request handlers do not write to the vault themselves.  They hand their
+events to a single :class:`GroupCommitWriter`, which gathers events from
+all concurrent requests and commits them together - one issue-store save
+and one batched event append - every ``commit_interval_ms`` milliseconds
+or as soon as ``commit_max_events`` events are waiting.  Each request is
+acknowledged only after the commit containing its events has finished.
+
+Tuning lives in the ``server`` section of config.json::
+
+    {"server": {"commit_interval_ms": 5, "commit_max_events": 1000}}
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .core import issue_store_lock
+from .fingerprint import find_issue
+from .storage import get_storage
+from .storage.rollups import count_events
+from .storage.search_index import index_events
+
+logger = logging.getLogger("crashvault")
+
+DEFAULT_COMMIT_INTERVAL_MS = 5
+DEFAULT_COMMIT_MAX_EVENTS = 1000
+
+
+def commit_events(drafts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Resolve issues for a list of event drafts and store them in one commit.
+
+    A draft is ``{"fingerprint": ..., "title": ..., "event": {...}}`` where
+    the event still lacks its ``issue_id``; a draft with an ``issue_id``
+    instead of a fingerprint goes to that issue as is.  Returns one
+    ``{"event_id", "issue_id", "issue_created", "event"}`` dict per draft,
+    in order.
+    """
+    with issue_store_lock():
+        return _commit_events(get_storage(), drafts)
+
+
+def _commit_events(storage, drafts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    known: Dict[str, Dict[str, Any]] = {}
+    new_issues: List[Dict[str, Any]] = []
+    next_id: Optional[int] = None
+    results = []
+    events = []
+
+    for draft in drafts:
+        fp = draft.get("fingerprint")
+        issue = known.get(fp) if "issue_id" not in draft else {"id": draft["issue_id"]}
+        created = False
+        if issue is None:
+            issue = find_issue(storage, fp, draft["title"])
+            if issue is None:
+                if next_id is None:
+                    next_id = storage.next_issue_id()
+                issue = {
+                    "id": next_id,
+                    "fingerprint": fp,
+                    "title": draft["title"],
+                    "status": "open",
+                    "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                }
+                next_id += 1
+                new_issues.append(issue)
+                created = True
+            known[fp] = issue
+
+        event = dict(draft["event"], issue_id=issue["id"])
+        events.append(event)
+        results.append({
+            "event_id": event["event_id"],
+            "issue_id": issue["id"],
+            "issue_created": created,
+            "event": event,
+        })
+
+    if new_issues:
+        storage.add_issues(new_issues)
+    if events:
+        storage.append_events(events)
+        index_events(events)
+        count_events(events)
+    return results
+
+
+class _Pending:
+    __slots__ = ("drafts", "future")
+
+    def __init__(self, drafts: List[Dict[str, Any]]):
+        self.drafts = drafts
+        self.future: Future = Future()
+
+
+class GroupCommitWriter:
+    """Single background writer that coalesces events into group commits."""
+
+    def __init__(self, commit_interval_ms: float = DEFAULT_COMMIT_INTERVAL_MS,
+                 commit_max_events: int = DEFAULT_COMMIT_MAX_EVENTS):
+        self.commit_interval = max(commit_interval_ms, 0) / 1000.0
+        self.commit_max_events = max(int(commit_max_events), 1)
+        self._queue: List[_Pending] = []
+        self._queued_events = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.stats = {"commits": 0, "events": 0, "largest_commit": 0, "errors": 0}
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "GroupCommitWriter":
+        server_cfg = cfg.get("server", {})
+        if not isinstance(server_cfg, dict):
+            server_cfg = {}
+        return cls(
+            commit_interval_ms=float(server_cfg.get("commit_interval_ms", DEFAULT_COMMIT_INTERVAL_MS)),
+            commit_max_events=int(server_cfg.get("commit_max_events", DEFAULT_COMMIT_MAX_EVENTS)),
+        )
+
+    # -- lifecycle ------------------------------------------------------
+
+    def start(self) -> "GroupCommitWriter":
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="crashvault-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        """Commit whatever is queued and stop the writer thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    # -- producers ------------------------------------------------------
+
+    def submit_async(self, drafts: List[Dict[str, Any]]) -> Future:
+        """Queue drafts for the next group commit; the future resolves to their results."""
+        pending = _Pending(drafts)
+        if not drafts:
+            pending.future.set_result([])
+            return pending.future
+        with self._cond:
+            if self._stopping or self._thread is None:
+                raise RuntimeError("writer is not running")
+            self._queue.append(pending)
+            self._queued_events += len(drafts)
+            self._cond.notify()
+        return pending.future
+
+    def submit(self, drafts: List[Dict[str, Any]], timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Queue drafts and block until they are committed."""
+        return self.submit_async(drafts).result(timeout)
+
+    # -- writer thread --------------------------------------------------
+
+    def _take_batch(self) -> List[_Pending]:
+        with self._cond:
+            while not self._queue and not self._stopping:
+                self._cond.wait()
+            if not self._queue:
+                return []
+            # Give concurrent requests a moment to join this commit
+            deadline = time.monotonic() + self.commit_interval
+            while self._queued_events < self.commit_max_events and not self._stopping:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, taken = [], 0
+            while self._queue and (not batch or taken + len(self._queue[0].drafts) <= self.commit_max_events):
+                pending = self._queue.pop(0)
+                batch.append(pending)
+                taken += len(pending.drafts)
+            self._queued_events -= taken
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            drafts = [d for pending in batch for d in pending.drafts]
+            try:
+                results = commit_events(drafts)
+            except Exception as e:
+                logger.error(f"group commit failed | events={len(drafts)} | error={e}")
+                self.stats["errors"] += 1
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+            self.stats["commits"] += 1
+            self.stats["events"] += len(drafts)
+            self.stats["largest_commit"] = max(self.stats["largest_commit"], len(drafts))
+            pos = 0
+            for pending in batch:
+                n = len(pending.drafts)
+                pending.future.set_result(results[pos:pos + n])
+                pos += n
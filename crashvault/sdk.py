@@ -0,0 +1,428 @@
+"""In-process error reporting for Python applications.
+
+Capturing an event only puts it on an in-memory queue; a background thread
+sends queued events in batches, either to a CrashVault server's
+``/api/v1/batch`` endpoint or straight into the local vault::
+
+    from crashvault import sdk
+
+    sdk.init("http://localhost:5678")   # or sdk.init() for the local vault
+
+    try:
+        handle(request)
+    except Exception:
+        sdk.capture_exception(tags=["api"])
+
+    sdk.capture_message("cache cold start", level="warning")
+
+The queue is bounded (``max_queue`` events).  When it is full, captures
+are dropped and counted instead of slowing the application down, unless
+``block`` allows them to wait that many seconds for room.  A batch that
+fails to send is retried ``max_retries`` times with backoff, then dropped
+and counted.  :func:`stats` reports the counters; queued events are
+flushed when the interpreter exits.
+"""
+
+import atexit
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+import traceback
+import urllib.parse
+import uuid
+import weakref
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("crashvault")
+
+LEVELS = ("debug", "info", "warning", "error", "critical")
+
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_BATCH_SIZE = 100
+MAX_BATCH_SIZE = 100  # the server accepts at most 100 events per batch
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_SHUTDOWN_TIMEOUT = 2.0
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+
+class TransportError(Exception):
+    """A batch could not be delivered.
+
+    ``transient`` errors (network failures, 5xx, 429) are retried; others
+    are not.
+    """
+
+    def __init__(self, message: str, transient: bool = True):
+        super().__init__(message)
+        self.transient = transient
+
+
+class HTTPTransport:
+    """Sends batches to a CrashVault server's ``/api/v1/batch`` endpoint."""
+
+    def __init__(self, server: str, timeout: float = DEFAULT_TIMEOUT):
+        parts = urllib.parse.urlsplit(server)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid server URL: {server!r}")
+        self.url = server.rstrip("/") + "/api/v1/batch"
+        self.timeout = timeout
+        self._pool = None
+
+    def send(self, events: List[Dict[str, Any]]):
+        import http.client
+        from .webhooks.pool import ConnectionPool
+
+        if self._pool is None:
+            # Only the background thread sends, so one kept-alive connection will do
+            self._pool = ConnectionPool(max_connections=1)
+        body = json.dumps({"events": events}).encode("utf-8")
+        try:
+            status, _, response = self._pool.request(
+                "POST", self.url, body, {"Content-Type": "application/json"}, self.timeout,
+            )
+        except (OSError, http.client.HTTPException) as e:
+            raise TransportError(f"{self.url}: {e}")
+        if status >= 300:
+            detail = response[:200].decode("utf-8", "replace")
+            raise TransportError(f"{self.url}: HTTP {status} {detail}", transient=status >= 500 or status == 429)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+
+
+class LocalTransport:
+    """Writes batches straight into the local vault (see ``CRASHVAULT_HOME``)."""
+
+    def send(self, events: List[Dict[str, Any]]):
+        from .core import ensure_dirs, load_config
+        from .fingerprint import get_strategy
+        from .ingest import commit_events
+
+        ensure_dirs()
+        grouping = get_strategy()
+        drafts = [
+            {
+                "fingerprint": grouping.fingerprint(event["message"], event["stacktrace"]),
+                "title": event["message"][:80],
+                "event": event,
+            }
+            for event in events
+        ]
+        try:
+            committed = commit_events(drafts)
+        except ValueError as e:
+            # e.g. an encrypted vault whose key this process does not have
+            raise TransportError(str(e), transient=False)
+        if load_config().get("webhooks"):
+            from .webhooks.dispatcher import dispatch_webhooks
+            for result in committed:
+                try:
+                    dispatch_webhooks(result["event"])
+                except Exception:
+                    pass  # Don't fail the batch if webhooks fail
+
+    def close(self):
+        pass
+
+
+_clients: "weakref.WeakSet[Client]" = weakref.WeakSet()
+
+
+def _reset_clients_after_fork():
+    for client in list(_clients):
+        client._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+class Client:
+    """Bounded event queue drained by a background sender thread."""
+
+    def __init__(self, transport, max_queue: int = DEFAULT_MAX_QUEUE,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_retries: int = DEFAULT_MAX_RETRIES, block: float = 0.0,
+                 tags: Iterable[str] = (), context: Optional[Dict[str, Any]] = None):
+        self.transport = transport
+        self.max_queue = max(int(max_queue), 1)
+        self.batch_size = min(max(int(batch_size), 1), MAX_BATCH_SIZE)
+        self.flush_interval = max(float(flush_interval), 0.0)
+        self.max_retries = max(int(max_retries), 0)
+        self.block = max(float(block), 0.0)
+        self.tags = list(tags)
+        self.context = dict(context or {})
+        self.host = platform.node()
+        self._queue: deque = deque()
+        self._in_flight = 0
+        self._flushing = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {
+            "captured": 0,
+            "sent": 0,
+            "batches": 0,
+            "send_errors": 0,
+            "dropped_queue_full": 0,
+            "dropped_send_failed": 0,
+            "dropped_invalid": 0,
+        }
+        _clients.add(self)
+
+    # -- producers ------------------------------------------------------
+
+    def capture_message(self, message: str, level: str = "info", stacktrace: str = "",
+                        tags: Iterable[str] = (), context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Queue an event. Returns its id, or None if it was dropped."""
+        return self._capture(str(message), level, stacktrace, tags, context, None)
+
+    def capture_exception(self, exc: Optional[BaseException] = None, level: str = "error",
+                          tags: Iterable[str] = (), context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Queue an event for ``exc`` (default: the exception being handled).
+
+        Returns the event id, or None if it was dropped or there is no exception.
+        """
+        if exc is None:
+            exc = sys.exc_info()[1]
+            if exc is None:
+                return None
+        # The traceback is formatted by the sender thread, off the caller's path
+        exc_info = (type(exc), exc, exc.__traceback__)
+        return self._capture(f"{type(exc).__name__}: {exc}", level, "", tags, context, exc_info)
+
+    def _capture(self, message, level, stacktrace, tags, context, exc_info) -> Optional[str]:
+        level = str(level).lower()
+        event = {
+            "event_id": str(uuid.uuid4()),
+            "message": message,
+            "stacktrace": stacktrace,
+            "timestamp": time.time(),
+            "level": level if level in LEVELS else "error",
+            "tags": [*self.tags, *tags],
+            "context": {**self.context, **context} if context else dict(self.context),
+        }
+        with self._cond:
+            if self._closed:
+                return None
+            if len(self._queue) >= self.max_queue and self.block:
+                self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed, self.block)
+            if len(self._queue) >= self.max_queue or self._closed:
+                self.stats["dropped_queue_full"] += 1
+                return None
+            self._queue.append((event, exc_info))
+            self.stats["captured"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="crashvault-sdk", daemon=True)
+                self._thread.start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return event["event_id"]
+
+    # -- lifecycle ------------------------------------------------------
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send everything queued so far. False if ``timeout`` ran out first."""
+        with self._cond:
+            if self._thread is None:
+                return not self._queue
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: Optional[float] = DEFAULT_SHUTDOWN_TIMEOUT) -> bool:
+        """Flush, stop the sender thread and refuse further events.
+
+        Returns False if events were still unsent when ``timeout`` ran out.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._cond:
+            done = not self._queue and not self._in_flight
+        self.transport.close()
+        return done
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus the current queue depth."""
+        with self._cond:
+            return dict(self.stats, queued=len(self._queue) + self._in_flight)
+
+    def _reset_after_fork(self):
+        # The sender thread does not exist in a forked child, and the parent
+        # still owns (and will send) the events queued before the fork.
+        self._cond = threading.Condition()
+        self._queue.clear()
+        self._in_flight = 0
+        self._flushing = 0
+        self._thread = None
+
+    # -- sender thread --------------------------------------------------
+
+    def _take_batch(self) -> Optional[List[Any]]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._queue) < self.batch_size and not self._closed and not self._flushing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not self._queue:
+                return None if self._closed else []
+            batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.batch_size))]
+            self._in_flight = len(batch)
+            # Wake producers waiting for room
+            self._cond.notify_all()
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if batch:
+                events = []
+                for event, exc_info in batch:
+                    try:
+                        events.append(self._prepare(event, exc_info))
+                    except Exception as e:
+                        # e.g. a circular reference in the context; never let one event stop the sender
+                        with self._cond:
+                            self.stats["dropped_invalid"] += 1
+                        logger.warning(f"sdk event dropped | event_id={event.get('event_id')} | error={e!r}")
+                if events:
+                    self._deliver(events)
+                else:
+                    with self._cond:
+                        self._settle()
+
+    def _prepare(self, event: Dict[str, Any], exc_info) -> Dict[str, Any]:
+        if exc_info is not None:
+            event["stacktrace"] = "".join(traceback.format_exception(*exc_info))
+        ts = datetime.fromtimestamp(event["timestamp"], timezone.utc)
+        event["timestamp"] = ts.isoformat().replace("+00:00", "Z")
+        event["host"] = self.host
+        event["pid"] = os.getpid()
+        if event["context"]:
+            # Context values the application passed in may not be JSON
+            event["context"] = json.loads(json.dumps(event["context"], default=str))
+        return event
+
+    def _deliver(self, events: List[Dict[str, Any]]):
+        attempt = 0
+        while True:
+            try:
+                self.transport.send(events)
+                error = None
+            except TransportError as e:
+                error = e
+            except Exception as e:
+                error = TransportError(str(e))
+            with self._cond:
+                if error is None:
+                    self.stats["sent"] += len(events)
+                    self.stats["batches"] += 1
+                    self._settle()
+                    return
+                self.stats["send_errors"] += 1
+                attempt += 1
+                if not error.transient or attempt > self.max_retries:
+                    self.stats["dropped_send_failed"] += len(events)
+                    self._settle()
+                    logger.warning(f"sdk batch dropped | events={len(events)} | error={error}")
+                    return
+                delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+                self._cond.wait_for(lambda: self._closed, delay)
+
+    def _settle(self):
+        self._in_flight = 0
+        self._cond.notify_all()
+
+
+_client: Optional[Client] = None
+_client_lock = threading.Lock()
+_atexit_registered = False
+
+
+def init(server: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT, **options) -> Client:
+    """Set up the client used by the module-level functions.
+
+    With ``server`` (e.g. ``"http://localhost:5678"``) events go to that
+    server; without it they are written to the local vault.  ``options``
+    are passed on to :class:`Client`.  Calling ``init`` again replaces
+    (and flushes) the previous client.
+    """
+    global _client, _atexit_registered
+    transport = HTTPTransport(server, timeout) if server else LocalTransport()
+    client = Client(transport, **options)
+    with _client_lock:
+        previous, _client = _client, client
+        if not _atexit_registered:
+            atexit.register(_close_at_exit)
+            _atexit_registered = True
+    if previous is not None:
+        previous.close()
+    return client
+
+
+def get_client() -> Optional[Client]:
+    return _client
+
+
+def capture_exception(exc: Optional[BaseException] = None, level: str = "error",
+                      tags: Iterable[str] = (), context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Report ``exc`` (default: the exception being handled). No-op before :func:`init`."""
+    client = _client
+    if client is None:
+        return None
+    return client.capture_exception(exc, level=level, tags=tags, context=context)
+
+
+def capture_message(message: str, level: str = "info", tags: Iterable[str] = (),
+                    context: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Report a message. No-op before :func:`init`."""
+    client = _client
+    if client is None:
+        return None
+    return client.capture_message(message, level=level, tags=tags, context=context)
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Send everything queued so far. False if ``timeout`` ran out first."""
+    client = _client
+    return client.flush(timeout) if client is not None else True
+
+
+def close(timeout: Optional[float] = DEFAULT_SHUTDOWN_TIMEOUT) -> bool:
+    """Flush and shut down the client set up by :func:`init`."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    return client.close(timeout) if client is not None else True
+
+
+def stats() -> Dict[str, Any]:
+    """Counters of the current client (captured, sent, dropped, ...)."""
+    client = _client
+    return client.snapshot() if client is not None else {}
+
+
+def _close_at_exit():
+    close(DEFAULT_SHUTDOWN_TIMEOUT)
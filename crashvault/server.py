@@ -1,28 +1,30 @@
 """HTTP server for receiving runtime errors from external applications."""
 
-import hashlib
 import json
 import logging
 import os
 import platform
+import re
 import signal
 import sys
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
 from .core import (
     ensure_dirs,
-    load_issues,
-    save_issues,
-    event_path_for,
     load_config,
     save_config,
     ROOT,
 )
+from .fingerprint import get_strategy
+from .ingest import GroupCommitWriter, commit_events
 from .webhooks.dispatcher import dispatch_webhooks
+from .webhooks.pool import close_pool, get_pool
 
 
 logger = logging.getLogger("crashvault")
@@ -31,83 +33,90 @@ DEFAULT_PORT = 5678
 PID_FILE = ROOT / "server.pid"
 
 
-class CrashVaultHandler(BaseHTTPRequestHandler):
-    """HTTP request handler for the CrashVault server."""
+MAX_BODY_BYTES = 1024 * 1024  # 1MB limit
+SERVER_MODES = ("threaded", "asyncio", "single")
+DEFAULT_MODE = "threaded"
+DEFAULT_WORKERS = 16
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_WEBHOOK_WORKERS = 2
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
 
-    def log_message(self, format, *args):
-        """Override to use our logger."""
-        logger.info(f"HTTP {args[0]}")
+_SERIES_PATH_RE = re.compile(r"^/api/v1/issues/(\d+)/series/?$")
 
-    def send_json_response(self, status: int, data: Dict[str, Any]):
-        """Send a JSON response."""
-        self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, X-API-Key")
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode("utf-8"))
 
-    def do_OPTIONS(self):
-        """Handle CORS preflight requests."""
-        self.send_response(200)
-        self.send_header("Access-Control-Allow-Origin", "*")
-        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, X-API-Key")
-        self.end_headers()
+def _query_value(query: Dict[str, List[str]], name: str) -> Optional[str]:
+    """First value of a query string parameter, or None."""
+    values = query.get(name)
+    return values[0] if values else None
 
-    def do_GET(self):
-        """Handle GET requests."""
-        parsed = urlparse(self.path)
-        path = parsed.path
-
-        if path == "/api/health" or path == "/health":
-            self.send_json_response(200, {
-                "status": "ok",
-                "service": "crashvault",
-                "version": "1.0.0",
-            })
-        elif path == "/api/v1/stats":
-            self._handle_stats()
-        else:
-            self.send_json_response(404, {"error": "Not found"})
+CORS_HEADERS = (
+    ("Access-Control-Allow-Origin", "*"),
+    ("Access-Control-Allow-Methods", "GET, POST, OPTIONS"),
+    ("Access-Control-Allow-Headers", "Content-Type, X-API-Key"),
+)
 
-    def do_POST(self):
-        """Handle POST requests."""
-        parsed = urlparse(self.path)
-        path = parsed.path
 
-        # Read request body
-        content_length = int(self.headers.get("Content-Length", 0))
-        if content_length > 1024 * 1024:  # 1MB limit
-            self.send_json_response(413, {"error": "Payload too large"})
-            return
+class CrashVaultApp:
+    """Request routing shared by every server mode.
+
+    ``handle`` takes an already-read request and returns ``(status, payload)``;
+    the transport (thread-per-request or asyncio) only deals with sockets.
+    """
+
+    def __init__(self, writer: Optional[GroupCommitWriter] = None, outbox=None):
+        self.writer = writer
+        self.outbox = outbox
+        # Grouping strategy from config.json; restart the server to pick up changes
+        self.grouping = get_strategy()
+
+    def handle(self, method: str, target: str, body: bytes, client_host: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        url = urlparse(target)
+        path = url.path
+
+        if method == "OPTIONS":
+            # CORS preflight
+            return 200, None
+        if method == "GET":
+            if path == "/api/health" or path == "/health":
+                return 200, {
+                    "status": "ok",
+                    "service": "crashvault",
+                    "version": "1.0.0",
+                }
+            if path == "/api/v1/stats":
+                return self._handle_stats()
+            if path == "/api/v1/metrics":
+                return self._handle_metrics()
+            if path == "/api/v1/events":
+                return self._handle_list_events(parse_qs(url.query))
+            match = _SERIES_PATH_RE.match(path)
+            if match:
+                return self._handle_series(int(match.group(1)), parse_qs(url.query))
+            return 404, {"error": "Not found"}
+        if method != "POST":
+            return 405, {"error": "Method not allowed"}
 
         try:
-            body = self.rfile.read(content_length)
             data = json.loads(body.decode("utf-8")) if body else {}
-        except json.JSONDecodeError:
-            self.send_json_response(400, {"error": "Invalid JSON"})
-            return
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            return 400, {"error": "Invalid JSON"}
+        if not isinstance(data, dict):
+            return 400, {"error": "Invalid JSON"}
 
         if path in ("/api/v1/events", "/api/v1/errors", "/api/events"):
-            self._handle_event(data)
-        elif path == "/api/v1/batch":
-            self._handle_batch(data)
-        else:
-            self.send_json_response(404, {"error": "Not found"})
+            return self._handle_event(data, client_host)
+        if path == "/api/v1/batch":
+            return self._handle_batch(data, client_host)
+        return 404, {"error": "Not found"}
 
-    def _handle_event(self, data: Dict[str, Any]):
-        """Handle a single error event."""
-        # Validate required fields
-        message = data.get("message")
-        if not message:
-            self.send_json_response(400, {"error": "message is required"})
-            return
+    def _build_draft(self, data: Dict[str, Any], client_host: str) -> Dict[str, Any]:
+        """Turn a submitted payload into an event draft for the writer."""
+        message = data["message"]
 
         # Extract optional fields
         stacktrace = data.get("stacktrace", data.get("stack", ""))
-        level = data.get("level", "error").lower()
+        level = str(data.get("level", "error")).lower()
         if level not in ("debug", "info", "warning", "error", "critical"):
             level = "error"
 
@@ -132,146 +141,317 @@ class CrashVaultHandler(BaseHTTPRequestHandler):
         if column:
             context["column"] = column
 
-        # Create fingerprint from message
-        fp = hashlib.sha1(message.encode("utf-8")).hexdigest()[:8]
-
-        # Load/create issue
-        ensure_dirs()
-        issues = load_issues()
-        issue = next((i for i in issues if i["fingerprint"] == fp), None)
-        created_new = False
-
-        if not issue:
-            issue = {
-                "id": len(issues) + 1,
-                "fingerprint": fp,
-                "title": message[:80],
-                "status": "open",
-                "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-            }
-            issues.append(issue)
-            save_issues(issues)
-            created_new = True
-
-        # Create event
-        event_id = str(uuid.uuid4())
         ts = datetime.now(timezone.utc)
-        event_data = {
-            "event_id": event_id,
-            "issue_id": issue["id"],
-            "message": message,
-            "stacktrace": stacktrace,
-            "timestamp": ts.isoformat().replace("+00:00", "Z"),
-            "level": level,
-            "tags": tags,
-            "context": context,
-            "host": data.get("host", self.client_address[0]),
-            "pid": data.get("pid", 0),
+        return {
+            "fingerprint": self.grouping.fingerprint(message, stacktrace),
+            "title": message[:80],
+            "event": {
+                "event_id": str(uuid.uuid4()),
+                "message": message,
+                "stacktrace": stacktrace,
+                "timestamp": ts.isoformat().replace("+00:00", "Z"),
+                "level": level,
+                "tags": tags,
+                "context": context,
+                "host": data.get("host", client_host),
+                "pid": data.get("pid", 0),
+            },
         }
 
-        # Save event
-        path = event_path_for(event_id, ts)
-        tmp = path.with_suffix(path.suffix + ".tmp")
-        with open(tmp, "w") as f:
-            json.dump(event_data, f, indent=2)
-        os.replace(tmp, path)
+    def _commit(self, drafts):
+        """Store drafts through the group-commit writer, if there is one."""
+        if self.writer is None:
+            ensure_dirs()
+            return commit_events(drafts)
+        return self.writer.submit(drafts)
+
+    def _notify(self, events):
+        """Queue webhook deliveries, or send them inline without an outbox."""
+        if self.outbox is not None:
+            self.outbox.enqueue_events(events)
+            return
+        for event_data in events:
+            dispatch_webhooks(event_data)
 
-        logger.info(f"event received | issue_id={issue['id']} | event_id={event_id} | level={level}")
+    def _handle_event(self, data: Dict[str, Any], client_host: str):
+        """Handle a single error event."""
+        # Validate required fields
+        if not data.get("message"):
+            return 400, {"error": "message is required"}
+
+        result = self._commit([self._build_draft(data, client_host)])[0]
+        event_data = result["event"]
+
+        logger.info(
+            f"event received | issue_id={result['issue_id']} | event_id={result['event_id']} | level={event_data['level']}"
+        )
 
         # Dispatch webhooks
-        dispatch_webhooks(event_data)
+        self._notify([event_data])
 
-        self.send_json_response(201, {
+        return 201, {
             "success": True,
-            "event_id": event_id,
-            "issue_id": issue["id"],
-            "issue_created": created_new,
-        })
+            "event_id": result["event_id"],
+            "issue_id": result["issue_id"],
+            "issue_created": result["issue_created"],
+        }
 
-    def _handle_batch(self, data: Dict[str, Any]):
+    def _handle_batch(self, data: Dict[str, Any], client_host: str):
         """Handle a batch of events."""
         events = data.get("events", [])
         if not isinstance(events, list):
-            self.send_json_response(400, {"error": "events must be an array"})
-            return
+            return 400, {"error": "events must be an array"}
 
         if len(events) > 100:
-            self.send_json_response(400, {"error": "Maximum 100 events per batch"})
-            return
-
-        results = []
-        for event_data in events:
-            if isinstance(event_data, dict) and event_data.get("message"):
-                # Reuse single event handler logic (simplified)
-                message = event_data["message"]
-                fp = hashlib.sha1(message.encode("utf-8")).hexdigest()[:8]
-
-                ensure_dirs()
-                issues = load_issues()
-                issue = next((i for i in issues if i["fingerprint"] == fp), None)
-
-                if not issue:
-                    issue = {
-                        "id": len(issues) + 1,
-                        "fingerprint": fp,
-                        "title": message[:80],
-                        "status": "open",
-                        "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
-                    }
-                    issues.append(issue)
-                    save_issues(issues)
-
-                event_id = str(uuid.uuid4())
-                ts = datetime.now(timezone.utc)
-                ev = {
-                    "event_id": event_id,
-                    "issue_id": issue["id"],
-                    "message": message,
-                    "stacktrace": event_data.get("stacktrace", ""),
-                    "timestamp": ts.isoformat().replace("+00:00", "Z"),
-                    "level": event_data.get("level", "error"),
-                    "tags": event_data.get("tags", []),
-                    "context": event_data.get("context", {}),
-                    "host": event_data.get("host", self.client_address[0]),
-                    "pid": event_data.get("pid", 0),
-                }
+            return 400, {"error": "Maximum 100 events per batch"}
 
-                path = event_path_for(event_id, ts)
-                tmp = path.with_suffix(path.suffix + ".tmp")
-                with open(tmp, "w") as f:
-                    json.dump(ev, f, indent=2)
-                os.replace(tmp, path)
+        drafts = [
+            self._build_draft(event_data, client_host)
+            for event_data in events
+            if isinstance(event_data, dict) and event_data.get("message")
+        ]
+        committed = self._commit(drafts)
 
-                dispatch_webhooks(ev)
-                results.append({"event_id": event_id, "issue_id": issue["id"]})
+        self._notify([result["event"] for result in committed])
+        results = [{"event_id": r["event_id"], "issue_id": r["issue_id"]} for r in committed]
 
-        self.send_json_response(201, {
+        return 201, {
             "success": True,
             "processed": len(results),
             "results": results,
-        })
+        }
 
     def _handle_stats(self):
         """Return basic stats."""
-        from .core import load_events
-
-        events = load_events()
-        issues = load_issues()
+        from .core import count_events_by_level, count_issues_by_status
 
-        level_counts = {}
-        for ev in events:
-            level = ev.get("level", "unknown")
-            level_counts[level] = level_counts.get(level, 0) + 1
+        status_counts = count_issues_by_status()
+        level_counts = count_events_by_level()
 
-        self.send_json_response(200, {
-            "total_issues": len(issues),
-            "total_events": len(events),
+        return 200, {
+            "total_issues": sum(status_counts.values()),
+            "total_events": sum(level_counts.values()),
             "events_by_level": level_counts,
-            "open_issues": len([i for i in issues if i.get("status") == "open"]),
-        })
+            "issues_by_status": status_counts,
+            "open_issues": status_counts.get("open", 0),
+        }
+
+
+    def _handle_list_events(self, query: Dict[str, List[str]]):
+        """Return one page of events, newest first, and the cursor of the next page."""
+        from .core import page_events
+        from .timerange import parse_time_bound
 
+        try:
+            limit = min(max(int(_query_value(query, "limit") or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+            issue = _query_value(query, "issue")
+            since, until = _query_value(query, "since"), _query_value(query, "until")
+            events, next_cursor = page_events(
+                limit,
+                cursor=_query_value(query, "cursor"),
+                newest_first=_query_value(query, "order") != "asc",
+                issue_id=int(issue) if issue else None,
+                level=_query_value(query, "level"),
+                tags=query.get("tag"),
+                since=parse_time_bound(since) if since else None,
+                until=parse_time_bound(until, end=True) if until else None,
+            )
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        return 200, {"events": events, "next_cursor": next_cursor}
+
+    def _handle_series(self, issue_id: int, query: Dict[str, List[str]]):
+        """Return event counts per time bucket for one issue."""
+        from .core import event_series, get_issue
+        from .timerange import parse_time_bound
+
+        if get_issue(issue_id) is None:
+            return 404, {"error": "Issue not found"}
+
+        try:
+            since, until = _query_value(query, "since"), _query_value(query, "until")
+            series = event_series(
+                issue_id=issue_id,
+                level=_query_value(query, "level"),
+                since=parse_time_bound(since) if since else None,
+                until=parse_time_bound(until, end=True) if until else None,
+                resolution=_query_value(query, "resolution"),
+            )
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        return 200, dict(series, issue_id=issue_id)
+
+    def _handle_metrics(self):
+        """Return ingest and webhook delivery metrics."""
+        data: Dict[str, Any] = {}
+        if self.writer is not None:
+            data["writer"] = dict(self.writer.stats)
+        if self.outbox is not None:
+            data["webhooks"] = self.outbox.snapshot()
+        data["webhook_connections"] = get_pool().stats()
+        return 200, data
+
+
+def encode_response(status: int, payload: Optional[Dict[str, Any]]) -> Tuple[List[Tuple[str, str]], bytes]:
+    """Headers and body for a routed response."""
+    body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+    headers = list(CORS_HEADERS)
+    if payload is not None:
+        headers.insert(0, ("Content-Type", "application/json"))
+    headers.append(("Content-Length", str(len(body))))
+    return headers, body
+
+
+class CrashVaultHandler(BaseHTTPRequestHandler):
+    """HTTP request handler for the CrashVault server."""
+
+    # Keep connections open between requests; idle ones time out
+    protocol_version = "HTTP/1.1"
+    timeout = DEFAULT_KEEPALIVE_TIMEOUT
+
+    def log_message(self, format, *args):
+        """Override to use our logger."""
+        logger.info(f"HTTP {args[0]}")
+
+    @property
+    def app(self) -> CrashVaultApp:
+        app = getattr(self.server, "app", None)
+        if app is None:
+            app = self.server.app = CrashVaultApp(getattr(self.server, "writer", None))
+        return app
+
+    def send_json_response(self, status: int, data: Optional[Dict[str, Any]]):
+        """Send a JSON response."""
+        headers, body = encode_response(status, data)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method: str):
+        body = b""
+        if method == "POST":
+            # Read request body
+            content_length = int(self.headers.get("Content-Length", 0))
+            if content_length > MAX_BODY_BYTES:
+                # The unread body would corrupt the connection
+                self.close_connection = True
+                self.send_json_response(413, {"error": "Payload too large"})
+                return
+            body = self.rfile.read(content_length)
+        status, payload = self.app.handle(method, self.path, body, self.client_address[0])
+        self.send_json_response(status, payload)
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight requests."""
+        self._dispatch("OPTIONS")
 
-def run_server(port: int = DEFAULT_PORT, host: str = "0.0.0.0"):
+    def do_GET(self):
+        """Handle GET requests."""
+        self._dispatch("GET")
+
+    def do_POST(self):
+        """Handle POST requests."""
+        self._dispatch("POST")
+
+
+class BoundedThreadingHTTPServer(HTTPServer):
+    """HTTPServer that serves connections from a fixed-size worker pool.
+
+    When every worker is busy the accept loop waits for a free slot, so a
+    burst of clients queues in the listen backlog instead of spawning an
+    unbounded number of threads.
+    """
+
+    # Connections wait here while all workers are busy
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers: int = DEFAULT_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.max_workers = max(int(max_workers), 1)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crashvault-http")
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._pool.submit(self._process_request_worker, request, client_address)
+        except RuntimeError:  # pool shut down
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def _server_settings(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    server_cfg = cfg.get("server", {})
+    return server_cfg if isinstance(server_cfg, dict) else {}
+
+
+def make_server(host: str, port: int, mode: Optional[str] = None, cfg: Optional[Dict[str, Any]] = None,
+                workers: Optional[int] = None):
+    """Build a server in the requested concurrency mode, with its writer running.
+
+    Every mode exposes ``serve_forever()``, ``shutdown()``, ``server_close()``,
+    ``server_address``, ``writer`` and ``webhook_workers`` (None when
+    ``server.webhook_workers`` is 0).
+    """
+    if cfg is None:
+        cfg = load_config()
+    settings = _server_settings(cfg)
+    mode = mode or settings.get("mode", DEFAULT_MODE)
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown server mode: {mode} (choose from {', '.join(SERVER_MODES)})")
+    workers = int(workers or settings.get("workers", DEFAULT_WORKERS))
+    keepalive = float(settings.get("keepalive_timeout", DEFAULT_KEEPALIVE_TIMEOUT))
+
+    # All writes go through one group-commit writer
+    writer = GroupCommitWriter.from_config(cfg).start()
+    # Webhooks are delivered from a persistent outbox by background workers
+    outbox = webhook_workers = None
+    n_webhook_workers = int(settings.get("webhook_workers", DEFAULT_WEBHOOK_WORKERS))
+    if n_webhook_workers > 0:
+        from .webhooks.outbox import WebhookOutbox, OutboxWorkers
+
+        outbox = WebhookOutbox()
+        webhook_workers = OutboxWorkers(outbox, workers=n_webhook_workers).start()
+    app = CrashVaultApp(writer, outbox)
+
+    if mode == "asyncio":
+        from .server_async import AsyncHTTPServer
+
+        server = AsyncHTTPServer((host, port), app, max_workers=workers, keepalive_timeout=keepalive)
+    else:
+        if mode == "threaded":
+            handler = type("CrashVaultHandler", (CrashVaultHandler,), {"timeout": keepalive})
+            server = BoundedThreadingHTTPServer((host, port), handler, max_workers=workers)
+        else:
+            # One thread serves every client, so an idle keep-alive connection
+            # would hold off all the others: close after each response
+            handler = type("CrashVaultHandler", (CrashVaultHandler,),
+                           {"timeout": keepalive, "protocol_version": "HTTP/1.0"})
+            server = HTTPServer((host, port), handler)
+    server.mode = mode
+    server.app = app
+    server.writer = writer
+    server.webhook_workers = webhook_workers
+    return server
+
+
+def run_server(port: int = DEFAULT_PORT, host: str = "0.0.0.0", mode: Optional[str] = None,
+               workers: Optional[int] = None):
     """Start the CrashVault HTTP server."""
     from .core import configure_logging
     ensure_dirs()
@@ -280,32 +460,39 @@ def run_server(port: int = DEFAULT_PORT, host: str = "0.0.0.0"):
     # Import webhook providers to register them
     from . import webhooks  # noqa
 
-    server = HTTPServer((host, port), CrashVaultHandler)
+    server = make_server(host, port, mode, workers=workers)
 
     # Save PID for stop command
     PID_FILE.write_text(str(os.getpid()))
 
     def cleanup(signum, frame):
-        logger.info("Server shutting down...")
-        if PID_FILE.exists():
-            PID_FILE.unlink()
-        server.shutdown()
-        sys.exit(0)
+        # serve_forever runs in this thread, so unwind it instead of calling shutdown()
+        raise SystemExit(0)
 
     signal.signal(signal.SIGTERM, cleanup)
     signal.signal(signal.SIGINT, cleanup)
 
-    logger.info(f"CrashVault server starting on {host}:{port}")
-    print(f"CrashVault server listening on http://{host}:{port}")
+    logger.info(f"CrashVault server starting on {host}:{port} ({server.mode} mode)")
+    print(f"CrashVault server listening on http://{host}:{port} ({server.mode} mode)")
     print(f"  POST /api/v1/events  - Submit error events")
     print(f"  GET  /api/health     - Health check")
     print(f"  GET  /api/v1/stats   - Get statistics")
+    print(f"  GET  /api/v1/metrics - Ingest and webhook delivery metrics")
     print(f"\nPress Ctrl+C to stop")
 
     try:
         server.serve_forever()
-    except KeyboardInterrupt:
-        cleanup(None, None)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        logger.info("Server shutting down...")
+        if PID_FILE.exists():
+            PID_FILE.unlink()
+        server.server_close()
+        server.writer.stop()
+        if server.webhook_workers is not None:
+            server.webhook_workers.stop()
+        close_pool()
 
 
 def stop_server():
@@ -0,0 +1,152 @@
+"""asyncio transport for the CrashVault HTTP server.
+
+A small HTTP/1.1 server built on ``asyncio.start_server``.  Connections are
+kept alive between requests (HTTP/1.1 default, or ``Connection: keep-alive``
+from 1.0 clients) until they sit idle for ``keepalive_timeout`` seconds.
+Routing is done by :class:`crashvault.server.CrashVaultApp`, which runs in a
+bounded thread pool because the storage engines are blocking.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Optional, Tuple
+
+from .server import MAX_BODY_BYTES, CrashVaultApp, encode_response
+
+logger = logging.getLogger("crashvault")
+
+MAX_HEADER_LINES = 100
+
+
+class _BadRequest(Exception):
+    pass
+
+
+class AsyncHTTPServer:
+    """asyncio-based server with keep-alive, mirroring the HTTPServer interface."""
+
+    def __init__(self, server_address: Tuple[str, int], app: CrashVaultApp,
+                 max_workers: int = 16, keepalive_timeout: float = 5.0):
+        self.requested_address = server_address
+        self.server_address: Optional[Tuple[str, int]] = None
+        self.app = app
+        self.keepalive_timeout = keepalive_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1),
+                                            thread_name_prefix="crashvault-aio")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self.ready = threading.Event()
+
+    # -- lifecycle ------------------------------------------------------
+
+    def serve_forever(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        host, port = self.requested_address
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        self.server_address = self._server.sockets[0].getsockname()[:2]
+        self.ready.set()
+        async with self._server:
+            await self._stopped.wait()
+
+    def shutdown(self):
+        """Stop serving; safe to call from another thread."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def server_close(self):
+        self._executor.shutdown(wait=True)
+
+    # -- connections ----------------------------------------------------
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """Read one request head. Returns None on a clean close or idle timeout."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise _BadRequest()
+        method, target, version = parts
+
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            raw = await reader.readline()
+            if raw in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = raw.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise _BadRequest()
+        return method.upper(), target, version, headers
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or ("", 0)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _BadRequest:
+                    await self._respond(writer, "HTTP/1.1", 400, {"error": "Bad request"}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+
+                connection = headers.get("connection", "").lower()
+                if version == "HTTP/1.1":
+                    keep_alive = connection != "close"
+                else:
+                    keep_alive = connection == "keep-alive"
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, version, 400, {"error": "Bad request"}, keep_alive=False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, version, 413, {"error": "Payload too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                status, payload = await self._loop.run_in_executor(
+                    self._executor, self.app.handle, method, target, body, peer[0]
+                )
+                logger.info(f"HTTP {method} {target} {version}")
+                await self._respond(writer, version, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"request failed | peer={peer[0]} | error={e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, writer: asyncio.StreamWriter, version: str, status: int, payload, keep_alive: bool):
+        headers, body = encode_response(status, payload)
+        headers.append(("Connection", "keep-alive" if keep_alive else "close"))
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        head = f"{version if version.startswith('HTTP/1.') else 'HTTP/1.1'} {status} {reason}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers)
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
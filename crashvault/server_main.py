@@ -6,4 +6,6 @@ from .server import run_server, DEFAULT_PORT
 if __name__ == "__main__":
     port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
     host = sys.argv[2] if len(sys.argv) > 2 else "0.0.0.0"
-    run_server(port=port, host=host)
+    mode = sys.argv[3] if len(sys.argv) > 3 and sys.argv[3] else None
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 and sys.argv[4] else None
+    run_server(port=port, host=host, mode=mode, workers=workers)
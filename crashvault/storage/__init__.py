@@ -0,0 +1,25 @@
+"""Storage engines for CrashVault."""
+
+from .base import StorageBackend
+from .engine import get_storage, get_engine, register_engine, available_engines, configured_engine_name
+from .json_store import JSONStorage
+from .sqlite_store import SQLiteStorage
+from .segments import SegmentStorage
+from .search_index import SearchIndex, get_search_index
+from .rollups import Rollups, open_rollups
+
+__all__ = [
+    "StorageBackend",
+    "get_storage",
+    "get_engine",
+    "register_engine",
+    "available_engines",
+    "configured_engine_name",
+    "JSONStorage",
+    "SQLiteStorage",
+    "SegmentStorage",
+    "SearchIndex",
+    "get_search_index",
+    "Rollups",
+    "open_rollups",
+]
@@ -0,0 +1,344 @@
+"""Base storage engine interface."""
+
+import base64
+import binascii
+import json
+import os
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..timerange import event_time, in_range
+
+
+def drop_torn_tail(f) -> int:
+    """Truncate a file opened ``a+b`` after its last newline.
+
+    A crash mid-append leaves a partial last line; appending after it would
+    glue the next record onto it and make both unreadable.  Returns the
+    size the file is left with.
+    """
+    end = f.seek(0, os.SEEK_END)
+    if not end:
+        return 0
+    f.seek(end - 1)
+    if f.read(1) == b"\n":
+        return end
+    pos = end
+    while pos > 0:
+        start = max(pos - 65536, 0)
+        f.seek(start)
+        newline = f.read(pos - start).rfind(b"\n")
+        if newline >= 0:
+            size = start + newline + 1
+            break
+        pos = start
+    else:
+        size = 0
+    f.truncate(size)
+    return size
+
+
+def event_matches(
+    ev: Dict[str, Any],
+    issue_id: Optional[int] = None,
+    level: Optional[str] = None,
+    tags: Optional[Iterable[str]] = None,
+    text: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> bool:
+    """Check an event dict against the standard query filters.
+
+    ``since``/``until`` bound the event timestamp to ``[since, until)``.
+    """
+    if issue_id is not None and ev.get("issue_id") != issue_id:
+        return False
+    if level and ev.get("level") != level:
+        return False
+    if tags and not set(tags).issubset(set(ev.get("tags", []))):
+        return False
+    if text and text.lower() not in ev.get("message", "").lower():
+        return False
+    if (since is not None or until is not None) and not in_range(ev.get("timestamp"), since, until):
+        return False
+    return True
+
+
+def event_sort_key(ev: Dict[str, Any]) -> Tuple[str, str]:
+    """Ordering key of an event: its timestamp in UTC, then its id."""
+    ts = event_time(ev.get("timestamp"))
+    stamp = ts.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ") if ts else ""
+    return stamp, str(ev.get("event_id", ""))
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """Opaque pagination cursor for the event with ordering key ``key``."""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of :func:`encode_cursor`; raises ValueError for foreign strings."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        stamp, event_id = data
+    except (ValueError, TypeError, binascii.Error):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return str(stamp), str(event_id)
+
+
+def _utc_stamp(d: date) -> str:
+    return datetime(d.year, d.month, d.day, tzinfo=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class StorageBackend(ABC):
+    """Abstract base class for vault storage engines.
+
+    An engine owns the issue list and the event records of one vault.
+    Commands go through the helpers in ``crashvault.core`` rather than
+    touching engine instances directly.
+    """
+
+    name = ""
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    # -- issues ---------------------------------------------------------
+
+    @abstractmethod
+    def load_issues(self) -> List[Dict[str, Any]]:
+        """Return every issue, in insertion order."""
+        pass
+
+    @abstractmethod
+    def save_issues(self, issues: List[Dict[str, Any]]) -> None:
+        """Replace the stored issue list."""
+        pass
+
+    def get_issue(self, issue_id: int) -> Optional[Dict[str, Any]]:
+        """Look up a single issue by id."""
+        return next((i for i in self.load_issues() if i["id"] == issue_id), None)
+
+    def find_issue_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Look up a single issue by fingerprint, or by one it absorbed in a merge."""
+        issues = self.load_issues()
+        return (next((i for i in issues if i.get("fingerprint") == fingerprint), None)
+                or next((i for i in issues if fingerprint in i.get("merged_fingerprints", ())), None))
+
+    def next_issue_id(self) -> int:
+        """Return the id to use for a newly created issue."""
+        return max((i["id"] for i in self.load_issues()), default=0) + 1
+
+    def save_issue(self, issue: Dict[str, Any]) -> None:
+        """Insert or update a single issue."""
+        issues = self.load_issues()
+        for idx, existing in enumerate(issues):
+            if existing["id"] == issue["id"]:
+                issues[idx] = issue
+                break
+        else:
+            issues.append(issue)
+        self.save_issues(issues)
+
+    def add_issues(self, issues: List[Dict[str, Any]]) -> None:
+        """Insert newly created issues (with ids from ``next_issue_id``)."""
+        self.save_issues(self.load_issues() + issues)
+
+    def count_issues_by_status(self) -> Dict[str, int]:
+        """Return a mapping of issue status -> number of issues."""
+        counts: Dict[str, int] = {}
+        for issue in self.load_issues():
+            status = issue.get("status", "open")
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    # -- events ---------------------------------------------------------
+
+    @abstractmethod
+    def append_events(self, events: List[Dict[str, Any]]) -> None:
+        """Persist new events."""
+        pass
+
+    @abstractmethod
+    def iter_events(
+        self,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield events matching the given filters.
+
+        Engines that partition events by day should only read the
+        partitions that overlap ``since``/``until``.
+        """
+        pass
+
+    def _event_partitions(
+        self,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        newest_first: bool,
+    ) -> Iterator[Tuple[Optional[date], Iterable[Dict[str, Any]]]]:
+        """Events grouped by day partition, in partition order.
+
+        Engines that store events by day yield ``(day, events)`` per
+        partition overlapping the range so ordered reads stop early; the
+        default is a single group of every event with no day.
+        """
+        yield None, self.iter_events(since=since, until=until)
+
+    def _cursor_key(self, ev: Dict[str, Any]) -> Tuple[str, str]:
+        return event_sort_key(ev)
+
+    def iter_events_sorted(
+        self,
+        newest_first: bool = True,
+        cursor: Optional[str] = None,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Lazily yield matching events ordered by timestamp.
+
+        ``cursor`` resumes right after the event it was made from (see
+        :meth:`page_events`).  Day-partitioned engines read one partition
+        at a time and hold back only the events a later partition could
+        still precede, so consumers that stop early never read the rest.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        bound = event_time(after[0]) if after else None
+        if bound is not None:
+            # Narrow the partitions read; the exact key comparison follows
+            if newest_first:
+                until = min(until, bound + timedelta(days=1)) if until else bound + timedelta(days=1)
+            else:
+                since = max(since, bound - timedelta(days=1)) if since else bound - timedelta(days=1)
+
+        pending: List[Tuple[Tuple[str, str], Dict[str, Any]]] = []
+        for day, events in self._event_partitions(since, until, newest_first):
+            for ev in events:
+                if not event_matches(ev, issue_id, level, tags, text, since, until):
+                    continue
+                key = self._cursor_key(ev)
+                if after is not None and (key >= after if newest_first else key <= after):
+                    continue
+                pending.append((key, ev))
+            if day is None:
+                continue
+            # Partitions still to come hold events at most a day away from theirs
+            pending.sort(key=lambda p: p[0], reverse=newest_first)
+            if newest_first:
+                cut = _utc_stamp(day + timedelta(days=1))
+                ready = [p for p in pending if p[0][0] >= cut]
+            else:
+                cut = _utc_stamp(day)
+                ready = [p for p in pending if p[0][0] < cut]
+            pending = pending[len(ready):]
+            for _, ev in ready:
+                yield ev
+        pending.sort(key=lambda p: p[0], reverse=newest_first)
+        for _, ev in pending:
+            yield ev
+
+    def page_events(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        newest_first: bool = True,
+        offset: int = 0,
+        **filters,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to ``limit`` events and the cursor of the next page (None at the end).
+
+        ``offset`` skips events after the cursor; skipped events are still
+        read, so following pages should pass the returned cursor instead.
+        """
+        events = list(islice(self.iter_events_sorted(newest_first, cursor, **filters),
+                             offset, offset + limit + 1))
+        page = events[:limit]
+        next_cursor = encode_cursor(self._cursor_key(page[-1])) if len(events) > limit and page else None
+        return page, next_cursor
+
+    def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a single event by id."""
+        return next((e for e in self.iter_events() if e.get("event_id") == event_id), None)
+
+    def get_events(self, refs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        """Look up several events by ``(event_id, timestamp)``.
+
+        The timestamp is a hint that lets engines go straight to the right
+        partition.  Returns ``{event_id: event}`` for the events that exist.
+        """
+        found = {}
+        for event_id, _ in refs:
+            ev = self.get_event(event_id)
+            if ev is not None:
+                found[event_id] = ev
+        return found
+
+    def count_events(self, **filters) -> int:
+        """Count events matching the given filters."""
+        return sum(1 for _ in self.iter_events(**filters))
+
+    def count_events_by_level(self, since: Optional[datetime] = None,
+                              until: Optional[datetime] = None) -> Dict[str, int]:
+        """Return a mapping of level -> number of events."""
+        counts: Dict[str, int] = {}
+        for ev in self.iter_events(since=since, until=until):
+            lvl = ev.get("level", "unknown")
+            counts[lvl] = counts.get(lvl, 0) + 1
+        return counts
+
+    @abstractmethod
+    def delete_issue_events(self, issue_id: int) -> int:
+        """Delete every event of an issue. Returns the number removed."""
+        pass
+
+    @abstractmethod
+    def delete_orphaned_events(self, valid_ids: Iterable[int]) -> int:
+        """Delete events whose issue id is not in ``valid_ids``."""
+        pass
+
+    @abstractmethod
+    def delete_events_before(self, cutoff: float) -> int:
+        """Delete events recorded before the ``cutoff`` unix timestamp."""
+        pass
+
+    @abstractmethod
+    def clear_events(self) -> None:
+        """Delete all events."""
+        pass
+
+    def clear(self) -> None:
+        """Delete all issues and events."""
+        self.save_issues([])
+        self.clear_events()
+
+    def seal_events(self) -> int:
+        """Encrypt the stored events of a vault that was just encrypted. Returns the number sealed."""
+        raise ValueError(f"The {self.name} storage engine does not support encrypted vaults")
+
+    def unseal_events(self, key: bytes) -> int:
+        """Store the events of a vault being decrypted as plaintext again. Returns the number moved."""
+        return 0
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        """Rebuild any lookup indexes the engine keeps. Returns their status."""
+        return self.index_status()
+
+    def index_status(self) -> Dict[str, Any]:
+        """Describe the lookup indexes the engine keeps."""
+        return {}
+
+    def info(self) -> Dict[str, Any]:
+        """Return a short description of the engine for ``storage info``."""
+        return {"engine": self.name, "location": str(self.root)}
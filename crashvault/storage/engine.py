@@ -0,0 +1,67 @@
+"""Storage engine registry - picks the engine configured for the vault."""
+
+from typing import Dict, Optional, Tuple, Type
+
+from .. import core
+from .base import StorageBackend
+
+
+DEFAULT_ENGINE = "json"
+
+# Registry of storage engine types
+_ENGINES: Dict[str, Type[StorageBackend]] = {}
+
+# Engine instances keyed by (engine name, vault root)
+_instances: Dict[Tuple[str, str], StorageBackend] = {}
+
+
+def register_engine(name: str, engine_class: Type[StorageBackend]):
+    """Register a storage engine type."""
+    _ENGINES[name] = engine_class
+
+
+def available_engines():
+    """Return the names of all registered engines."""
+    return sorted(_ENGINES)
+
+
+def configured_engine_name(cfg: Optional[dict] = None) -> str:
+    """Return the engine name selected in config.json.
+
+    The engine lives under the ``storage`` section, e.g.
+    ``{"storage": {"engine": "sqlite"}}``.
+    """
+    cfg = cfg if cfg is not None else core.load_config()
+    storage_cfg = cfg.get("storage", {})
+    if isinstance(storage_cfg, str):
+        return storage_cfg
+    if isinstance(storage_cfg, dict):
+        return storage_cfg.get("engine", DEFAULT_ENGINE)
+    return DEFAULT_ENGINE
+
+
+def get_engine(name: str) -> StorageBackend:
+    """Get the (cached) engine instance of the given type for the current vault."""
+    engine_class = _ENGINES.get(name)
+    if engine_class is None:
+        raise ValueError(f"Unknown storage engine: {name}")
+    key = (name, str(core.ROOT))
+    engine = _instances.get(key)
+    if engine is None:
+        engine = engine_class(core.ROOT)
+        _instances[key] = engine
+    return engine
+
+
+def get_storage() -> StorageBackend:
+    """Get the storage engine configured for the current vault."""
+    return get_engine(configured_engine_name())
+
+
+def reset_engines():
+    """Drop cached engine instances (e.g. after the vault root changes)."""
+    for engine in _instances.values():
+        close = getattr(engine, "close", None)
+        if close:
+            close()
+    _instances.clear()
@@ -0,0 +1,269 @@
+"""Persistent fingerprint -> issue id and issue id -> file offset index.
+
+The JSON engine writes ``issues.json`` with one issue per line, which lets
+this index remember where each issue starts.  Ingestion can then resolve a
+fingerprint to its issue, and ``get_issue`` can read a single record,
+without parsing the whole issue list.  It also keeps the number of issues
+per status for ``crashvault stats``.
+
+The index records the size and mtime of the ``issues.json`` it was built
+from; when the file changes behind its back (hand edits, older versions,
+another tool) the index is considered stale and rebuilt from the file.
+
+Creating an issue appends it to ``issues.json`` and its entry to a journal
+next to the index (``issues.index.log``), so neither file is rewritten per
+new issue; the journal is folded into the index every ``JOURNAL_LIMIT``
+entries and whenever the whole issue list is saved.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+INDEX_VERSION = 2
+JOURNAL_LIMIT = 1000
+
+
+def _file_signature(path: Path) -> Optional[Dict[str, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def dump_issue_lines(issues: List[Dict[str, Any]]) -> Tuple[bytes, Dict[int, Tuple[int, int]]]:
+    """Serialize issues one per line and return (data, {id: (offset, length)})."""
+    parts = [b"[\n"]
+    offsets: Dict[int, Tuple[int, int]] = {}
+    pos = 2
+    for n, issue in enumerate(issues):
+        line = json.dumps(issue).encode("utf-8")
+        offsets.setdefault(issue["id"], (pos, len(line)))
+        parts.append(line)
+        pos += len(line)
+        if n < len(issues) - 1:
+            parts.append(b",\n")
+            pos += 2
+    parts.append(b"\n]\n")
+    return b"".join(parts), offsets
+
+
+def scan_issue_lines(data: bytes) -> Optional[Dict[int, Tuple[int, int]]]:
+    """Recover line offsets from a file written by :func:`dump_issue_lines`.
+
+    Returns None if the file is in any other layout (e.g. pretty-printed).
+    """
+    offsets: Dict[int, Tuple[int, int]] = {}
+    pos = 0
+    for raw in data.split(b"\n"):
+        line = raw[:-1] if raw.endswith(b",") else raw
+        if line.startswith(b"{"):
+            try:
+                issue = json.loads(line)
+            except ValueError:
+                return None
+            offsets.setdefault(issue["id"], (pos, len(line)))
+        elif line.strip() not in (b"", b"[", b"]", b"[]"):
+            return None
+        pos += len(raw) + 1
+    return offsets
+
+
+def recover_issue_lines(data: bytes) -> Optional[List[Dict[str, Any]]]:
+    """Issues of a file written by :func:`dump_issue_lines` whose last append was torn.
+
+    The torn issue (which was never indexed) is dropped.  Returns None if
+    the damage is anywhere but the last issue, or the file is in any other
+    layout.
+    """
+    decoder = json.JSONDecoder()
+    issues: List[Dict[str, Any]] = []
+    torn = False
+    for line in data.split(b"\n"):
+        if line.startswith(b"{"):
+            if torn:
+                return None
+            try:
+                issues.append(decoder.raw_decode(line.decode("utf-8"))[0])
+            except ValueError:
+                torn = True
+        elif line.strip() not in (b"", b"[", b"]", b"[]"):
+            return None
+    return issues
+
+
+class IssueIndex:
+    """On-disk index kept next to ``issues.json``."""
+
+    def __init__(self, path: Path, source: Path):
+        self.path = path
+        self.journal = path.with_suffix(".log")
+        self.source = source
+        self.fingerprints: Dict[str, int] = {}
+        self.offsets: Dict[int, Tuple[int, int]] = {}
+        self.max_id = 0
+        self.statuses: Dict[str, int] = {}
+        self._source_sig: Optional[Dict[str, int]] = None
+        self._loaded_sig = None
+        self._journal_entries = 0
+
+    # -- persistence ----------------------------------------------------
+
+    def _signature(self):
+        return _file_signature(self.path), _file_signature(self.journal)
+
+    def _load(self) -> bool:
+        """(Re)load the index file if it changed on disk. Returns False if missing or unreadable."""
+        sig = self._signature()
+        if sig[0] is None:
+            return False
+        if sig == self._loaded_sig:
+            return True
+        try:
+            data = json.loads(self.path.read_text())
+        except Exception:
+            return False
+        if data.get("version") != INDEX_VERSION:
+            return False
+        self.fingerprints = data.get("fingerprints", {})
+        self.offsets = {int(k): tuple(v) for k, v in (data.get("offsets") or {}).items()}
+        self.max_id = data.get("max_id", 0)
+        self.statuses = data.get("statuses", {})
+        self._source_sig = data.get("source")
+        self._journal_entries = 0
+        try:
+            with open(self.journal, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn by a crash; its issue never made it into the source signature
+                    self._apply(entry)
+                    self._journal_entries += 1
+        except FileNotFoundError:
+            pass
+        self._loaded_sig = sig
+        return True
+
+    def _apply(self, entry: Dict[str, Any]):
+        issue_id = entry["id"]
+        for fp in [entry.get("fingerprint")] + entry.get("merged_fingerprints", []):
+            if fp:
+                self.fingerprints.setdefault(fp, issue_id)
+        self.statuses[entry["status"]] = self.statuses.get(entry["status"], 0) + 1
+        self.offsets[issue_id] = tuple(entry["loc"])
+        self.max_id = max(self.max_id, issue_id)
+        self._source_sig = entry["source"]
+
+    def _save(self):
+        # Drop the journal first: an index without it only looks stale
+        try:
+            self.journal.unlink()
+        except FileNotFoundError:
+            pass
+        self._journal_entries = 0
+        payload = {
+            "version": INDEX_VERSION,
+            "source": self._source_sig,
+            "max_id": self.max_id,
+            "statuses": self.statuses,
+            "fingerprints": self.fingerprints,
+            "offsets": {str(k): list(v) for k, v in self.offsets.items()},
+        }
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload))
+        os.replace(tmp, self.path)
+        self._loaded_sig = self._signature()
+
+    # -- maintenance ----------------------------------------------------
+
+    def is_fresh(self) -> bool:
+        """True if the index exists and matches the current issues.json."""
+        return self._load() and self._source_sig == _file_signature(self.source)
+
+    def update(self, issues: List[Dict[str, Any]], offsets: Optional[Dict[int, Tuple[int, int]]]):
+        """Record the state of a freshly written issues.json."""
+        self.fingerprints = {}
+        self.statuses = {}
+        for issue in issues:
+            fp = issue.get("fingerprint")
+            if fp and fp not in self.fingerprints:
+                self.fingerprints[fp] = issue["id"]
+            status = issue.get("status", "open")
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        # Fingerprints of merged-away issues resolve to the issue that absorbed them
+        for issue in issues:
+            for fp in issue.get("merged_fingerprints", ()):
+                self.fingerprints.setdefault(fp, issue["id"])
+        self.offsets = offsets or {}
+        self.max_id = max((i["id"] for i in issues), default=0)
+        self._source_sig = _file_signature(self.source)
+        self._save()
+
+    def append(self, issues: List[Dict[str, Any]], offsets: Dict[int, Tuple[int, int]]):
+        """Record new issues just appended to a fresh index's issues.json."""
+        source = _file_signature(self.source)
+        lines = []
+        for issue in issues:
+            entry = {
+                "id": issue["id"],
+                "fingerprint": issue.get("fingerprint"),
+                "merged_fingerprints": list(issue.get("merged_fingerprints", ())),
+                "status": issue.get("status", "open"),
+                "loc": list(offsets[issue["id"]]),
+                "source": source,
+            }
+            self._apply(entry)
+            lines.append(json.dumps(entry) + "\n")
+        if self._journal_entries + len(lines) > JOURNAL_LIMIT:
+            self._save()
+            return
+        with open(self.journal, "a") as f:
+            f.write("".join(lines))
+        self._journal_entries += len(lines)
+        self._loaded_sig = self._signature()
+
+    def rebuild(self, issues: List[Dict[str, Any]]):
+        """Rebuild from the current issues.json contents."""
+        offsets = None
+        try:
+            offsets = scan_issue_lines(self.source.read_bytes())
+        except FileNotFoundError:
+            pass
+        self.update(issues, offsets)
+
+    def remove(self):
+        """Delete the index file and its journal."""
+        for path in (self.journal, self.path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self._loaded_sig = None
+
+    # -- lookups (caller must check is_fresh first) ---------------------
+
+    def lookup_fingerprint(self, fingerprint: str) -> Optional[int]:
+        return self.fingerprints.get(fingerprint)
+
+    def read_issue(self, issue_id: int) -> Optional[Dict[str, Any]]:
+        """Read one issue straight from its offset in issues.json."""
+        loc = self.offsets.get(issue_id)
+        if loc is None:
+            return None
+        offset, length = loc
+        with open(self.source, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "fresh": self.is_fresh(),
+            "fingerprints": len(self.fingerprints),
+            "statuses": dict(self.statuses),
+            "offsets": len(self.offsets),
+            "journal": self._journal_entries,
+        }
@@ -0,0 +1,400 @@
+"""JSON storage engine - issues.json plus one JSON file per event.
+
+This is the default engine and the on-disk layout Crashvault has always
+used, so existing vaults keep working without migration.  Unencrypted
+vaults also keep an ``issues.index.json`` (see ``issue_index``) so that
+fingerprint and id lookups do not parse the whole issue list.  Encrypted
+vaults write their events to the sealed store instead (see ``sealed``).
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .. import core
+from .base import StorageBackend, event_matches
+from .engine import register_engine
+from .issue_index import IssueIndex, dump_issue_lines, recover_issue_lines
+from ..timerange import day_dir_date, iter_day_dirs
+
+INDEX_FILE_NAME = "issues.index.json"
+
+
+class JSONStorage(StorageBackend):
+    """Store issues in ``issues.json`` and events under ``events/YYYY/MM/DD``."""
+
+    name = "json"
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.issue_index = IssueIndex(root / INDEX_FILE_NAME, core.ISSUES_FILE)
+        self._sealed_store = None
+        self._sealed_key: Optional[bytes] = None
+
+    def _fresh_index(self) -> Optional[IssueIndex]:
+        """Return the issue index, rebuilding it if stale; None for encrypted vaults."""
+        if core.is_vault_encrypted():
+            return None
+        if not self.issue_index.is_fresh():
+            self.issue_index.rebuild(self.load_issues())
+        return self.issue_index
+
+    def load_issues(self) -> List[Dict[str, Any]]:
+        core.ensure_dirs()
+        key = core.get_vault_key()
+        if core.is_vault_encrypted() and key:
+            from .. import encrypter
+            # Encrypted vault
+            if encrypter.is_chunked_file(core.ISSUES_FILE):
+                try:
+                    with encrypter.open_decrypted(core.ISSUES_FILE, key) as f:
+                        return json.load(f)
+                except encrypter.DecryptionError:
+                    raise ValueError("Invalid password for encrypted vault")
+            if core._is_encrypted_json_file(core.ISSUES_FILE):
+                # Single Fernet token written by older versions
+                from cryptography.fernet import InvalidToken
+                try:
+                    decrypted = encrypter.decrypt_file(core.ISSUES_FILE, key=key)
+                    return json.loads(decrypted)
+                except InvalidToken:
+                    raise ValueError("Invalid password for encrypted vault")
+            # Vault was just encrypted, file is not yet encrypted
+
+        data = core.ISSUES_FILE.read_bytes()
+        try:
+            return json.loads(data)
+        except ValueError:
+            # An append interrupted by a crash leaves the last line torn
+            issues = recover_issue_lines(data)
+            if issues is None:
+                raise
+            return issues
+
+    def save_issues(self, issues: List[Dict[str, Any]]) -> None:
+        key = core.get_vault_key()
+        if core.is_vault_encrypted() and key:
+            from .. import encrypter
+            # Encrypt and save
+            data = json.dumps(issues, indent=2).encode()
+            encrypter.write_encrypted(core.ISSUES_FILE, data, key)
+            # Never keep plaintext lookups next to an encrypted issue list
+            self.issue_index.remove()
+        else:
+            data, offsets = dump_issue_lines(issues)
+            tmp_path = core.ISSUES_FILE.with_suffix(core.ISSUES_FILE.suffix + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, core.ISSUES_FILE)
+            self.issue_index.update(issues, offsets)
+
+    def save_issue(self, issue: Dict[str, Any]) -> None:
+        index = self._fresh_index()
+        if index is None or issue["id"] in index.offsets or not self._append_issues(index, [issue]):
+            super().save_issue(issue)
+
+    def add_issues(self, issues: List[Dict[str, Any]]) -> None:
+        index = self._fresh_index()
+        if index is None or not self._append_issues(index, issues):
+            super().add_issues(issues)
+
+    def _append_issues(self, index: IssueIndex, issues: List[Dict[str, Any]]) -> bool:
+        """Append new issues to issues.json in place. False if its layout does not allow it."""
+        if not index.offsets:
+            return False  # empty, or not written by dump_issue_lines
+        with open(core.ISSUES_FILE, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(size - 4, 0))
+            if f.read() != b"}\n]\n":
+                return False
+            # Overwrite the closing "\n]\n" with ",\n<issue>" lines and close again
+            offsets = {}
+            parts = []
+            pos = size - 3
+            for issue in issues:
+                line = json.dumps(issue).encode("utf-8")
+                parts.append(b",\n" + line)
+                offsets[issue["id"]] = (pos + 2, len(line))
+                pos += 2 + len(line)
+            parts.append(b"\n]\n")
+            f.seek(size - 3)
+            f.write(b"".join(parts))
+        index.append(issues, offsets)
+        return True
+
+    def get_issue(self, issue_id: int) -> Optional[Dict[str, Any]]:
+        return self._get_issue(self._fresh_index(), issue_id)
+
+    def _get_issue(self, index: Optional[IssueIndex], issue_id: int) -> Optional[Dict[str, Any]]:
+        if index is not None and index.offsets:
+            try:
+                issue = index.read_issue(issue_id)
+            except ValueError:
+                issue = None  # file changed under us; fall back to a full read
+            if issue is not None and issue.get("id") == issue_id:
+                return issue
+            if issue_id not in index.offsets:
+                return None
+        return super().get_issue(issue_id)
+
+    def find_issue_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        index = self._fresh_index()
+        if index is None:
+            return super().find_issue_by_fingerprint(fingerprint)
+        issue_id = index.lookup_fingerprint(fingerprint)
+        return self._get_issue(index, issue_id) if issue_id is not None else None
+
+    def count_issues_by_status(self) -> Dict[str, int]:
+        index = self._fresh_index()
+        if index is None:
+            return super().count_issues_by_status()
+        return dict(index.statuses)
+
+    def next_issue_id(self) -> int:
+        index = self._fresh_index()
+        if index is None:
+            return super().next_issue_id()
+        return index.max_id + 1
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        if core.is_vault_encrypted():
+            return {"issue_index": "disabled (encrypted vault)"}
+        self.issue_index.rebuild(self.load_issues())
+        return {"issue_index": self.issue_index.stats()}
+
+    def index_status(self) -> Dict[str, Any]:
+        if core.is_vault_encrypted():
+            return {"issue_index": "disabled (encrypted vault)"}
+        return {"issue_index": self.issue_index.stats()}
+
+    # -- sealed events ----------------------------------------------------
+
+    def _sealed_with(self, key: bytes):
+        # Imported here: cryptography is only needed by encrypted vaults
+        from .sealed import SealedEvents
+
+        if self._sealed_store is None or self._sealed_key != key:
+            self._sealed_store, self._sealed_key = SealedEvents(core.EVENTS_DIR, key), key
+        return self._sealed_store
+
+    def _sealed(self):
+        """The sealed event store of an encrypted, unlocked vault; else None."""
+        if not core.is_vault_encrypted():
+            return None
+        key = core.get_vault_key()
+        return self._sealed_with(key) if key is not None else None
+
+    def _get_sealed(self, event_ids, day_dir=None) -> Dict[str, Dict[str, Any]]:
+        sealed = self._sealed()
+        return sealed.get_events(set(event_ids), day_dir) if sealed is not None and event_ids else {}
+
+    def seal_events(self) -> int:
+        """Move plaintext events into the sealed store. Returns the number moved."""
+        sealed = self._sealed()
+        if sealed is None:
+            raise ValueError("The vault must be encrypted and unlocked to seal its events")
+        moved = 0
+        batch: List[Tuple[Any, Dict[str, Any]]] = []
+
+        def flush():
+            sealed.append([ev for _, ev in batch])
+            for f, _ in batch:
+                f.unlink()
+
+        for item in list(self._iter_event_files()):
+            batch.append(item)
+            if len(batch) >= 1000:
+                flush()
+                moved += len(batch)
+                batch = []
+        if batch:
+            flush()
+            moved += len(batch)
+        return moved
+
+    def unseal_events(self, key: bytes) -> int:
+        """Write sealed events back as plaintext (when decrypting the vault). Returns the number moved."""
+        sealed = self._sealed_with(key)
+        moved = 0
+        for segment in sealed.segments():
+            events = list(sealed.read_segment(segment))
+            self._append_plain(events)
+            sealed.remove_segment(segment)
+            moved += len(events)
+        return moved
+
+    # -- events -----------------------------------------------------------
+
+    def append_events(self, events: List[Dict[str, Any]]) -> None:
+        if core.is_vault_encrypted():
+            sealed = self._sealed()
+            if sealed is None:
+                raise ValueError("The vault is encrypted; unlock it to store events")
+            sealed.append(events)
+        else:
+            self._append_plain(events)
+
+    def _append_plain(self, events: List[Dict[str, Any]]) -> None:
+        for ev in events:
+            ts = core.parse_timestamp(ev["timestamp"])
+            path = core.event_path_for(ev["event_id"], ts)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(ev, f, indent=2)
+            os.replace(tmp, path)
+
+    def _iter_event_files(self, since: Optional[datetime] = None, until: Optional[datetime] = None):
+        """Yield (path, event) for every readable event file.
+
+        With a time range only the day directories that overlap it are read.
+        """
+        if since is None and until is None:
+            files = core.EVENTS_DIR.glob("**/*.json")
+        else:
+            files = (f for day_dir in iter_day_dirs(core.EVENTS_DIR, since, until) for f in day_dir.glob("*.json"))
+        for f in files:
+            try:
+                yield f, json.loads(f.read_text())
+            except Exception:
+                continue
+
+    def _read_day(self, day_dir) -> Iterator[Dict[str, Any]]:
+        """Events stored in one day directory."""
+        for f in day_dir.glob("*.json"):
+            try:
+                yield json.loads(f.read_text())
+            except Exception:
+                continue
+        sealed = self._sealed()
+        if sealed is not None:
+            yield from sealed.read_day(day_dir)
+
+    def _event_partitions(self, since, until, newest_first):
+        day_dirs = list(iter_day_dirs(core.EVENTS_DIR, since, until))
+        if newest_first:
+            day_dirs.reverse()
+        for day_dir in day_dirs:
+            yield day_dir_date(day_dir), self._read_day(day_dir)
+
+    def iter_events(
+        self,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        for _, ev in self._iter_event_files(since, until):
+            if event_matches(ev, issue_id, level, tags, text, since, until):
+                yield ev
+        sealed = self._sealed()
+        if sealed is not None:
+            yield from sealed.iter_events(issue_id, level, tags, text, since, until)
+
+    def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        # Event files are named after their id, so no parsing is needed to find one
+        for f in core.EVENTS_DIR.glob(f"**/{event_id}.json"):
+            try:
+                return json.loads(f.read_text())
+            except Exception:
+                return None
+        return self._get_sealed([event_id]).get(event_id)
+
+    def get_events(self, refs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        sealed_by_day: Dict[Any, List[str]] = {}
+        for event_id, timestamp in refs:
+            day_dir = core.event_day_dir(timestamp)
+            if day_dir is not None:
+                try:
+                    found[event_id] = json.loads((day_dir / f"{event_id}.json").read_text())
+                    continue
+                except FileNotFoundError:
+                    sealed_by_day.setdefault(day_dir, []).append(event_id)
+                    continue
+                except Exception:
+                    continue
+            ev = self.get_event(event_id)
+            if ev is not None:
+                found[event_id] = ev
+        for day_dir, event_ids in sealed_by_day.items():
+            in_day = self._get_sealed(event_ids, day_dir)
+            found.update(in_day)
+            for event_id in event_ids:
+                if event_id not in in_day:
+                    ev = self.get_event(event_id)
+                    if ev is not None:
+                        found[event_id] = ev
+        return found
+
+    def _delete_where(self, predicate, remove_unreadable: bool = False) -> int:
+        removed = 0
+        for f in core.EVENTS_DIR.glob("**/*.json"):
+            try:
+                ev = json.loads(f.read_text())
+            except Exception:
+                if not remove_unreadable:
+                    continue
+                ev = None
+            if ev is None or predicate(ev):
+                try:
+                    f.unlink()
+                    removed += 1
+                except Exception:
+                    pass
+        return removed
+
+    def delete_issue_events(self, issue_id: int) -> int:
+        removed = self._delete_where(lambda ev: ev.get("issue_id") == issue_id)
+        sealed = self._sealed()
+        return removed + (sealed.delete_issue_events(issue_id) if sealed is not None else 0)
+
+    def delete_orphaned_events(self, valid_ids: Iterable[int]) -> int:
+        valid_ids = set(valid_ids)
+        removed = self._delete_where(lambda ev: ev.get("issue_id") not in valid_ids, remove_unreadable=True)
+        sealed = self._sealed()
+        return removed + (sealed.delete_orphaned_events(valid_ids) if sealed is not None else 0)
+
+    def delete_events_before(self, cutoff: float) -> int:
+        sealed = self._sealed()
+        removed = sealed.delete_events_before(cutoff) if sealed is not None else 0
+        for p in core.EVENTS_DIR.glob("**/*.json"):
+            try:
+                if p.stat().st_mtime < cutoff:
+                    p.unlink()
+                    removed += 1
+            except Exception:
+                continue
+        return removed
+
+    def clear_events(self) -> None:
+        for f in core.EVENTS_DIR.glob("**/*.json"):
+            try:
+                f.unlink()
+            except Exception:
+                pass
+        from .sealed import clear_sealed_events
+        clear_sealed_events(core.EVENTS_DIR)
+
+    def clear(self) -> None:
+        if core.ISSUES_FILE.exists():
+            core.ISSUES_FILE.unlink()
+        self.issue_index.remove()
+        self.clear_events()
+
+    def info(self) -> Dict[str, Any]:
+        data = {
+            "engine": self.name,
+            "location": str(self.root),
+            "issues_file": str(core.ISSUES_FILE),
+            "events_dir": str(core.EVENTS_DIR),
+        }
+        sealed = self._sealed()
+        if sealed is not None:
+            data.update(sealed.stats())
+        return data
+
+
+# Register the engine
+register_engine("json", JSONStorage)
@@ -0,0 +1,72 @@
+"""Cross-process file locks used by the storage engines."""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+
+# In-process locks, so threads of one process serialize before taking the OS lock
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+# Lock files already held by the current thread (re-entrant use)
+_held = threading.local()
+
+
+def _thread_lock(path: Path) -> threading.RLock:
+    key = str(path)
+    with _thread_locks_guard:
+        lock = _thread_locks.get(key)
+        if lock is None:
+            lock = threading.RLock()
+            _thread_locks[key] = lock
+        return lock
+
+
+@contextmanager
+def file_lock(path: Path):
+    """Hold an exclusive lock on ``path`` (created if missing).
+
+    Serializes both threads of this process and other processes using the
+    same lock file.  On platforms without ``fcntl``/``msvcrt`` only the
+    in-process part applies.
+    """
+    key = str(path)
+    held = getattr(_held, "paths", None)
+    if held is None:
+        held = _held.paths = set()
+    if key in held:
+        yield
+        return
+
+    tlock = _thread_lock(path)
+    with tlock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(path), os.O_RDWR | os.O_CREAT, 0o644)
+        held.add(key)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            elif msvcrt is not None:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            yield
+        finally:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                elif msvcrt is not None:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+                held.discard(key)
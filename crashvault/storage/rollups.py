@@ -0,0 +1,443 @@
+"""Materialised event counters behind ``crashvault stats`` and ``/api/v1/stats``.
+
+A sidecar (``index/rollups.db``, SQLite) holds event counts per level, per
+issue and per UTC hour and level.  They are incremented at write time by the
+helpers in ``crashvault.core`` and by the ingest writer, so reading the
+totals costs the same however many events the vault holds.  Ranged counts
+add up the whole hours inside the range and scan only the partial hours at
+its edges.
+
+The same sidecar keeps a time series per issue and level at minute, hour
+and day resolution for ``stats --trend`` and ``/api/v1/issues/<id>/series``.
+Finer buckets are dropped once they are older than their retention (see
+``series`` in config.json); the coarser ones still cover that time::
+
+    {"series": {"minute_retention_hours": 48, "hour_retention_days": 90}}
+
+Deletes do not know which events they removed, so they mark the counters
+stale instead; the next read rebuilds them with one scan.  A vault created
+before the counters existed is built the same way on first use.
+``crashvault index check`` compares the counters with a full recount and
+``crashvault index rebuild`` rebuilds them.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .. import core
+from ..timerange import event_time
+
+
+logger = logging.getLogger("crashvault")
+
+INDEX_DIR_NAME = "index"
+DB_NAME = "rollups.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS counts (
+    kind  TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS hourly (
+    hour  TEXT NOT NULL,
+    level TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (hour, level)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS series (
+    resolution TEXT NOT NULL,
+    issue_id   INTEGER NOT NULL,
+    bucket     TEXT NOT NULL,
+    level      TEXT NOT NULL,
+    count      INTEGER NOT NULL,
+    PRIMARY KEY (resolution, issue_id, bucket, level)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_series_bucket ON series(resolution, bucket);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_HOUR_FORMAT = "%Y-%m-%dT%H"
+
+# Bumped when the counters gain data that older builds do not have
+ROLLUP_VERSION = "2"
+
+# Series resolutions: bucket length and key format (UTC)
+RESOLUTIONS = {
+    "minute": (timedelta(minutes=1), "%Y-%m-%dT%H:%M"),
+    "hour": (timedelta(hours=1), _HOUR_FORMAT),
+    "day": (timedelta(days=1), "%Y-%m-%d"),
+}
+DEFAULT_MINUTE_RETENTION_HOURS = 48
+DEFAULT_HOUR_RETENTION_DAYS = 90
+MAX_SERIES_POINTS = 1440
+PRUNE_INTERVAL = 60.0
+
+
+def _hour_floor(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    """Start of the ``resolution`` bucket holding ``ts``, in UTC."""
+    ts = ts.astimezone(timezone.utc).replace(second=0, microsecond=0)
+    if resolution != "minute":
+        ts = ts.replace(minute=0)
+    if resolution == "day":
+        ts = ts.replace(hour=0)
+    return ts
+
+
+def series_retention(cfg: Optional[Dict[str, Any]] = None) -> Dict[str, Optional[timedelta]]:
+    """How long buckets of each resolution are kept (None: forever)."""
+    cfg = cfg if cfg is not None else core.load_config()
+    data = cfg.get("series", {})
+    if not isinstance(data, dict):
+        data = {}
+    return {
+        "minute": timedelta(hours=float(data.get("minute_retention_hours", DEFAULT_MINUTE_RETENTION_HOURS))),
+        "hour": timedelta(days=float(data.get("hour_retention_days", DEFAULT_HOUR_RETENTION_DAYS))),
+        "day": None,
+    }
+
+
+_Tally = Tuple[Dict[Tuple[str, str], int], Dict[Tuple[str, str], int], Dict[Tuple[str, int, str, str], int]]
+
+
+def tally(events: Iterable[Dict[str, Any]]) -> _Tally:
+    """Count events into ``({(kind, key): n}, {(hour, level): n}, {(resolution, issue, bucket, level): n})``."""
+    counts: Dict[Tuple[str, str], int] = {}
+    hourly: Dict[Tuple[str, str], int] = {}
+    series: Dict[Tuple[str, int, str, str], int] = {}
+    for ev in events:
+        level = ev.get("level", "unknown")
+        if level is None:
+            level = "unknown"
+        for key in (("level", level), ("issue", str(ev.get("issue_id")))):
+            counts[key] = counts.get(key, 0) + 1
+        ts = event_time(ev.get("timestamp"))
+        hour = ts.astimezone(timezone.utc).strftime(_HOUR_FORMAT) if ts else ""
+        hourly[(hour, level)] = hourly.get((hour, level), 0) + 1
+        if ts is None:
+            continue
+        issue_id = ev.get("issue_id") if isinstance(ev.get("issue_id"), int) else 0
+        for resolution, (_, fmt) in RESOLUTIONS.items():
+            key = (resolution, issue_id, ts.astimezone(timezone.utc).strftime(fmt), level)
+            series[key] = series.get(key, 0) + 1
+    return counts, hourly, series
+
+
+class Rollups:
+    """The ``index/rollups.db`` sidecar of one vault."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+        self._last_prune = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -- maintenance ----------------------------------------------------
+
+    def is_built(self) -> bool:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'built'").fetchone()
+        return bool(row and row[0] == ROLLUP_VERSION)
+
+    @staticmethod
+    def _apply(conn: sqlite3.Connection, counts, hourly, series):
+        conn.executemany(
+            "INSERT INTO counts (kind, key, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (kind, key) DO UPDATE SET count = count + excluded.count",
+            [(kind, key, n) for (kind, key), n in counts.items()],
+        )
+        conn.executemany(
+            "INSERT INTO hourly (hour, level, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (hour, level) DO UPDATE SET count = count + excluded.count",
+            [(hour, level, n) for (hour, level), n in hourly.items()],
+        )
+        conn.executemany(
+            "INSERT INTO series (resolution, issue_id, bucket, level, count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (resolution, issue_id, bucket, level) DO UPDATE SET count = count + excluded.count",
+            [(res, issue_id, bucket, level, n) for (res, issue_id, bucket, level), n in series.items()],
+        )
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Drop series buckets older than their resolution's retention."""
+        now = now or datetime.now(timezone.utc)
+        removed = 0
+        conn = self._conn()
+        with conn:
+            for resolution, keep in series_retention().items():
+                if keep is None:
+                    continue
+                cutoff = bucket_start(now - keep, resolution).strftime(RESOLUTIONS[resolution][1])
+                removed += conn.execute("DELETE FROM series WHERE resolution = ? AND bucket < ?",
+                                        (resolution, cutoff)).rowcount
+        self._last_prune = time.monotonic()
+        return removed
+
+    def add(self, events: List[Dict[str, Any]]):
+        """Count newly stored events (ignored until the counters are built)."""
+        conn = self._conn()
+        with conn:
+            if self.is_built():
+                self._apply(conn, *tally(events))
+        if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+            self.prune()
+
+    def invalidate(self):
+        """Mark the counters stale; the next read rebuilds them."""
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', '0')")
+
+    def rebuild(self, events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Recount from ``events`` (normally every stored event)."""
+        counted = tally(events)
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM counts")
+            conn.execute("DELETE FROM hourly")
+            conn.execute("DELETE FROM series")
+            self._apply(conn, *counted)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built', ?)", (ROLLUP_VERSION,))
+        self.prune()
+        return self.status()
+
+    def ensure_built(self, storage):
+        if not self.is_built():
+            # Every writer (core.save_events, the ingest writer) holds this
+            # lock from append to count, so no write is half-counted while
+            # the events are scanned
+            with core.issue_store_lock():
+                if not self.is_built():
+                    self.rebuild(storage.iter_events())
+
+    def status(self) -> Dict[str, Any]:
+        conn = self._conn()
+        total = conn.execute("SELECT COALESCE(SUM(count), 0) FROM counts WHERE kind = 'level'").fetchone()[0]
+        hours = conn.execute("SELECT COUNT(DISTINCT hour) FROM hourly").fetchone()[0]
+        buckets = conn.execute("SELECT COUNT(*) FROM series").fetchone()[0]
+        return {"path": str(self.path), "built": self.is_built(), "events": total, "hours": hours,
+                "series_buckets": buckets}
+
+    # -- reads ------------------------------------------------------------
+
+    def counts(self, kind: str) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT key, count FROM counts WHERE kind = ? AND count != 0", (kind,))
+        return {key: count for key, count in rows}
+
+    def hourly_by_level(self, low: Optional[str], high: Optional[str]) -> Dict[str, int]:
+        """Level counts of the hour buckets in ``[low, high)`` (either end open)."""
+        sql = "SELECT level, SUM(count) FROM hourly WHERE hour != ''"
+        params: List[str] = []
+        if low is not None:
+            sql += " AND hour >= ?"
+            params.append(low)
+        if high is not None:
+            sql += " AND hour < ?"
+            params.append(high)
+        rows = self._conn().execute(sql + " GROUP BY level", params)
+        return {level: count for level, count in rows if count}
+
+    def series_counts(self, resolution: str, low: str, high: str, issue_id: Optional[int] = None,
+                      level: Optional[str] = None) -> Dict[str, int]:
+        """Counts per ``resolution`` bucket in ``[low, high)``, optionally for one issue and level."""
+        sql = "SELECT bucket, SUM(count) FROM series WHERE resolution = ? AND bucket >= ? AND bucket < ?"
+        params: List[Any] = [resolution, low, high]
+        if issue_id is not None:
+            sql += " AND issue_id = ?"
+            params.append(issue_id)
+        if level:
+            sql += " AND level = ?"
+            params.append(level)
+        rows = self._conn().execute(sql + " GROUP BY bucket", params)
+        return {bucket: count for bucket, count in rows}
+
+    def check(self, events: Iterable[Dict[str, Any]]) -> List[str]:
+        """Compare the counters with a recount of ``events``; returns the differences."""
+        counts, hourly, series = tally(events)
+        problems = []
+        for kind in ("level", "issue"):
+            stored = self.counts(kind)
+            actual = {key: n for (k, key), n in counts.items() if k == kind}
+            for key in sorted(set(stored) | set(actual)):
+                if stored.get(key, 0) != actual.get(key, 0):
+                    problems.append(f"{kind} {key}: counted {stored.get(key, 0)}, actual {actual.get(key, 0)}")
+        stored_hours = {(hour, level): count for hour, level, count in
+                        self._conn().execute("SELECT hour, level, count FROM hourly WHERE count != 0")}
+        bad_hours = sum(1 for key in set(stored_hours) | set(hourly)
+                        if stored_hours.get(key, 0) != hourly.get(key, 0))
+        if bad_hours:
+            problems.append(f"{bad_hours} hourly bucket(s) differ")
+        # Day buckets are never pruned, so they must match exactly
+        stored_days = {(issue_id, bucket, level): count for issue_id, bucket, level, count in self._conn().execute(
+            "SELECT issue_id, bucket, level, count FROM series WHERE resolution = 'day' AND count != 0")}
+        days = {key[1:]: n for key, n in series.items() if key[0] == "day"}
+        bad_days = sum(1 for key in set(stored_days) | set(days) if stored_days.get(key, 0) != days.get(key, 0))
+        if bad_days:
+            problems.append(f"{bad_days} daily series bucket(s) differ")
+        return problems
+
+
+_instances: Dict[str, Rollups] = {}
+_instances_lock = threading.Lock()
+
+
+def open_rollups() -> Rollups:
+    """The (cached) rollup counters of the current vault."""
+    path = core.ROOT / INDEX_DIR_NAME / DB_NAME
+    with _instances_lock:
+        rollups = _instances.get(str(path))
+        if rollups is None:
+            rollups = _instances[str(path)] = Rollups(path)
+    return rollups
+
+
+def _maintain(action: str, fn, *args):
+    """Apply a write-time counter update; never let it fail the write itself."""
+    try:
+        getattr(open_rollups(), fn)(*args)
+    except sqlite3.Error as e:
+        logger.warning(f"rollup {action} failed, run `crashvault index rebuild`: {e}")
+
+
+def count_events(events: List[Dict[str, Any]]):
+    _maintain("update", "add", events)
+
+
+def invalidate_rollups():
+    _maintain("invalidate", "invalidate")
+
+
+def clear_rollups():
+    _maintain("clear", "rebuild", [])
+
+
+def count_events_by_level(storage, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> Dict[str, int]:
+    """Level counts from the counters, falling back to the engine if they are unusable."""
+    try:
+        rollups = open_rollups()
+        rollups.ensure_built(storage)
+        if since is None and until is None:
+            return rollups.counts("level")
+        return _ranged_counts(rollups, storage, since, until)
+    except sqlite3.Error as e:
+        logger.warning(f"rollup read failed, counting events instead: {e}")
+        return storage.count_events_by_level(since=since, until=until)
+
+
+def _ranged_counts(rollups: Rollups, storage, since: Optional[datetime],
+                   until: Optional[datetime]) -> Dict[str, int]:
+    # Whole hours inside the range come from the counters, the partial
+    # hours at either edge from the (partition-pruned) events
+    first = _hour_floor(since) if since is not None else None
+    if first is not None and first < since:
+        first += timedelta(hours=1)
+    last = _hour_floor(until) if until is not None else None
+    if first is not None and last is not None and first >= last:
+        return storage.count_events_by_level(since=since, until=until)
+
+    counts = rollups.hourly_by_level(first.strftime(_HOUR_FORMAT) if first else None,
+                                     last.strftime(_HOUR_FORMAT) if last else None)
+    edges = []
+    if first is not None and since < first:
+        edges.append((since, first))
+    if last is not None and last < until:
+        edges.append((last, until))
+    for low, high in edges:
+        for level, n in storage.count_events_by_level(since=low, until=high).items():
+            counts[level] = counts.get(level, 0) + n
+    return counts
+
+
+def count_events_by_issue(storage) -> Dict[int, int]:
+    """Event count per issue id, from the counters."""
+    rollups = open_rollups()
+    rollups.ensure_built(storage)
+    return {int(key): n for key, n in rollups.counts("issue").items() if key.lstrip("-").isdigit()}
+
+
+def pick_resolution(since: datetime, until: datetime, now: Optional[datetime] = None) -> str:
+    """Finest resolution that is still retained at ``since`` and fits the range in few enough points."""
+    now = now or datetime.now(timezone.utc)
+    retention = series_retention()
+    for resolution, (step, _) in RESOLUTIONS.items():
+        keep = retention[resolution]
+        if keep is not None and since < now - keep:
+            continue
+        if (until - since) / step <= MAX_SERIES_POINTS:
+            return resolution
+    return "day"
+
+
+def event_series(storage, issue_id: Optional[int] = None, level: Optional[str] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 resolution: Optional[str] = None) -> Dict[str, Any]:
+    """Event counts per time bucket, from the counters only.
+
+    Defaults to the last 24 hours at the finest resolution that fits.  The
+    buckets containing ``since`` and ``until`` are counted whole.  Raises
+    ValueError for an unknown resolution or a range with too many buckets.
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(hours=24)
+    if since >= until:
+        raise ValueError("since must be before until")
+    if resolution is None:
+        resolution = pick_resolution(since, until)
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution} (use {', '.join(RESOLUTIONS)})")
+    step, fmt = RESOLUTIONS[resolution]
+
+    starts = []
+    start = bucket_start(since, resolution)
+    while start < until:
+        starts.append(start)
+        if len(starts) > MAX_SERIES_POINTS:
+            raise ValueError(f"Too many {resolution} buckets in range (max {MAX_SERIES_POINTS}); "
+                             "use a coarser resolution")
+        start += step
+
+    rollups = open_rollups()
+    rollups.ensure_built(storage)
+    counts = rollups.series_counts(resolution, starts[0].strftime(fmt), (starts[-1] + step).strftime(fmt),
+                                   issue_id=issue_id, level=level)
+    buckets = [{"start": s.strftime("%Y-%m-%dT%H:%M:%SZ"), "count": counts.get(s.strftime(fmt), 0)}
+               for s in starts]
+    return {
+        "resolution": resolution,
+        "since": since.astimezone(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "until": until.astimezone(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "buckets": buckets,
+        "total": sum(b["count"] for b in buckets),
+    }
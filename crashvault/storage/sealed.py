@@ -0,0 +1,365 @@
+"""Sealed event store - how encrypted vaults keep their events.
+
+Events of an encrypted vault are appended to sealed segments under the
+usual day partitions, whichever engine the vault uses::
+
+    events/2024/03/15/1710460800000.sealed   <- header, then encrypted records
+    events/2024/03/15/1710460800000.sidx     <- one line of digests per record
+
+Every segment has its own random data key, kept in the segment header
+encrypted (AES-GCM) under a key-encryption key derived from the vault key;
+each record is sealed on its own under the data key with a fresh nonce.
+The index holds no plaintext: per record its offset and length, and keyed
+digests (HMAC-SHA256 under an index key derived from the vault key) of its
+event id, issue id, level and tags.  Queries filtering on those fields
+compare digests and only decrypt the records that match, and deleting an
+issue's events copies the other records without decrypting anything.
+
+Records are written before their index lines, so a crash mid-append
+leaves at most unindexed bytes at the end of a segment, which are ignored,
+and a partial last index line, which the next append cuts off.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from .. import core
+from ..encrypter import DecryptionError, derive_subkey
+from ..timerange import iter_day_dirs
+from .base import drop_torn_tail, event_matches
+from .locking import file_lock
+
+SEGMENT_SUFFIX = ".sealed"
+INDEX_SUFFIX = ".sidx"
+LOCK_NAME = ".sealed.lock"
+MAGIC = b"CVS1"
+
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+SEGMENT_MAX_AGE = 3600
+
+_NONCE_SIZE = 12
+_HEADER_SIZE = len(MAGIC) + _NONCE_SIZE + 32 + 16
+_LENGTH = struct.Struct(">I")
+
+# Index entry: [offset, length, event id, issue id, level, [tags]] (digests)
+_OFFSET, _SIZE, _EVENT, _ISSUE, _LEVEL, _TAGS = range(6)
+
+
+def clear_sealed_events(events_dir: Path) -> None:
+    """Delete every sealed segment (no key needed)."""
+    for segment in sorted(events_dir.glob("**/*" + SEGMENT_SUFFIX)):
+        with file_lock(segment.parent / LOCK_NAME):
+            SealedEvents.remove_segment(segment)
+
+
+def _segment_created(path: Path) -> float:
+    try:
+        return int(path.stem) / 1000.0
+    except ValueError:
+        return 0.0
+
+
+class SealedEvents:
+    """The sealed segments of one vault, opened with its key."""
+
+    def __init__(self, events_dir: Path, key: bytes):
+        self.events_dir = events_dir
+        self._kek = AESGCM(derive_subkey(key, b"crashvault segment keys v1"))
+        self._index_key = derive_subkey(key, b"crashvault index v1")
+        self._deks: Dict[bytes, AESGCM] = {}
+
+    def digest(self, field: str, value: Any) -> str:
+        """Keyed digest of a field value, as stored in the index."""
+        msg = f"{field}\0{value}".encode("utf-8")
+        return hmac.new(self._index_key, msg, hashlib.sha256).hexdigest()[:32]
+
+    # -- layout ---------------------------------------------------------
+
+    def segments(self, day_dir: Optional[Path] = None) -> List[Path]:
+        """Sealed segments of one day (or all days), oldest first."""
+        if day_dir is not None:
+            return sorted(day_dir.glob("*" + SEGMENT_SUFFIX))
+        return sorted(self.events_dir.glob("**/*" + SEGMENT_SUFFIX))
+
+    def _segments_between(self, since: Optional[datetime], until: Optional[datetime]) -> List[Path]:
+        if since is None and until is None:
+            return self.segments()
+        return [s for day_dir in iter_day_dirs(self.events_dir, since, until) for s in self.segments(day_dir)]
+
+    def _active_segment(self, day_dir: Path) -> Path:
+        segments = self.segments(day_dir)
+        now = time.time()
+        if segments:
+            current = segments[-1]
+            try:
+                size = current.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size < SEGMENT_MAX_BYTES and now - _segment_created(current) < SEGMENT_MAX_AGE:
+                return current
+            name = max(int(now * 1000), int(current.stem) + 1)
+        else:
+            name = int(now * 1000)
+        return day_dir / f"{name}{SEGMENT_SUFFIX}"
+
+    # -- keys -----------------------------------------------------------
+
+    def _new_header(self) -> Tuple[bytes, AESGCM]:
+        dek = AESGCM.generate_key(bit_length=256)
+        nonce = os.urandom(_NONCE_SIZE)
+        header = MAGIC + nonce + self._kek.encrypt(nonce, dek, MAGIC)
+        self._deks[header] = AESGCM(dek)
+        return header, self._deks[header]
+
+    def _dek(self, header: bytes) -> AESGCM:
+        """Unwrap the data key of a segment from its header."""
+        dek = self._deks.get(header)
+        if dek is None:
+            if len(header) != _HEADER_SIZE or not header.startswith(MAGIC):
+                raise DecryptionError("Not a sealed event segment")
+            nonce = header[len(MAGIC):len(MAGIC) + _NONCE_SIZE]
+            try:
+                dek = AESGCM(self._kek.decrypt(nonce, header[len(MAGIC) + _NONCE_SIZE:], MAGIC))
+            except InvalidTag:
+                raise DecryptionError("Wrong key for this vault's events")
+            self._deks[header] = dek
+        return dek
+
+    # -- writes ---------------------------------------------------------
+
+    def _entry(self, ev: Dict[str, Any], offset: int, length: int) -> List[Any]:
+        return [
+            offset,
+            length,
+            self.digest("event", ev.get("event_id")),
+            self.digest("issue", ev.get("issue_id")),
+            self.digest("level", ev.get("level")),
+            sorted({self.digest("tag", t) for t in ev.get("tags") or []}),
+        ]
+
+    def append(self, events: List[Dict[str, Any]]) -> None:
+        by_day: Dict[Path, List[Dict[str, Any]]] = {}
+        for ev in events:
+            ts = core.parse_timestamp(ev.get("timestamp", ""))
+            by_day.setdefault(core._event_day_dir(ts), []).append(ev)
+        for day_dir, day_events in by_day.items():
+            with file_lock(day_dir / LOCK_NAME):
+                self._append_to(self._active_segment(day_dir), day_events)
+
+    def _append_to(self, segment: Path, events: List[Dict[str, Any]]):
+        with open(segment, "ab+") as f:
+            f.seek(0)
+            header = f.read(_HEADER_SIZE)
+            if header:
+                dek = self._dek(header)
+            else:
+                header, dek = self._new_header()
+                f.write(header)
+            offset = f.seek(0, os.SEEK_END)
+            records, entries = [], []
+            for ev in events:
+                nonce = os.urandom(_NONCE_SIZE)
+                sealed = nonce + dek.encrypt(nonce, json.dumps(ev).encode("utf-8"), header)
+                record = _LENGTH.pack(len(sealed)) + sealed
+                records.append(record)
+                entries.append(self._entry(ev, offset, len(record)))
+                offset += len(record)
+            f.write(b"".join(records))
+            f.flush()
+            os.fsync(f.fileno())
+        with open(segment.with_suffix(INDEX_SUFFIX), "a+b") as fi:
+            # A torn last line would swallow the first entry written after it
+            drop_torn_tail(fi)
+            fi.write("".join(json.dumps(e) + "\n" for e in entries).encode("utf-8"))
+            fi.flush()
+            os.fsync(fi.fileno())
+
+    # -- reads ----------------------------------------------------------
+
+    @staticmethod
+    def _entries(segment: Path) -> Iterator[List[Any]]:
+        try:
+            f = open(segment.with_suffix(INDEX_SUFFIX))
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written tail
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _open(self, segment: Path):
+        f = open(segment, "rb")
+        header = f.read(_HEADER_SIZE)
+        try:
+            return f, header, self._dek(header)
+        except DecryptionError:
+            f.close()
+            raise
+
+    @staticmethod
+    def _unseal(f, header: bytes, dek: AESGCM, entry: List[Any]) -> Dict[str, Any]:
+        f.seek(entry[_OFFSET] + _LENGTH.size)
+        sealed = f.read(entry[_SIZE] - _LENGTH.size)
+        try:
+            data = dek.decrypt(sealed[:_NONCE_SIZE], sealed[_NONCE_SIZE:], header)
+        except InvalidTag:
+            raise DecryptionError(f"Corrupted record in {f.name}")
+        return json.loads(data)
+
+    def _read_matching(self, segment: Path, wanted: Callable[[List[Any]], bool]) -> Iterator[Dict[str, Any]]:
+        """Decrypt the records of a segment whose index entry passes ``wanted``."""
+        entries = [e for e in self._entries(segment) if wanted(e)]
+        if not entries:
+            return
+        f, header, dek = self._open(segment)
+        with f:
+            for entry in entries:
+                yield self._unseal(f, header, dek, entry)
+
+    def read_segment(self, segment: Path) -> Iterator[Dict[str, Any]]:
+        """Every record of a segment."""
+        return self._read_matching(segment, lambda e: True)
+
+    def _prefilter(self, issue_id, level, tags) -> Callable[[List[Any]], bool]:
+        issue = self.digest("issue", issue_id) if issue_id is not None else None
+        lvl = self.digest("level", level) if level else None
+        tag_digests = {self.digest("tag", t) for t in tags or ()}
+
+        def wanted(entry):
+            return ((issue is None or entry[_ISSUE] == issue)
+                    and (lvl is None or entry[_LEVEL] == lvl)
+                    and tag_digests.issubset(entry[_TAGS]))
+        return wanted
+
+    def iter_events(
+        self,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        wanted = self._prefilter(issue_id, level, tags)
+        for segment in self._segments_between(since, until):
+            for ev in self._read_matching(segment, wanted):
+                if event_matches(ev, issue_id, level, tags, text, since, until):
+                    yield ev
+
+    def read_day(self, day_dir: Path) -> Iterator[Dict[str, Any]]:
+        for segment in self.segments(day_dir):
+            yield from self.read_segment(segment)
+
+    def get_events(self, event_ids: Set[str], day_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+        """Look up events by id, in one day's segments or in all of them."""
+        digests = {self.digest("event", eid): eid for eid in event_ids}
+        found: Dict[str, Dict[str, Any]] = {}
+
+        def wanted(entry):
+            return entry[_EVENT] in digests and digests[entry[_EVENT]] not in found
+
+        for segment in self.segments(day_dir):
+            if len(found) == len(digests):
+                break
+            for ev in self._read_matching(segment, wanted):
+                found[ev.get("event_id")] = ev
+        return found
+
+    # -- deletes --------------------------------------------------------
+
+    def _rewrite(self, segment: Path, drop: Callable[[List[Any], Callable[[], Dict[str, Any]]], bool]) -> int:
+        """Rewrite a segment without the records ``drop(entry, load)`` selects.
+
+        ``load()`` decrypts the record, for conditions the index cannot
+        answer; kept records are copied as they are.  Caller holds the day
+        lock.  Returns the number of records dropped.
+        """
+        entries = list(self._entries(segment))
+        if not entries:
+            return 0
+        f, header, dek = self._open(segment)
+        with f:
+            kept = [e for e in entries if not drop(e, lambda e=e: self._unseal(f, header, dek, e))]
+            dropped = len(entries) - len(kept)
+            if not dropped:
+                return 0
+            index_path = segment.with_suffix(INDEX_SUFFIX)
+            if not kept:
+                segment.unlink()
+                index_path.unlink(missing_ok=True)
+                return dropped
+            tmp = segment.with_suffix(SEGMENT_SUFFIX + ".tmp")
+            tmp_index = index_path.with_suffix(INDEX_SUFFIX + ".tmp")
+            offset = len(header)
+            with open(tmp, "wb") as out, open(tmp_index, "w") as out_index:
+                out.write(header)
+                for entry in kept:
+                    f.seek(entry[_OFFSET])
+                    out.write(f.read(entry[_SIZE]))
+                    out_index.write(json.dumps([offset] + entry[1:]) + "\n")
+                    offset += entry[_SIZE]
+                out.flush()
+                os.fsync(out.fileno())
+        os.replace(tmp, segment)
+        os.replace(tmp_index, index_path)
+        return dropped
+
+    def delete_where(self, drop) -> int:
+        removed = 0
+        for segment in self.segments():
+            with file_lock(segment.parent / LOCK_NAME):
+                removed += self._rewrite(segment, drop)
+        return removed
+
+    def delete_issue_events(self, issue_id: int) -> int:
+        issue = self.digest("issue", issue_id)
+        return self.delete_where(lambda e, load: e[_ISSUE] == issue)
+
+    def delete_orphaned_events(self, valid_ids: Iterable[int]) -> int:
+        valid = {self.digest("issue", i) for i in valid_ids}
+        return self.delete_where(lambda e, load: e[_ISSUE] not in valid)
+
+    def delete_events_before(self, cutoff: float) -> int:
+        removed = 0
+        for segment in self.segments():
+            with file_lock(segment.parent / LOCK_NAME):
+                try:
+                    whole = segment.stat().st_mtime < cutoff
+                except FileNotFoundError:
+                    continue
+                if whole:
+                    # Nothing was appended since the cutoff: drop the whole segment
+                    removed += sum(1 for _ in self._entries(segment))
+                    self.remove_segment(segment)
+                else:
+                    removed += self._rewrite(
+                        segment,
+                        lambda e, load: core.parse_timestamp(load().get("timestamp", "")).timestamp() < cutoff,
+                    )
+        return removed
+
+    @staticmethod
+    def remove_segment(segment: Path) -> None:
+        for path in (segment, segment.with_suffix(INDEX_SUFFIX)):
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self.segments()
+        return {
+            "sealed_segments": len(segments),
+            "sealed_events": sum(sum(1 for _ in self._entries(s)) for s in segments),
+        }
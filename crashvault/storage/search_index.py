@@ -0,0 +1,499 @@
+"""Inverted index over event text, tags, level and host.
+
+An opt-in sidecar (``index/search.db``, SQLite) that maps terms to events so
+``crashvault search`` can answer text and tag queries without reading every
+event.  It works with any storage engine: the index only yields candidate
+event ids, which are then loaded from the engine and checked against the
+query, so an index that lags behind a delete never returns wrong results.
+
+Terms are ``w:<word>`` for the words of the message and stacktrace, and
+``t:<tag>``, ``l:<level>``, ``h:<host>`` for the other fields.  The index is
+maintained at write time by the helpers in ``crashvault.core`` and can be
+rebuilt with ``crashvault index rebuild``.
+
+Query syntax (see :func:`parse_query`)::
+
+    timeout db            both words (AND is implied, may be spelled out)
+    timeout OR refused    either word; AND binds tighter than OR
+    "connection reset"    phrase: the words next to each other
+    conn*                 any word starting with "conn"
+    tag:db level:error host:web-1 issue:12
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .. import core
+from .base import event_matches
+from ..timerange import sql_bounds
+
+
+logger = logging.getLogger("crashvault")
+
+INDEX_DIR_NAME = "index"
+DB_NAME = "search.db"
+REBUILD_BATCH = 1000
+
+_WORD_RE = re.compile(r"\w+")
+_QUERY_RE = re.compile(r'"([^"]*)"?|(\S+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc       INTEGER PRIMARY KEY,
+    event_id  TEXT NOT NULL UNIQUE,
+    issue_id  INTEGER,
+    timestamp TEXT,
+    terms     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_docs_issue ON docs(issue_id);
+CREATE INDEX IF NOT EXISTS ix_docs_timestamp ON docs(timestamp);
+
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc  INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased words of ``text``."""
+    return _WORD_RE.findall(text.lower()) if text else []
+
+
+# -- queries ------------------------------------------------------------
+
+FIELD_TERMS = ("tag", "level", "host", "issue")
+
+
+@dataclass(frozen=True)
+class Term:
+    """One query term.
+
+    ``kind`` is ``word``, ``prefix``, ``phrase`` (``value`` is a tuple of
+    words) or one of the fields in :data:`FIELD_TERMS`.
+    """
+    kind: str
+    value: Any
+
+
+# A query is a list of alternatives (OR), each a list of terms (AND)
+Query = List[List[Term]]
+
+
+def _word_terms(raw: str) -> List[Term]:
+    prefix = raw.endswith("*")
+    words = tokenize(raw.rstrip("*"))
+    if not words:
+        return []
+    if prefix:
+        terms = [Term("word", w) for w in words[:-1]]
+        return terms + [Term("prefix", words[-1])]
+    if len(words) == 1:
+        return [Term("word", words[0])]
+    # "foo.bar" must match the words next to each other
+    return [Term("phrase", tuple(words))]
+
+
+def parse_query(text: str) -> Query:
+    """Parse a search query into OR-ed groups of AND-ed terms.
+
+    Raises ValueError for malformed field terms (e.g. ``issue:abc``).
+    """
+    groups: Query = [[]]
+    for match in _QUERY_RE.finditer(text or ""):
+        phrase, raw = match.group(1), match.group(2)
+        if phrase is not None:
+            words = tokenize(phrase)
+            if len(words) == 1:
+                groups[-1].append(Term("word", words[0]))
+            elif words:
+                groups[-1].append(Term("phrase", tuple(words)))
+            continue
+        if raw == "OR":
+            if groups[-1]:
+                groups.append([])
+            continue
+        if raw == "AND":
+            continue
+        field, sep, value = raw.partition(":")
+        field = field.lower()
+        if sep and value and field in FIELD_TERMS:
+            if field == "issue":
+                try:
+                    groups[-1].append(Term("issue", int(value.lstrip("#"))))
+                except ValueError:
+                    raise ValueError(f"Invalid issue id in query: {value}")
+            else:
+                groups[-1].append(Term(field, value.lower()))
+            continue
+        groups[-1].extend(_word_terms(raw))
+    return [g for g in groups if g]
+
+
+def _contains_run(words: List[str], run: Tuple[str, ...]) -> bool:
+    n = len(run)
+    return any(tuple(words[i:i + n]) == run for i in range(len(words) - n + 1))
+
+
+class _EventText:
+    """Tokenised fields of one event, computed once per match."""
+
+    def __init__(self, ev: Dict[str, Any]):
+        self.ev = ev
+        self.message = tokenize(ev.get("message"))
+        self.stacktrace = tokenize(ev.get("stacktrace"))
+        self.words = set(self.message) | set(self.stacktrace)
+
+    def matches(self, term: Term) -> bool:
+        ev = self.ev
+        if term.kind == "word":
+            return term.value in self.words
+        if term.kind == "prefix":
+            return any(w.startswith(term.value) for w in self.words)
+        if term.kind == "phrase":
+            return _contains_run(self.message, term.value) or _contains_run(self.stacktrace, term.value)
+        if term.kind == "tag":
+            return term.value in {str(t).lower() for t in ev.get("tags") or []}
+        if term.kind == "level":
+            return str(ev.get("level") or "").lower() == term.value
+        if term.kind == "host":
+            return str(ev.get("host") or "").lower() == term.value
+        if term.kind == "issue":
+            return ev.get("issue_id") == term.value
+        return False
+
+
+def query_matches(query: Query, ev: Dict[str, Any]) -> bool:
+    """Check an event against a parsed query (an empty query matches all)."""
+    if not query:
+        return True
+    text = _EventText(ev)
+    return any(all(text.matches(term) for term in group) for group in query)
+
+
+# -- the index ----------------------------------------------------------
+
+def event_terms(ev: Dict[str, Any]) -> Set[str]:
+    """Index terms of one event."""
+    terms = {"w:" + w for w in tokenize(ev.get("message"))}
+    terms.update("w:" + w for w in tokenize(ev.get("stacktrace")))
+    terms.update("t:" + str(t).lower() for t in ev.get("tags") or [])
+    if ev.get("level"):
+        terms.add("l:" + str(ev["level"]).lower())
+    if ev.get("host"):
+        terms.add("h:" + str(ev["host"]).lower())
+    return terms
+
+
+def _filter_terms(level: Optional[str], tags: Iterable[str], text: Optional[str]) -> List[Term]:
+    """Index terms implied by the classic ``--level/--tag/--text`` filters."""
+    terms = [Term("level", level.lower())] if level else []
+    terms.extend(Term("tag", str(t).lower()) for t in tags or ())
+    terms.extend(_substring_terms(text))
+    return terms
+
+
+def _substring_terms(text: Optional[str]) -> List[Term]:
+    """Terms every message containing ``text`` as a substring must have.
+
+    A word of ``text`` is only known to be a whole word of the message when
+    non-word characters of ``text`` surround it; one that runs into the
+    start of ``text`` may be the tail of a longer word, and is left to the
+    scan that re-checks each candidate.  So ``out`` yields no terms (it
+    matches "timeout") and ``eout err`` only ``err*``.
+    """
+    if not text:
+        return []
+    text = text.lower()
+    terms = []
+    for match in _WORD_RE.finditer(text):
+        if match.start() == 0:
+            continue
+        if match.end() == len(text):
+            terms.append(Term("prefix", match.group()))
+        else:
+            terms.append(Term("word", match.group()))
+    return terms
+
+
+class SearchIndex:
+    """The ``index/search.db`` sidecar of one vault."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -- maintenance ----------------------------------------------------
+
+    def _remove_docs(self, conn: sqlite3.Connection, rows: Iterable[Tuple[int, str]]) -> int:
+        removed = 0
+        for doc, terms in rows:
+            conn.executemany("DELETE FROM postings WHERE term = ? AND doc = ?",
+                             [(term, doc) for term in terms.split("\n") if term])
+            conn.execute("DELETE FROM docs WHERE doc = ?", (doc,))
+            removed += 1
+        return removed
+
+    def add(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Index events (re-indexing any that are already present)."""
+        conn = self._conn()
+        added = 0
+        with conn:
+            for ev in events:
+                event_id = ev.get("event_id")
+                if not event_id:
+                    continue
+                existing = conn.execute("SELECT doc, terms FROM docs WHERE event_id = ?", (event_id,)).fetchall()
+                self._remove_docs(conn, existing)
+                terms = sorted(event_terms(ev))
+                doc = conn.execute(
+                    "INSERT INTO docs (event_id, issue_id, timestamp, terms) VALUES (?, ?, ?, ?)",
+                    (event_id, ev.get("issue_id"), ev.get("timestamp"), "\n".join(terms)),
+                ).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO postings (term, doc) VALUES (?, ?)",
+                                 [(term, doc) for term in terms])
+                added += 1
+        return added
+
+    def remove_events(self, event_ids: Iterable[str]) -> int:
+        conn = self._conn()
+        with conn:
+            rows = []
+            for event_id in event_ids:
+                rows.extend(conn.execute("SELECT doc, terms FROM docs WHERE event_id = ?", (event_id,)))
+            return self._remove_docs(conn, rows)
+
+    def remove_issue(self, issue_id: int) -> int:
+        conn = self._conn()
+        with conn:
+            rows = conn.execute("SELECT doc, terms FROM docs WHERE issue_id = ?", (issue_id,)).fetchall()
+            return self._remove_docs(conn, rows)
+
+    def remove_orphans(self, valid_ids: Iterable[int]) -> int:
+        valid_ids = set(valid_ids)
+        conn = self._conn()
+        with conn:
+            rows = [
+                (doc, terms)
+                for doc, issue_id, terms in conn.execute("SELECT doc, issue_id, terms FROM docs")
+                if issue_id not in valid_ids
+            ]
+            return self._remove_docs(conn, rows)
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM postings")
+            conn.execute("DELETE FROM docs")
+
+    def rebuild(self, events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Re-index every event from scratch."""
+        self.clear()
+        batch: List[Dict[str, Any]] = []
+        for ev in events:
+            batch.append(ev)
+            if len(batch) >= REBUILD_BATCH:
+                self.add(batch)
+                batch = []
+        if batch:
+            self.add(batch)
+        conn = self._conn()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('built_at', ?)", (str(time.time()),))
+        conn.execute("ANALYZE")
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        conn = self._conn()
+        built = conn.execute("SELECT value FROM meta WHERE key = 'built_at'").fetchone()
+        return {
+            "location": str(self.path),
+            "events": conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0],
+            "postings": conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0],
+            "built_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(float(built[0]))) if built else "never",
+        }
+
+    # -- lookups --------------------------------------------------------
+
+    @staticmethod
+    def _term_sql(term: Term) -> List[Tuple[str, tuple]]:
+        """Sub-selects (each yielding ``doc``) that must all hold for ``term``."""
+        if term.kind == "word":
+            return [("SELECT doc FROM postings WHERE term = ?", ("w:" + term.value,))]
+        if term.kind == "prefix":
+            low = "w:" + term.value
+            return [("SELECT doc FROM postings WHERE term >= ? AND term < ?", (low, low + "\uffff"))]
+        if term.kind == "phrase":
+            return [("SELECT doc FROM postings WHERE term = ?", ("w:" + w,)) for w in term.value]
+        if term.kind == "issue":
+            return [("SELECT doc FROM docs WHERE issue_id = ?", (term.value,))]
+        prefix = {"tag": "t:", "level": "l:", "host": "h:"}[term.kind]
+        return [("SELECT doc FROM postings WHERE term = ?", (prefix + term.value,))]
+
+    def candidates(self, groups: Query, since: Optional[datetime] = None,
+                   until: Optional[datetime] = None) -> List[Tuple[str, Optional[str]]]:
+        """``(event_id, timestamp)`` of events that may match, oldest first."""
+        selects, params = [], []
+        for group in groups:
+            parts = [part for term in group for part in self._term_sql(term)]
+            selects.append("SELECT doc FROM (" + " INTERSECT ".join(sql for sql, _ in parts) + ")")
+            for _, p in parts:
+                params.extend(p)
+        sql = "SELECT event_id, timestamp FROM docs WHERE doc IN (" + " UNION ".join(selects) + ")"
+        low, high = sql_bounds(since, until)
+        if low is not None:
+            sql += " AND timestamp >= ?"
+            params.append(low)
+        if high is not None:
+            sql += " AND timestamp < ?"
+            params.append(high)
+        return self._conn().execute(sql + " ORDER BY timestamp", params).fetchall()
+
+
+_instances: Dict[str, SearchIndex] = {}
+_instances_lock = threading.Lock()
+
+
+def search_index_enabled(cfg: Optional[Dict[str, Any]] = None) -> bool:
+    """Whether ``{"indexes": {"search": true}}`` is set in config.json.
+
+    Never for encrypted vaults: the index would hold their text in the clear.
+    """
+    cfg = cfg if cfg is not None else core.load_config()
+    if cfg.get("encrypted"):
+        return False
+    indexes = cfg.get("indexes", {})
+    return isinstance(indexes, dict) and bool(indexes.get("search"))
+
+
+def open_search_index() -> SearchIndex:
+    """The (cached) search index of the current vault, enabled or not."""
+    path = core.ROOT / INDEX_DIR_NAME / DB_NAME
+    with _instances_lock:
+        index = _instances.get(str(path))
+        if index is None:
+            index = _instances[str(path)] = SearchIndex(path)
+    return index
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """The search index if it is enabled for the current vault, else None."""
+    return open_search_index() if search_index_enabled() else None
+
+
+def drop_search_index():
+    """Close and delete the current vault's search index files."""
+    index = open_search_index()
+    index.close()
+    with _instances_lock:
+        _instances.pop(str(index.path), None)
+    for suffix in ("", "-wal", "-shm"):
+        Path(str(index.path) + suffix).unlink(missing_ok=True)
+
+
+def _maintain(action: str, fn, *args):
+    """Apply a write-time index update; never let it fail the write itself."""
+    try:
+        index = get_search_index()
+        if index is not None:
+            getattr(index, fn)(*args)
+    except sqlite3.Error as e:
+        logger.warning(f"search index {action} failed, run `crashvault index rebuild`: {e}")
+
+
+def index_events(events: List[Dict[str, Any]]):
+    _maintain("update", "add", events)
+
+
+def unindex_issue(issue_id: int):
+    _maintain("update", "remove_issue", issue_id)
+
+
+def unindex_orphans(valid_ids: Iterable[int]):
+    _maintain("update", "remove_orphans", valid_ids)
+
+
+def clear_search_index():
+    _maintain("clear", "clear")
+
+
+def search_events(
+    storage,
+    query: Optional[str] = None,
+    issue_id: Optional[int] = None,
+    level: Optional[str] = None,
+    tags: Optional[Iterable[str]] = None,
+    text: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Events matching ``query`` and the classic filters, as an iterator.
+
+    Uses the search index when it is enabled and the filters give it
+    something to look up; otherwise scans the engine's events.  The query
+    is parsed before anything is read, so a malformed one raises
+    ValueError here rather than while iterating.
+    """
+    groups = parse_query(query) if query else []
+    return _search(storage, groups, issue_id, level, tags, text, since, until)
+
+
+def _search(storage, groups: Query, issue_id, level, tags, text, since, until) -> Iterator[Dict[str, Any]]:
+    tags = list(tags or ())
+    index = get_search_index()
+
+    extra = _filter_terms(level, tags, text)
+    if issue_id is not None:
+        extra.append(Term("issue", issue_id))
+    if index is None or not (groups or extra):
+        for ev in storage.iter_events(issue_id=issue_id, level=level, tags=tags or None, text=text,
+                                      since=since, until=until):
+            if query_matches(groups, ev):
+                yield ev
+        return
+
+    lookup = [group + extra for group in groups] if groups else [extra]
+    refs = index.candidates(lookup, since, until)
+    found = storage.get_events(refs)
+    stale = []
+    for event_id, _ in refs:
+        ev = found.get(event_id)
+        if ev is None:
+            stale.append(event_id)
+            continue
+        if event_matches(ev, issue_id, level, tags, text, since, until) and query_matches(groups, ev):
+            yield ev
+    if stale:
+        # Deleted behind the index's back (e.g. `prune`); forget them now
+        _maintain("cleanup", "remove_events", stale)
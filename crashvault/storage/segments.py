@@ -0,0 +1,383 @@
+"""Segmented event log engine - events appended to rolling NDJSON segments.
+
+Issues are handled exactly like the JSON engine.  Events, instead of one
+file each, are appended as newline-delimited JSON records to segment files
+under the usual day partitions::
+
+    events/2024/03/15/1710460800000.ndjson   <- records, one per line
+    events/2024/03/15/1710460800000.idx      <- [event_id, offset, length, timestamp] per record
+
+A segment is closed and a new one started once it grows past
+``segment_max_bytes`` or gets older than ``segment_max_age`` seconds.
+Writers from any process take a per-day lock file while appending, so the
+CLI and the server can share a vault.  Event files written before the vault
+switched engines are still read (and deleted) as before.  Encrypted
+vaults append to sealed segments instead (see ``sealed``).
+
+Settings live in the ``storage`` section of config.json::
+
+    {"storage": {"engine": "segments",
+                 "segment_max_bytes": 67108864,
+                 "segment_max_age": 3600,
+                 "fsync": "always",          # always | interval | never
+                 "fsync_interval": 1.0}}
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .. import core
+from .base import drop_torn_tail, event_matches
+from .engine import register_engine
+from .json_store import JSONStorage
+from .locking import file_lock
+from ..timerange import iter_day_dirs
+
+SEGMENT_SUFFIX = ".ndjson"
+INDEX_SUFFIX = ".idx"
+LOCK_NAME = ".segments.lock"
+
+DEFAULT_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_SEGMENT_MAX_AGE = 3600
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def _segment_created(path: Path) -> float:
+    """Segment names are their creation time in milliseconds."""
+    try:
+        return int(path.stem) / 1000.0
+    except ValueError:
+        return 0.0
+
+
+def read_segment(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield every readable record of a segment file."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # partially written tail
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class SegmentStorage(JSONStorage):
+    """JSON issue store plus an append-only segmented event log."""
+
+    name = "segments"
+
+    def __init__(self, root):
+        super().__init__(root)
+        storage_cfg = core.load_config().get("storage", {})
+        if not isinstance(storage_cfg, dict):
+            storage_cfg = {}
+        self.segment_max_bytes = int(storage_cfg.get("segment_max_bytes", DEFAULT_SEGMENT_MAX_BYTES))
+        self.segment_max_age = float(storage_cfg.get("segment_max_age", DEFAULT_SEGMENT_MAX_AGE))
+        self.fsync = storage_cfg.get("fsync", "always")
+        if self.fsync not in FSYNC_POLICIES:
+            self.fsync = "always"
+        self.fsync_interval = float(storage_cfg.get("fsync_interval", 1.0))
+        self._last_fsync = 0.0
+
+    # -- layout ---------------------------------------------------------
+
+    def _segments(self, day_dir: Optional[Path] = None) -> List[Path]:
+        """Segment files of one day (or all days), oldest first."""
+        if day_dir is not None:
+            return sorted(day_dir.glob("*" + SEGMENT_SUFFIX))
+        return sorted(core.EVENTS_DIR.glob("**/*" + SEGMENT_SUFFIX))
+
+    def _active_segment(self, day_dir: Path) -> Path:
+        """Return the segment to append to, starting a new one when due."""
+        segments = self._segments(day_dir)
+        now = time.time()
+        if segments:
+            current = segments[-1]
+            try:
+                size = current.stat().st_size
+            except FileNotFoundError:
+                size = 0
+            if size < self.segment_max_bytes and now - _segment_created(current) < self.segment_max_age:
+                return current
+            name = max(int(now * 1000), int(current.stem) + 1)
+        else:
+            name = int(now * 1000)
+        return day_dir / f"{name}{SEGMENT_SUFFIX}"
+
+    def _sync(self, fileobj):
+        if self.fsync == "never":
+            return
+        now = time.monotonic()
+        if self.fsync == "interval" and now - self._last_fsync < self.fsync_interval:
+            return
+        os.fsync(fileobj.fileno())
+        self._last_fsync = now
+
+    # -- writes ---------------------------------------------------------
+
+    def _append_plain(self, events: List[Dict[str, Any]]) -> None:
+        by_day: Dict[Path, List[Dict[str, Any]]] = {}
+        for ev in events:
+            ts = core.parse_timestamp(ev.get("timestamp", ""))
+            by_day.setdefault(core._event_day_dir(ts), []).append(ev)
+
+        for day_dir, day_events in by_day.items():
+            with file_lock(day_dir / LOCK_NAME):
+                segment = self._active_segment(day_dir)
+                self._append_records(segment, day_events)
+
+    def _append_records(self, segment: Path, events: List[Dict[str, Any]]):
+        lines = [json.dumps(ev).encode("utf-8") + b"\n" for ev in events]
+        with open(segment, "a+b") as f:
+            offset = drop_torn_tail(f)
+            f.write(b"".join(lines))
+            f.flush()
+            self._sync(f)
+        index_lines = []
+        for ev, line in zip(events, lines):
+            index_lines.append(json.dumps([ev.get("event_id"), offset, len(line), ev.get("timestamp")]) + "\n")
+            offset += len(line)
+        with open(segment.with_suffix(INDEX_SUFFIX), "a+b") as f:
+            drop_torn_tail(f)
+            f.write("".join(index_lines).encode("utf-8"))
+
+    def _rewrite_segment(self, segment: Path, keep) -> int:
+        """Rewrite a segment keeping records for which ``keep(ev)`` is true.
+
+        Returns the number of records dropped.  Caller holds the day lock.
+        """
+        records = list(read_segment(segment))
+        kept = [ev for ev in records if keep(ev)]
+        dropped = len(records) - len(kept)
+        if not dropped:
+            return 0
+        index_path = segment.with_suffix(INDEX_SUFFIX)
+        if not kept:
+            segment.unlink()
+            if index_path.exists():
+                index_path.unlink()
+            return dropped
+        tmp = segment.with_suffix(SEGMENT_SUFFIX + ".tmp")
+        tmp_index = index_path.with_suffix(INDEX_SUFFIX + ".tmp")
+        offset = 0
+        with open(tmp, "wb") as f, open(tmp_index, "w") as fi:
+            for ev in kept:
+                line = json.dumps(ev).encode("utf-8") + b"\n"
+                f.write(line)
+                fi.write(json.dumps([ev.get("event_id"), offset, len(line), ev.get("timestamp")]) + "\n")
+                offset += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, segment)
+        os.replace(tmp_index, index_path)
+        return dropped
+
+    def _delete_from_segments(self, drop) -> int:
+        removed = 0
+        for segment in self._segments():
+            with file_lock(segment.parent / LOCK_NAME):
+                removed += self._rewrite_segment(segment, lambda ev: not drop(ev))
+        return removed
+
+    # -- reads ----------------------------------------------------------
+
+    def iter_segment_events(self) -> Iterator[Dict[str, Any]]:
+        """Events stored in segments only (not legacy per-event files)."""
+        for segment in self._segments():
+            yield from read_segment(segment)
+
+    def iter_events(
+        self,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        # Events written as individual files before the switch
+        yield from super().iter_events(issue_id=issue_id, level=level, tags=tags, text=text,
+                                       since=since, until=until)
+        if since is None and until is None:
+            segments = self._segments()
+        else:
+            segments = [s for day_dir in iter_day_dirs(core.EVENTS_DIR, since, until) for s in self._segments(day_dir)]
+        for segment in segments:
+            for ev in read_segment(segment):
+                if event_matches(ev, issue_id, level, tags, text, since, until):
+                    yield ev
+
+    def _read_day(self, day_dir: Path) -> Iterator[Dict[str, Any]]:
+        yield from super()._read_day(day_dir)
+        for segment in self._segments(day_dir):
+            yield from read_segment(segment)
+
+    @staticmethod
+    def _read_indexed(index_paths: Iterable[Path], wanted: Set[str]) -> Dict[str, Dict[str, Any]]:
+        """Read the records of ``wanted`` event ids via the given ``.idx`` files."""
+        found: Dict[str, Dict[str, Any]] = {}
+        # For a single id, skip parsing lines that cannot mention it
+        needle = json.dumps(next(iter(wanted))) if len(wanted) == 1 else None
+        for index_path in index_paths:
+            if len(found) == len(wanted):
+                break
+            # Either file may be removed by prune/gc after being listed
+            try:
+                f = open(index_path)
+            except FileNotFoundError:
+                continue
+            try:
+                seg = open(index_path.with_suffix(SEGMENT_SUFFIX), "rb")
+            except FileNotFoundError:
+                f.close()
+                continue
+            with f, seg:
+                for line in f:
+                    if needle is not None and needle not in line:
+                        continue
+                    try:
+                        eid, offset, length, _ = json.loads(line)
+                    except ValueError:
+                        continue
+                    if eid in wanted and eid not in found:
+                        seg.seek(offset)
+                        found[eid] = json.loads(seg.read(length))
+        return found
+
+    def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        ev = super().get_event(event_id)
+        if ev is not None:
+            return ev
+        found = self._read_indexed(core.EVENTS_DIR.glob("**/*" + INDEX_SUFFIX), {event_id})
+        return found.get(event_id)
+
+    def get_events(self, refs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        found: Dict[str, Dict[str, Any]] = {}
+        by_day: Dict[Path, Set[str]] = {}
+        elsewhere = []
+        for event_id, timestamp in refs:
+            day_dir = core.event_day_dir(timestamp)
+            if day_dir is None:
+                elsewhere.append(event_id)
+            else:
+                by_day.setdefault(day_dir, set()).add(event_id)
+        for day_dir, wanted in by_day.items():
+            found.update(self._read_indexed(sorted(day_dir.glob("*" + INDEX_SUFFIX)), wanted))
+            found.update(self._get_sealed(wanted - found.keys(), day_dir))
+            elsewhere.extend(wanted - found.keys())
+        for event_id in elsewhere:
+            ev = self.get_event(event_id)
+            if ev is not None:
+                found[event_id] = ev
+        return found
+
+    # -- deletes --------------------------------------------------------
+
+    def delete_issue_events(self, issue_id: int) -> int:
+        removed = super().delete_issue_events(issue_id)
+        return removed + self._delete_from_segments(lambda ev: ev.get("issue_id") == issue_id)
+
+    def delete_orphaned_events(self, valid_ids: Iterable[int]) -> int:
+        valid_ids = set(valid_ids)
+        removed = super().delete_orphaned_events(valid_ids)
+        return removed + self._delete_from_segments(lambda ev: ev.get("issue_id") not in valid_ids)
+
+    def delete_events_before(self, cutoff: float) -> int:
+        removed = super().delete_events_before(cutoff)
+        for segment in self._segments():
+            with file_lock(segment.parent / LOCK_NAME):
+                try:
+                    whole = segment.stat().st_mtime < cutoff
+                except FileNotFoundError:
+                    continue
+                if whole:
+                    # Nothing was appended since the cutoff: drop the whole segment
+                    removed += sum(1 for _ in read_segment(segment))
+                    segment.unlink()
+                    index_path = segment.with_suffix(INDEX_SUFFIX)
+                    if index_path.exists():
+                        index_path.unlink()
+                else:
+                    removed += self._rewrite_segment(
+                        segment, lambda ev: core.parse_timestamp(ev.get("timestamp", "")).timestamp() >= cutoff
+                    )
+        return removed
+
+    def absorb_event_files(self, batch_size: int = 1000) -> int:
+        """Move legacy per-event files into segments. Returns the number moved."""
+        moved = 0
+        batch: List[Dict[str, Any]] = []
+        files: List[Path] = []
+
+        def flush():
+            self.append_events(batch)
+            for f in files:
+                f.unlink()
+
+        for f in list(core.EVENTS_DIR.glob("**/*.json")):
+            try:
+                ev = json.loads(f.read_text())
+            except Exception:
+                continue
+            batch.append(ev)
+            files.append(f)
+            if len(batch) >= batch_size:
+                flush()
+                moved += len(batch)
+                batch, files = [], []
+        if batch:
+            flush()
+            moved += len(batch)
+        return moved
+
+    def seal_events(self) -> int:
+        moved = super().seal_events()
+        sealed = self._sealed()
+        for segment in self._segments():
+            with file_lock(segment.parent / LOCK_NAME):
+                events = list(read_segment(segment))
+                sealed.append(events)
+                for path in (segment, segment.with_suffix(INDEX_SUFFIX)):
+                    path.unlink(missing_ok=True)
+            moved += len(events)
+        return moved
+
+    def clear_events(self) -> None:
+        super().clear_events()
+        self.clear_segments()
+
+    def clear_segments(self) -> None:
+        """Remove all segments, leaving legacy per-event files alone."""
+        for segment in self._segments():
+            with file_lock(segment.parent / LOCK_NAME):
+                for path in (segment, segment.with_suffix(INDEX_SUFFIX)):
+                    try:
+                        path.unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def info(self) -> Dict[str, Any]:
+        segments = self._segments()
+        data = super().info()
+        data.update({
+            "engine": self.name,
+            "segments": len(segments),
+            "segment_bytes": sum(s.stat().st_size for s in segments),
+            "segment_max_bytes": self.segment_max_bytes,
+            "segment_max_age": self.segment_max_age,
+            "fsync": self.fsync,
+        })
+        return data
+
+
+# Register the engine
+register_engine("segments", SegmentStorage)
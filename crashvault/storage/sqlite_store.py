@@ -0,0 +1,315 @@
+"""SQLite storage engine - issues and events in one indexed database.
+
+Lookups by issue, level, tag and counts become index scans instead of
+walking every event file.  The database runs in WAL mode so readers
+(CLI commands) never block the writer (the HTTP server).
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .. import core
+from .base import StorageBackend, decode_cursor
+from .engine import register_engine
+from ..timerange import sql_bounds
+
+
+DB_NAME = "crashvault.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    position    INTEGER PRIMARY KEY,
+    id          INTEGER NOT NULL,
+    fingerprint TEXT,
+    status      TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_issues_id ON issues(id);
+CREATE INDEX IF NOT EXISTS ix_issues_fingerprint ON issues(fingerprint);
+CREATE INDEX IF NOT EXISTS ix_issues_status ON issues(status);
+
+CREATE TABLE IF NOT EXISTS events (
+    event_id   TEXT PRIMARY KEY,
+    issue_id   INTEGER,
+    timestamp  TEXT,
+    level      TEXT,
+    message    TEXT,
+    created_at REAL,
+    data       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_events_issue ON events(issue_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_events_level ON events(level, timestamp);
+CREATE INDEX IF NOT EXISTS ix_events_timestamp ON events(timestamp);
+
+CREATE TABLE IF NOT EXISTS event_tags (
+    tag      TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (tag, event_id)
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteStorage(StorageBackend):
+    """Store issues and events in ``crashvault.db`` (SQLite, WAL mode)."""
+
+    name = "sqlite"
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.path = root / DB_NAME
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if core.is_vault_encrypted():
+                raise ValueError("The sqlite storage engine does not support encrypted vaults")
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -- issues ---------------------------------------------------------
+
+    def load_issues(self) -> List[Dict[str, Any]]:
+        rows = self._conn().execute("SELECT data FROM issues ORDER BY position")
+        return [json.loads(data) for (data,) in rows]
+
+    def save_issues(self, issues: List[Dict[str, Any]]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM issues")
+            conn.executemany(
+                "INSERT INTO issues (position, id, fingerprint, status, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (pos, i["id"], i.get("fingerprint"), i.get("status"), json.dumps(i))
+                    for pos, i in enumerate(issues)
+                ],
+            )
+
+    def _get_issue_where(self, column: str, value) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute(
+            f"SELECT data FROM issues WHERE {column} = ? ORDER BY position LIMIT 1", (value,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_issue(self, issue_id: int) -> Optional[Dict[str, Any]]:
+        return self._get_issue_where("id", issue_id)
+
+    def find_issue_by_fingerprint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        issue = self._get_issue_where("fingerprint", fingerprint)
+        if issue is None:
+            # Merged fingerprints are rare; a scan on a miss is cheaper than another index
+            row = self._conn().execute(
+                "SELECT data FROM issues, json_each(issues.data, '$.merged_fingerprints') AS fp "
+                "WHERE fp.value = ? ORDER BY position LIMIT 1", (fingerprint,)
+            ).fetchone()
+            issue = json.loads(row[0]) if row else None
+        return issue
+
+    def count_issues_by_status(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT COALESCE(status, 'open'), COUNT(*) FROM issues GROUP BY 1")
+        return {status: count for status, count in rows}
+
+    def next_issue_id(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) + 1 FROM issues").fetchone()[0]
+
+    def save_issue(self, issue: Dict[str, Any]) -> None:
+        conn = self._conn()
+        data = json.dumps(issue)
+        with conn:
+            cur = conn.execute(
+                "UPDATE issues SET fingerprint = ?, status = ?, data = ? WHERE id = ?",
+                (issue.get("fingerprint"), issue.get("status"), data, issue["id"]),
+            )
+            if cur.rowcount == 0:
+                conn.execute(
+                    "INSERT INTO issues (position, id, fingerprint, status, data) "
+                    "VALUES ((SELECT COALESCE(MAX(position), -1) + 1 FROM issues), ?, ?, ?, ?)",
+                    (issue["id"], issue.get("fingerprint"), issue.get("status"), data),
+                )
+
+    def add_issues(self, issues: List[Dict[str, Any]]) -> None:
+        conn = self._conn()
+        with conn:
+            start = conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM issues").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO issues (position, id, fingerprint, status, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (start + n, i["id"], i.get("fingerprint"), i.get("status"), json.dumps(i))
+                    for n, i in enumerate(issues)
+                ],
+            )
+
+    # -- events ---------------------------------------------------------
+
+    def append_events(self, events: List[Dict[str, Any]]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO events (event_id, issue_id, timestamp, level, message, created_at, data) "
+                "VALUES (?, ?, ?, ?, ?, strftime('%s', 'now'), ?)",
+                [
+                    (ev["event_id"], ev.get("issue_id"), ev.get("timestamp"), ev.get("level"),
+                     ev.get("message", ""), json.dumps(ev))
+                    for ev in events
+                ],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO event_tags (tag, event_id) VALUES (?, ?)",
+                [(tag, ev["event_id"]) for ev in events for tag in ev.get("tags", [])],
+            )
+
+    def _where(self, issue_id=None, level=None, tags=None, text=None, since=None, until=None):
+        clauses, params = [], []
+        # Index range scan on the loose text bounds, then the exact comparison
+        low, high = sql_bounds(since, until)
+        if low is not None:
+            clauses.append("timestamp >= ? AND julianday(timestamp) >= julianday(?)")
+            params.extend([low, since.isoformat()])
+        if high is not None:
+            clauses.append("timestamp < ? AND julianday(timestamp) < julianday(?)")
+            params.extend([high, until.isoformat()])
+        if issue_id is not None:
+            clauses.append("issue_id = ?")
+            params.append(issue_id)
+        if level:
+            clauses.append("level = ?")
+            params.append(level)
+        for tag in tags or ():
+            clauses.append("event_id IN (SELECT event_id FROM event_tags WHERE tag = ?)")
+            params.append(tag)
+        if text:
+            clauses.append("instr(lower(message), ?) > 0")
+            params.append(text.lower())
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return where, params
+
+    def iter_events(
+        self,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        where, params = self._where(issue_id, level, tags, text, since, until)
+        for (data,) in self._conn().execute(f"SELECT data FROM events{where} ORDER BY timestamp", params):
+            yield json.loads(data)
+
+    def _cursor_key(self, ev: Dict[str, Any]) -> Tuple[str, str]:
+        # Rows are ordered by the stored timestamp text, so cursors use it as-is
+        return ev.get("timestamp") or "", ev["event_id"]
+
+    def iter_events_sorted(
+        self,
+        newest_first: bool = True,
+        cursor: Optional[str] = None,
+        issue_id: Optional[int] = None,
+        level: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        text: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        where, params = self._where(issue_id, level, tags, text, since, until)
+        if cursor:
+            where += (" AND " if where else " WHERE ") + f"(timestamp, event_id) {'<' if newest_first else '>'} (?, ?)"
+            params.extend(decode_cursor(cursor))
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT data FROM events{where} ORDER BY timestamp {order}, event_id {order}"
+        for (data,) in self._conn().execute(sql, params):
+            yield json.loads(data)
+
+    def get_event(self, event_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT data FROM events WHERE event_id = ?", (event_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_events(self, refs: Iterable[Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        ids = [event_id for event_id, _ in refs]
+        found = {}
+        conn = self._conn()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = conn.execute(
+                f"SELECT event_id, data FROM events WHERE event_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update((event_id, json.loads(data)) for event_id, data in rows)
+        return found
+
+    def count_events(self, **filters) -> int:
+        where, params = self._where(**filters)
+        return self._conn().execute(f"SELECT COUNT(*) FROM events{where}", params).fetchone()[0]
+
+    def count_events_by_level(self, since: Optional[datetime] = None,
+                              until: Optional[datetime] = None) -> Dict[str, int]:
+        where, params = self._where(since=since, until=until)
+        rows = self._conn().execute(
+            f"SELECT COALESCE(level, 'unknown'), COUNT(*) FROM events{where} GROUP BY level", params
+        )
+        return {level: count for level, count in rows}
+
+    def _delete_events_where(self, where: str, params) -> int:
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"DELETE FROM event_tags WHERE event_id IN (SELECT event_id FROM events WHERE {where})", params
+            )
+            return conn.execute(f"DELETE FROM events WHERE {where}", params).rowcount
+
+    def delete_issue_events(self, issue_id: int) -> int:
+        return self._delete_events_where("issue_id = ?", (issue_id,))
+
+    def delete_orphaned_events(self, valid_ids: Iterable[int]) -> int:
+        conn = self._conn()
+        with conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS valid_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM valid_ids")
+            conn.executemany("INSERT OR IGNORE INTO valid_ids (id) VALUES (?)", [(i,) for i in valid_ids])
+        return self._delete_events_where("issue_id IS NULL OR issue_id NOT IN (SELECT id FROM valid_ids)", ())
+
+    def delete_events_before(self, cutoff: float) -> int:
+        return self._delete_events_where("created_at < ?", (cutoff,))
+
+    def clear_events(self) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM events")
+            conn.execute("DELETE FROM event_tags")
+
+    def rebuild_index(self) -> Dict[str, Any]:
+        conn = self._conn()
+        conn.execute("REINDEX")
+        conn.execute("ANALYZE")
+        return self.index_status()
+
+    def index_status(self) -> Dict[str, Any]:
+        rows = self._conn().execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")
+        return {"sqlite_indexes": ", ".join(sorted(name for (name,) in rows))}
+
+    def info(self) -> Dict[str, Any]:
+        conn = self._conn()
+        return {
+            "engine": self.name,
+            "location": str(self.path),
+            "issues": conn.execute("SELECT COUNT(*) FROM issues").fetchone()[0],
+            "events": conn.execute("SELECT COUNT(*) FROM events").fetchone()[0],
+        }
+
+
+# Register the engine
+register_engine("sqlite", SQLiteStorage)
@@ -0,0 +1,151 @@
+"""``--since``/``--until`` for read commands, and day-partition pruning.
+
+Events are stored under ``events/YYYY/MM/DD`` (see ``core._event_day_dir``),
+so a query over a time range only has to open the day directories that
+can hold matching events.  The directory of an event is the calendar date
+of its own timestamp, which may carry a UTC offset; pruning therefore keeps
+one day of slack on either side and the exact bounds are applied per event.
+"""
+
+import re
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import click
+
+
+_RELATIVE_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhdw])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+_SLACK = timedelta(days=1)
+
+
+def _midnight(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=timezone.utc)
+
+
+def parse_time_bound(value: str, end: bool = False, now: Optional[datetime] = None) -> datetime:
+    """Parse a time bound into an aware datetime.
+
+    Accepts relative ages (``90s``, ``30m``, ``24h``, ``7d``, ``2w``) counted
+    back from now, ``now``/``today``/``yesterday``, dates (``2024-03-01``) and
+    ISO-8601 timestamps.  With ``end=True`` a bare date means the end of that
+    day, so ``--until 2024-03-01`` includes March 1st.
+    """
+    now = now or datetime.now(timezone.utc)
+    text = value.strip().lower()
+    match = _RELATIVE_RE.match(text)
+    if match:
+        return now - timedelta(seconds=float(match.group(1)) * _UNIT_SECONDS[match.group(2)])
+    if text == "now":
+        return now
+    if text in ("today", "yesterday"):
+        day = now.date() - timedelta(days=1 if text == "yesterday" else 0)
+        return _midnight(day + timedelta(days=1) if end else day)
+    try:
+        day = date.fromisoformat(text)
+    except ValueError:
+        pass
+    else:
+        return _midnight(day + timedelta(days=1) if end else day)
+    try:
+        ts = datetime.fromisoformat(value.strip().replace("Z", "+00:00").replace("z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Invalid time: {value!r} (use e.g. 24h, 7d, 2024-03-01 or an ISO timestamp)")
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def event_time(timestamp) -> Optional[datetime]:
+    """Parse an event timestamp, or None if it is missing or malformed."""
+    try:
+        ts = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def in_range(timestamp, since: Optional[datetime] = None, until: Optional[datetime] = None) -> bool:
+    """Whether an event timestamp lies in ``[since, until)``."""
+    if since is None and until is None:
+        return True
+    ts = event_time(timestamp)
+    if ts is None:
+        return False
+    return (since is None or ts >= since) and (until is None or ts < until)
+
+
+def day_bounds(since: Optional[datetime], until: Optional[datetime]) -> Tuple[Optional[date], Optional[date]]:
+    """First and last partition dates that may hold events in the range."""
+    first = (since - _SLACK).date() if since is not None else None
+    last = (until + _SLACK).date() if until is not None else None
+    return first, last
+
+
+def iter_day_dirs(events_dir: Path, since: Optional[datetime] = None,
+                  until: Optional[datetime] = None) -> Iterator[Path]:
+    """Day directories under ``events_dir`` that may hold events in the range, oldest first.
+
+    Whole years and months outside the range are skipped without listing them.
+    """
+    first, last = day_bounds(since, until)
+    lo = (first.year, first.month, first.day) if first else (0, 0, 0)
+    hi = (last.year, last.month, last.day) if last else (9999, 99, 99)
+
+    def numbered(path: Path):
+        try:
+            entries = [(int(p.name), p) for p in path.iterdir() if p.is_dir() and p.name.isdigit()]
+        except FileNotFoundError:
+            return []
+        return sorted(entries)
+
+    for year, year_dir in numbered(events_dir):
+        if not lo[0] <= year <= hi[0]:
+            continue
+        for month, month_dir in numbered(year_dir):
+            if not lo[:2] <= (year, month) <= hi[:2]:
+                continue
+            for day, day_dir in numbered(month_dir):
+                if lo <= (year, month, day) <= hi:
+                    yield day_dir
+
+
+def day_dir_date(day_dir: Path) -> date:
+    """Partition date of an ``events/YYYY/MM/DD`` directory."""
+    return date(int(day_dir.parent.parent.name), int(day_dir.parent.name), int(day_dir.name))
+
+
+def sql_bounds(since: Optional[datetime], until: Optional[datetime]) -> Tuple[Optional[str], Optional[str]]:
+    """Loose ``timestamp`` text bounds for an indexed SQL range scan.
+
+    Stored timestamps are ISO strings in whatever offset the client sent, so
+    the range is widened by a day; callers still check the exact bounds.
+    """
+    first, last = day_bounds(since, until)
+    return (first.isoformat() if first else None,
+            (last + timedelta(days=1)).isoformat() if last else None)
+
+
+class TimeBound(click.ParamType):
+    """Click type for ``--since``/``--until`` values."""
+
+    name = "time"
+
+    def __init__(self, end: bool = False):
+        self.end = end
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, datetime):
+            return value
+        try:
+            return parse_time_bound(value, end=self.end)
+        except ValueError as e:
+            self.fail(str(e), param, ctx)
+
+
+def time_range_options(f):
+    """Add ``--since``/``--until`` options to a read command."""
+    f = click.option("--until", type=TimeBound(end=True), default=None,
+                     help="Only events before this time (same forms as --since)")(f)
+    f = click.option("--since", type=TimeBound(), default=None,
+                     help="Only events at or after this time: 24h, 7d, today, 2024-03-01 or ISO timestamp")(f)
+    return f
@@ -7,13 +7,11 @@ from .discord import DiscordWebhook
 from .teams import TeamsWebhook
 from .http import HTTPWebhook
 from .github import GitHubIssuesWebhook
-from .jira import JiraWebhook
 
 # Import all providers to trigger registration
 # The import side-effect registers each provider with the dispatcher
 import crashvault.webhooks.teams  # noqa: F401
 import crashvault.webhooks.github  # noqa: F401
-import crashvault.webhooks.jira  # noqa: F401
 
 __all__ = [
     "WebhookProvider",
@@ -24,5 +22,4 @@ __all__ = [
     "TeamsWebhook",
     "HTTPWebhook",
     "GitHubIssuesWebhook",
-    "JiraWebhook",
 ]
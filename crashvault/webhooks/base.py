@@ -1,11 +1,82 @@
 """Base webhook provider interface."""
 
-from abc import ABC, abstractmethod
+from abc import ABC
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional
 import hmac
 import hashlib
+import http.client
 import json
+import logging
+import socket
+import urllib.error
+import urllib.request
+
+
+logger = logging.getLogger("crashvault")
+
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class WebhookDeliveryError(Exception):
+    """A webhook delivery attempt failed.
+
+    ``transient`` failures (network errors, timeouts, 5xx, 429) are worth
+    retrying; others (bad URL, 4xx) are parked in the dead-letter store.
+    ``retry_after`` is the server-requested delay in seconds, if any.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None, transient: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.transient = transient
+
+    @classmethod
+    def from_status(cls, status: int, detail: str = "", retry_after: Optional[float] = None):
+        message = f"HTTP {status}" + (f": {detail}" if detail else "")
+        return cls(message, status=status, retry_after=retry_after,
+                   transient=status in TRANSIENT_STATUSES or status >= 500)
+
+    @classmethod
+    def from_response(cls, status: int, body: bytes, headers=None, reason: str = "") -> "WebhookDeliveryError":
+        text = body.decode("utf-8", "replace")
+        try:
+            detail = json.loads(text).get("message", "")
+        except (ValueError, AttributeError):
+            detail = text[:200]
+        retry_after = parse_retry_after(headers.get("Retry-After") if headers else None)
+        return cls.from_status(status, detail or reason, retry_after)
+
+    @classmethod
+    def from_http_error(cls, error: urllib.error.HTTPError) -> "WebhookDeliveryError":
+        try:
+            body = error.read()
+        except Exception:
+            body = b""
+        return cls.from_response(error.code, body, error.headers, str(error.reason))
 
 
 @dataclass
@@ -18,6 +89,9 @@ class WebhookConfig:
     secret: Optional[str] = None
     events: Optional[List[str]] = None  # Filter by level: ["error", "critical"]
     enabled: bool = True
+    rate_limit: Optional[float] = None  # Max notifications per minute
+    burst: Optional[int] = None  # Token bucket size (default: rate_limit)
+    coalesce_window: Optional[float] = None  # Seconds to fold repeat events of an issue
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -28,6 +102,9 @@ class WebhookConfig:
             "secret": self.secret,
             "events": self.events,
             "enabled": self.enabled,
+            "rate_limit": self.rate_limit,
+            "burst": self.burst,
+            "coalesce_window": self.coalesce_window,
         }
 
     @classmethod
@@ -40,6 +117,9 @@ class WebhookConfig:
             secret=data.get("secret"),
             events=data.get("events"),
             enabled=data.get("enabled", True),
+            rate_limit=data.get("rate_limit"),
+            burst=data.get("burst"),
+            coalesce_window=data.get("coalesce_window"),
         )
 
 
@@ -55,9 +135,10 @@ class WebhookPayload:
     tags: Optional[List[str]] = None
     context: Optional[Dict[str, Any]] = None
     host: Optional[str] = None
+    occurrences: int = 1  # Events this notification stands for (coalescing)
 
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        data = {
             "event_id": self.event_id,
             "issue_id": self.issue_id,
             "message": self.message,
@@ -68,6 +149,9 @@ class WebhookPayload:
             "context": self.context or {},
             "host": self.host,
         }
+        if self.occurrences > 1:
+            data["occurrences"] = self.occurrences
+        return data
 
     def sign(self, secret: str) -> str:
         """Create HMAC-SHA256 signature of the payload."""
@@ -83,16 +167,104 @@ class WebhookProvider(ABC):
     """Abstract base class for webhook providers."""
 
     def __init__(self, config: WebhookConfig):
+        # deliver and send default to each other; a provider must implement one
+        cls = type(self)
+        if cls.deliver is WebhookProvider.deliver and cls.send is WebhookProvider.send:
+            raise TypeError(f"Can't instantiate webhook provider {cls.__name__} without a deliver or send method")
         self.config = config
+        # Level filter, normalised once instead of per event
+        self.levels = frozenset(e.lower() for e in config.events) if config.events else None
+
+    def deliver(self, payload: WebhookPayload) -> None:
+        """
+        Deliver a webhook notification.
+
+        Raises WebhookDeliveryError on failure. Providers implement either
+        this or ``send``; the default adapts a boolean ``send``.
+        """
+        if not self.send(payload):
+            raise WebhookDeliveryError(f"{self.config.type} webhook reported failure")
 
-    @abstractmethod
     def send(self, payload: WebhookPayload) -> bool:
         """
         Send a webhook notification.
 
         Returns True if successful, False otherwise.
         """
-        pass
+        try:
+            self.deliver(payload)
+            return True
+        except WebhookDeliveryError as e:
+            logger.error(f"{self.config.type} webhook failed: {e}")
+            return False
+
+    def post_json(
+        self,
+        url: str,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 10,
+        ok_statuses: Optional[Iterable[int]] = None,
+    ) -> bytes:
+        """POST a JSON body and return the response body.
+
+        Any status outside ``ok_statuses`` (default: 2xx) and any network
+        error is raised as a classified WebhookDeliveryError.  Requests go
+        through the shared keep-alive connection pool unless the
+        environment configures a proxy for the URL.
+        """
+        from .pool import ConnectionPool, get_pool
+
+        request_headers = {"Content-Type": "application/json"}
+        request_headers.update(headers or {})
+        data = json.dumps(body).encode("utf-8")
+        if ConnectionPool.uses_proxy(url):
+            return self._post_via_urllib(url, data, request_headers, timeout, ok_statuses)
+
+        try:
+            status, response_headers, response_body = get_pool().request(
+                "POST", url, data, request_headers, timeout
+            )
+        except ValueError as e:  # malformed URL / unsupported scheme
+            raise WebhookDeliveryError(f"invalid webhook URL: {e}", transient=False)
+        except (OSError, http.client.HTTPException) as e:
+            raise WebhookDeliveryError(f"network error: {e}", transient=True)
+
+        if not self._status_ok(status, ok_statuses):
+            raise WebhookDeliveryError.from_response(
+                status, response_body, response_headers, http.client.responses.get(status, "")
+            )
+        return response_body
+
+    @staticmethod
+    def _status_ok(status: int, ok_statuses: Optional[Iterable[int]]) -> bool:
+        if ok_statuses is None:
+            return 200 <= status < 300
+        return status in set(ok_statuses)
+
+    def _post_via_urllib(self, url: str, data: bytes, headers: Dict[str, str],
+                         timeout: float, ok_statuses: Optional[Iterable[int]]) -> bytes:
+        """One-off request through urllib, which applies proxy settings."""
+        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                status = response.status
+                response_body = response.read()
+        except urllib.error.HTTPError as e:
+            raise WebhookDeliveryError.from_http_error(e)
+        except urllib.error.URLError as e:
+            reason = e.reason
+            # Unknown scheme / malformed URL will never succeed
+            transient = not isinstance(reason, str) or "unknown url type" not in reason
+            raise WebhookDeliveryError(f"network error: {reason}", transient=transient)
+        except (socket.timeout, TimeoutError, ConnectionError) as e:
+            raise WebhookDeliveryError(f"network error: {e}", transient=True)
+        except ValueError as e:  # malformed URL
+            raise WebhookDeliveryError(f"invalid webhook URL: {e}", transient=False)
+
+        if not self._status_ok(status, ok_statuses):
+            raise WebhookDeliveryError.from_status(status, "unexpected response status")
+        return response_body
 
     def should_send(self, payload: WebhookPayload) -> bool:
         """Check if this webhook should receive this event based on filters."""
@@ -100,11 +272,11 @@ class WebhookProvider(ABC):
             return False
 
         # If no event filter, send all events
-        if not self.config.events:
+        if self.levels is None:
             return True
 
         # Check if event level matches filter
-        return payload.level.lower() in [e.lower() for e in self.config.events]
+        return payload.level.lower() in self.levels
 
     def format_message(self, payload: WebhookPayload) -> str:
         """Format the error message for display."""
@@ -120,6 +292,9 @@ class WebhookProvider(ABC):
         msg = f"{emoji} [{payload.level.upper()}] Issue #{payload.issue_id}\n"
         msg += f"**{payload.message}**\n"
 
+        if payload.occurrences > 1:
+            msg += f"Occurrences: {payload.occurrences}\n"
+
         if payload.host:
             msg += f"Host: {payload.host}\n"
 
@@ -1,9 +1,6 @@
 """Discord webhook provider."""
 
-import json
 import logging
-import urllib.request
-import urllib.error
 from typing import Any, Dict, List
 
 from .base import WebhookConfig, WebhookPayload, WebhookProvider
@@ -16,29 +13,10 @@ logger = logging.getLogger("crashvault")
 class DiscordWebhook(WebhookProvider):
     """Send notifications to Discord via webhooks."""
 
-    def send(self, payload: WebhookPayload) -> bool:
+    def deliver(self, payload: WebhookPayload) -> None:
         """Send a Discord notification."""
-        try:
-            discord_payload = self._build_discord_payload(payload)
-            data = json.dumps(discord_payload).encode("utf-8")
-
-            req = urllib.request.Request(
-                self.config.url,
-                data=data,
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-
-            with urllib.request.urlopen(req, timeout=10) as response:
-                # Discord returns 204 No Content on success
-                return response.status in (200, 204)
-
-        except urllib.error.URLError as e:
-            logger.error(f"Discord webhook failed: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Discord webhook error: {e}")
-            return False
+        # Discord returns 204 No Content on success
+        self.post_json(self.config.url, self._build_discord_payload(payload), timeout=10, ok_statuses=(200, 204))
 
     def _build_discord_payload(self, payload: WebhookPayload) -> Dict[str, Any]:
         """Build a Discord embed message."""
@@ -74,6 +52,13 @@ class DiscordWebhook(WebhookProvider):
             },
         ]
 
+        if payload.occurrences > 1:
+            fields.append({
+                "name": "Occurrences",
+                "value": str(payload.occurrences),
+                "inline": True,
+            })
+
         if payload.host:
             fields.append({
                 "name": "Host",
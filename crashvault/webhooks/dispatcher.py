@@ -1,16 +1,22 @@
 """Webhook dispatcher - manages and sends webhooks."""
 
 import logging
+import threading
 import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Optional, Type
+from typing import Dict, List, Optional, Tuple, Type
 
 from ..core import load_config, save_config
-from .base import WebhookConfig, WebhookPayload, WebhookProvider
+from .base import WebhookConfig, WebhookDeliveryError, WebhookPayload, WebhookProvider
+from .retry import RetryPolicy
+from .throttle import AlertThrottle
 
 
 logger = logging.getLogger("crashvault")
 
+# Threads delivering one event to several webhooks in parallel
+DISPATCH_WORKERS = 5
+
 # Registry of webhook provider types
 _PROVIDERS: Dict[str, Type[WebhookProvider]] = {}
 
@@ -33,6 +39,11 @@ class WebhookDispatcher:
 
     def __init__(self):
         self.webhooks: List[WebhookConfig] = []
+        self.retry_policy = RetryPolicy()
+        self.throttle = AlertThrottle()
+        self._providers: Dict[str, WebhookProvider] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
         self._load_webhooks()
 
     def _load_webhooks(self):
@@ -40,12 +51,52 @@ class WebhookDispatcher:
         config = load_config()
         webhook_data = config.get("webhooks", [])
         self.webhooks = [WebhookConfig.from_dict(w) for w in webhook_data]
+        self.retry_policy = RetryPolicy.from_config(config)
+        self._providers = {}
 
     def _save_webhooks(self):
         """Save webhooks to config."""
         config = load_config()
         config["webhooks"] = [w.to_dict() for w in self.webhooks]
         save_config(config)
+        # Providers captured the old configs; rebuild them on next use
+        self._providers = {}
+
+    def provider_for(self, webhook: WebhookConfig) -> Optional[WebhookProvider]:
+        """Cached provider instance for a configured webhook."""
+        provider = self._providers.get(webhook.id)
+        if provider is None or provider.config is not webhook:
+            provider = get_provider(webhook)
+            if provider is not None:
+                self._providers[webhook.id] = provider
+        return provider
+
+    def matching(self, payload: WebhookPayload) -> List[Tuple[WebhookConfig, WebhookProvider]]:
+        """Enabled webhooks whose filters accept ``payload``, with their providers."""
+        result = []
+        for webhook in self.webhooks:
+            if not webhook.enabled:
+                continue
+            provider = self.provider_for(webhook)
+            if provider and provider.should_send(payload):
+                result.append((webhook, provider))
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=DISPATCH_WORKERS, thread_name_prefix="crashvault-dispatch"
+                    )
+        return self._executor
+
+    def close(self):
+        """Shut down the delivery threads (they are started again on demand)."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
 
     def add_webhook(
         self,
@@ -54,6 +105,9 @@ class WebhookDispatcher:
         name: Optional[str] = None,
         secret: Optional[str] = None,
         events: Optional[List[str]] = None,
+        rate_limit: Optional[float] = None,
+        burst: Optional[int] = None,
+        coalesce_window: Optional[float] = None,
     ) -> WebhookConfig:
         """Add a new webhook configuration."""
         webhook = WebhookConfig(
@@ -64,6 +118,9 @@ class WebhookDispatcher:
             secret=secret,
             events=events,
             enabled=True,
+            rate_limit=rate_limit,
+            burst=burst,
+            coalesce_window=coalesce_window,
         )
         self.webhooks.append(webhook)
         self._save_webhooks()
@@ -104,49 +161,96 @@ class WebhookDispatcher:
         """
         Dispatch a payload to all matching webhooks.
 
-        Returns a dict of webhook_id -> success status.
+        Returns a dict of webhook_id -> success status.  Webhooks with a
+        rate limit or coalescing window may hold the payload back; those are
+        left out of the result.
         """
         results = {}
 
         # Get providers for all enabled webhooks that match the event
-        providers = []
-        for webhook in self.webhooks:
-            provider = get_provider(webhook)
-            if provider and provider.should_send(payload):
-                providers.append((webhook.id, provider))
-
-        if not providers:
+        deliveries = []
+        for webhook, provider in self.matching(payload):
+            admitted = self.throttle.admit(webhook, payload)
+            if admitted is not None:
+                deliveries.append((webhook.id, provider, admitted))
+
+        # Piggyback aggregated notifications whose coalescing window is over
+        for webhook, summary in self.flush_coalesced():
+            provider = self.provider_for(webhook)
+            if provider:
+                deliveries.append((webhook.id, provider, summary))
+
+        if not deliveries:
             return results
 
-        # Dispatch in parallel with thread pool
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        # A single delivery runs in the caller's thread; several go out in parallel
+        if len(deliveries) == 1:
+            webhook_id, provider, item = deliveries[0]
+            try:
+                results[webhook_id] = self._deliver(webhook_id, provider, item)
+            except Exception as e:
+                results[webhook_id] = e
+        else:
+            executor = self._get_executor()
             futures = {
-                executor.submit(provider.send, payload): webhook_id
-                for webhook_id, provider in providers
+                executor.submit(self._deliver, webhook_id, provider, item): webhook_id
+                for webhook_id, provider, item in deliveries
             }
-
             for future in as_completed(futures):
-                webhook_id = futures[future]
                 try:
-                    success = future.result()
-                    results[webhook_id] = success
-                    if success:
-                        logger.info(f"webhook sent | id={webhook_id}")
-                    else:
-                        logger.warning(f"webhook failed | id={webhook_id}")
+                    results[futures[future]] = future.result()
                 except Exception as e:
-                    results[webhook_id] = False
-                    logger.error(f"webhook error | id={webhook_id} | error={e}")
+                    results[futures[future]] = e
+
+        for webhook_id, outcome in results.items():
+            if outcome is True:
+                logger.info(f"webhook sent | id={webhook_id}")
+            elif outcome is False:
+                logger.warning(f"webhook failed | id={webhook_id}")
+            else:
+                results[webhook_id] = False
+                logger.error(f"webhook error | id={webhook_id} | error={outcome}")
 
         return results
 
+    def flush_coalesced(self) -> List[Tuple[WebhookConfig, WebhookPayload]]:
+        """Aggregated notifications for held-back events that are now due."""
+        return self.throttle.flush([w for w in self.webhooks if w.enabled])
+
+    def _deliver(self, webhook_id: str, provider: WebhookProvider, payload: WebhookPayload) -> bool:
+        """Try one delivery; on failure hand the payload to the outbox.
+
+        This runs in the caller's thread (the CLI, a request handler), so it
+        never sleeps through a backoff: a retryable failure is queued in the
+        outbox for its next attempt, anything else is dead-lettered.
+        """
+        try:
+            provider.deliver(payload)
+            return True
+        except WebhookDeliveryError as e:
+            error = e
+        except Exception as e:
+            error = WebhookDeliveryError(str(e))
+
+        try:
+            from .outbox import WebhookOutbox
+            outbox = WebhookOutbox(policy=self.retry_policy)
+            if self.retry_policy.should_retry(1, error):
+                outbox.schedule_retry(webhook_id, payload, 1, error)
+                logger.info(f"webhook deferred to outbox | id={webhook_id} | error={error}")
+            else:
+                outbox.dead_letter(webhook_id, payload, 1, error)
+        except OSError as e:
+            logger.error(f"webhook outbox write failed | id={webhook_id} | error={e}")
+        return False
+
     def test_webhook(self, webhook_id: str) -> bool:
         """Send a test event to a specific webhook."""
         webhook = self.get_webhook(webhook_id)
         if not webhook:
             return False
 
-        provider = get_provider(webhook)
+        provider = self.provider_for(webhook)
         if not provider:
             return False
 
@@ -175,13 +279,9 @@ def get_dispatcher() -> WebhookDispatcher:
     return _dispatcher
 
 
-def dispatch_webhooks(event_data: dict):
-    """
-    Dispatch webhooks for an event.
-
-    This is the main entry point for triggering webhooks when an event is created.
-    """
-    payload = WebhookPayload(
+def payload_from_event(event_data: dict) -> WebhookPayload:
+    """Build the webhook payload for a stored event."""
+    return WebhookPayload(
         event_id=event_data.get("event_id", ""),
         issue_id=event_data.get("issue_id", 0),
         message=event_data.get("message", ""),
@@ -193,5 +293,13 @@ def dispatch_webhooks(event_data: dict):
         host=event_data.get("host"),
     )
 
+
+def dispatch_webhooks(event_data: dict):
+    """
+    Dispatch webhooks for an event.
+
+    This is the main entry point for triggering webhooks when an event is created.
+    """
+    payload = payload_from_event(event_data)
     dispatcher = get_dispatcher()
     return dispatcher.dispatch(payload)
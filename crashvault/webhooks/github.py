@@ -2,11 +2,9 @@
 
 import json
 import logging
-import urllib.request
-import urllib.error
 from typing import Any, Dict, List, Optional
 
-from .base import WebhookConfig, WebhookPayload, WebhookProvider
+from .base import WebhookConfig, WebhookDeliveryError, WebhookPayload, WebhookProvider
 from .dispatcher import register_provider
 
 
@@ -60,84 +58,52 @@ class GitHubIssuesWebhook(WebhookProvider):
         super().__init__(config)
         self._token = config.secret or ""
         
-    def send(self, payload: WebhookPayload) -> bool:
+    def _api_url(self) -> str:
+        """Resolve the configured repository to its API URL."""
+        # Parse the repository URL from config
+        # Accept both full API URL and owner/repo format
+        repo_url = self.config.url.rstrip("/")
+
+        # Support both:
+        # - https://api.github.com/repos/owner/repo
+        # - https://github.com/owner/repo
+        # - owner/repo (shorthand)
+        if "/repos/" in repo_url:
+            return repo_url
+        if repo_url.startswith("http"):
+            # Convert web URL to API URL
+            # https://github.com/owner/repo -> https://api.github.com/repos/owner/repo
+            parts = repo_url.replace("https://github.com/", "").split("/")
+            if len(parts) >= 2:
+                owner, repo = parts[0], parts[1]
+                return f"https://api.github.com/repos/{owner}/{repo}"
+            raise WebhookDeliveryError(f"Invalid GitHub URL: {repo_url}", transient=False)
+        # Assume owner/repo format
+        return f"https://api.github.com/repos/{repo_url}"
+
+    def deliver(self, payload: WebhookPayload) -> None:
         """Create a GitHub issue from the payload."""
+        api_url = self._api_url()
+        issue_data = self._build_issue_data(payload)
+
+        headers = {
+            "User-Agent": "CrashVault/1.0",
+            "Accept": "application/vnd.github+json",
+        }
+
+        if self._token:
+            headers["Authorization"] = f"Bearer {self._token}"
+
+        # Determine if we're creating new or updating existing
+        # For now, always create new issues
+        # In the future, could check for existing issue by title/label
+        body = self.post_json(f"{api_url}/issues", issue_data, headers=headers, timeout=30, ok_statuses=(201,))
         try:
-            # Parse the repository URL from config
-            # Accept both full API URL and owner/repo format
-            repo_url = self.config.url.rstrip("/")
-            
-            # Support both:
-            # - https://api.github.com/repos/owner/repo
-            # - https://github.com/owner/repo
-            # - owner/repo (shorthand)
-            if "/repos/" in repo_url:
-                api_url = repo_url
-            elif repo_url.startswith("http"):
-                # Convert web URL to API URL
-                # https://github.com/owner/repo -> https://api.github.com/repos/owner/repo
-                parts = repo_url.replace("https://github.com/", "").split("/")
-                if len(parts) >= 2:
-                    owner, repo = parts[0], parts[1]
-                    api_url = f"https://api.github.com/repos/{owner}/{repo}"
-                else:
-                    logger.error(f"Invalid GitHub URL: {repo_url}")
-                    return False
-            else:
-                # Assume owner/repo format
-                api_url = f"https://api.github.com/repos/{repo_url}"
-            
-            issue_data = self._build_issue_data(payload)
-            
-            # Make the API request
-            data = json.dumps(issue_data).encode("utf-8")
-            
-            headers = {
-                "Content-Type": "application/json",
-                "User-Agent": "CrashVault/1.0",
-                "Accept": "application/vnd.github+json",
-            }
-            
-            if self._token:
-                headers["Authorization"] = f"Bearer {self._token}"
-            
-            # Determine if we're creating new or updating existing
-            # For now, always create new issues
-            # In the future, could check for existing issue by title/label
-            url = f"{api_url}/issues"
-            
-            req = urllib.request.Request(
-                url,
-                data=data,
-                headers=headers,
-                method="POST",
-            )
-            
-            with urllib.request.urlopen(req, timeout=30) as response:
-                if response.status == 201:
-                    result = json.loads(response.read().decode("utf-8"))
-                    issue_url = result.get("html_url", "")
-                    logger.info(f"GitHub issue created: {issue_url}")
-                    return True
-                else:
-                    logger.error(f"GitHub API returned status: {response.status}")
-                    return False
-                    
-        except urllib.error.HTTPError as e:
-            try:
-                error_body = e.read().decode("utf-8")
-                error_data = json.loads(error_body)
-                logger.error(f"GitHub API error: {error_data.get('message', str(e))}")
-            except Exception:
-                logger.error(f"GitHub webhook failed: {e}")
-            return False
-        except urllib.error.URLError as e:
-            logger.error(f"GitHub webhook network error: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"GitHub webhook error: {e}")
-            return False
-    
+            issue_url = json.loads(body.decode("utf-8")).get("html_url", "")
+        except ValueError:
+            issue_url = ""
+        logger.info(f"GitHub issue created: {issue_url}")
+
     def _build_issue_data(self, payload: WebhookPayload) -> Dict[str, Any]:
         """Build the GitHub issue data from the payload."""
         emoji = self.SEVERITY_EMOJI.get(payload.level.lower(), "📌")
@@ -155,6 +121,9 @@ class GitHubIssuesWebhook(WebhookProvider):
         body_parts.append(f"| **Level** | {payload.level.upper()} |")
         body_parts.append(f"| **Timestamp** | {payload.timestamp or 'N/A'} |")
         body_parts.append(f"| **Host** | {payload.host or 'N/A'} |")
+
+        if payload.occurrences > 1:
+            body_parts.append(f"| **Occurrences** | {payload.occurrences} |")
         
         if payload.tags:
             body_parts.append(f"| **Tags** | {', '.join(payload.tags)} |")
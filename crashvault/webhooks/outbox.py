@@ -0,0 +1,438 @@
+"""Persistent webhook outbox.
+
+The server does not call webhook providers while answering a request.
+Instead, every (event, webhook) delivery is written as a job file to the
+outbox and background workers send them:
+
+    outbox/pending/<due_ms>-<job_id>.json    waiting (due time in the name)
+    outbox/inflight/<due_ms>-<job_id>.json   claimed by a worker
+    outbox/dead/<job_id>.json                gave up (see RetryPolicy)
+    outbox/metrics.json                      last metrics snapshot
+
+Jobs are claimed by renaming them from ``pending`` to ``inflight``, which
+is atomic, so several workers (or processes) never send the same job.
+Jobs left in ``inflight`` by a crash are moved back on startup, so
+deliveries survive restarts (at-least-once).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .. import core
+from .base import WebhookDeliveryError, WebhookPayload
+from .dispatcher import get_dispatcher, payload_from_event
+from .retry import RetryPolicy
+
+
+logger = logging.getLogger("crashvault")
+
+DEFAULT_WORKERS = 2
+METRICS_WRITE_INTERVAL = 1.0
+
+
+def outbox_dir() -> Path:
+    return core.ROOT / "outbox"
+
+
+def _write_job(path: Path, job: Dict[str, Any]):
+    tmp = path.with_name("." + path.name + ".tmp")
+    tmp.write_text(json.dumps(job))
+    os.replace(tmp, path)
+
+
+class OutboxMetrics:
+    """Delivery counters and enqueue-to-delivery latency."""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+        self._latencies = deque(maxlen=window)
+
+    def record_delivery(self, latency: float):
+        with self._lock:
+            self.delivered += 1
+            self._latencies.append(latency)
+
+    def record_failure(self, dead: bool):
+        with self._lock:
+            self.failed_attempts += 1
+            if dead:
+                self.dead_lettered += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            data = {
+                "delivered": self.delivered,
+                "failed_attempts": self.failed_attempts,
+                "dead_lettered": self.dead_lettered,
+            }
+        if latencies:
+            data["latency_seconds"] = {
+                "avg": round(sum(latencies) / len(latencies), 4),
+                "p50": round(latencies[len(latencies) // 2], 4),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4),
+                "max": round(latencies[-1], 4),
+            }
+        return data
+
+
+class WebhookOutbox:
+    """On-disk queue of webhook deliveries."""
+
+    def __init__(self, root: Optional[Path] = None, policy: Optional[RetryPolicy] = None):
+        self.root = root or outbox_dir()
+        self.pending_dir = self.root / "pending"
+        self.inflight_dir = self.root / "inflight"
+        self.dead_dir = self.root / "dead"
+        for d in (self.pending_dir, self.inflight_dir, self.dead_dir):
+            d.mkdir(parents=True, exist_ok=True)
+        self.policy = policy or RetryPolicy.from_config(core.load_config())
+        self.metrics = OutboxMetrics()
+        self._cond = threading.Condition()
+        self._metrics_written = 0.0
+
+    # -- producers ------------------------------------------------------
+
+    def enqueue(self, event_data: Dict[str, Any]) -> int:
+        """Queue deliveries of one event to every matching webhook."""
+        return self.enqueue_events([event_data])
+
+    def enqueue_events(self, events: Iterable[Dict[str, Any]]) -> int:
+        """Queue deliveries for several events. Returns the number of jobs written.
+
+        Payloads held back by a webhook's rate limit or coalescing window
+        are not queued; they reach the queue later as one aggregated job
+        via :meth:`enqueue_due_summaries`.
+        """
+        dispatcher = get_dispatcher()
+        if not any(w.enabled for w in dispatcher.list_webhooks()):
+            return 0
+        now = time.time()
+        written = 0
+        for event_data in events:
+            payload = payload_from_event(event_data)
+            for webhook, _ in dispatcher.matching(payload):
+                admitted = dispatcher.throttle.admit(webhook, payload)
+                if admitted is None:
+                    continue
+                self._write_pending(webhook.id, admitted, now)
+                written += 1
+        written += self.enqueue_due_summaries(notify=False)
+        if written:
+            with self._cond:
+                self._cond.notify_all()
+        return written
+
+    def enqueue_due_summaries(self, notify: bool = True) -> int:
+        """Queue aggregated notifications whose coalescing window is over."""
+        due = get_dispatcher().flush_coalesced()
+        now = time.time()
+        for webhook, payload in due:
+            self._write_pending(webhook.id, payload, now)
+        if due and notify:
+            with self._cond:
+                self._cond.notify_all()
+        return len(due)
+
+    def _write_pending(self, webhook_id: str, payload: WebhookPayload, now: float):
+        job = {
+            "id": uuid.uuid4().hex,
+            "webhook_id": webhook_id,
+            "payload": payload.to_dict(),
+            "attempts": 0,
+            "enqueued_at": now,
+        }
+        _write_job(self.pending_dir / self._job_name(job, now), job)
+
+    def schedule_retry(self, webhook_id: str, payload: WebhookPayload, attempts: int,
+                       error: WebhookDeliveryError):
+        """Queue a delivery that already failed ``attempts`` times for its next attempt.
+
+        Used by inline dispatch, which must not sleep through the backoff
+        itself; the workers pick the job up once it is due.
+        """
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "webhook_id": webhook_id,
+            "payload": payload.to_dict(),
+            "attempts": attempts,
+            "enqueued_at": now,
+            "last_error": str(error),
+            "last_status": error.status,
+        }
+        self.metrics.record_failure(False)
+        due = now + self.policy.delay(attempts, error.retry_after)
+        _write_job(self.pending_dir / self._job_name(job, due), job)
+        self.wake()
+
+    def deliver_due(self) -> int:
+        """Deliver every job that is due now, without waiting for later ones.
+
+        Jobs that fail and are rescheduled are not retried in the same call.
+        Returns the number of jobs handled (delivered, rescheduled or dead).
+        """
+        self.enqueue_due_summaries(notify=False)
+        now_ms = int(time.time() * 1000)
+        due = 0
+        for name in os.listdir(self.pending_dir):
+            try:
+                due += name.endswith(".json") and int(name.split("-", 1)[0]) <= now_ms
+            except ValueError:
+                continue
+        handled = 0
+        while handled < due and self.deliver_one():
+            handled += 1
+        return handled
+
+    @staticmethod
+    def _job_name(job: Dict[str, Any], due: float) -> str:
+        return f"{int(due * 1000):015d}-{job['id']}.json"
+
+    # -- consumers ------------------------------------------------------
+
+    def recover(self) -> int:
+        """Return jobs abandoned in ``inflight`` (e.g. by a crash) to ``pending``."""
+        moved = 0
+        for path in self.inflight_dir.glob("*.json"):
+            try:
+                os.replace(path, self.pending_dir / path.name)
+                moved += 1
+            except FileNotFoundError:
+                continue
+        return moved
+
+    def claim(self) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """Take the oldest due job, or None if nothing is due."""
+        now_ms = int(time.time() * 1000)
+        for name in sorted(os.listdir(self.pending_dir)):
+            if not name.endswith(".json") or name.startswith("."):
+                continue
+            try:
+                due_ms = int(name.split("-", 1)[0])
+            except ValueError:
+                continue
+            if due_ms > now_ms:
+                break  # names sort by due time
+            target = self.inflight_dir / name
+            try:
+                os.rename(self.pending_dir / name, target)
+            except FileNotFoundError:
+                continue  # another worker got it
+            try:
+                return target, json.loads(target.read_text())
+            except ValueError:
+                logger.error(f"webhook outbox: unreadable job {name}, moving to dead letters")
+                os.replace(target, self.dead_dir / name)
+        return None
+
+    def complete(self, path: Path, job: Dict[str, Any]):
+        self.metrics.record_delivery(time.time() - job.get("enqueued_at", time.time()))
+        path.unlink(missing_ok=True)
+
+    def fail(self, path: Path, job: Dict[str, Any], error: WebhookDeliveryError):
+        """Reschedule a failed job with backoff, or dead-letter it."""
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["last_error"] = str(error)
+        job["last_status"] = error.status
+        dead = not self.policy.should_retry(job["attempts"], error)
+        self.metrics.record_failure(dead)
+        if dead:
+            self._write_dead(job)
+        else:
+            due = time.time() + self.policy.delay(job["attempts"], error.retry_after)
+            _write_job(self.pending_dir / self._job_name(job, due), job)
+        path.unlink(missing_ok=True)
+
+    # -- dead letters ---------------------------------------------------
+
+    def _write_dead(self, job: Dict[str, Any]):
+        job["dead_at"] = time.time()
+        _write_job(self.dead_dir / f"{job['id']}.json", job)
+        logger.warning(
+            f"webhook dead-lettered | id={job['webhook_id']} | job={job['id']} | error={job.get('last_error')}"
+        )
+
+    def dead_letter(self, webhook_id: str, payload: WebhookPayload, attempts: int, error: WebhookDeliveryError):
+        """Park a delivery that failed outside the queue (inline dispatch)."""
+        now = time.time()
+        self._write_dead({
+            "id": uuid.uuid4().hex,
+            "webhook_id": webhook_id,
+            "payload": payload.to_dict(),
+            "attempts": attempts,
+            "enqueued_at": now,
+            "last_error": str(error),
+            "last_status": error.status,
+        })
+        self.metrics.record_failure(True)
+
+    def iter_dead(self, webhook_id: Optional[str] = None) -> Iterable[Tuple[Path, Dict[str, Any]]]:
+        """Yield (path, job) for dead-lettered deliveries, oldest first."""
+        jobs = []
+        for path in self.dead_dir.glob("*.json"):
+            try:
+                job = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            if webhook_id is None or job.get("webhook_id") == webhook_id:
+                jobs.append((job.get("dead_at", 0), path, job))
+        for _, path, job in sorted(jobs, key=lambda item: item[0]):
+            yield path, job
+
+    def requeue_dead(self, path: Path, job: Dict[str, Any]):
+        """Move a dead letter back to the queue with a fresh attempt budget."""
+        job["attempts"] = 0
+        job.pop("dead_at", None)
+        _write_job(self.pending_dir / self._job_name(job, time.time()), job)
+        path.unlink(missing_ok=True)
+        self.wake()
+
+    def replay_dead(self, path: Path, job: Dict[str, Any]) -> Optional[WebhookDeliveryError]:
+        """Redeliver a dead letter now. Returns None on success, else the error.
+
+        Successful jobs are removed; failed ones stay dead with updated details.
+        """
+        error = self._attempt(job)
+        if error is None:
+            self.metrics.record_delivery(time.time() - job.get("enqueued_at", time.time()))
+            path.unlink(missing_ok=True)
+            return None
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["last_error"] = str(error)
+        job["last_status"] = error.status
+        job["dead_at"] = time.time()
+        _write_job(path, job)
+        return error
+
+    def _attempt(self, job: Dict[str, Any]) -> Optional[WebhookDeliveryError]:
+        """Try one delivery of ``job``. Returns None on success."""
+        dispatcher = get_dispatcher()
+        webhook = dispatcher.get_webhook(job.get("webhook_id"))
+        provider = dispatcher.provider_for(webhook) if webhook else None
+        if provider is None:
+            return WebhookDeliveryError(f"webhook {job.get('webhook_id')} no longer exists", transient=False)
+        try:
+            provider.deliver(WebhookPayload(**job["payload"]))
+        except WebhookDeliveryError as e:
+            return e
+        except Exception as e:
+            return WebhookDeliveryError(str(e))
+        logger.info(f"webhook sent | id={webhook.id}")
+        return None
+
+    def deliver_one(self) -> bool:
+        """Deliver the next due job. Returns False when nothing was due."""
+        claimed = self.claim()
+        if claimed is None:
+            return False
+        path, job = claimed
+        webhook = get_dispatcher().get_webhook(job.get("webhook_id"))
+        if webhook is None or not webhook.enabled:
+            # Webhook removed or disabled since the job was queued
+            path.unlink(missing_ok=True)
+            return True
+        error = self._attempt(job)
+        if error is None:
+            self.complete(path, job)
+        else:
+            self.fail(path, job, error)
+        self._maybe_write_metrics()
+        return True
+
+    def wait(self, timeout: float):
+        """Sleep until new jobs are queued or ``timeout`` passes."""
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    # -- metrics --------------------------------------------------------
+
+    def depth(self) -> Dict[str, int]:
+        def count(d: Path) -> int:
+            return sum(1 for n in os.listdir(d) if n.endswith(".json") and not n.startswith("."))
+
+        return {
+            "pending": count(self.pending_dir),
+            "inflight": count(self.inflight_dir),
+            "dead": count(self.dead_dir),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        throttle = get_dispatcher().throttle
+        return {
+            "queue": self.depth(),
+            **self.metrics.snapshot(),
+            "throttle": dict(throttle.stats, held=throttle.pending()),
+        }
+
+    def _maybe_write_metrics(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._metrics_written < METRICS_WRITE_INTERVAL:
+            return
+        self._metrics_written = now
+        try:
+            _write_job(self.root / "metrics.json", dict(self.metrics.snapshot(), updated_at=time.time()))
+        except OSError:
+            pass
+
+
+def read_saved_metrics(root: Optional[Path] = None) -> Dict[str, Any]:
+    """Metrics last written by a running server (empty if none)."""
+    try:
+        return json.loads(((root or outbox_dir()) / "metrics.json").read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+class OutboxWorkers:
+    """Background threads draining a :class:`WebhookOutbox`."""
+
+    def __init__(self, outbox: WebhookOutbox, workers: int = DEFAULT_WORKERS, poll_interval: float = 1.0):
+        self.outbox = outbox
+        self.workers = max(int(workers), 1)
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "OutboxWorkers":
+        self.outbox.recover()
+        self._stop.clear()
+        for n in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"crashvault-webhook-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self._stop.set()
+        self.outbox.wake()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self.outbox._maybe_write_metrics(force=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delivered = self.outbox.deliver_one()
+                if not delivered:
+                    delivered = self.outbox.enqueue_due_summaries(notify=False) > 0
+            except Exception as e:
+                logger.error(f"webhook outbox worker error: {e}")
+                delivered = False
+            if not delivered:
+                self.outbox.wait(self.poll_interval)
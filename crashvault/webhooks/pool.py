@@ -0,0 +1,247 @@
+"""Keep-alive HTTP connection pool shared by the webhook providers.
+
+Webhook deliveries tend to go to a handful of hosts (hooks.slack.com,
+discord.com, api.github.com, ...).  Instead of a fresh TCP/TLS handshake per
+notification, connections are kept open per ``(scheme, host, port)`` and
+reused until they have been idle for ``idle_timeout`` seconds.
+
+Configured by the ``webhook_pool`` section of config.json::
+
+    {"webhook_pool": {"max_connections": 4, "idle_timeout": 30}}
+
+``max_connections`` is the number of idle connections kept per host (``0``
+disables pooling); concurrent deliveries beyond that open extra connections
+that are closed after use.
+"""
+
+import http.client
+import select
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ..core import load_config
+
+
+DEFAULT_MAX_CONNECTIONS = 4
+DEFAULT_IDLE_TIMEOUT = 30.0
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Errors meaning a kept-alive connection was closed by the server while idle
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+_HostKey = Tuple[str, str, int]
+
+# Safe to send again when a reused connection dies before the response
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class _StaleConnection(Exception):
+    """A reused connection failed in a way that makes resending safe."""
+
+
+def _closed_by_peer(conn: http.client.HTTPConnection) -> bool:
+    """Whether an idle kept-alive connection has been closed by the server.
+
+    An idle connection has nothing to read; if its socket is readable, the
+    server has sent EOF (or stray bytes) and it must not be reused.
+    """
+    sock = conn.sock
+    if sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool:
+    """Per-host pool of reusable ``http.client`` connections."""
+
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.max_connections = max(int(max_connections), 0)
+        self.idle_timeout = float(idle_timeout)
+        self._lock = threading.Lock()
+        self._idle: Dict[_HostKey, Deque[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._stats = {"requests": 0, "opened": 0, "reused": 0, "expired": 0, "stale": 0}
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "ConnectionPool":
+        data = cfg.get("webhook_pool", {})
+        if not isinstance(data, dict):
+            data = {}
+        return cls(
+            max_connections=int(data.get("max_connections", DEFAULT_MAX_CONNECTIONS)),
+            idle_timeout=float(data.get("idle_timeout", DEFAULT_IDLE_TIMEOUT)),
+        )
+
+    @staticmethod
+    def uses_proxy(url: str) -> bool:
+        """Whether the environment routes this URL through a proxy (not pooled)."""
+        parts = urllib.parse.urlsplit(url)
+        proxies = urllib.request.getproxies()
+        return parts.scheme in proxies and not urllib.request.proxy_bypass(parts.hostname or "")
+
+    @staticmethod
+    def _key(parts: urllib.parse.SplitResult) -> _HostKey:
+        scheme = parts.scheme.lower()
+        if scheme not in _DEFAULT_PORTS:
+            raise ValueError(f"unsupported URL scheme: {parts.scheme!r}")
+        if not parts.hostname:
+            raise ValueError("URL has no host")
+        return scheme, parts.hostname, parts.port or _DEFAULT_PORTS[scheme]
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None,
+                timeout: float = 10) -> Tuple[int, http.client.HTTPMessage, bytes]:
+        """Send one request and return ``(status, headers, body)``.
+
+        Raises ``ValueError`` for unusable URLs and ``OSError`` /
+        ``http.client.HTTPException`` for network failures.  A pooled
+        connection found closed by the server is replaced before sending.
+        If a reused connection fails while the request is being sent, or
+        before any response arrives to an idempotent request, the request
+        is sent again once on a fresh connection.  A POST that may have
+        reached the server is never resent; the error is raised, and the
+        caller's retry policy decides.
+        """
+        parts = urllib.parse.urlsplit(url)
+        key = self._key(parts)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = headers or {}
+
+        with self._lock:
+            self._stats["requests"] += 1
+        conn = self._acquire(key)
+        if conn is not None:
+            try:
+                return self._send(key, conn, method, path, body, headers, timeout, reused=True)
+            except _StaleConnection:
+                with self._lock:
+                    self._stats["stale"] += 1
+        return self._send(key, self._connect(key, timeout), method, path, body, headers, timeout)
+
+    def _connect(self, key: _HostKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        with self._lock:
+            self._stats["opened"] += 1
+            if scheme == "https" and self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def _acquire(self, key: _HostKey) -> Optional[http.client.HTTPConnection]:
+        now = time.monotonic()
+        expired = []
+        conn = None
+        with self._lock:
+            idle = self._idle.get(key)
+            # Most recently used first: if that one has expired, all have
+            while idle:
+                candidate, since = idle.pop()
+                if now - since >= self.idle_timeout:
+                    expired.append(candidate)
+                    self._stats["expired"] += 1
+                elif _closed_by_peer(candidate):
+                    expired.append(candidate)
+                    self._stats["stale"] += 1
+                else:
+                    conn = candidate
+                    self._stats["reused"] += 1
+                    break
+        for stale in expired:
+            stale.close()
+        return conn
+
+    def _release(self, key: _HostKey, conn: http.client.HTTPConnection):
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.max_connections:
+                idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def _send(self, key: _HostKey, conn: http.client.HTTPConnection, method: str, path: str,
+              body: Optional[bytes], headers: Dict[str, str], timeout: float, reused: bool = False):
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            try:
+                conn.request(method, path, body=body, headers=headers)
+            except _STALE_ERRORS as e:
+                # The server dropped the connection before taking the request
+                if reused:
+                    raise _StaleConnection() from e
+                raise
+            try:
+                response = conn.getresponse()
+            except _STALE_ERRORS as e:
+                # The request was sent and may have been processed
+                if reused and method.upper() in IDEMPOTENT_METHODS:
+                    raise _StaleConnection() from e
+                raise
+            data = response.read()
+        except BaseException:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return response.status, response.headers, data
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(
+                self._stats,
+                idle=sum(len(idle) for idle in self._idle.values()),
+                hosts=sum(1 for idle in self._idle.values() if idle),
+                max_connections=self.max_connections,
+                idle_timeout=self.idle_timeout,
+            )
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn, _ in connections:
+                conn.close()
+
+
+# Global pool instance
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Get the shared webhook connection pool."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool.from_config(load_config())
+    return _pool
+
+
+def close_pool():
+    """Close the shared pool's idle connections (e.g. on server shutdown)."""
+    if _pool is not None:
+        _pool.close()
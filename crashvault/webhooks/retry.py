@@ -0,0 +1,52 @@
+"""Retry policy for webhook deliveries."""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from .base import WebhookDeliveryError
+
+
+@dataclass
+class RetryPolicy:
+    """Capped exponential backoff with full jitter.
+
+    Attempt ``n`` (1-based) that failed transiently is retried after a
+    random delay in ``[0, min(max_delay, base_delay * 2 ** (n - 1))]``, or
+    after the server's ``Retry-After`` if that is longer (still capped by
+    ``max_delay``).  After ``max_attempts`` attempts, or on a permanent
+    failure, the delivery is dead-lettered.
+
+    Configured by the ``webhook_retry`` section of config.json.
+    """
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 300.0
+    jitter: bool = True
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "RetryPolicy":
+        data = cfg.get("webhook_retry", {})
+        if not isinstance(data, dict):
+            data = {}
+        return cls(
+            max_attempts=int(data.get("max_attempts", cls.max_attempts)),
+            base_delay=float(data.get("base_delay", cls.base_delay)),
+            max_delay=float(data.get("max_delay", cls.max_delay)),
+            jitter=bool(data.get("jitter", cls.jitter)),
+        )
+
+    def should_retry(self, attempts: int, error: Optional[WebhookDeliveryError]) -> bool:
+        """Whether a delivery that has failed ``attempts`` times should be tried again."""
+        if error is not None and not error.transient:
+            return False
+        return attempts < self.max_attempts
+
+    def delay(self, attempts: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before the next try after ``attempts`` failures."""
+        backoff = min(self.max_delay, self.base_delay * (2 ** max(attempts - 1, 0)))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+        if retry_after is not None:
+            backoff = max(backoff, min(retry_after, self.max_delay))
+        return backoff
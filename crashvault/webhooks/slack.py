@@ -1,9 +1,6 @@
 """Slack webhook provider."""
 
-import json
 import logging
-import urllib.request
-import urllib.error
 from typing import Any, Dict, List
 
 from .base import WebhookConfig, WebhookPayload, WebhookProvider
@@ -16,28 +13,9 @@ logger = logging.getLogger("crashvault")
 class SlackWebhook(WebhookProvider):
     """Send notifications to Slack via incoming webhooks."""
 
-    def send(self, payload: WebhookPayload) -> bool:
+    def deliver(self, payload: WebhookPayload) -> None:
         """Send a Slack notification."""
-        try:
-            slack_payload = self._build_slack_payload(payload)
-            data = json.dumps(slack_payload).encode("utf-8")
-
-            req = urllib.request.Request(
-                self.config.url,
-                data=data,
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-
-            with urllib.request.urlopen(req, timeout=10) as response:
-                return response.status == 200
-
-        except urllib.error.URLError as e:
-            logger.error(f"Slack webhook failed: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Slack webhook error: {e}")
-            return False
+        self.post_json(self.config.url, self._build_slack_payload(payload), timeout=10, ok_statuses=(200,))
 
     def _build_slack_payload(self, payload: WebhookPayload) -> Dict[str, Any]:
         """Build a Slack Block Kit message."""
@@ -75,6 +53,15 @@ class SlackWebhook(WebhookProvider):
             },
         ]
 
+        # Mention events folded into this notification
+        if payload.occurrences > 1:
+            blocks.append({
+                "type": "context",
+                "elements": [
+                    {"type": "mrkdwn", "text": f"Occurrences: *{payload.occurrences}*"},
+                ],
+            })
+
         # Add host info if available
         if payload.host:
             blocks.append({
@@ -1,9 +1,6 @@
 """Microsoft Teams webhook provider."""
 
-import json
 import logging
-import urllib.request
-import urllib.error
 from typing import Any, Dict, List
 
 from .base import WebhookConfig, WebhookPayload, WebhookProvider
@@ -16,28 +13,9 @@ logger = logging.getLogger("crashvault")
 class TeamsWebhook(WebhookProvider):
     """Send notifications to Microsoft Teams via incoming webhooks."""
 
-    def send(self, payload: WebhookPayload) -> bool:
+    def deliver(self, payload: WebhookPayload) -> None:
         """Send a Teams notification."""
-        try:
-            teams_payload = self._build_teams_payload(payload)
-            data = json.dumps(teams_payload).encode("utf-8")
-
-            req = urllib.request.Request(
-                self.config.url,
-                data=data,
-                headers={"Content-Type": "application/json"},
-                method="POST",
-            )
-
-            with urllib.request.urlopen(req, timeout=10) as response:
-                return response.status == 200
-
-        except urllib.error.URLError as e:
-            logger.error(f"Teams webhook failed: {e}")
-            return False
-        except Exception as e:
-            logger.error(f"Teams webhook error: {e}")
-            return False
+        self.post_json(self.config.url, self._build_teams_payload(payload), timeout=10, ok_statuses=(200,))
 
     def _build_teams_payload(self, payload: WebhookPayload) -> Dict[str, Any]:
         """Build a Teams adaptive card message."""
@@ -66,6 +44,9 @@ class TeamsWebhook(WebhookProvider):
             {"name": "Issue", "value": f"#{payload.issue_id}"},
         ]
 
+        if payload.occurrences > 1:
+            facts.append({"name": "Occurrences", "value": str(payload.occurrences)})
+
         if payload.host:
             facts.append({"name": "Host", "value": payload.host})
 
@@ -0,0 +1,144 @@
+"""Per-webhook rate limiting and per-issue alert coalescing.
+
+Both are configured on :class:`~crashvault.webhooks.base.WebhookConfig`:
+
+- ``rate_limit``: notifications per minute (token bucket), ``burst`` the
+  bucket size (defaults to ``rate_limit``, at least 1);
+- ``coalesce_window``: seconds during which further events of an issue
+  that was just notified are folded into one follow-up notification.
+
+The first event of a burst goes out immediately.  Events that are coalesced
+or rate limited are counted, and once the window has passed (and a token is
+available) one notification for the latest event is sent carrying the
+number of occurrences it stands for.  State is kept in memory, so it
+applies within one process - in practice the server.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+
+from .base import WebhookConfig, WebhookPayload
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens/second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+@dataclass
+class _IssueState:
+    window_until: float = 0.0
+    suppressed: int = 0
+    latest: Optional[WebhookPayload] = field(default=None)
+
+
+class AlertThrottle:
+    """Decides which notifications go out now, later, or folded into others."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[Tuple[float, float], TokenBucket]] = {}
+        self._issues: Dict[Tuple[str, int], _IssueState] = {}
+        self.stats = {"sent": 0, "coalesced": 0, "rate_limited": 0, "summaries": 0}
+
+    @staticmethod
+    def applies_to(webhook: WebhookConfig) -> bool:
+        return bool(webhook.rate_limit or webhook.coalesce_window)
+
+    def _bucket(self, webhook: WebhookConfig) -> Optional[TokenBucket]:
+        if not webhook.rate_limit:
+            return None
+        settings = (float(webhook.rate_limit), float(webhook.burst or webhook.rate_limit))
+        entry = self._buckets.get(webhook.id)
+        if entry is None or entry[0] != settings:
+            entry = (settings, TokenBucket(settings[0] / 60.0, settings[1]))
+            self._buckets[webhook.id] = entry
+        return entry[1]
+
+    def admit(self, webhook: WebhookConfig, payload: WebhookPayload,
+              now: Optional[float] = None) -> Optional[WebhookPayload]:
+        """Return the payload to send now, or None if it was held back."""
+        if not self.applies_to(webhook):
+            return payload
+        now = time.monotonic() if now is None else now
+        key = (webhook.id, payload.issue_id)
+        with self._lock:
+            state = self._issues.get(key)
+            if state and webhook.coalesce_window and now < state.window_until:
+                state.suppressed += payload.occurrences
+                state.latest = payload
+                self.stats["coalesced"] += 1
+                return None
+
+            bucket = self._bucket(webhook)
+            if bucket is not None and not bucket.take(now):
+                if state is None:
+                    state = self._issues[key] = _IssueState(window_until=now)
+                state.suppressed += payload.occurrences
+                state.latest = payload
+                self.stats["rate_limited"] += 1
+                return None
+
+            # Sending: carry along anything held back since the last notification
+            carried = state.suppressed if state else 0
+            if webhook.coalesce_window:
+                self._issues[key] = _IssueState(window_until=now + float(webhook.coalesce_window))
+            else:
+                self._issues.pop(key, None)
+            self.stats["sent"] += 1
+            if carried:
+                return replace(payload, occurrences=payload.occurrences + carried)
+            return payload
+
+    def flush(self, webhooks: List[WebhookConfig],
+              now: Optional[float] = None) -> List[Tuple[WebhookConfig, WebhookPayload]]:
+        """Aggregated notifications whose window has passed, ready to send."""
+        now = time.monotonic() if now is None else now
+        by_id = {w.id: w for w in webhooks}
+        due = []
+        with self._lock:
+            for key, state in list(self._issues.items()):
+                webhook = by_id.get(key[0])
+                if webhook is None:
+                    del self._issues[key]
+                    continue
+                if now < state.window_until:
+                    continue
+                if not state.suppressed:
+                    del self._issues[key]
+                    continue
+                bucket = self._bucket(webhook)
+                if bucket is not None and not bucket.take(now):
+                    continue
+                due.append((webhook, replace(state.latest, occurrences=state.suppressed)))
+                self.stats["summaries"] += 1
+                if webhook.coalesce_window:
+                    self._issues[key] = _IssueState(window_until=now + float(webhook.coalesce_window))
+                else:
+                    del self._issues[key]
+        return due
+
+    def pending(self) -> int:
+        """Number of held-back events not yet notified."""
+        with self._lock:
+            return sum(s.suppressed for s in self._issues.values())
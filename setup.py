@@ -33,6 +33,7 @@ setup(
     packages=find_packages(include=["crashvault", "crashvault.*"]),
     py_modules=[],
     install_requires=["click>=8", "rich", "cryptography"],
+    extras_require={"zstd": ["zstandard"]},
     entry_points={"console_scripts": ["crashvault=crashvault.cli:cli"]},
     classifiers=[
         "Programming Language :: Python :: 3",
@@ -61,13 +61,13 @@ class TestAddCommand:
         assert len(issues) == 2
         assert issues[0]["fingerprint"] != issues[1]["fingerprint"]
 
-    def test_fingerprint_is_sha1_prefix(self, crashvault_home, cli_runner):
-        """Fingerprint should be first 8 chars of SHA1 hash of message."""
+    def test_fingerprint_is_sha1(self, crashvault_home, cli_runner):
+        """Fingerprint should be the full SHA1 hash of message."""
         from crashvault.cli import cli
         from crashvault.core import load_issues
 
         message = "Test error for fingerprint"
-        expected_fp = hashlib.sha1(message.encode("utf-8")).hexdigest()[:8]
+        expected_fp = hashlib.sha1(message.encode("utf-8")).hexdigest()
 
         cli_runner.invoke(cli, ["add", message])
 
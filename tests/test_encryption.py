@@ -0,0 +1,431 @@
+"""
+Tests for encrypted vaults: key derivation caching, the chunked format and the key agent.
+"""
+import json
+import os
+
+import pytest
+
+
+def _encrypt(crashvault_home, password="s3cret"):
+    from crashvault.core import clear_vault_password, encrypt_vault, save_issues
+
+    save_issues([{"id": 1, "fingerprint": "f" * 40, "title": "Secret error", "status": "open"}])
+    encrypt_vault(password)
+    clear_vault_password()
+
+
+class TestKeyDerivation:
+    """Tests for the per-process key cache."""
+
+    def test_key_derived_once_per_password(self, crashvault_home):
+        """Loading and saving repeatedly should derive the key once."""
+        from crashvault import core, encrypter
+
+        _encrypt(crashvault_home)
+        encrypter.derive_key.cache_clear()
+        core.set_vault_password("s3cret")
+        for _ in range(3):
+            core.save_issues(core.load_issues())
+
+        info = encrypter.derive_key.cache_info()
+        assert info.misses == 1
+        assert info.hits >= 5
+
+    def test_key_and_password_are_interchangeable(self, crashvault_home):
+        """Data encrypted with the password decrypts with the derived key."""
+        from crashvault import encrypter
+
+        token = encrypter.encrypt_data(b"payload", "pw")
+        assert encrypter.decrypt_data(token, key=encrypter.derive_key("pw")) == b"payload"
+        with pytest.raises(ValueError):
+            encrypter.decrypt_data(token)
+
+    def test_vault_key_unlocks_store(self, crashvault_home):
+        """A vault unlocked with a derived key reads and writes like one unlocked with the password."""
+        from crashvault import core, encrypter
+
+        _encrypt(crashvault_home)
+        core.set_vault_key(core.derive_vault_key("s3cret"))
+        assert core.get_vault_password() is None
+        assert core.load_issues()[0]["title"] == "Secret error"
+        assert core.verify_vault_key(core.get_vault_key())
+        assert not core.verify_vault_key(core.derive_vault_key("wrong"))
+
+    def test_vaults_get_their_own_salt(self, crashvault_home):
+        """Each encrypted vault derives its key with a random salt kept in its config."""
+        from crashvault import core, encrypter
+
+        _encrypt(crashvault_home)
+        first = core.load_config()["kdf_salt"]
+        key = core.derive_vault_key("s3cret")
+        assert key != encrypter.derive_key("s3cret")
+        assert core.verify_vault_key(key)
+        assert not core.verify_vault_key(encrypter.derive_key("s3cret"))
+
+        core.decrypt_vault("s3cret")
+        assert "kdf_salt" not in core.load_config()
+        core.encrypt_vault("s3cret")
+        core.clear_vault_password()
+        assert core.load_config()["kdf_salt"] != first
+        core.set_vault_password("s3cret")
+        assert core.load_issues()[0]["title"] == "Secret error"
+
+    def test_wrong_password_rejected(self, crashvault_home, cli_runner, monkeypatch):
+        """The CLI should refuse a wrong password."""
+        import getpass
+        from crashvault.cli import cli
+
+        _encrypt(crashvault_home)
+        monkeypatch.setattr(getpass, "getpass", lambda prompt="": "wrong")
+        result = cli_runner.invoke(cli, ["list"])
+        assert result.exit_code == 1
+        assert "Invalid password" in result.output
+
+
+class TestChunkedFormat:
+    """Tests for the streaming chunked encryption format."""
+
+    def _encrypted(self, data, chunk_size=1000):
+        import io
+        from crashvault import encrypter
+
+        buf = io.BytesIO()
+        with encrypter.ChunkedWriter(buf, encrypter.derive_key("pw"), chunk_size=chunk_size) as writer:
+            writer.write(data[:1234])
+            writer.write(data[1234:])
+        return buf
+
+    def _reader(self, buf, password="pw"):
+        import io
+        from crashvault import encrypter
+
+        buf.seek(0)
+        return io.BufferedReader(encrypter.ChunkedReader(buf, encrypter.derive_key(password), closefd=False))
+
+    def test_round_trip(self, crashvault_home):
+        """Data spanning many chunks decrypts back unchanged."""
+        data = os.urandom(25000)
+        assert self._reader(self._encrypted(data)).read() == data
+        assert self._reader(self._encrypted(b"")).read() == b""
+
+    def test_seek_decrypts_from_any_offset(self, crashvault_home):
+        """Seeking lands on the right plaintext byte, including chunk boundaries and the end."""
+        data = os.urandom(5000)
+        buf = self._encrypted(data)
+        for offset in (0, 1, 999, 1000, 1001, 4999, 5000):
+            reader = self._reader(buf)
+            reader.seek(offset)
+            assert reader.read(10) == data[offset:offset + 10]
+
+    def test_append(self, crashvault_home):
+        """Appending continues the file without rewriting earlier chunks."""
+        from crashvault import encrypter
+
+        data = os.urandom(3500)
+        buf = self._encrypted(data)
+        head = buf.getvalue()[:2000]
+        buf.seek(0)
+        with encrypter.ChunkedWriter.append(buf, encrypter.derive_key("pw")) as writer:
+            writer.write(b"appended")
+        assert buf.getvalue()[:2000] == head
+        assert self._reader(buf).read() == data + b"appended"
+
+    def test_tampering_and_truncation_detected(self, crashvault_home):
+        """Modified, truncated or wrongly keyed files fail to decrypt."""
+        import io
+        from crashvault import encrypter
+
+        raw = self._encrypted(os.urandom(3500)).getvalue()
+        flipped = bytearray(raw)
+        flipped[1500] ^= 1
+        # Header, three full chunks, then the last chunk: drop it whole
+        without_last = raw[:24 + 3 * (4 + 12 + 1000 + 16)]
+        for damaged in (bytes(flipped), raw[:-5], without_last):
+            with pytest.raises(encrypter.DecryptionError):
+                self._reader(io.BytesIO(damaged)).read()
+        with pytest.raises(encrypter.DecryptionError):
+            self._reader(io.BytesIO(raw), password="wrong").read()
+
+    def test_issues_file_is_chunked(self, crashvault_home):
+        """Encrypted vaults store the issue list in the chunked format."""
+        from crashvault import core, encrypter
+
+        _encrypt(crashvault_home)
+        assert encrypter.is_chunked_file(core.ISSUES_FILE)
+        assert b"Secret error" not in core.ISSUES_FILE.read_bytes()
+        core.set_vault_password("s3cret")
+        assert core.load_issues()[0]["title"] == "Secret error"
+
+    def test_legacy_fernet_issues_file_readable(self, crashvault_home):
+        """Issue lists encrypted by older versions are read, and rewritten chunked on save."""
+        from crashvault import core, encrypter
+
+        _encrypt(crashvault_home)
+        # Older versions derived the key with a fixed salt and stored none
+        cfg = core.load_config()
+        del cfg["kdf_salt"]
+        core.save_config(cfg)
+        issues = [{"id": 1, "fingerprint": "f" * 40, "title": "Old secret", "status": "open"}]
+        core.ISSUES_FILE.write_bytes(encrypter.encrypt_data(json.dumps(issues).encode(), "s3cret"))
+        assert core.verify_vault_key(encrypter.derive_key("s3cret"))
+        core.set_vault_password("s3cret")
+        assert core.load_issues() == issues
+        core.save_issues(issues)
+        assert encrypter.is_chunked_file(core.ISSUES_FILE)
+
+    @pytest.mark.parametrize("fmt,name", [("json", "out.json"), ("ndjson", "out.ndjson.gz")])
+    def test_encrypted_export_round_trip(self, sample_events, cli_runner, tmp_path, fmt, name):
+        """Encrypted exports are unreadable without the password and import with it."""
+        from crashvault import encrypter
+        from crashvault.cli import cli
+        from crashvault.core import clear_events, iter_events, save_issues
+
+        out = tmp_path / name
+        result = cli_runner.invoke(cli, ["export", "--format", fmt, "--encrypt", "--output", str(out)],
+                                   input="pw\npw\n")
+        assert result.exit_code == 0, result.output
+        assert encrypter.is_chunked_file(out)
+        assert b"event-001" not in out.read_bytes()
+
+        save_issues([])
+        clear_events()
+        result = cli_runner.invoke(cli, ["import", str(out)], input="wrong\n")
+        assert result.exit_code != 0
+        result = cli_runner.invoke(cli, ["import", str(out), "--restart"], input="pw\n")
+        assert result.exit_code == 0, result.output
+        assert len(list(iter_events())) == len(sample_events)
+
+    def test_export_survives_decrypt(self, crashvault_home, cli_runner, tmp_path, monkeypatch):
+        """An export of an encrypted vault imports after the vault is decrypted, with its own password."""
+        import getpass
+        from crashvault import core
+        from crashvault.cli import cli
+
+        _encrypt(crashvault_home)
+        core.set_vault_password("s3cret")
+        core.save_events([_event("event-1", 1), _event("event-2", 1)])
+        core.clear_vault_password()
+        monkeypatch.setattr(getpass, "getpass", lambda prompt="": "s3cret")
+
+        out = tmp_path / "backup.ndjson"
+        result = cli_runner.invoke(cli, ["export", "--format", "ndjson", "--encrypt", "--output", str(out)],
+                                   input="pw\npw\n")
+        assert result.exit_code == 0, result.output
+
+        core.decrypt_vault("s3cret")
+        core.clear_vault_password()
+        core.save_issues([])
+        core.clear_events()
+        result = cli_runner.invoke(cli, ["import", str(out)], input="s3cret\n")
+        assert result.exit_code != 0
+        assert "wrong password" in result.output
+        result = cli_runner.invoke(cli, ["import", str(out), "--restart"], input="pw\n")
+        assert result.exit_code == 0, result.output
+        assert [ev["message"] for ev in core.iter_events()] == ["secret boom", "secret boom"]
+        assert core.load_issues()[0]["title"] == "Secret error"
+
+
+def _event(event_id, issue_id, level="error", tags=None, message="secret boom", timestamp="2024-01-01T00:00:00Z"):
+    return {
+        "event_id": event_id,
+        "issue_id": issue_id,
+        "message": message,
+        "stacktrace": "",
+        "timestamp": timestamp,
+        "level": level,
+        "tags": tags or [],
+        "context": {},
+        "host": "testhost",
+        "pid": 1,
+    }
+
+
+class TestSealedEvents:
+    """Tests for the encrypted event store."""
+
+    @pytest.fixture
+    def unlocked(self, crashvault_home):
+        from crashvault import core
+
+        _encrypt(crashvault_home)
+        core.set_vault_password("s3cret")
+        return core
+
+    @pytest.fixture
+    def unseal_calls(self, monkeypatch):
+        from crashvault.storage.sealed import SealedEvents
+
+        calls = []
+        original = SealedEvents._unseal
+
+        def counting(f, header, dek, entry):
+            calls.append(entry)
+            return original(f, header, dek, entry)
+
+        monkeypatch.setattr(SealedEvents, "_unseal", staticmethod(counting))
+        return calls
+
+    def _store(self, core):
+        core.save_events([
+            _event("e1", 1, tags=["db"]),
+            _event("e2", 1, level="warning"),
+            _event("e3", 2, tags=["db", "web"], timestamp="2024-01-02T00:00:00Z"),
+        ])
+
+    def test_append_after_torn_index_line(self, unlocked):
+        """Entries appended after a crash left a partial index line stay readable."""
+        self._store(unlocked)
+        index = next(unlocked.EVENTS_DIR.glob("2024/01/01/*.sidx"))
+        data = index.read_bytes()
+        index.write_bytes(data[:-10])
+
+        unlocked.save_events([_event("e4", 1), {**_event("e5", 3), "tags": None}])
+
+        assert sorted(ev["event_id"] for ev in unlocked.iter_events()) == ["e1", "e3", "e4", "e5"]
+        assert [ev["event_id"] for ev in unlocked.iter_events(issue_id=3)] == ["e5"]
+
+    def test_no_plaintext_on_disk(self, unlocked):
+        """Events and their index hold neither messages nor tag names."""
+        self._store(unlocked)
+        files = [f for f in unlocked.EVENTS_DIR.glob("**/*") if f.is_file()]
+        assert {f.suffix for f in files} >= {".sealed", ".sidx"}
+        for f in files:
+            data = f.read_bytes()
+            assert b"secret boom" not in data and b"web" not in data and b"warning" not in data
+
+    def test_filtered_reads_decrypt_only_matches(self, unlocked, unseal_calls):
+        """Issue, level and tag filters are answered from the index."""
+        self._store(unlocked)
+        assert sorted(e["event_id"] for e in unlocked.iter_events()) == ["e1", "e2", "e3"]
+        unseal_calls.clear()
+        assert [e["event_id"] for e in unlocked.iter_events(issue_id=1, level="warning")] == ["e2"]
+        assert [e["event_id"] for e in unlocked.iter_events(tags=["web"])] == ["e3"]
+        assert len(unseal_calls) == 2
+
+    def test_lookup_by_id(self, unlocked):
+        """Single and batched lookups find sealed events."""
+        self._store(unlocked)
+        assert unlocked.get_event("e2")["level"] == "warning"
+        assert unlocked.get_event("missing") is None
+        from crashvault.core import _storage
+
+        found = _storage().get_events([("e1", "2024-01-01T00:00:00Z"), ("e3", None)])
+        assert set(found) == {"e1", "e3"}
+
+    def test_delete_issue_events_without_decrypting(self, unlocked, unseal_calls):
+        """Deleting an issue's events copies the rest without decrypting them."""
+        self._store(unlocked)
+        assert unlocked.delete_issue_events(1) == 2
+        assert unseal_calls == []
+        assert [e["event_id"] for e in unlocked.iter_events()] == ["e3"]
+        assert unlocked.delete_orphaned_events([1]) == 1
+        assert list(unlocked.iter_events()) == []
+
+    def test_locked_vault_refuses_writes(self, unlocked):
+        """Events are never written in the clear to an encrypted vault."""
+        unlocked.clear_vault_password()
+        with pytest.raises(ValueError):
+            unlocked.save_events([_event("e9", 1)])
+
+    @pytest.mark.parametrize("engine", ["json", "segments"])
+    def test_encrypt_and_decrypt_vault_move_events(self, sample_events, engine):
+        """Encrypting a vault seals its events; decrypting it restores them."""
+        from crashvault import core
+        from crashvault.storage import get_storage
+
+        cfg = core.load_config()
+        cfg["storage"] = {"engine": engine}
+        core.save_config(cfg)
+        if engine == "segments":
+            get_storage().absorb_event_files()
+        before = sorted(e["event_id"] for e in core.iter_events())
+
+        core.encrypt_vault("s3cret")
+        assert not list(core.EVENTS_DIR.glob("**/*.json")) and not list(core.EVENTS_DIR.glob("**/*.ndjson"))
+        assert sorted(e["event_id"] for e in core.iter_events()) == before
+
+        core.decrypt_vault("s3cret")
+        assert not list(core.EVENTS_DIR.glob("**/*.sealed"))
+        assert sorted(e["event_id"] for e in core.iter_events()) == before
+
+
+@pytest.mark.unix
+class TestKeyAgent:
+    """Tests for the key agent."""
+
+    @pytest.fixture
+    def running_agent(self, crashvault_home):
+        from crashvault import agent, core
+
+        _encrypt(crashvault_home)
+        agent.start(core.derive_vault_key("s3cret"), ttl=60)
+        yield agent
+        agent.stop()
+
+    def test_agent_serves_key(self, running_agent):
+        """The agent hands out the key it was started with."""
+        from crashvault import core
+
+        assert running_agent.fetch_key() == core.derive_vault_key("s3cret")
+        info = running_agent.status()
+        assert 0 < info["expires_in"] <= 60
+
+    def test_cli_uses_agent_without_prompt(self, running_agent, cli_runner, monkeypatch):
+        """Commands against an unlocked vault neither prompt nor derive the key."""
+        import getpass
+        from crashvault import encrypter
+        from crashvault.cli import cli
+
+        def no_prompt(prompt=""):
+            raise AssertionError("prompted for the password")
+
+        monkeypatch.setattr(getpass, "getpass", no_prompt)
+        encrypter.derive_key.cache_clear()
+        result = cli_runner.invoke(cli, ["list"])
+        assert result.exit_code == 0, result.output
+        assert "Secret error" in result.output
+        assert encrypter.derive_key.cache_info().misses == 0
+
+    def test_stop_forgets_key(self, running_agent):
+        """After stop the key is gone and the socket removed."""
+        assert running_agent.stop()
+        assert running_agent.fetch_key() is None
+        assert not running_agent.socket_path().exists()
+        assert not running_agent.stop()
+
+    def test_agent_expires(self, crashvault_home):
+        """The agent exits once its time-to-live has passed."""
+        import time
+        from crashvault import agent
+
+        agent.start(b"k" * 44, ttl=1)
+        assert agent.fetch_key() == b"k" * 44
+        deadline = time.monotonic() + 10
+        while agent.socket_path().exists() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert agent.fetch_key() is None
+
+    def test_socket_directory_is_private(self, running_agent):
+        """The socket directory is only accessible to its owner."""
+        import stat
+
+        mode = stat.S_IMODE(running_agent.socket_path().parent.stat().st_mode)
+        assert mode == 0o700
+
+    def test_agent_commands(self, crashvault_home, cli_runner, monkeypatch):
+        """agent start/status/stop through the CLI."""
+        import getpass
+        from crashvault.cli import cli
+
+        _encrypt(crashvault_home)
+        monkeypatch.setattr(getpass, "getpass", lambda prompt="": "s3cret")
+        try:
+            result = cli_runner.invoke(cli, ["agent", "start", "--ttl", "30"])
+            assert result.exit_code == 0, result.output
+            assert "Key agent started" in result.output
+            result = cli_runner.invoke(cli, ["agent", "status"])
+            assert "expires in" in result.output
+        finally:
+            result = cli_runner.invoke(cli, ["agent", "stop"])
+        assert "Key agent stopped" in result.output
@@ -443,3 +443,219 @@ class TestExportImportRoundtrip:
         issues = load_issues()
         imported_fps = {i["fingerprint"] for i in issues}
         assert imported_fps == original_fps
+
+
+class TestStreamingImport:
+    """Tests for the incremental parser and resumable imports."""
+
+    def _export(self, path, n_events, issues=None):
+        events = [{"issue_id": 1, "message": f"Ünïcode event {n}", "level": "error"} for n in range(n_events)]
+        path.write_text(json.dumps({
+            "version": 1,
+            "exported_at": "2024-01-01T00:00:00Z",
+            "issues": issues if issues is not None else [{"id": 1, "fingerprint": "fp1", "title": "Issue 1"}],
+            "events": events,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        return events
+
+    def test_stream_reads_across_chunk_boundaries(self, tmp_path):
+        """Elements split over tiny chunks, including multibyte characters, parse intact."""
+        from crashvault.importer import JSONStream
+
+        path = tmp_path / "export.json"
+        events = self._export(path, 5)
+        with open(path, "rb") as f:
+            stream = JSONStream(f, chunk_size=7)
+            seen = {}
+            for key in stream.keys():
+                if key == "events":
+                    seen[key] = [ev for _, ev in stream.items()]
+                else:
+                    seen[key] = stream.value()
+        assert seen["events"] == events
+        assert seen["version"] == 1
+
+    def test_stream_continues_from_element_offset(self, tmp_path):
+        """Reading can resume from the byte offset recorded after an element."""
+        from crashvault.importer import JSONStream
+
+        path = tmp_path / "export.json"
+        events = self._export(path, 4)
+        with open(path, "rb") as f:
+            stream = JSONStream(f, chunk_size=16)
+            for key in stream.keys():
+                if key == "events":
+                    items = stream.items()
+                    next(items)
+                    next(items)
+                    offset = stream.offset
+                    break
+                stream.skip()
+        with open(path, "rb") as f:
+            rest = [ev for _, ev in JSONStream(f, offset).items(opened=True)]
+        assert rest == events[2:]
+
+    def test_interrupted_import_resumes(self, crashvault_home, cli_runner, tmp_path):
+        """An interrupted import continues from its checkpoint without duplicates."""
+        import pytest
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues
+        from crashvault.importer import import_file
+
+        path = tmp_path / "export.json"
+        self._export(path, 7)
+
+        class Interrupted(Exception):
+            pass
+
+        def stop(offset):
+            raise Interrupted()
+
+        with pytest.raises(Interrupted):
+            import_file(path, batch_size=3, progress=stop)
+        assert len(load_events()) == 3
+
+        result = cli_runner.invoke(cli, ["import", str(path)])
+        assert result.exit_code != 0
+        assert "--resume" in result.output
+
+        result = cli_runner.invoke(cli, ["import", str(path), "--resume", "--batch-size", "3"])
+        assert result.exit_code == 0, result.output
+        assert "Imported 1 issue(s), 7 event(s)" in result.output
+        events = load_events()
+        assert sorted(ev["message"] for ev in events) == sorted(f"Ünïcode event {n}" for n in range(7))
+        assert len(load_issues()) == 1
+        assert {ev["issue_id"] for ev in events} == {1}
+
+    def test_events_map_to_imported_issue_ids(self, crashvault_home, cli_runner, sample_issues, tmp_path):
+        """Events follow their issue to its new local id."""
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues
+
+        path = tmp_path / "export.json"
+        self._export(path, 2, issues=[{"id": 1, "fingerprint": "newfp", "title": "Incoming"}])
+
+        result = cli_runner.invoke(cli, ["import", str(path)])
+
+        assert result.exit_code == 0, result.output
+        incoming = next(i for i in load_issues() if i["fingerprint"] == "newfp")
+        assert incoming["id"] != 1
+        assert all(ev["issue_id"] == incoming["id"] for ev in load_events())
+
+
+class TestStreamingExport:
+    """Tests for NDJSON and compressed exports."""
+
+    def test_ndjson_export_records(self, crashvault_home, cli_runner, sample_issues, sample_events):
+        """NDJSON export writes a header, then one record per issue and event."""
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["export", "--format", "ndjson"])
+
+        assert result.exit_code == 0
+        records = [json.loads(line) for line in result.output.splitlines()]
+        assert records[0]["type"] == "header"
+        assert [r["type"] for r in records[1:]] == ["issue"] * 3 + ["event"] * 3
+        assert {r["data"]["id"] for r in records if r["type"] == "issue"} == {i["id"] for i in sample_issues}
+
+    def test_gzip_ndjson_roundtrip(self, crashvault_home, cli_runner, sample_issues, sample_events, tmp_path):
+        """A .gz output is compressed, and import reads it back."""
+        import gzip
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues
+
+        export_file = tmp_path / "backup.ndjson.gz"
+        result = cli_runner.invoke(cli, ["export", "--format", "ndjson", "--output", str(export_file)])
+        assert result.exit_code == 0
+        assert json.loads(gzip.decompress(export_file.read_bytes()).splitlines()[0])["type"] == "header"
+
+        cli_runner.invoke(cli, ["kill"], input="y\n")
+        result = cli_runner.invoke(cli, ["import", str(export_file)])
+
+        assert result.exit_code == 0, result.output
+        assert len(load_issues()) == 3
+        assert len(load_events()) == 3
+
+    def test_gzip_json_to_stdout(self, crashvault_home, cli_runner, sample_issues):
+        """--compress applies to stdout too."""
+        import gzip
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["export", "--compress", "gzip"])
+
+        assert result.exit_code == 0
+        assert len(json.loads(gzip.decompress(result.stdout_bytes))["issues"]) == 3
+
+    def test_export_single_issue(self, crashvault_home, cli_runner, sample_issues, sample_events):
+        """--issue limits the export to one issue and its events."""
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["export", "--issue", "1"])
+
+        assert result.exit_code == 0
+        data = json.loads(result.output)
+        assert [i["id"] for i in data["issues"]] == [1]
+        assert data["events"] and all(ev["issue_id"] == 1 for ev in data["events"])
+
+        result = cli_runner.invoke(cli, ["export", "--issue", "99"])
+        assert result.exit_code != 0
+
+    def test_csv_cannot_be_compressed(self, crashvault_home, cli_runner, sample_issues, tmp_path):
+        """Compression is only offered for JSON and NDJSON."""
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["export", "--format", "csv", "--output", str(tmp_path / "x.csv.gz")])
+
+        assert result.exit_code != 0
+
+    def test_zstd_roundtrip(self, crashvault_home, cli_runner, sample_issues, sample_events, tmp_path):
+        """zstd works when the zstandard package is installed."""
+        import pytest
+        pytest.importorskip("zstandard")
+        from crashvault.cli import cli
+        from crashvault.core import load_events
+
+        export_file = tmp_path / "backup.json.zst"
+        assert cli_runner.invoke(cli, ["export", "--output", str(export_file)]).exit_code == 0
+        cli_runner.invoke(cli, ["kill"], input="y\n")
+        assert cli_runner.invoke(cli, ["import", str(export_file)]).exit_code == 0
+        assert len(load_events()) == 3
+
+    def test_zstd_ndjson_roundtrip(self, crashvault_home, cli_runner, sample_issues, sample_events, tmp_path):
+        """NDJSON exports compressed with zstd import too."""
+        import pytest
+        pytest.importorskip("zstandard")
+        from crashvault.cli import cli
+        from crashvault.core import load_events
+
+        export_file = tmp_path / "backup.ndjson.zst"
+        assert cli_runner.invoke(cli, ["export", "--format", "ndjson", "--output", str(export_file)]).exit_code == 0
+        cli_runner.invoke(cli, ["kill"], input="y\n")
+        result = cli_runner.invoke(cli, ["import", str(export_file)])
+        assert result.exit_code == 0, result.output
+        assert len(load_events()) == 3
+
+    def test_zstd_import_resumes(self, crashvault_home, tmp_path):
+        """A checkpoint inside a zstd stream is reached by reading forward."""
+        import pytest
+        zstandard = pytest.importorskip("zstandard")
+        from crashvault.core import load_events
+        from crashvault.importer import import_file
+
+        events = [{"issue_id": 1, "message": f"event {n}", "level": "error"} for n in range(7)]
+        data = json.dumps({"version": 1, "issues": [{"id": 1, "fingerprint": "fp1", "title": "Issue 1"}],
+                           "events": events}).encode()
+        path = tmp_path / "export.json.zst"
+        path.write_bytes(zstandard.ZstdCompressor().compress(data))
+
+        class Interrupted(Exception):
+            pass
+
+        def stop(offset):
+            raise Interrupted()
+
+        with pytest.raises(Interrupted):
+            import_file(path, batch_size=3, progress=stop)
+        import_file(path, batch_size=3, resume=True)
+
+        assert sorted(ev["message"] for ev in load_events()) == [f"event {n}" for n in range(7)]
@@ -0,0 +1,349 @@
+"""
+Tests for fingerprinting strategies, the regroup command and similarity clustering.
+"""
+import hashlib
+
+import pytest
+
+
+PY_TRACE = """Traceback (most recent call last):
+  File "/srv/app/main.py", line {a}, in run
+    handle(request)
+  File "/srv/app/views.py", line {b}, in handle
+    user = load_user(uid)
+  File "/usr/lib/python3.11/site-packages/orm/query.py", line 88, in get
+    raise KeyError(uid)
+KeyError: {uid}"""
+
+
+class TestFingerprint:
+    """Tests for message normalisation, frame parsing and strategies."""
+
+    def test_normalize_message_replaces_variable_tokens(self):
+        """Numbers, UUIDs, addresses and timestamps should become placeholders."""
+        from crashvault.fingerprint import normalize_message
+
+        assert normalize_message("User 42 not found") == "User <num> not found"
+        assert normalize_message(
+            "req 123e4567-e89b-12d3-a456-426614174000 from 10.0.0.7:8080 at 2024-01-02T03:04:05Z"
+        ) == "req <uuid> from <ip> at <ts>"
+        assert normalize_message("mail to bob@example.com failed") == "mail to <email> failed"
+        assert normalize_message("bad pointer 0xdeadBEEF") == "bad pointer <hex>"
+        # Digits inside identifiers are kept
+        assert normalize_message("id42 missing") == "id42 missing"
+
+    def test_parse_python_frames_innermost_first(self):
+        """Python tracebacks should be parsed with the most recent call first."""
+        from crashvault.fingerprint import parse_frames
+
+        frames = parse_frames(PY_TRACE.format(a=10, b=20, uid=1))
+        assert [func for _, func in frames] == ["get", "handle", "run"]
+
+    def test_parse_java_and_js_frames(self):
+        """JVM and JavaScript ``at`` lines should be parsed."""
+        from crashvault.fingerprint import parse_frames
+
+        java = ("java.lang.NullPointerException\n"
+                "\tat com.acme.Service.load(Service.java:42)\n"
+                "\tat java.base/java.lang.Thread.run(Thread.java:833)")
+        assert parse_frames(java) == [("Service.java", "com.acme.Service.load"),
+                                      ("Thread.java", "java.base/java.lang.Thread.run")]
+        js = ("TypeError: x is undefined\n"
+              "    at render (/app/src/view.js:10:5)\n"
+              "    at /app/node_modules/lib/index.js:1:1")
+        assert parse_frames(js) == [("/app/src/view.js", "render"),
+                                    ("/app/node_modules/lib/index.js", "<anonymous>")]
+
+    def test_message_strategy_is_sha1(self):
+        """The default strategy should hash the raw message."""
+        from crashvault.fingerprint import fingerprint_event
+
+        message = "Something broke"
+        assert fingerprint_event(message, cfg={}) == hashlib.sha1(message.encode("utf-8")).hexdigest()
+
+    def test_stack_strategy_ignores_line_numbers_and_values(self):
+        """Events from the same code path should share a fingerprint."""
+        from crashvault.fingerprint import get_strategy
+
+        strategy = get_strategy("stack", cfg={})
+        a = strategy.fingerprint("KeyError: 1", PY_TRACE.format(a=10, b=20, uid=1))
+        b = strategy.fingerprint("KeyError: 2", PY_TRACE.format(a=11, b=25, uid=2))
+        other = strategy.fingerprint("KeyError: 1", PY_TRACE.format(a=10, b=20, uid=1).replace("handle", "update"))
+        assert a == b
+        assert a != other
+
+    def test_stack_strategy_without_stacktrace_normalizes(self):
+        """Events without a stacktrace should fall back to the normalised message."""
+        from crashvault.fingerprint import get_strategy
+
+        strategy = get_strategy("stack", cfg={})
+        assert strategy.fingerprint("User 42 not found") == strategy.fingerprint("User 7 not found")
+
+    def test_strategy_from_config(self, crashvault_home):
+        """The configured strategy should be used for new events."""
+        from crashvault.core import save_config
+        from crashvault.fingerprint import fingerprint_event, get_strategy
+
+        save_config({"grouping": {"strategy": "normalized"}})
+        assert fingerprint_event("User 42 not found") == fingerprint_event("User 7 not found")
+        with pytest.raises(ValueError):
+            get_strategy("nope")
+
+    def test_add_groups_with_configured_strategy(self, crashvault_home, cli_runner):
+        """add should group by the configured strategy."""
+        from crashvault.cli import cli
+        from crashvault.core import load_issues, save_config
+
+        save_config({"grouping": {"strategy": "normalized"}})
+        cli_runner.invoke(cli, ["add", "User 42 not found"])
+        cli_runner.invoke(cli, ["add", "User 7 not found"])
+
+        assert len(load_issues()) == 1
+
+
+class TestRegroupCommand:
+    """Tests for the regroup command."""
+
+    def test_regroup_merges_issues(self, crashvault_home, cli_runner):
+        """Issues whose events share a new fingerprint should be merged."""
+        from crashvault.cli import cli
+        from crashvault.core import load_config, load_events, load_issues
+
+        for message in ["User 1 not found", "User 2 not found", "User 2 not found", "Disk full"]:
+            cli_runner.invoke(cli, ["add", message])
+        assert len(load_issues()) == 3
+
+        result = cli_runner.invoke(cli, ["regroup", "--strategy", "normalized", "--yes"])
+
+        assert result.exit_code == 0, result.output
+        issues = load_issues()
+        assert len(issues) == 2
+        kept = next(i for i in issues if i["title"] == "User 2 not found")
+        events = load_events()
+        assert len(events) == 4
+        assert sum(1 for ev in events if ev["issue_id"] == kept["id"]) == 3
+        assert load_config()["grouping"]["strategy"] == "normalized"
+
+    def test_regroup_splits_issue(self, crashvault_home, cli_runner):
+        """Events no longer matching their issue should move to a new issue."""
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues, save_config
+
+        save_config({"grouping": {"strategy": "normalized"}})
+        for message in ["User 1 not found", "User 2 not found", "User 3 not found"]:
+            cli_runner.invoke(cli, ["add", message])
+        assert len(load_issues()) == 1
+
+        result = cli_runner.invoke(cli, ["regroup", "--strategy", "message", "--yes"])
+
+        assert result.exit_code == 0, result.output
+        issues = load_issues()
+        assert len(issues) == 3
+        events = load_events()
+        assert len(events) == 3
+        assert len({ev["issue_id"] for ev in events}) == 3
+
+    def test_regroup_dry_run_changes_nothing(self, crashvault_home, cli_runner):
+        """--dry-run should only report."""
+        from crashvault.cli import cli
+        from crashvault.core import load_issues
+
+        for message in ["User 1 not found", "User 2 not found"]:
+            cli_runner.invoke(cli, ["add", message])
+
+        result = cli_runner.invoke(cli, ["regroup", "--strategy", "normalized", "--dry-run", "--yes"])
+
+        assert result.exit_code == 0
+        assert "1 issue(s) merged away" in result.output
+        assert len(load_issues()) == 2
+
+
+class TestLegacyFingerprints:
+    """Tests for issues keyed by 8-character fingerprints."""
+
+    def test_legacy_issue_adopted_on_next_event(self, crashvault_home, cli_runner):
+        """A new event re-keys the legacy issue it belongs to."""
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues, save_issues
+
+        full = hashlib.sha1(b"Disk full").hexdigest()
+        save_issues([{"id": 1, "fingerprint": full[:8], "title": "Disk full", "status": "open"}])
+
+        cli_runner.invoke(cli, ["add", "Disk full"])
+
+        issues = load_issues()
+        assert len(issues) == 1
+        assert issues[0]["fingerprint"] == full
+        assert load_events()[0]["issue_id"] == 1
+
+    def test_legacy_prefix_collision_detected(self, crashvault_home, cli_runner, caplog):
+        """An event whose prefix matches an unrelated legacy issue gets its own issue."""
+        from crashvault.cli import cli
+        from crashvault.core import load_issues, save_issues
+
+        full = hashlib.sha1(b"Disk full").hexdigest()
+        save_issues([{"id": 1, "fingerprint": full[:8], "title": "Connection reset", "status": "open"}])
+
+        with caplog.at_level("WARNING", logger="crashvault"):
+            cli_runner.invoke(cli, ["add", "Disk full"])
+
+        issues = load_issues()
+        assert len(issues) == 2
+        assert issues[0]["fingerprint"] == full[:8]
+        assert "fingerprint collision" in caplog.text
+
+    def test_regroup_rekeys_and_splits_collisions(self, crashvault_home, cli_runner):
+        """regroup widens legacy fingerprints and splits issues that collided."""
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues, save_events, save_issues
+
+        save_issues([{"id": 1, "fingerprint": "deadbeef", "title": "Disk full", "status": "open"}])
+        save_events([
+            {"event_id": f"e{n}", "issue_id": 1, "message": message, "stacktrace": "",
+             "timestamp": "2024-01-01T00:00:00Z", "level": "error", "tags": [], "context": {}}
+            for n, message in enumerate(["Disk full", "Disk full", "Connection reset"])
+        ])
+
+        result = cli_runner.invoke(cli, ["regroup", "--yes"])
+
+        assert result.exit_code == 0, result.output
+        assert "1 issue(s) re-keyed" in result.output
+        issues = load_issues()
+        assert sorted(i["fingerprint"] for i in issues) == sorted(
+            hashlib.sha1(m).hexdigest() for m in (b"Disk full", b"Connection reset"))
+        by_fp = {i["fingerprint"]: i["id"] for i in issues}
+        assert all(ev["issue_id"] == by_fp[hashlib.sha1(ev["message"].encode()).hexdigest()] for ev in load_events())
+
+    def test_regroup_moves_events_both_ways(self, crashvault_home, cli_runner):
+        """Events swapping between two issues should all survive the regroup."""
+        from crashvault.cli import cli
+        from crashvault.core import load_events, save_events, save_issues
+
+        disk, reset = (hashlib.sha1(m).hexdigest() for m in (b"Disk full", b"Connection reset"))
+        save_issues([
+            {"id": 1, "fingerprint": disk, "title": "Disk full", "status": "open"},
+            {"id": 2, "fingerprint": reset, "title": "Connection reset", "status": "open"},
+        ])
+        placed = [(1, "Disk full"), (1, "Disk full"), (1, "Connection reset"),
+                  (2, "Connection reset"), (2, "Connection reset"), (2, "Connection reset"), (2, "Disk full")]
+        save_events([
+            {"event_id": f"e{n}", "issue_id": issue_id, "message": message, "stacktrace": "",
+             "timestamp": "2024-01-01T00:00:00Z", "level": "error", "tags": [], "context": {}}
+            for n, (issue_id, message) in enumerate(placed)
+        ])
+
+        result = cli_runner.invoke(cli, ["regroup", "--yes"])
+
+        assert result.exit_code == 0, result.output
+        events = load_events()
+        assert sorted(ev["event_id"] for ev in events) == [f"e{n}" for n in range(7)]
+        assert sorted((ev["issue_id"], ev["message"]) for ev in events) == sorted(
+            [(1, "Disk full")] * 3 + [(2, "Connection reset")] * 4)
+
+
+def _trace(*funcs):
+    lines = ["Traceback (most recent call last):"]
+    lines += [f'  File "/srv/app/mod{n}.py", line {n}, in {func}' for n, func in enumerate(funcs)]
+    return "\n".join(lines + ["ValueError: bad"])
+
+
+FRAMES = ["main", "dispatch", "handle", "load", "query", "execute", "connect", "retry", "read", "parse"]
+
+
+class TestCluster:
+    """Tests for MinHash/LSH clustering and the cluster command."""
+
+    def test_similarity_estimates_jaccard(self):
+        """Signature agreement should approximate the shingle overlap."""
+        from crashvault.cluster import minhash, shingles, similarity
+
+        a = shingles("ValueError: bad", _trace(*FRAMES))
+        b = shingles("ValueError: bad", _trace(*FRAMES[:-1], "decode"))
+        jaccard = len(a & b) / len(a | b)
+        assert abs(similarity(minhash(a), minhash(b)) - jaccard) < 0.15
+        assert similarity(minhash(a), minhash(a)) == 1.0
+
+    def test_find_clusters_groups_near_duplicates(self):
+        """Near-identical stacktraces cluster; unrelated ones stay apart."""
+        from crashvault.cluster import find_clusters, minhash, shingles
+
+        signatures = {
+            1: minhash(shingles("ValueError: bad", _trace(*FRAMES))),
+            2: minhash(shingles("ValueError: bad", _trace(*FRAMES, "extra"))),
+            3: minhash(shingles("Disk full on /var")),
+        }
+        assert find_clusters(signatures, 0.7) == [[1, 2]]
+
+    def test_cluster_proposes_and_applies(self, crashvault_home, cli_runner):
+        """cluster lists merges, and --apply merges into the largest issue."""
+        from crashvault.cli import cli
+        from crashvault.core import load_events, load_issues
+
+        cli_runner.invoke(cli, ["add", "ValueError: bad", "--stack", _trace(*FRAMES)])
+        for _ in range(2):
+            cli_runner.invoke(cli, ["add", "ValueError: worse", "--stack", _trace(*FRAMES, "extra")])
+        cli_runner.invoke(cli, ["add", "Disk full"])
+
+        result = cli_runner.invoke(cli, ["cluster", "--threshold", "0.7"])
+        assert result.exit_code == 0, result.output
+        assert "1 cluster(s), 1 issue(s) to merge" in result.output
+        assert len(load_issues()) == 3
+
+        result = cli_runner.invoke(cli, ["cluster", "--threshold", "0.7", "--apply", "--yes"])
+        assert result.exit_code == 0, result.output
+        assert "0 of 3 signature(s) computed" in result.output
+        issues = load_issues()
+        assert [i["title"] for i in issues] == ["ValueError: worse", "Disk full"]
+        kept = issues[0]
+        assert sum(1 for ev in load_events() if ev["issue_id"] == kept["id"]) == 3
+
+        # New events of the merged issue land in the kept one
+        cli_runner.invoke(cli, ["add", "ValueError: bad", "--stack", _trace(*FRAMES)])
+        assert len(load_issues()) == 2
+        assert sum(1 for ev in load_events() if ev["issue_id"] == kept["id"]) == 4
+
+    def test_reruns_only_read_changed_issues(self, crashvault_home, monkeypatch):
+        """Unchanged issues read no events; grown ones read only their newer events."""
+        from crashvault import cluster, core
+
+        core.save_issues([{"id": n, "fingerprint": f"fp{n}", "title": f"Issue {n}", "status": "open"}
+                          for n in (1, 2, 3)])
+
+        def ev(event_id, issue_id, timestamp, stack):
+            return {"event_id": event_id, "issue_id": issue_id, "message": "ValueError: bad",
+                    "stacktrace": stack, "timestamp": timestamp, "level": "error", "tags": [], "context": {}}
+
+        core.save_events([
+            ev("a1", 1, "2024-01-01T00:00:00Z", _trace(*FRAMES)),
+            ev("b1", 2, "2024-01-02T00:00:00Z", ""),
+            ev("c1", 3, "2024-01-03T00:00:00Z", _trace("main", "other")),
+        ])
+        cache = cluster.open_signature_cache()
+        first, computed = cluster.issue_signatures(core.load_issues(), cache)
+        assert computed == 3
+
+        reads = []
+        iter_events = core.iter_events
+
+        def recording(**filters):
+            reads.append(filters)
+            return iter_events(**filters)
+
+        monkeypatch.setattr(core, "iter_events", recording)
+        assert cluster.issue_signatures(core.load_issues(), cache) == (first, 0)
+        assert reads == []
+
+        # Issue 2 gets its first stacktrace in a newer event; issue 1 a newer event that changes nothing
+        core.save_events([ev("b2", 2, "2024-02-01T00:00:00Z", _trace(*FRAMES)),
+                          ev("a2", 1, "2024-02-02T00:00:00Z", _trace("x"))])
+        second, computed = cluster.issue_signatures(core.load_issues(), cache)
+        assert computed == 1
+        assert [r["since"].isoformat() for r in reads] == ["2024-01-01T00:00:00+00:00"]
+        assert second[2] == first[1] and second[1] == first[1] and second[3] == first[3]
+
+        # An older event (e.g. imported) is caught and the issue read in full
+        reads.clear()
+        core.save_events([ev("c0", 3, "2023-12-01T00:00:00Z", _trace(*FRAMES))])
+        third, computed = cluster.issue_signatures(core.load_issues(), cache)
+        assert third[3] == first[1]
+        assert [r.get("since") for r in reads][-1] is None
@@ -0,0 +1,295 @@
+"""
+Tests for the in-process Python SDK.
+"""
+import threading
+import time
+
+import pytest
+
+
+class RecordingTransport:
+    """Transport that keeps the batches it is given."""
+
+    def __init__(self, failures=()):
+        self.batches = []
+        self.failures = list(failures)
+        self.gate = threading.Event()
+        self.gate.set()
+        self.closed = False
+
+    def send(self, events):
+        self.gate.wait(5)
+        if self.failures:
+            raise self.failures.pop(0)
+        self.batches.append(list(events))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    from crashvault import sdk
+
+    monkeypatch.setattr(sdk, "RETRY_BASE_DELAY", 0.001)
+
+
+@pytest.fixture
+def live_server(crashvault_home):
+    from crashvault.server import make_server
+
+    server = make_server("127.0.0.1", 0, mode="threaded", cfg={"server": {"commit_interval_ms": 1}})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    thread.join(5)
+    server.server_close()
+    server.writer.stop()
+    if server.webhook_workers is not None:
+        server.webhook_workers.stop()
+
+
+class TestClient:
+    """Tests for queueing and batching."""
+
+    def test_flush_sends_in_batches(self):
+        """Queued events should go out in batches of at most batch_size."""
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        client = Client(transport, batch_size=10, flush_interval=60)
+        ids = [client.capture_message(f"event {i}") for i in range(25)]
+
+        assert client.flush(5)
+        sent = [e["event_id"] for batch in transport.batches for e in batch]
+        assert sent == ids
+        assert all(len(batch) <= 10 for batch in transport.batches)
+        assert client.snapshot() == {
+            "captured": 25, "sent": 25, "batches": len(transport.batches), "send_errors": 0,
+            "dropped_queue_full": 0, "dropped_send_failed": 0, "dropped_invalid": 0, "queued": 0,
+        }
+        client.close()
+
+    def test_event_fields(self):
+        """Events should carry level, tags, merged context, timestamp, host and pid."""
+        import os
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        client = Client(transport, flush_interval=60, tags=["svc"], context={"region": "eu"})
+        client.capture_message("slow query", level="WARNING", tags=["db"], context={"ms": 900})
+        client.capture_message("odd level", level="bogus")
+        client.flush(5)
+
+        first, second = transport.batches[0]
+        assert first["level"] == "warning"
+        assert first["tags"] == ["svc", "db"]
+        assert first["context"] == {"region": "eu", "ms": 900}
+        assert first["timestamp"].endswith("Z")
+        assert first["pid"] == os.getpid()
+        assert second["level"] == "error"
+        client.close()
+
+    def test_capture_exception(self):
+        """capture_exception should report the handled exception with its traceback."""
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        client = Client(transport)
+        assert client.capture_exception() is None
+
+        try:
+            {}["missing"]
+        except KeyError:
+            event_id = client.capture_exception(context={"obj": object()})
+        client.flush(5)
+
+        event = transport.batches[0][0]
+        assert event["event_id"] == event_id
+        assert event["message"] == "KeyError: 'missing'"
+        assert event["level"] == "error"
+        assert "Traceback" in event["stacktrace"] and "test_capture_exception" in event["stacktrace"]
+        assert event["context"]["obj"].startswith("<object")
+        client.close()
+
+    def test_unserializable_event_is_dropped(self):
+        """An event that cannot be serialized should be dropped without stopping the sender."""
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        client = Client(transport, flush_interval=60)
+        circular = {}
+        circular["self"] = circular
+        client.capture_message("bad context", context={"loop": circular})
+        ok = client.capture_message("fine")
+        assert client.flush(5)
+
+        client.capture_message("also bad", context=circular)
+        assert client.flush(5)
+        later = client.capture_message("after")
+        assert client.flush(5)
+
+        assert [e["event_id"] for batch in transport.batches for e in batch] == [ok, later]
+        stats = client.snapshot()
+        assert stats["dropped_invalid"] == 2
+        assert stats["sent"] == 2
+        assert stats["queued"] == 0
+        client.close()
+
+    def test_full_queue_drops(self):
+        """Captures beyond max_queue should be dropped and counted, not block."""
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        transport.gate.clear()
+        client = Client(transport, max_queue=5, batch_size=5, flush_interval=0)
+        client.capture_message("first")
+        # Wait until the sender holds "first" and is stuck in the transport
+        deadline = time.monotonic() + 5
+        while client._queue and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        results = [client.capture_message(f"event {i}") for i in range(8)]
+        transport.gate.set()
+
+        assert results.count(None) == 3
+        assert client.flush(5)
+        stats = client.snapshot()
+        assert stats["dropped_queue_full"] == 3
+        assert stats["sent"] == 6
+        client.close()
+
+    def test_block_waits_for_room(self):
+        """With block set, a capture on a full queue should wait for the sender."""
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        client = Client(transport, max_queue=2, batch_size=2, flush_interval=0, block=5)
+        results = [client.capture_message(f"event {i}") for i in range(20)]
+
+        assert None not in results
+        assert client.flush(5)
+        assert client.snapshot()["sent"] == 20
+        client.close()
+
+    def test_transient_errors_are_retried(self, no_backoff):
+        """A batch should survive transient failures up to max_retries."""
+        from crashvault.sdk import Client, TransportError
+
+        transport = RecordingTransport(failures=[TransportError("down"), OSError("reset")])
+        client = Client(transport, max_retries=2)
+        client.capture_message("persistent")
+
+        assert client.flush(5)
+        assert len(transport.batches) == 1
+        assert client.snapshot()["send_errors"] == 2
+        client.close()
+
+    def test_failed_batches_are_dropped(self, no_backoff):
+        """Batches should be dropped after max_retries or on a permanent error."""
+        from crashvault.sdk import Client, TransportError
+
+        transport = RecordingTransport(failures=[TransportError("down")] * 2 + [TransportError("bad", transient=False)])
+        client = Client(transport, max_retries=1, flush_interval=60)
+        client.capture_message("lost to retries")
+        assert client.flush(5)
+        client.capture_message("rejected")
+        assert client.flush(5)
+
+        stats = client.snapshot()
+        assert transport.batches == []
+        assert stats["dropped_send_failed"] == 2
+        assert stats["send_errors"] == 3
+        client.close()
+
+    def test_close_flushes_and_refuses_events(self):
+        """close should send what is queued, close the transport and drop later captures."""
+        from crashvault.sdk import Client
+
+        transport = RecordingTransport()
+        client = Client(transport, flush_interval=60)
+        client.capture_message("before close")
+
+        assert client.close(5)
+        assert len(transport.batches) == 1
+        assert transport.closed
+        assert client.capture_message("after close") is None
+
+
+class TestModuleFunctions:
+    """Tests for init and the module-level capture functions."""
+
+    def test_noop_before_init(self, crashvault_home):
+        """Capturing before init should do nothing."""
+        from crashvault import sdk
+
+        assert sdk.get_client() is None
+        assert sdk.capture_message("nobody listens") is None
+        assert sdk.flush() is True
+        assert sdk.stats() == {}
+
+    def test_local_vault(self, crashvault_home):
+        """Without a server, events should be grouped into issues in the local vault."""
+        from crashvault import sdk
+        from crashvault.core import load_events, load_issues
+
+        sdk.init(flush_interval=60)
+        try:
+            for _ in range(3):
+                try:
+                    int("nope")
+                except ValueError:
+                    sdk.capture_exception(tags=["parse"])
+            sdk.capture_message("deploy finished")
+            assert sdk.flush(5)
+        finally:
+            assert sdk.close()
+
+        issues = load_issues()
+        events = load_events()
+        assert len(issues) == 2
+        assert len(events) == 4
+        assert sorted(e["issue_id"] for e in events) == [1, 1, 1, 2]
+        assert any(e["tags"] == ["parse"] and "int(" in e["stacktrace"] for e in events)
+        assert sdk.get_client() is None
+
+    def test_server(self, live_server):
+        """With a server, events should be posted to its batch endpoint."""
+        from crashvault import sdk
+        from crashvault.core import load_events
+
+        sdk.init(live_server, batch_size=50, flush_interval=60)
+        try:
+            for i in range(120):
+                sdk.capture_message(f"request {i % 3} failed", level="error")
+            assert sdk.flush(10)
+            stats = sdk.stats()
+        finally:
+            sdk.close()
+
+        assert stats["sent"] == 120
+        assert stats["batches"] == 3
+        assert len(load_events()) == 120
+
+    def test_server_unreachable(self, no_backoff):
+        """Network failures should be transient errors."""
+        import socket
+        from crashvault.sdk import HTTPTransport, TransportError
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        transport = HTTPTransport(f"http://127.0.0.1:{port}", timeout=1)
+
+        with pytest.raises(TransportError) as excinfo:
+            transport.send([{"message": "x"}])
+        assert excinfo.value.transient
+
+    def test_invalid_server_url(self):
+        """init should reject URLs it cannot post to."""
+        from crashvault import sdk
+
+        with pytest.raises(ValueError):
+            sdk.init("localhost:5678")
+        assert sdk.get_client() is None
@@ -122,6 +122,368 @@ class TestSearchCommand:
         assert "0 event(s) matched" in result.output
 
 
+def _indexed_event(event_id, issue_id, message, level="error", tags=(), host="web-1", stacktrace="",
+                   timestamp="2024-03-01T12:00:00Z"):
+    return {
+        "event_id": event_id,
+        "issue_id": issue_id,
+        "message": message,
+        "stacktrace": stacktrace,
+        "timestamp": timestamp,
+        "level": level,
+        "tags": list(tags),
+        "context": {},
+        "host": host,
+    }
+
+
+class TestSearchIndex:
+    """Tests for the inverted search index and the query syntax."""
+
+    QUERIES = [
+        {"text": "timeout"},
+        {"text": "Connection re"},
+        {"tags": ["db"]},
+        {"text": "timeout", "tags": ["db"]},
+        {"level": "warning"},
+        {"query": "timeout OR refused"},
+        {"query": '"connection reset"'},
+        {"query": "conn* level:error"},
+        {"query": "tag:cache OR host:web-2"},
+        {"query": "issue:2 pool"},
+        {"query": "handler.py"},
+        {"text": "out"},
+        {"text": "eout aft"},
+        {"text": "base timeout after 3"},
+        {"text": "nnection re", "tags": ["db"]},
+    ]
+
+    def _events(self):
+        return [
+            _indexed_event("e1", 1, "Database timeout after 30s", tags=["db"]),
+            _indexed_event("e2", 1, "Database timeout after 31s", tags=["db", "api"], host="web-2"),
+            _indexed_event("e3", 2, "Connection reset by peer", level="warning", tags=["cache"],
+                           stacktrace='File "handler.py", line 3, in pool'),
+            _indexed_event("e4", 3, "Connection refused", tags=["db"], timestamp="2024-03-02T08:00:00Z"),
+            _indexed_event("e5", 3, "Reset the connection pool", level="info"),
+        ]
+
+    def _enable(self, cli_runner):
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["index", "enable", "search"])
+        assert result.exit_code == 0, result.output
+
+    def test_parse_query(self):
+        """Words are AND-ed, OR splits alternatives, quotes make phrases."""
+        from crashvault.storage.search_index import Term, parse_query
+
+        assert parse_query('db timeout OR "connection reset" conn* tag:DB issue:#4') == [
+            [Term("word", "db"), Term("word", "timeout")],
+            [Term("phrase", ("connection", "reset")), Term("prefix", "conn"),
+             Term("tag", "db"), Term("issue", 4)],
+        ]
+        assert parse_query("") == []
+
+    def test_index_matches_scan(self, crashvault_home, cli_runner):
+        """Indexed searches return exactly what a full scan returns, for every engine."""
+        from crashvault.core import clear_events, load_config, save_config, save_events, search_events
+        from crashvault.storage import get_search_index
+
+        for engine in ("json", "sqlite", "segments"):
+            clear_events()
+            cfg = load_config()
+            cfg["storage"] = {"engine": engine}
+            cfg.pop("indexes", None)
+            save_config(cfg)
+            save_events(self._events())
+
+            scanned = [sorted(e["event_id"] for e in search_events(**q)) for q in self.QUERIES]
+            self._enable(cli_runner)
+            assert get_search_index() is not None
+            indexed = [sorted(e["event_id"] for e in search_events(**q)) for q in self.QUERIES]
+
+            assert indexed == scanned, engine
+            assert scanned[0] == ["e1", "e2"]
+            assert scanned[5] == ["e1", "e2", "e4"]
+            assert scanned[6] == ["e3"]
+            assert scanned[11] == ["e1", "e2"]
+            assert scanned[12] == ["e1", "e2"]
+            assert scanned[14] == ["e4"]
+
+    def test_text_terms_keep_substring_semantics(self):
+        """Only words known to be whole in every match become index terms."""
+        from crashvault.storage.search_index import Term, _filter_terms
+
+        assert _filter_terms(None, [], "out") == []
+        assert _filter_terms(None, [], "eout err") == [Term("prefix", "err")]
+        assert _filter_terms(None, [], "db timeout after") == [Term("word", "timeout"), Term("prefix", "after")]
+        assert _filter_terms(None, [], "timeout: ") == []
+
+    def test_index_updated_at_write_time(self, crashvault_home, cli_runner):
+        """New and deleted events are reflected without a rebuild."""
+        from crashvault.core import delete_issue_events, save_events, search_events
+        from crashvault.storage import get_search_index
+
+        self._enable(cli_runner)
+        save_events(self._events())
+        assert get_search_index().status()["events"] == 5
+
+        delete_issue_events(1)
+
+        assert get_search_index().status()["events"] == 3
+        assert [e["event_id"] for e in search_events(query="timeout OR refused")] == ["e4"]
+
+    def test_stale_entries_are_dropped(self, crashvault_home, cli_runner):
+        """Events deleted behind the index's back are skipped and forgotten."""
+        from crashvault.core import EVENTS_DIR, save_events, search_events
+        from crashvault.storage import get_search_index
+
+        self._enable(cli_runner)
+        save_events(self._events())
+        next(EVENTS_DIR.glob("**/e1.json")).unlink()
+
+        assert [e["event_id"] for e in search_events(query="timeout")] == ["e2"]
+        assert get_search_index().status()["events"] == 4
+
+    def test_search_command_query(self, crashvault_home, cli_runner):
+        """search --query uses the query syntax, with or without the index."""
+        from crashvault.cli import cli
+        from crashvault.core import save_events
+
+        save_events(self._events())
+        args = ["search", "--query", '"connection reset" OR refused', "--level", "warning"]
+
+        result = cli_runner.invoke(cli, args)
+        assert "1 event(s) matched" in result.output
+        assert "Connection reset by peer" in result.output
+
+        self._enable(cli_runner)
+        assert cli_runner.invoke(cli, args).output == result.output
+
+        bad = cli_runner.invoke(cli, ["search", "--query", "issue:abc"])
+        assert bad.exit_code != 0
+        assert "--query" in bad.output
+
+    def test_storage_errors_are_not_query_errors(self, crashvault_home, cli_runner, monkeypatch):
+        """Errors while reading events should surface as themselves, not as a bad --query."""
+        from crashvault.cli import cli
+        from crashvault.storage import get_storage
+
+        def broken(*args, **kwargs):
+            raise ValueError("Invalid password for encrypted vault")
+            yield
+
+        monkeypatch.setattr(type(get_storage()), "iter_events", broken)
+        result = cli_runner.invoke(cli, ["search", "--query", "timeout"])
+
+        assert isinstance(result.exception, ValueError)
+        assert "--query" not in result.output
+
+    def test_disable_removes_index(self, crashvault_home, cli_runner):
+        """index disable turns the index off and deletes its database."""
+        from crashvault.cli import cli
+        from crashvault.core import ROOT
+        from crashvault.storage import get_search_index
+
+        self._enable(cli_runner)
+        assert (ROOT / "index" / "search.db").exists()
+
+        result = cli_runner.invoke(cli, ["index", "disable", "search"])
+
+        assert result.exit_code == 0
+        assert get_search_index() is None
+        assert not (ROOT / "index" / "search.db").exists()
+
+
+class TestTimeRange:
+    """Tests for --since/--until and day-partition pruning."""
+
+    def _events(self):
+        return [
+            _indexed_event("old", 1, "Old failure", timestamp="2021-06-01T10:00:00Z"),
+            _indexed_event("mar1", 1, "March failure", timestamp="2024-03-01T10:00:00Z"),
+            # Stored under 2024/03/01 but 2024-03-02T04:00 in UTC
+            _indexed_event("late", 2, "Late failure", timestamp="2024-03-01T23:00:00-05:00"),
+            _indexed_event("mar3", 2, "Later failure", level="warning", timestamp="2024-03-03T09:00:00Z"),
+        ]
+
+    def test_parse_time_bound(self):
+        """Relative ages, dates and timestamps are accepted."""
+        from datetime import datetime, timezone
+        import pytest
+        from crashvault.timerange import parse_time_bound
+
+        now = datetime(2024, 3, 10, 12, 0, tzinfo=timezone.utc)
+        assert parse_time_bound("24h", now=now) == datetime(2024, 3, 9, 12, 0, tzinfo=timezone.utc)
+        assert parse_time_bound("7d", now=now) == datetime(2024, 3, 3, 12, 0, tzinfo=timezone.utc)
+        assert parse_time_bound("today", now=now) == datetime(2024, 3, 10, tzinfo=timezone.utc)
+        assert parse_time_bound("2024-03-01") == datetime(2024, 3, 1, tzinfo=timezone.utc)
+        assert parse_time_bound("2024-03-01", end=True) == datetime(2024, 3, 2, tzinfo=timezone.utc)
+        assert parse_time_bound("2024-03-01T10:00:00Z") == datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+        with pytest.raises(ValueError):
+            parse_time_bound("last tuesday")
+
+    def test_only_overlapping_partitions_are_read(self, crashvault_home):
+        """iter_day_dirs skips years, months and days outside the range."""
+        from datetime import datetime, timezone
+        from crashvault.core import EVENTS_DIR
+        from crashvault.timerange import iter_day_dirs
+
+        for day in ("2021/06/01", "2024/02/27", "2024/03/01", "2024/03/05", "2024/04/01"):
+            (EVENTS_DIR / day).mkdir(parents=True)
+
+        since = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        until = datetime(2024, 3, 2, tzinfo=timezone.utc)
+        days = [p.relative_to(EVENTS_DIR).as_posix() for p in iter_day_dirs(EVENTS_DIR, since, until)]
+
+        assert days == ["2024/03/01"]
+        assert len(list(iter_day_dirs(EVENTS_DIR))) == 5
+
+    def test_engines_apply_exact_bounds(self, crashvault_home):
+        """Every engine returns the same events for a range, using UTC bounds."""
+        from datetime import datetime, timezone
+        from crashvault.core import clear_events, count_events_by_level, iter_events, load_config, save_config, save_events
+
+        since = datetime(2024, 3, 2, tzinfo=timezone.utc)
+        for engine in ("json", "sqlite", "segments"):
+            clear_events()
+            cfg = load_config()
+            cfg["storage"] = {"engine": engine}
+            save_config(cfg)
+            save_events(self._events())
+
+            assert sorted(e["event_id"] for e in iter_events(since=since)) == ["late", "mar3"], engine
+            assert sorted(e["event_id"] for e in iter_events(until=since)) == ["mar1", "old"], engine
+            assert count_events_by_level(since=since) == {"error": 1, "warning": 1}, engine
+
+    def test_read_commands_accept_range(self, crashvault_home, cli_runner, sample_issues):
+        """search, events, stats and show take --since/--until."""
+        from crashvault.cli import cli
+        from crashvault.core import save_events
+
+        save_events(self._events())
+
+        result = cli_runner.invoke(cli, ["search", "--since", "2024-03-01", "--until", "2024-03-01"])
+        assert "1 event(s) matched" in result.output
+        assert "March failure" in result.output
+
+        result = cli_runner.invoke(cli, ["events", "--since", "2024-01-01"])
+        assert "showing 3 event(s)" in result.output
+
+        result = cli_runner.invoke(cli, ["stats", "--since", "2024-03-03"])
+        assert "warning: 1" in result.output
+        assert "error:" not in result.output
+
+        result = cli_runner.invoke(cli, ["show", "2", "--since", "2024-03-03"])
+        assert "Later failure" in result.output
+        assert "Late failure" not in result.output
+
+        result = cli_runner.invoke(cli, ["search", "--since", "soonish"])
+        assert result.exit_code != 0
+        assert "Invalid time" in result.output
+
+
+class TestEventPagination:
+    """Tests for ordered, lazily paginated event reads."""
+
+    def _events(self):
+        events = []
+        for day in range(1, 6):
+            for hour in (3, 15):
+                events.append(_indexed_event(f"d{day}h{hour:02d}", day % 2 + 1, f"Failure {day}/{hour}",
+                                             level="warning" if hour == 3 else "error",
+                                             timestamp=f"2024-03-{day:02d}T{hour:02d}:00:00Z"))
+        # Stored under 2024/03/05 but later than every other event in UTC
+        events.append(_indexed_event("offset", 1, "Offset failure", timestamp="2024-03-05T20:00:00-08:00"))
+        return events
+
+    def _use_engine(self, engine):
+        from crashvault.core import clear_events, load_config, save_config, save_events
+
+        clear_events()
+        cfg = load_config()
+        cfg["storage"] = {"engine": engine}
+        save_config(cfg)
+        save_events(self._events())
+
+    def test_sorted_and_paged_on_every_engine(self, crashvault_home):
+        """Pages follow timestamp order, do not overlap and end with a None cursor."""
+        from datetime import datetime, timezone
+        from crashvault.core import iter_events_sorted, page_events
+
+        since = datetime(2024, 3, 3, tzinfo=timezone.utc)
+        expected = [f"d{day}h{hour:02d}" for day in range(1, 6) for hour in (3, 15)] + ["offset"]
+        for engine in ("json", "sqlite", "segments"):
+            self._use_engine(engine)
+            assert [e["event_id"] for e in iter_events_sorted()] == expected[::-1], engine
+            assert [e["event_id"] for e in iter_events_sorted(newest_first=False)] == expected, engine
+
+            seen, cursor = [], None
+            while True:
+                page, cursor = page_events(4, cursor=cursor, newest_first=False)
+                seen.extend(e["event_id"] for e in page)
+                if cursor is None:
+                    break
+            assert seen == expected, engine
+
+            page, cursor = page_events(2, level="error", since=since)
+            assert [e["event_id"] for e in page] == ["offset", "d5h15"], engine
+            page, _ = page_events(2, cursor=cursor, level="error")
+            assert [e["event_id"] for e in page] == ["d4h15", "d3h15"], engine
+
+    def test_first_page_stops_early(self, crashvault_home, monkeypatch):
+        """Newest-first reads only the most recent day partitions for a small page."""
+        from crashvault.core import page_events
+        from crashvault.storage import get_storage
+
+        self._use_engine("json")
+        storage = get_storage()
+        read = []
+        original = storage._read_day
+        monkeypatch.setattr(storage, "_read_day", lambda day_dir: read.append(day_dir.name) or original(day_dir))
+
+        page, cursor = page_events(2)
+
+        assert [e["event_id"] for e in page] == ["offset", "d5h15"]
+        assert cursor is not None
+        assert read == ["05", "04"]
+
+    def test_invalid_cursor(self, crashvault_home, cli_runner):
+        """A cursor that was not produced by a page is rejected."""
+        import pytest
+        from crashvault.cli import cli
+        from crashvault.core import page_events
+
+        with pytest.raises(ValueError):
+            page_events(10, cursor="not-a-cursor")
+        result = cli_runner.invoke(cli, ["events", "--cursor", "not-a-cursor"])
+        assert result.exit_code != 0
+        assert "Invalid cursor" in result.output
+
+    def test_events_command_cursor(self, crashvault_home, cli_runner):
+        """The events command prints the cursor of the next page and accepts it back."""
+        import re
+        from crashvault.cli import cli
+        from crashvault.core import save_events
+
+        save_events(self._events())
+
+        result = cli_runner.invoke(cli, ["events", "--limit", "3"])
+        assert result.exit_code == 0, result.output
+        assert "Offset failure" in result.output
+        assert "showing 3 event(s)" in result.output
+        cursor = re.search(r"--cursor (\S+)", result.output).group(1)
+
+        result = cli_runner.invoke(cli, ["events", "--limit", "3", "--cursor", cursor])
+        assert "Failure 4/15" in result.output
+        assert "Failure 5/3" not in result.output
+
+        result = cli_runner.invoke(cli, ["events", "--limit", "20", "--offset", "9"])
+        assert "showing 2 event(s)" in result.output
+        assert "--cursor" not in result.output
+
+
 class TestListCommand:
     """Tests for the list command."""
 
@@ -288,3 +650,202 @@ class TestStatsCommand:
         assert result.exit_code == 0
         assert "Issues by status:" in result.output
         assert "Events by level:" in result.output
+
+
+class TestRollups:
+    """Tests for the materialised stats counters."""
+
+    def _events(self):
+        return [
+            _indexed_event("a", 1, "A", timestamp="2024-03-01T10:15:00Z"),
+            _indexed_event("b", 1, "B", timestamp="2024-03-01T10:45:00Z"),
+            _indexed_event("c", 2, "C", level="warning", timestamp="2024-03-01T11:30:00Z"),
+            _indexed_event("d", 2, "D", timestamp="2024-03-01T23:10:00-05:00"),
+            _indexed_event("e", 3, "E", level="info", timestamp="2024-03-03T00:00:00Z"),
+        ]
+
+    def test_counts_do_not_read_events(self, crashvault_home, monkeypatch):
+        """Once built, totals and whole-hour ranges come from the counters alone."""
+        from datetime import datetime, timezone
+        from crashvault.core import count_events_by_issue, count_events_by_level, save_events
+        from crashvault.storage import get_storage
+
+        save_events(self._events()[:2])
+        assert count_events_by_level() == {"error": 2}
+        save_events(self._events()[2:])
+
+        def no_scan(*args, **kwargs):
+            raise AssertionError("events were read")
+
+        monkeypatch.setattr(get_storage(), "iter_events", no_scan)
+        monkeypatch.setattr(get_storage(), "count_events_by_level", no_scan)
+        assert count_events_by_level() == {"error": 3, "warning": 1, "info": 1}
+        assert count_events_by_issue() == {1: 2, 2: 2, 3: 1}
+        since = datetime(2024, 3, 1, 11, tzinfo=timezone.utc)
+        assert count_events_by_level(since=since, until=datetime(2024, 3, 3, tzinfo=timezone.utc)) == {
+            "warning": 1, "error": 1}
+
+    def test_rebuild_waits_for_append_to_be_counted(self, crashvault_home, monkeypatch):
+        """A rebuild racing save_events should neither miss nor double-count its events."""
+        import threading
+        from crashvault.core import count_events_by_level, save_events
+        from crashvault.storage import get_storage
+        from crashvault.storage.rollups import invalidate_rollups
+
+        save_events(self._events()[:2])
+        invalidate_rollups()
+        storage = get_storage()
+        append = storage.append_events
+        results = []
+
+        def append_then_rebuild(events):
+            append(events)
+            # A reader rebuilding the counters right after the events hit the disk
+            reader = threading.Thread(target=lambda: results.append(count_events_by_level()))
+            reader.start()
+            reader.join(0.2)
+            results.append(reader)
+
+        monkeypatch.setattr(storage, "append_events", append_then_rebuild)
+        save_events(self._events()[2:])
+        reader = results.pop(0)
+        reader.join(5)
+
+        assert results == [{"error": 3, "warning": 1, "info": 1}]
+        assert count_events_by_level() == {"error": 3, "warning": 1, "info": 1}
+
+    def test_ranged_counts_match_scan(self, crashvault_home):
+        """Partial hours at the edges of a range are counted from the events."""
+        from datetime import datetime, timezone
+        from crashvault.core import clear_events, count_events_by_level, load_config, save_config, save_events
+        from crashvault.storage import get_storage
+
+        ranges = [
+            (datetime(2024, 3, 1, 10, 30, tzinfo=timezone.utc), None),
+            (None, datetime(2024, 3, 1, 11, 45, tzinfo=timezone.utc)),
+            (datetime(2024, 3, 1, 10, 20, tzinfo=timezone.utc), datetime(2024, 3, 1, 10, 50, tzinfo=timezone.utc)),
+            (datetime(2024, 3, 1, 10, 30, tzinfo=timezone.utc), datetime(2024, 3, 2, 4, 30, tzinfo=timezone.utc)),
+        ]
+        for engine in ("json", "sqlite", "segments"):
+            clear_events()
+            cfg = load_config()
+            cfg["storage"] = {"engine": engine}
+            save_config(cfg)
+            save_events(self._events())
+            storage = get_storage()
+            for since, until in ranges:
+                assert count_events_by_level(since=since, until=until) == \
+                    storage.count_events_by_level(since=since, until=until), (engine, since, until)
+
+    def test_deletes_rebuild_on_next_read(self, crashvault_home):
+        """Deleting events marks the counters stale; the next read recounts."""
+        from crashvault.core import count_events_by_level, delete_issue_events, save_events
+        from crashvault.storage import open_rollups
+
+        save_events(self._events())
+        assert count_events_by_level()["error"] == 3
+
+        delete_issue_events(1)
+
+        assert not open_rollups().is_built()
+        assert count_events_by_level() == {"error": 1, "warning": 1, "info": 1}
+
+    def test_check_and_fix(self, crashvault_home, cli_runner):
+        """index check reports counters that disagree with the events and --fix rebuilds them."""
+        from crashvault.cli import cli
+        from crashvault.core import count_events_by_level, save_events
+        from crashvault.storage import open_rollups
+
+        save_events(self._events())
+        assert cli_runner.invoke(cli, ["index", "check"]).exit_code == 0
+
+        open_rollups().add([_indexed_event("ghost", 9, "Ghost")])
+        result = cli_runner.invoke(cli, ["index", "check"])
+        assert result.exit_code == 1
+        assert "issue 9: counted 1, actual 0" in result.output
+
+        result = cli_runner.invoke(cli, ["index", "check", "--fix"])
+        assert "rebuilt" in result.output
+        assert count_events_by_level()["error"] == 3
+
+    def test_status_counts_follow_status_changes(self, crashvault_home, cli_runner, sample_issues):
+        """Issue status counts are kept by the engine and follow resolve/reopen."""
+        from crashvault.cli import cli
+        from crashvault.core import count_issues_by_status
+
+        assert count_issues_by_status() == {"open": 1, "resolved": 1, "ignored": 1}
+        cli_runner.invoke(cli, ["resolve", "1"])
+        assert count_issues_by_status() == {"resolved": 2, "ignored": 1}
+
+        result = cli_runner.invoke(cli, ["stats"])
+        assert "open: 0" in result.output
+        assert "resolved: 2" in result.output
+
+
+class TestEventSeries:
+    """Tests for the per-issue time series and stats --trend."""
+
+    def _save_recent(self):
+        from datetime import datetime, timedelta, timezone
+        from crashvault.core import save_events
+
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        stamp = lambda minutes: (now - timedelta(minutes=minutes)).isoformat().replace("+00:00", "Z")
+        save_events([
+            _indexed_event("a", 1, "A", timestamp=stamp(5)),
+            _indexed_event("b", 1, "B", timestamp=stamp(5)),
+            _indexed_event("c", 1, "C", level="warning", timestamp=stamp(65)),
+            _indexed_event("d", 2, "D", timestamp=stamp(3)),
+            _indexed_event("old", 1, "Old", timestamp="2020-01-01T10:00:00Z"),
+        ])
+        return now
+
+    def test_minute_series_for_issue(self, crashvault_home):
+        """Buckets are zero-filled and count one issue's events."""
+        from datetime import timedelta
+        from crashvault.core import event_series
+
+        now = self._save_recent()
+        series = event_series(issue_id=1, since=now - timedelta(hours=2), until=now)
+
+        assert series["resolution"] == "minute"
+        assert len(series["buckets"]) == 120
+        assert series["total"] == 3
+        assert [b["count"] for b in series["buckets"] if b["count"]] == [1, 2]
+        assert event_series(issue_id=1, level="warning", since=now - timedelta(hours=2), until=now)["total"] == 1
+
+    def test_retention_keeps_coarse_buckets(self, crashvault_home):
+        """Old minute and hour buckets are pruned; day buckets still answer for that time."""
+        from datetime import datetime, timezone
+        import pytest
+        from crashvault.core import event_series
+        from crashvault.storage.rollups import pick_resolution
+
+        self._save_recent()
+        since = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        until = datetime(2020, 1, 2, tzinfo=timezone.utc)
+
+        assert pick_resolution(since, until) == "day"
+        assert event_series(issue_id=1, since=since, until=until)["total"] == 1
+        assert event_series(issue_id=1, since=since, until=until, resolution="minute")["total"] == 0
+        with pytest.raises(ValueError):
+            event_series(since=since, until=datetime(2021, 1, 1, tzinfo=timezone.utc), resolution="minute")
+
+    def test_sparkline(self):
+        """Counts map onto bar heights and are folded to the width."""
+        from crashvault.commands.stats_cmd import sparkline
+
+        assert sparkline([0, 1, 2, 4]) == " ▂▄█"
+        assert sparkline([0, 0]) == "  "
+        assert len(sparkline(list(range(120)), width=60)) == 60
+
+    def test_stats_trend(self, crashvault_home, cli_runner):
+        """stats --trend prints a sparkline per level."""
+        from crashvault.cli import cli
+
+        self._save_recent()
+        result = cli_runner.invoke(cli, ["stats", "--trend", "--issue", "1", "--resolution", "hour"])
+
+        assert result.exit_code == 0, result.output
+        assert "Trend for issue #1 (per hour" in result.output
+        assert "warning" in result.output.split("Trend")[1]
@@ -0,0 +1,339 @@
+"""
+Tests for the HTTP ingestion server.
+"""
+import http.client
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+def _draft(message, event_id):
+    return {
+        "fingerprint": f"fp-{message}",
+        "title": message,
+        "event": {"event_id": event_id, "message": message, "timestamp": "2024-01-01T00:00:00Z",
+                  "level": "error", "tags": [], "context": {}},
+    }
+
+
+@pytest.fixture(params=["threaded", "asyncio", "single"])
+def live_server(request, crashvault_home):
+    """Run the server in each concurrency mode on a free port."""
+    from crashvault.server import make_server
+
+    server = make_server("127.0.0.1", 0, mode=request.param, cfg={"server": {"commit_interval_ms": 1}})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    if request.param == "asyncio":
+        assert server.ready.wait(5)
+    yield server
+    _stop(server, thread)
+
+
+def _stop(server, thread):
+    server.shutdown()
+    thread.join(5)
+    server.server_close()
+    server.writer.stop()
+    if server.webhook_workers is not None:
+        server.webhook_workers.stop()
+
+
+def _post(server, path, payload):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return resp.status, json.loads(resp.read())
+
+
+def _get(server, path):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+    with urllib.request.urlopen(url) as resp:
+        return resp.status, json.loads(resp.read())
+
+
+class TestGroupCommitWriter:
+    """Tests for coalescing writes into group commits."""
+
+    def test_commit_events_groups_by_fingerprint(self, crashvault_home):
+        """Drafts sharing a fingerprint resolve to one new issue."""
+        from crashvault.ingest import commit_events
+        from crashvault.core import load_issues, load_events
+
+        results = commit_events([_draft("a", "e1"), _draft("b", "e2"), _draft("a", "e3")])
+
+        assert [r["issue_id"] for r in results] == [1, 2, 1]
+        assert [r["issue_created"] for r in results] == [True, True, False]
+        assert [i["id"] for i in load_issues()] == [1, 2]
+        assert {e["event_id"] for e in load_events()} == {"e1", "e2", "e3"}
+
+    def test_concurrent_submits_share_a_commit(self, crashvault_home):
+        """Events submitted within the commit interval are committed together."""
+        from crashvault.ingest import GroupCommitWriter
+        from crashvault.core import load_events
+
+        writer = GroupCommitWriter(commit_interval_ms=200).start()
+        futures = [writer.submit_async([_draft("same", f"e{i}")]) for i in range(10)]
+        results = [f.result(5) for f in futures]
+        writer.stop()
+
+        assert writer.stats["commits"] == 1
+        assert writer.stats["events"] == 10
+        assert {r[0]["issue_id"] for r in results} == {1}
+        assert len(load_events()) == 10
+
+    def test_max_events_triggers_commit(self, crashvault_home):
+        """A full batch is committed without waiting for the interval."""
+        from crashvault.ingest import GroupCommitWriter
+
+        writer = GroupCommitWriter(commit_interval_ms=60_000, commit_max_events=3).start()
+        result = writer.submit([_draft("x", f"e{i}") for i in range(3)], timeout=5)
+        writer.stop()
+
+        assert len(result) == 3
+
+    def test_stop_flushes_queue(self, crashvault_home):
+        """Stopping the writer commits events still waiting."""
+        from crashvault.ingest import GroupCommitWriter
+        from crashvault.core import load_events
+
+        writer = GroupCommitWriter(commit_interval_ms=60_000).start()
+        future = writer.submit_async([_draft("late", "e1")])
+        writer.stop(timeout=5)
+
+        assert future.result(0)[0]["event_id"] == "e1"
+        assert len(load_events()) == 1
+
+
+class TestIngestEndpoints:
+    """Tests for the ingest endpoints going through the writer."""
+
+    def test_single_event(self, live_server):
+        """POST /api/v1/events stores the event and acknowledges the issue."""
+        from crashvault.core import load_events
+
+        status, body = _post(live_server, "/api/v1/events", {"message": "Boom", "level": "warning"})
+
+        assert status == 201
+        assert body["issue_id"] == 1
+        assert body["issue_created"] is True
+        events = load_events()
+        assert events[0]["event_id"] == body["event_id"]
+        assert events[0]["level"] == "warning"
+
+    def test_batch(self, live_server):
+        """POST /api/v1/batch commits all events at once."""
+        from crashvault.core import load_issues, load_events
+
+        payload = {"events": [{"message": "A"}, {"message": "B"}, {"message": "A"}, {"nope": 1}]}
+        status, body = _post(live_server, "/api/v1/batch", payload)
+
+        assert status == 201
+        assert body["processed"] == 3
+        assert [r["issue_id"] for r in body["results"]] == [1, 2, 1]
+        assert len(load_issues()) == 2
+        assert len(load_events()) == 3
+        assert live_server.writer.stats["commits"] == 1
+
+    def test_unknown_path_and_bad_json(self, live_server):
+        """Routing errors are reported the same way in every mode."""
+        conn = http.client.HTTPConnection("127.0.0.1", live_server.server_address[1], timeout=5)
+        conn.request("POST", "/api/v1/events", body=b"{nope", headers={"Content-Type": "application/json"})
+        assert conn.getresponse().status == 400
+        conn.close()
+
+        conn = http.client.HTTPConnection("127.0.0.1", live_server.server_address[1], timeout=5)
+        conn.request("GET", "/nope")
+        assert conn.getresponse().status == 404
+        conn.close()
+
+
+class TestEventsEndpoint:
+    """Tests for GET /api/v1/events."""
+
+    def test_pages_with_cursor(self, live_server):
+        """Events come newest first with a cursor for the next page."""
+        import urllib.error
+        from crashvault.core import save_events
+
+        save_events([
+            {"event_id": f"e{i}", "issue_id": 1, "message": f"Boom {i}", "level": "error",
+             "timestamp": f"2024-01-0{i}T00:00:00Z", "tags": ["db"] if i % 2 else [], "context": {}}
+            for i in range(1, 6)
+        ])
+
+        status, body = _get(live_server, "/api/v1/events?limit=2")
+        assert status == 200
+        assert [e["event_id"] for e in body["events"]] == ["e5", "e4"]
+
+        status, body = _get(live_server, f"/api/v1/events?limit=2&tag=db&cursor={body['next_cursor']}")
+        assert [e["event_id"] for e in body["events"]] == ["e3", "e1"]
+        assert body["next_cursor"] is None
+
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _get(live_server, "/api/v1/events?cursor=bogus")
+        assert excinfo.value.code == 400
+
+
+class TestStatsEndpoint:
+    """Tests for GET /api/v1/stats."""
+
+    def test_counts_follow_ingest(self, live_server):
+        """Counts include events committed by the writer and issue statuses."""
+        _post(live_server, "/api/v1/batch", {"events": [{"message": "A"}, {"message": "B", "level": "warning"}]})
+        status, body = _get(live_server, "/api/v1/stats")
+        assert status == 200
+        assert body["events_by_level"] == {"error": 1, "warning": 1}
+
+        _post(live_server, "/api/v1/events", {"message": "A"})
+        status, body = _get(live_server, "/api/v1/stats")
+        assert body["total_events"] == 3
+        assert body["issues_by_status"] == {"open": 2}
+        assert body["open_issues"] == 2
+
+
+class TestSeriesEndpoint:
+    """Tests for GET /api/v1/issues/<id>/series."""
+
+    def test_issue_series(self, live_server):
+        """The series covers the issue's recent events; unknown issues are 404."""
+        import urllib.error
+
+        _post(live_server, "/api/v1/batch", {"events": [{"message": "A"}, {"message": "A"}, {"message": "B"}]})
+
+        status, body = _get(live_server, "/api/v1/issues/1/series?since=1h&resolution=minute")
+        assert status == 200
+        assert body["issue_id"] == 1
+        assert body["resolution"] == "minute"
+        assert body["total"] == 2
+
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _get(live_server, "/api/v1/issues/99/series")
+        assert excinfo.value.code == 404
+        with pytest.raises(urllib.error.HTTPError) as excinfo:
+            _get(live_server, "/api/v1/issues/1/series?resolution=week")
+        assert excinfo.value.code == 400
+
+
+class TestConcurrency:
+    """Tests for the threaded and asyncio server modes."""
+
+    @pytest.mark.parametrize("mode", ["threaded", "asyncio"])
+    def test_parallel_requests_get_unique_issue_ids(self, crashvault_home, mode):
+        """Parallel clients never receive duplicate issue ids."""
+        from crashvault.server import make_server
+        from crashvault.core import load_issues
+
+        server = make_server("127.0.0.1", 0, mode=mode, cfg={"server": {"workers": 8}})
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        if mode == "asyncio":
+            assert server.ready.wait(5)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                bodies = list(pool.map(
+                    lambda i: _post(server, "/api/v1/events", {"message": f"error {i % 10}"})[1], range(40)
+                ))
+        finally:
+            _stop(server, thread)
+
+        ids = [i["id"] for i in load_issues()]
+        assert len(ids) == 10
+        assert len(set(ids)) == 10
+        assert sum(b["issue_created"] for b in bodies) == 10
+
+    def test_keep_alive_connection_reused(self, live_server):
+        """Several requests can be sent over one HTTP/1.1 connection."""
+        conn = http.client.HTTPConnection("127.0.0.1", live_server.server_address[1], timeout=5)
+        for i in range(3):
+            conn.request("POST", "/api/v1/events", body=json.dumps({"message": f"m{i}"}),
+                         headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            assert resp.status == 201
+            json.loads(resp.read())
+        conn.request("GET", "/api/health")
+        assert json.loads(conn.getresponse().read())["status"] == "ok"
+        conn.close()
+
+    def test_single_mode_idle_client_does_not_block(self, crashvault_home):
+        """In single mode a client keeping its connection open must not hold off the others."""
+        from crashvault.server import make_server
+
+        server = make_server("127.0.0.1", 0, mode="single",
+                             cfg={"server": {"commit_interval_ms": 1, "keepalive_timeout": 10}})
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            idle = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+            idle.request("GET", "/api/health")
+            resp = idle.getresponse()
+            resp.read()
+            assert resp.getheader("Connection", "").lower() != "keep-alive"
+
+            other = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=2)
+            other.request("GET", "/api/health")
+            assert json.loads(other.getresponse().read())["status"] == "ok"
+            other.close()
+            idle.close()
+        finally:
+            _stop(server, thread)
+
+    def test_issue_lock_serializes_cli_and_server(self, crashvault_home):
+        """Issue creation from many threads allocates distinct ids."""
+        from crashvault.core import issue_store_lock, next_issue_id, save_issue, load_issues
+
+        def create(n):
+            with issue_store_lock():
+                save_issue({"id": next_issue_id(), "fingerprint": f"fp{n}", "title": str(n), "status": "open"})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(create, range(30)))
+
+        ids = [i["id"] for i in load_issues()]
+        assert sorted(ids) == list(range(1, 31))
+
+
+
+class TestWebhookDelivery:
+    """Tests for webhook delivery from the server."""
+
+    def _mock_webhook(self):
+        from crashvault.webhooks.base import WebhookProvider
+        from crashvault.webhooks.dispatcher import get_dispatcher, register_provider
+
+        class MockProvider(WebhookProvider):
+            calls = []
+
+            def send(self, payload):
+                MockProvider.calls.append(payload)
+                return True
+
+        register_provider("mock", MockProvider)
+        get_dispatcher().add_webhook(type="mock", url="https://mock.test")
+        return MockProvider
+
+    def test_server_response_does_not_wait_for_webhooks(self, crashvault_home):
+        """Ingest returns before delivery; workers send it in the background."""
+        import time
+        from crashvault.server import make_server
+
+        provider = self._mock_webhook()
+        server = make_server("127.0.0.1", 0, mode="threaded", cfg={"server": {"webhook_workers": 1}})
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            status, _ = _post(server, "/api/v1/events", {"message": "boom"})
+            assert status == 201
+            deadline = time.time() + 5
+            while not provider.calls and time.time() < deadline:
+                time.sleep(0.01)
+            status, metrics = _get(server, "/api/v1/metrics")
+        finally:
+            _stop(server, thread)
+
+        assert len(provider.calls) == 1
+        assert metrics["webhooks"]["queue"]["pending"] == 0
+        assert metrics["writer"]["events"] == 1
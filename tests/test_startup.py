@@ -0,0 +1,160 @@
+"""
+Tests for CLI startup cost: lazy command loading and deferred imports.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Heavy dependencies only some commands need
+DEFERRED = ("rich", "cryptography", "requests", "crashvault.webhooks", "crashvault.encrypter")
+
+
+def _run(code, home, *argv):
+    """Run ``code`` in a fresh interpreter and return the JSON it prints last."""
+    env = dict(os.environ, CRASHVAULT_HOME=str(home))
+    proc = subprocess.run(
+        [sys.executable, "-c", code, *argv],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert proc.returncode == 0, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+_LOADED = """
+import json, sys
+from crashvault.cli import cli
+try:
+    cli.main(sys.argv[1:], prog_name="crashvault", standalone_mode=False)
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+def _loaded_modules(home, *argv):
+    return _run(_LOADED, home, *argv)
+
+
+def _deferred_loaded(modules):
+    return [m for m in modules if m.split(".")[0] in DEFERRED or m.startswith(DEFERRED)]
+
+
+class TestLazyCommands:
+    """Tests for the lazily loading command group."""
+
+    def test_import_loads_no_commands(self, tmp_path):
+        """Importing the CLI should not import any command module or heavy dependency."""
+        modules = _run("import json, sys, crashvault.cli; print(json.dumps(sorted(sys.modules)))", tmp_path)
+
+        assert [m for m in modules if m.startswith("crashvault.commands.")] == []
+        assert _deferred_loaded(modules) == []
+
+    def test_running_command_imports_only_its_module(self, tmp_path):
+        """Running a command should import its own module and no other command."""
+        modules = _loaded_modules(tmp_path, "path")
+
+        assert [m for m in modules if m.startswith("crashvault.commands.")] == ["crashvault.commands.misc_cmds"]
+        assert "cryptography" not in modules
+
+    def test_add_skips_webhooks_and_encryption(self, tmp_path):
+        """Recording an event in a plain vault without webhooks should stay light."""
+        modules = _loaded_modules(tmp_path, "add", "boom")
+
+        assert "crashvault.commands.add_cmd" in modules
+        assert [m for m in modules if m.split(".")[0] in ("cryptography", "requests")] == []
+        assert "crashvault.webhooks" not in modules
+
+    def test_subcommand_help_is_side_effect_free(self, tmp_path):
+        """``<command> --help`` should not set up the vault."""
+        home = tmp_path / "vault"
+        _loaded_modules(home, "add", "--help")
+
+        assert not home.exists()
+
+    def test_help_as_an_argument_still_runs_setup(self, tmp_path):
+        """A ``--help`` that click treats as an argument should not skip vault setup."""
+        home = tmp_path / "vault"
+        _loaded_modules(home, "add", "--", "--help")
+
+        assert home.exists()
+
+    def test_help_detection_follows_the_parser(self, crashvault_home):
+        """Only a help option click would act on should count as a help request."""
+        import click
+        from crashvault.cli import cli, _help_requested
+
+        def requested(*args):
+            return _help_requested(click.Context(cli), cli, args)
+
+        assert requested("--help")
+        assert requested("add", "--help")
+        assert requested("webhook", "list", "--help")
+        assert not requested("add", "--", "--help")
+        assert not requested("add", "--tag", "--help", "boom")
+        assert not requested("wrap", "--", "pytest", "--help")
+        assert not requested("no-such-command", "--help")
+
+    def test_every_command_resolves(self, crashvault_home):
+        """Every listed command should load from its module."""
+        import click
+        from crashvault.cli import cli, COMMANDS
+
+        ctx = click.Context(cli)
+        names = cli.list_commands(ctx)
+
+        assert set(COMMANDS) <= set(names)
+        for name in names:
+            command = cli.get_command(ctx, name)
+            assert isinstance(command, click.Command), name
+
+    def test_unknown_command_errors(self, crashvault_home, cli_runner):
+        """An unknown command should fail like it does in a plain click group."""
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["no-such-command"])
+
+        assert result.exit_code != 0
+        assert "No such command" in result.output
+
+    def test_top_level_help_lists_commands(self, crashvault_home, cli_runner):
+        """The top-level help should still list the commands."""
+        from crashvault.cli import cli, COMMANDS
+
+        result = cli_runner.invoke(cli, ["--help"])
+
+        assert result.exit_code == 0
+        for name in ("add", "list", "export", "agent"):
+            assert name in COMMANDS
+            assert f"\n  {name}" in result.output
+
+
+_IMPORT_TIME = """
+import json, sys, time
+start = time.perf_counter()
+import click
+mid = time.perf_counter()
+import crashvault.cli
+end = time.perf_counter()
+print(json.dumps([mid - start, end - mid]))
+"""
+
+
+@pytest.mark.slow
+class TestStartupBenchmark:
+    """Guards against startup-time regressions."""
+
+    # Importing every command eagerly used to cost well over this on top of click
+    BUDGET = 0.12
+
+    def test_cli_import_time(self, tmp_path):
+        """Importing the CLI on top of click should stay within budget (best of five)."""
+        runs = [_run(_IMPORT_TIME, tmp_path) for _ in range(5)]
+        own = min(cli_time for _, cli_time in runs)
+
+        assert own < self.BUDGET, f"crashvault.cli took {own * 1000:.0f}ms to import on top of click"
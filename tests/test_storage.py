@@ -0,0 +1,405 @@
+"""
+Tests for the pluggable storage engines.
+"""
+import json
+
+
+def _use_engine(name):
+    from crashvault.core import load_config, save_config
+
+    cfg = load_config()
+    cfg["storage"] = {"engine": name}
+    save_config(cfg)
+
+
+def _event(event_id, issue_id, level="error", tags=None, message="boom", timestamp="2024-01-01T00:00:00Z"):
+    return {
+        "event_id": event_id,
+        "issue_id": issue_id,
+        "message": message,
+        "stacktrace": "",
+        "timestamp": timestamp,
+        "level": level,
+        "tags": tags or [],
+        "context": {},
+        "host": "testhost",
+        "pid": 1,
+    }
+
+
+class TestEngineSelection:
+    """Tests for picking the engine from config.json."""
+
+    def test_default_engine_is_json(self, crashvault_home):
+        """A fresh vault uses the JSON engine."""
+        from crashvault.storage import get_storage
+
+        assert get_storage().name == "json"
+
+    def test_engine_from_config(self, crashvault_home):
+        """storage.engine in config.json selects the engine."""
+        from crashvault.storage import get_storage
+
+        _use_engine("sqlite")
+        assert get_storage().name == "sqlite"
+
+    def test_engine_as_plain_string(self, crashvault_home):
+        """`config set storage sqlite` stores a plain string, which is accepted too."""
+        from crashvault.core import save_config
+        from crashvault.storage import get_storage
+
+        save_config({"version": 1, "storage": "sqlite"})
+        assert get_storage().name == "sqlite"
+
+
+class TestSQLiteEngine:
+    """Tests for the SQLite engine."""
+
+    def test_issue_roundtrip_preserves_order(self, crashvault_home):
+        """Issues survive save/load in insertion order."""
+        from crashvault.core import load_issues, save_issues
+
+        _use_engine("sqlite")
+        issues = [{"id": i, "fingerprint": f"fp{i}", "title": f"Issue {i}", "status": "open"} for i in (3, 1, 2)]
+        save_issues(issues)
+
+        assert load_issues() == issues
+
+    def test_single_issue_lookups(self, crashvault_home):
+        """get_issue and save_issue work without rewriting the list."""
+        from crashvault.core import get_issue, save_issue, load_issues
+        from crashvault.storage import get_storage
+
+        _use_engine("sqlite")
+        save_issue({"id": 1, "fingerprint": "aaa", "title": "A", "status": "open"})
+        save_issue({"id": 2, "fingerprint": "bbb", "title": "B", "status": "open"})
+        save_issue({"id": 1, "fingerprint": "aaa", "title": "A", "status": "resolved"})
+
+        assert get_issue(1)["status"] == "resolved"
+        assert get_storage().find_issue_by_fingerprint("bbb")["id"] == 2
+        assert [i["id"] for i in load_issues()] == [1, 2]
+
+    def test_merged_fingerprint_lookup(self, crashvault_home):
+        """Fingerprints absorbed by a merge resolve to the merging issue."""
+        from crashvault.core import save_issues
+        from crashvault.storage import get_storage
+
+        _use_engine("sqlite")
+        save_issues([{"id": 1, "fingerprint": "aaa", "title": "A", "status": "open", "merged_fingerprints": ["bbb"]}])
+
+        assert get_storage().find_issue_by_fingerprint("bbb")["id"] == 1
+        assert get_storage().find_issue_by_fingerprint("ccc") is None
+
+    def test_event_filters(self, crashvault_home):
+        """Level, tag, issue and text filters are applied by the engine."""
+        from crashvault.core import save_events, iter_events, count_events_by_level
+
+        _use_engine("sqlite")
+        save_events([
+            _event("e1", 1, "error", ["db", "api"], "DB timeout"),
+            _event("e2", 1, "warning", ["db"]),
+            _event("e3", 2, "error", ["web"]),
+        ])
+
+        assert {e["event_id"] for e in iter_events(level="error")} == {"e1", "e3"}
+        assert {e["event_id"] for e in iter_events(tags=["db", "api"])} == {"e1"}
+        assert {e["event_id"] for e in iter_events(issue_id=1)} == {"e1", "e2"}
+        assert {e["event_id"] for e in iter_events(text="timeout")} == {"e1"}
+        assert count_events_by_level() == {"error": 2, "warning": 1}
+
+    def test_delete_operations(self, crashvault_home):
+        """purge/gc style deletes remove the right events."""
+        from crashvault.core import save_events, load_events, delete_issue_events, delete_orphaned_events
+
+        _use_engine("sqlite")
+        save_events([_event("e1", 1), _event("e2", 2), _event("e3", 3)])
+
+        assert delete_issue_events(1) == 1
+        assert delete_orphaned_events([2]) == 1
+        assert [e["event_id"] for e in load_events()] == ["e2"]
+
+    def test_cli_commands_use_engine(self, crashvault_home, cli_runner):
+        """add/show/search/stats work end-to-end on the SQLite engine."""
+        from crashvault.cli import cli
+
+        _use_engine("sqlite")
+        cli_runner.invoke(cli, ["add", "Database timeout", "--tag", "db"])
+        cli_runner.invoke(cli, ["add", "Database timeout", "--level", "warning"])
+
+        result = cli_runner.invoke(cli, ["show", "1"])
+        assert result.exit_code == 0
+        assert result.output.count("Database timeout") == 3
+
+        result = cli_runner.invoke(cli, ["search", "--tag", "db"])
+        assert "1 event(s) matched" in result.output
+
+        result = cli_runner.invoke(cli, ["stats"])
+        assert "error:" in result.output
+        assert "warning:" in result.output
+
+
+class TestStorageMigrate:
+    """Tests for `crashvault storage migrate`."""
+
+    def test_migrate_json_to_sqlite(self, crashvault_home, cli_runner, sample_events):
+        """Migrating copies issues and events and switches the engine."""
+        from crashvault.cli import cli
+        from crashvault.core import load_config, load_issues, load_events
+
+        result = cli_runner.invoke(cli, ["storage", "migrate", "sqlite"])
+
+        assert result.exit_code == 0
+        assert "Migrated 3 issue(s) and 3 event(s)" in result.output
+        assert load_config()["storage"]["engine"] == "sqlite"
+        assert len(load_issues()) == 3
+        assert {e["event_id"] for e in load_events()} == {"event-001", "event-002", "event-003"}
+
+    def test_migrate_keeps_existing_storage_settings(self, crashvault_home, cli_runner):
+        """Other keys of the storage config section are preserved."""
+        from crashvault.cli import cli
+        from crashvault.core import load_config, save_config
+
+        save_config({"version": 1, "storage": {"retention_days": 30}})
+        cli_runner.invoke(cli, ["storage", "migrate", "sqlite"])
+
+        assert load_config()["storage"] == {"retention_days": 30, "engine": "sqlite"}
+
+    def test_migrate_unknown_engine(self, crashvault_home, cli_runner):
+        """Unknown engine names are rejected."""
+        from crashvault.cli import cli
+
+        result = cli_runner.invoke(cli, ["storage", "migrate", "nope"])
+        assert result.exit_code != 0
+
+
+class TestIssueIndex:
+    """Tests for the JSON engine's fingerprint/offset index."""
+
+    def test_index_written_with_issues(self, crashvault_home):
+        """save_issues records fingerprints, offsets and the max id."""
+        from crashvault.core import save_issues
+        from crashvault.storage import get_storage
+
+        save_issues([
+            {"id": 1, "fingerprint": "aaa", "title": "A", "status": "open"},
+            {"id": 7, "fingerprint": "bbb", "title": "B", "status": "open"},
+        ])
+
+        index = get_storage().issue_index
+        assert index.is_fresh()
+        assert index.lookup_fingerprint("bbb") == 7
+        assert index.max_id == 7
+        assert index.read_issue(7)["title"] == "B"
+
+    def test_lookups_use_index(self, crashvault_home):
+        """Fingerprint and id lookups resolve through the index."""
+        from crashvault.core import save_issues, get_issue, find_issue_by_fingerprint, next_issue_id
+
+        save_issues([{"id": i, "fingerprint": f"fp{i}", "title": f"Issue {i}", "status": "open"} for i in range(1, 50)])
+
+        assert find_issue_by_fingerprint("fp42")["id"] == 42
+        assert find_issue_by_fingerprint("missing") is None
+        assert get_issue(13)["title"] == "Issue 13"
+        assert get_issue(999) is None
+        assert next_issue_id() == 50
+
+    def test_stale_index_is_rebuilt(self, crashvault_home, sample_issues):
+        """Editing issues.json by hand invalidates the index."""
+        from crashvault.core import ISSUES_FILE, find_issue_by_fingerprint, save_issues
+
+        save_issues(sample_issues)
+        edited = sample_issues + [{"id": 4, "fingerprint": "new12345", "title": "Hand edit", "status": "open"}]
+        ISSUES_FILE.write_text(json.dumps(edited, indent=2))
+
+        issue = find_issue_by_fingerprint("new12345")
+        assert issue is not None
+        assert issue["id"] == 4
+
+    def test_pretty_printed_file_falls_back(self, crashvault_home, sample_issues):
+        """Files not written one-issue-per-line still resolve by id."""
+        from crashvault.core import get_issue
+
+        assert get_issue(2)["title"] == "Another test error"
+
+    def test_new_issues_are_appended(self, crashvault_home, sample_issues):
+        """Creating an issue appends it and journals its index entry instead of rewriting both."""
+        from crashvault.core import ISSUES_FILE, save_issues, save_issue, load_issues, get_issue, \
+            find_issue_by_fingerprint, count_issues_by_status
+        from crashvault.storage import get_storage
+
+        save_issues(sample_issues)
+        index = get_storage().issue_index
+        before = ISSUES_FILE.read_bytes()
+        snapshot = index.path.read_bytes()
+
+        save_issue({"id": 4, "fingerprint": "new12345", "title": "Appended", "status": "open"})
+        get_storage().add_issues([{"id": 5, "fingerprint": "new67890", "title": "Batch", "status": "resolved"}])
+
+        assert ISSUES_FILE.read_bytes().startswith(before[:-3])
+        assert index.path.read_bytes() == snapshot
+        assert [i["id"] for i in load_issues()] == [1, 2, 3, 4, 5]
+        assert index.is_fresh()
+        assert find_issue_by_fingerprint("new12345")["title"] == "Appended"
+        assert get_issue(5)["title"] == "Batch"
+        assert count_issues_by_status()["resolved"] == 2
+
+        # A fresh process reads the journal back
+        from crashvault.storage.issue_index import IssueIndex
+        reloaded = IssueIndex(index.path, ISSUES_FILE)
+        assert reloaded.is_fresh()
+        assert reloaded.lookup_fingerprint("new67890") == 5
+        assert reloaded.max_id == 5
+
+        # Saving the whole list folds the journal back into the index
+        save_issues(load_issues())
+        assert not index.journal.exists()
+        assert index.lookup_fingerprint("new12345") == 4
+
+    def test_torn_append_is_recovered(self, crashvault_home, sample_issues):
+        """An append cut short by a crash loses only the issue being appended."""
+        from crashvault.core import ISSUES_FILE, save_issues, save_issue, load_issues
+
+        save_issues(sample_issues)
+        save_issue({"id": 4, "fingerprint": "new12345", "title": "Appended", "status": "open"})
+        data = ISSUES_FILE.read_bytes()
+        ISSUES_FILE.write_bytes(data[:-20])
+
+        assert [i["id"] for i in load_issues()] == [1, 2, 3]
+        save_issue({"id": 4, "fingerprint": "new12345", "title": "Again", "status": "open"})
+        assert json.loads(ISSUES_FILE.read_bytes())[-1]["title"] == "Again"
+
+    def test_add_reuses_issue_after_purge(self, crashvault_home, cli_runner):
+        """New issue ids never collide with existing ones."""
+        from crashvault.cli import cli
+        from crashvault.core import load_issues
+
+        cli_runner.invoke(cli, ["add", "first"])
+        cli_runner.invoke(cli, ["add", "second"])
+        cli_runner.invoke(cli, ["purge", "1", "--yes"])
+        cli_runner.invoke(cli, ["add", "third"])
+
+        ids = [i["id"] for i in load_issues()]
+        assert len(ids) == len(set(ids))
+
+    def test_index_rebuild_command(self, crashvault_home, cli_runner, sample_issues):
+        """`crashvault index rebuild` rebuilds and reports the index."""
+        from crashvault.cli import cli
+        from crashvault.storage import get_storage
+
+        result = cli_runner.invoke(cli, ["index", "rebuild"])
+
+        assert result.exit_code == 0
+        assert "Indexes rebuilt" in result.output
+        assert get_storage().issue_index.lookup_fingerprint("def67890") == 2
+
+
+class TestSegmentEngine:
+    """Tests for the append-only segmented event log."""
+
+    def _configure(self, **settings):
+        from crashvault.core import load_config, save_config
+
+        cfg = load_config()
+        cfg["storage"] = {"engine": "segments", **settings}
+        save_config(cfg)
+
+    def test_events_appended_to_one_segment(self, crashvault_home):
+        """A batch of events lands in a single segment with its offset index."""
+        from crashvault.core import EVENTS_DIR, save_events, load_events
+
+        self._configure()
+        save_events([_event(f"e{i}", 1) for i in range(5)])
+
+        segments = list(EVENTS_DIR.glob("**/*.ndjson"))
+        assert len(segments) == 1
+        assert len(segments[0].with_suffix(".idx").read_text().splitlines()) == 5
+        assert not list(EVENTS_DIR.glob("**/*.json"))
+        assert [e["event_id"] for e in load_events()] == [f"e{i}" for i in range(5)]
+
+    def test_segment_rotation(self, crashvault_home):
+        """A new segment is started once the active one is full."""
+        from crashvault.core import EVENTS_DIR, save_event
+
+        self._configure(segment_max_bytes=1)
+        for i in range(3):
+            save_event(_event(f"e{i}", 1))
+
+        assert len(list(EVENTS_DIR.glob("**/*.ndjson"))) == 3
+
+    def test_get_event_and_filters(self, crashvault_home):
+        """Point lookups use the offset index; filters still apply."""
+        from crashvault.core import save_events, get_event, iter_events
+
+        self._configure(fsync="never")
+        save_events([_event("e1", 1, "error", ["db"]), _event("e2", 2, "warning")])
+
+        assert get_event("e2")["issue_id"] == 2
+        assert get_event("missing") is None
+        assert [e["event_id"] for e in iter_events(tags=["db"])] == ["e1"]
+
+    def test_legacy_event_files_still_read(self, crashvault_home, sample_events):
+        """Per-event files written before switching engines remain visible."""
+        from crashvault.core import save_event, load_events, delete_issue_events
+
+        self._configure()
+        save_event(_event("e-new", 1))
+
+        assert len(load_events()) == 4
+        assert delete_issue_events(1) == 3
+        assert {e["event_id"] for e in load_events()} == {"event-003"}
+
+    def test_delete_rewrites_segment(self, crashvault_home):
+        """Deleting some events rewrites the segment and its index."""
+        from crashvault.core import save_events, get_event, delete_orphaned_events, load_events
+
+        self._configure()
+        save_events([_event("e1", 1), _event("e2", 2), _event("e3", 1)])
+
+        assert delete_orphaned_events([1]) == 1
+        assert [e["event_id"] for e in load_events()] == ["e1", "e3"]
+        assert get_event("e3")["event_id"] == "e3"
+
+    def test_append_after_torn_write(self, crashvault_home):
+        """A partial record left by a crash is cut off before the next append."""
+        from crashvault.core import EVENTS_DIR, save_events, load_events, get_event
+
+        self._configure()
+        save_events([_event("e1", 1)])
+        segment = next(EVENTS_DIR.glob("**/*.ndjson"))
+        with open(segment, "ab") as f:
+            f.write(b'{"event_id": "torn", "iss')
+        with open(segment.with_suffix(".idx"), "a") as f:
+            f.write('["torn", 1')
+
+        save_events([_event("e2", 1), _event("e3", 1)])
+
+        assert [e["event_id"] for e in load_events()] == ["e1", "e2", "e3"]
+        assert get_event("e2")["event_id"] == "e2"
+        assert get_event("e3")["event_id"] == "e3"
+
+    def test_lookup_tolerates_removed_segment(self, crashvault_home):
+        """A segment deleted after its index was listed is skipped, not an error."""
+        from crashvault.core import EVENTS_DIR, save_events
+        from crashvault.storage.segments import SegmentStorage
+
+        self._configure()
+        save_events([_event("e1", 1)])
+        index = next(EVENTS_DIR.glob("**/*.idx"))
+        index.with_suffix(".ndjson").unlink()
+
+        assert SegmentStorage._read_indexed([index], {"e1"}) == {}
+
+    def test_migrate_moves_event_files(self, crashvault_home, cli_runner, sample_events):
+        """Migrating from json to segments converts files instead of duplicating."""
+        from crashvault.cli import cli
+        from crashvault.core import EVENTS_DIR, load_events
+
+        result = cli_runner.invoke(cli, ["storage", "migrate", "segments"])
+        assert "Migrated 3 issue(s) and 3 event(s)" in result.output
+        assert not list(EVENTS_DIR.glob("**/*.json"))
+        assert len(load_events()) == 3
+
+        result = cli_runner.invoke(cli, ["storage", "migrate", "json"])
+        assert "Migrated 3 issue(s) and 3 event(s)" in result.output
+        assert not list(EVENTS_DIR.glob("**/*.ndjson"))
+        assert len(load_events()) == 3
@@ -193,6 +193,26 @@ class TestWebhookPayload:
 class TestWebhookProvider:
     """Tests for WebhookProvider base class."""
 
+    def test_provider_must_implement_deliver_or_send(self):
+        """A provider implementing neither deliver nor send should be rejected, not recurse."""
+        import pytest
+        from crashvault.webhooks.base import WebhookConfig, WebhookDeliveryError, WebhookPayload, WebhookProvider
+
+        class Incomplete(WebhookProvider):
+            pass
+
+        class SendOnly(WebhookProvider):
+            def send(self, payload):
+                return False
+
+        config = WebhookConfig(id="p", type="test", url="https://example.com")
+        with pytest.raises(TypeError):
+            Incomplete(config)
+
+        payload = WebhookPayload(event_id="test", issue_id=1, message="Test", level="error")
+        with pytest.raises(WebhookDeliveryError):
+            SendOnly(config).deliver(payload)
+
     def test_should_send_when_disabled(self):
         """should_send returns False when webhook is disabled."""
         from crashvault.webhooks.base import WebhookConfig, WebhookPayload, WebhookProvider
@@ -400,6 +420,46 @@ class TestWebhookDispatcher:
 
         assert result is False
 
+    def test_providers_are_cached_until_config_changes(self, crashvault_home):
+        """Provider instances are reused per webhook and rebuilt after a save."""
+        from crashvault.webhooks.dispatcher import WebhookDispatcher
+        from crashvault.webhooks import http  # noqa: F401 - registers the provider
+
+        dispatcher = WebhookDispatcher()
+        webhook = dispatcher.add_webhook(type="http", url="https://example.com", events=["ERROR"])
+
+        provider = dispatcher.provider_for(webhook)
+        assert dispatcher.provider_for(webhook) is provider
+        assert provider.levels == frozenset({"error"})
+
+        dispatcher.toggle_webhook(webhook.id, enabled=False)
+        assert dispatcher.provider_for(webhook) is not provider
+
+    def test_dispatch_reuses_executor(self, crashvault_home):
+        """Parallel deliveries share one long-lived executor."""
+        from crashvault.webhooks.base import WebhookPayload, WebhookProvider
+        from crashvault.webhooks.dispatcher import WebhookDispatcher, register_provider
+
+        delivered = []
+
+        class RecordingProvider(WebhookProvider):
+            def deliver(self, payload):
+                delivered.append(self.config.id)
+
+        register_provider("recording", RecordingProvider)
+        dispatcher = WebhookDispatcher()
+        ids = {dispatcher.add_webhook(type="recording", url=f"https://r{n}.test").id for n in range(3)}
+
+        payload = WebhookPayload(event_id="e1", issue_id=1, message="m", level="error")
+        assert dispatcher.dispatch(payload) == {i: True for i in ids}
+        executor = dispatcher._executor
+        dispatcher.dispatch(payload)
+
+        assert executor is not None and dispatcher._executor is executor
+        assert sorted(delivered) == sorted(list(ids) * 2)
+        dispatcher.close()
+        assert dispatcher._executor is None
+
 
 class TestDispatchWebhooks:
     """Tests for the dispatch_webhooks function."""
@@ -459,3 +519,534 @@ class TestDispatchWebhooks:
 
         assert len(MockProvider.calls) == 1
         assert MockProvider.calls[0].event_id == "test"
+
+
+class TestWebhookOutbox:
+    """Tests for the persistent webhook outbox."""
+
+    def _mock_webhook(self, results=None):
+        from crashvault.webhooks.base import WebhookProvider
+        from crashvault.webhooks.dispatcher import get_dispatcher, register_provider
+
+        class MockProvider(WebhookProvider):
+            calls = []
+            outcomes = list(results or [])
+
+            def send(self, payload):
+                MockProvider.calls.append(payload)
+                return MockProvider.outcomes.pop(0) if MockProvider.outcomes else True
+
+        register_provider("mock", MockProvider)
+        get_dispatcher().add_webhook(type="mock", url="https://mock.test")
+        return MockProvider
+
+    def test_enqueue_and_deliver(self, crashvault_home):
+        """Jobs are written to disk and delivered by deliver_one."""
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        provider = self._mock_webhook()
+        outbox = WebhookOutbox()
+
+        assert outbox.enqueue({"event_id": "e1", "issue_id": 1, "message": "boom", "level": "error"}) == 1
+        assert outbox.depth()["pending"] == 1
+        assert outbox.deliver_one() is True
+        assert outbox.deliver_one() is False
+
+        assert provider.calls[0].event_id == "e1"
+        assert outbox.depth() == {"pending": 0, "inflight": 0, "dead": 0}
+        assert outbox.metrics.snapshot()["delivered"] == 1
+
+    def test_failed_delivery_is_rescheduled_then_dead_lettered(self, crashvault_home):
+        """Failures back off and end up in dead letters after max attempts."""
+        from crashvault.webhooks.outbox import WebhookOutbox
+        from crashvault.webhooks.retry import RetryPolicy
+
+        self._mock_webhook(results=[False, False])
+        outbox = WebhookOutbox(policy=RetryPolicy(max_attempts=2, base_delay=0))
+        outbox.enqueue({"event_id": "e1", "issue_id": 1, "message": "boom", "level": "error"})
+
+        outbox.deliver_one()
+        assert outbox.depth()["pending"] == 1
+        outbox.deliver_one()
+        assert outbox.depth() == {"pending": 0, "inflight": 0, "dead": 1}
+        assert outbox.metrics.snapshot()["dead_lettered"] == 1
+
+    def test_inflight_jobs_recovered_after_restart(self, crashvault_home):
+        """Jobs claimed before a crash are delivered after restart."""
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        provider = self._mock_webhook()
+        WebhookOutbox().enqueue({"event_id": "e1", "issue_id": 1, "message": "boom", "level": "error"})
+        assert WebhookOutbox().claim() is not None  # worker dies holding the job
+
+        outbox = WebhookOutbox()
+        assert outbox.recover() == 1
+        assert outbox.deliver_one() is True
+        assert len(provider.calls) == 1
+
+    def test_outbox_command(self, crashvault_home, cli_runner):
+        """`webhook outbox` reports the queue depth."""
+        from crashvault.cli import cli
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        self._mock_webhook()
+        WebhookOutbox().enqueue({"event_id": "e1", "issue_id": 1, "message": "boom", "level": "error"})
+
+        result = cli_runner.invoke(cli, ["webhook", "outbox"])
+        assert result.exit_code == 0
+        assert "Pending:   1" in result.output
+
+
+class TestWebhookRetry:
+    """Tests for retries, dead letters and replay."""
+
+    def _provider(self, errors):
+        from crashvault.webhooks.base import WebhookProvider
+        from crashvault.webhooks.dispatcher import register_provider
+
+        class FlakyProvider(WebhookProvider):
+            calls = 0
+            pending = list(errors)
+
+            def deliver(self, payload):
+                FlakyProvider.calls += 1
+                if FlakyProvider.pending:
+                    raise FlakyProvider.pending.pop(0)
+
+        register_provider("flaky", FlakyProvider)
+        return FlakyProvider
+
+    def _dispatcher(self, **retry):
+        from crashvault.core import load_config, save_config
+        from crashvault.webhooks.dispatcher import WebhookDispatcher
+
+        cfg = load_config()
+        cfg["webhook_retry"] = {"base_delay": 0, "max_delay": 0, **retry}
+        save_config(cfg)
+        dispatcher = WebhookDispatcher()
+        dispatcher.add_webhook(type="flaky", url="https://flaky.test")
+        return dispatcher
+
+    def _payload(self):
+        from crashvault.webhooks.base import WebhookPayload
+
+        return WebhookPayload(event_id="e1", issue_id=1, message="boom", level="error")
+
+    def test_error_classification(self):
+        """5xx/429 are transient, other 4xx are permanent; Retry-After is parsed."""
+        from crashvault.webhooks.base import WebhookDeliveryError, parse_retry_after
+
+        assert WebhookDeliveryError.from_status(503).transient is True
+        assert WebhookDeliveryError.from_status(429, retry_after=7).retry_after == 7
+        assert WebhookDeliveryError.from_status(404).transient is False
+        assert parse_retry_after("12") == 12
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+        assert parse_retry_after("soon") is None
+
+    def test_backoff_is_capped_and_honours_retry_after(self):
+        """Delays grow exponentially up to max_delay; Retry-After wins if longer."""
+        from crashvault.webhooks.retry import RetryPolicy
+
+        policy = RetryPolicy(base_delay=1, max_delay=10, jitter=False)
+        assert [policy.delay(n) for n in (1, 2, 3, 4, 5)] == [1, 2, 4, 8, 10]
+        assert policy.delay(1, retry_after=5) == 5
+        assert policy.delay(1, retry_after=60) == 10
+
+        jittered = RetryPolicy(base_delay=1, max_delay=10)
+        assert all(0 <= jittered.delay(4) <= 8 for _ in range(50))
+
+    def test_transient_failures_are_retried(self, crashvault_home):
+        """Inline dispatch tries once and leaves retries to the outbox."""
+        from crashvault.webhooks.base import WebhookDeliveryError
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        provider = self._provider([WebhookDeliveryError.from_status(503), WebhookDeliveryError("timeout")])
+        dispatcher = self._dispatcher()
+
+        assert list(dispatcher.dispatch(self._payload()).values()) == [False]
+        assert provider.calls == 1
+        outbox = WebhookOutbox()
+        assert outbox.depth() == {"pending": 1, "inflight": 0, "dead": 0}
+
+        assert outbox.deliver_due() == 1
+        assert outbox.deliver_due() == 1
+        assert provider.calls == 3
+        assert outbox.depth() == {"pending": 0, "inflight": 0, "dead": 0}
+        assert outbox.metrics.delivered == 1
+
+    def test_inline_dispatch_does_not_sleep(self, crashvault_home):
+        """A long Retry-After is not waited out by the caller."""
+        import time
+        from crashvault.webhooks.base import WebhookDeliveryError
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        self._provider([WebhookDeliveryError.from_status(429, retry_after=60)])
+        dispatcher = self._dispatcher(max_delay=300)
+
+        start = time.monotonic()
+        dispatcher.dispatch(self._payload())
+
+        assert time.monotonic() - start < 5
+        outbox = WebhookOutbox()
+        assert outbox.claim() is None  # not due for a minute
+        job = json.loads(next(outbox.pending_dir.glob("*.json")).read_text())
+        assert job["attempts"] == 1 and job["last_status"] == 429
+
+    def test_deliver_command(self, crashvault_home, cli_runner):
+        """`webhook deliver` sends due deliveries without a server."""
+        from crashvault.cli import cli
+        from crashvault.webhooks.base import WebhookDeliveryError
+
+        provider = self._provider([WebhookDeliveryError("down")])
+        self._dispatcher().dispatch(self._payload())
+
+        result = cli_runner.invoke(cli, ["webhook", "deliver"])
+
+        assert result.exit_code == 0, result.output
+        assert "Handled 1 delivery(ies); 0 pending, 0 dead." in result.output
+        assert provider.calls == 2
+
+    def test_permanent_failure_is_dead_lettered(self, crashvault_home):
+        """A 4xx is not retried and lands in the dead-letter store."""
+        from crashvault.webhooks.base import WebhookDeliveryError
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        provider = self._provider([WebhookDeliveryError.from_status(400)])
+        dispatcher = self._dispatcher()
+
+        assert list(dispatcher.dispatch(self._payload()).values()) == [False]
+        assert provider.calls == 1
+        dead = list(WebhookOutbox().iter_dead())
+        assert len(dead) == 1
+        assert dead[0][1]["last_status"] == 400
+
+    def test_replay_command(self, crashvault_home, cli_runner):
+        """`webhook replay` redelivers dead letters and removes them on success."""
+        from crashvault.cli import cli
+        from crashvault.webhooks.base import WebhookDeliveryError
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        self._provider([WebhookDeliveryError("down")] * 2)
+        dispatcher = self._dispatcher(max_attempts=2)
+        dispatcher.dispatch(self._payload())
+        WebhookOutbox(policy=dispatcher.retry_policy).deliver_due()
+        assert WebhookOutbox().depth()["dead"] == 1
+
+        result = cli_runner.invoke(cli, ["webhook", "replay"])
+
+        assert result.exit_code == 0
+        assert "Replayed 1 delivery(ies), 0 still failing." in result.output
+        assert WebhookOutbox().depth()["dead"] == 0
+
+    def test_replay_requeue(self, crashvault_home, cli_runner):
+        """--requeue hands dead letters back to the delivery queue."""
+        from crashvault.cli import cli
+        from crashvault.webhooks.base import WebhookDeliveryError
+        from crashvault.webhooks.outbox import WebhookOutbox
+
+        self._provider([WebhookDeliveryError.from_status(410)])
+        self._dispatcher().dispatch(self._payload())
+
+        result = cli_runner.invoke(cli, ["webhook", "replay", "--requeue"])
+
+        assert "Requeued 1 delivery(ies)." in result.output
+        assert WebhookOutbox().depth() == {"pending": 1, "inflight": 0, "dead": 0}
+
+
+class TestAlertThrottle:
+    """Tests for per-webhook rate limiting and alert coalescing."""
+
+    def _webhook(self, **kwargs):
+        from crashvault.webhooks.base import WebhookConfig
+
+        return WebhookConfig(id="w1", type="http", url="https://example.com", **kwargs)
+
+    def _payload(self, event_id="e1", issue_id=1):
+        from crashvault.webhooks.base import WebhookPayload
+
+        return WebhookPayload(event_id=event_id, issue_id=issue_id, message="boom", level="error")
+
+    def test_token_bucket(self):
+        """The bucket allows a burst, then refills at the configured rate."""
+        from crashvault.webhooks.throttle import TokenBucket
+
+        bucket = TokenBucket(rate=1.0, capacity=2)
+        bucket.updated = 0.0
+        assert bucket.take(0.0) and bucket.take(0.0)
+        assert not bucket.take(0.5)
+        assert bucket.take(1.0)
+
+    def test_unthrottled_webhook_passes_through(self):
+        """Webhooks without limits always get the payload unchanged."""
+        from crashvault.webhooks.throttle import AlertThrottle
+
+        throttle = AlertThrottle()
+        payload = self._payload()
+        assert all(throttle.admit(self._webhook(), payload) is payload for _ in range(20))
+
+    def test_burst_is_coalesced_into_one_summary(self):
+        """First event goes out; the rest of the window becomes one counted notification."""
+        from crashvault.webhooks.throttle import AlertThrottle
+
+        throttle = AlertThrottle()
+        webhook = self._webhook(coalesce_window=60)
+
+        assert throttle.admit(webhook, self._payload("e0"), now=0.0) is not None
+        for n in range(1, 10):
+            assert throttle.admit(webhook, self._payload(f"e{n}"), now=float(n)) is None
+        assert throttle.flush([webhook], now=30.0) == []
+        assert throttle.pending() == 9
+
+        due = throttle.flush([webhook], now=61.0)
+        assert len(due) == 1
+        assert due[0][1].event_id == "e9"
+        assert due[0][1].occurrences == 9
+        assert due[0][1].to_dict()["occurrences"] == 9
+        assert throttle.pending() == 0
+        assert throttle.stats["coalesced"] == 9
+        assert throttle.stats["summaries"] == 1
+
+    def test_other_issues_are_not_coalesced(self):
+        """Coalescing is per issue."""
+        from crashvault.webhooks.throttle import AlertThrottle
+
+        throttle = AlertThrottle()
+        webhook = self._webhook(coalesce_window=60)
+        assert throttle.admit(webhook, self._payload("e1", issue_id=1), now=0.0) is not None
+        assert throttle.admit(webhook, self._payload("e2", issue_id=2), now=0.0) is not None
+
+    def test_rate_limited_events_are_carried_over(self):
+        """Events over the rate limit are counted into the next notification."""
+        from crashvault.webhooks.throttle import AlertThrottle
+
+        throttle = AlertThrottle()
+        webhook = self._webhook(rate_limit=60, burst=1)
+
+        assert throttle.admit(webhook, self._payload("e1"), now=0.0) is not None
+        assert throttle.admit(webhook, self._payload("e2"), now=0.1) is None
+        assert throttle.admit(webhook, self._payload("e3"), now=0.2) is None
+        assert throttle.stats["rate_limited"] == 2
+
+        sent = throttle.admit(webhook, self._payload("e4"), now=1.5)
+        assert sent.event_id == "e4"
+        assert sent.occurrences == 3
+
+    def test_dispatcher_applies_throttle(self, crashvault_home):
+        """dispatch sends once per window and then delivers the summary."""
+        from crashvault.webhooks.base import WebhookProvider
+        from crashvault.webhooks.dispatcher import WebhookDispatcher, register_provider
+
+        sent = []
+
+        class RecordingProvider(WebhookProvider):
+            def deliver(self, payload):
+                sent.append(payload)
+
+        register_provider("recording", RecordingProvider)
+        dispatcher = WebhookDispatcher()
+        webhook = dispatcher.add_webhook(type="recording", url="https://rec.test", coalesce_window=60)
+
+        for n in range(5):
+            dispatcher.dispatch(self._payload(f"e{n}"))
+        assert [p.event_id for p in sent] == ["e0"]
+
+        # Close the window and let the next dispatch piggyback the summary
+        dispatcher.throttle._issues[(webhook.id, 1)].window_until = 0
+        dispatcher.dispatch(self._payload("x", issue_id=2))
+        summary = [p for p in sent if p.issue_id == 1][-1]
+        assert summary.event_id == "e4"
+        assert summary.occurrences == 4
+
+    def test_add_command_options(self, crashvault_home, cli_runner):
+        """webhook add stores the rate limit and coalescing window."""
+        from crashvault.cli import cli
+        from crashvault.core import load_config
+
+        result = cli_runner.invoke(cli, [
+            "webhook", "add", "http", "--url=https://example.com",
+            "--rate-limit=10", "--coalesce-window=30",
+        ])
+
+        assert result.exit_code == 0
+        assert "Rate limit: 10/min" in result.output
+        stored = load_config()["webhooks"][0]
+        assert stored["rate_limit"] == 10
+        assert stored["coalesce_window"] == 30
+
+
+class TestConnectionPool:
+    """Tests for the shared keep-alive connection pool."""
+
+    def _serve(self, status=200, headers=None):
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            peers = set()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                Handler.peers.add(self.client_address)
+                body = b'{"message": "nope"}'
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, Handler, f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+    def test_connections_are_reused(self, monkeypatch):
+        """Sequential requests to one host share a single connection."""
+        from crashvault.webhooks.pool import ConnectionPool
+
+        monkeypatch.delenv("http_proxy", raising=False)
+        server, handler, url = self._serve()
+        pool = ConnectionPool()
+        try:
+            for _ in range(5):
+                status, _, _ = pool.request("POST", url, b"{}", {"Content-Type": "application/json"})
+                assert status == 200
+            stats = pool.stats()
+            assert stats["opened"] == 1
+            assert stats["reused"] == 4
+            assert len(handler.peers) == 1
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_idle_connections_expire(self, monkeypatch):
+        """Connections idle longer than idle_timeout are not reused."""
+        from crashvault.webhooks.pool import ConnectionPool
+
+        monkeypatch.delenv("http_proxy", raising=False)
+        server, _, url = self._serve()
+        pool = ConnectionPool(idle_timeout=0)
+        try:
+            pool.request("POST", url, b"{}")
+            pool.request("POST", url, b"{}")
+            assert pool.stats()["opened"] == 2
+            assert pool.stats()["expired"] == 1
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_stale_connection_is_retried(self, monkeypatch):
+        """A pooled connection closed by the server is replaced transparently."""
+        from crashvault.webhooks.pool import ConnectionPool
+
+        monkeypatch.delenv("http_proxy", raising=False)
+        server, _, url = self._serve()
+        pool = ConnectionPool()
+        try:
+            pool.request("POST", url, b"{}")
+            for connections in pool._idle.values():
+                for conn, _ in connections:
+                    conn.sock.shutdown(2)
+            status, _, _ = pool.request("POST", url, b"{}")
+            assert status == 200
+            assert pool.stats()["opened"] == 2
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+    def _serve_dropping_second_request(self):
+        """Server that processes the second request on a connection but never answers it."""
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            received = []
+
+            def _handle(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                Handler.received.append(self.command)
+                if len(Handler.received) == 2:
+                    self.close_connection = True
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_GET = do_POST = _handle
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server, Handler, f"http://127.0.0.1:{server.server_address[1]}/hook"
+
+    def test_post_is_not_resent_after_it_was_sent(self, monkeypatch):
+        """A POST the server may have processed is not silently delivered twice."""
+        import http.client
+        import pytest
+        from crashvault.webhooks.pool import ConnectionPool
+
+        monkeypatch.delenv("http_proxy", raising=False)
+        server, handler, url = self._serve_dropping_second_request()
+        pool = ConnectionPool()
+        try:
+            pool.request("POST", url, b"{}")
+            with pytest.raises(http.client.RemoteDisconnected):
+                pool.request("POST", url, b"{}")
+            assert handler.received == ["POST", "POST"]
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_idempotent_request_is_resent(self, monkeypatch):
+        """A GET whose reused connection dies before the response is sent again."""
+        from crashvault.webhooks.pool import ConnectionPool
+
+        monkeypatch.delenv("http_proxy", raising=False)
+        server, handler, url = self._serve_dropping_second_request()
+        pool = ConnectionPool()
+        try:
+            pool.request("GET", url)
+            status, _, _ = pool.request("GET", url)
+            assert status == 200
+            assert handler.received == ["GET", "GET", "GET"]
+            assert pool.stats()["stale"] == 1
+        finally:
+            pool.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_post_json_classifies_pooled_errors(self, crashvault_home, monkeypatch):
+        """post_json maps statuses from the pool to delivery errors."""
+        import pytest
+        from crashvault.webhooks.base import WebhookConfig, WebhookDeliveryError
+        from crashvault.webhooks.http import HTTPWebhook
+
+        monkeypatch.delenv("http_proxy", raising=False)
+        server, _, url = self._serve(status=429, headers={"Retry-After": "3"})
+        provider = HTTPWebhook(WebhookConfig(id="w1", type="http", url=url))
+        try:
+            with pytest.raises(WebhookDeliveryError) as excinfo:
+                provider.post_json(url, {"a": 1})
+            assert excinfo.value.status == 429
+            assert excinfo.value.retry_after == 3
+            assert excinfo.value.transient is True
+            assert "nope" in str(excinfo.value)
+
+            with pytest.raises(WebhookDeliveryError) as excinfo:
+                provider.post_json("ftp://example.com/x", {})
+            assert excinfo.value.transient is False
+        finally:
+            server.shutdown()
+            server.server_close()